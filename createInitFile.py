@@ -80,27 +80,53 @@ __build_platform__ = '{platform}'
 __all__ = ["gui", "misc", "visual", "core",
            "event", "data", "sound", "microphone"]
 
+
+def _getGitSha():
+    # the (short) sha of the current commit, read from the .git folder rather
+    # than by running `git rev-parse`, which would need a subprocess every
+    # time psychopy is imported
+    gitDir = os.path.join(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))), '.git')
+    with open(os.path.join(gitDir, 'HEAD')) as f:
+        head = f.read().strip()
+    if not head.startswith('ref: '):  # a detached HEAD is the sha itself
+        return head[:7]
+    ref = head[len('ref: '):]
+    refFile = os.path.join(gitDir, *ref.split('/'))
+    if os.path.isfile(refFile):
+        with open(refFile) as f:
+            return f.read().strip()[:7]
+    with open(os.path.join(gitDir, 'packed-refs')) as f:
+        for line in f:
+            if line.strip().endswith(' ' + ref):
+                return line.split()[0][:7]
+
+
 # for developers the following allows access to the current git sha from
 # their repository
 if __git_sha__ == 'n/a':
-    import subprocess
     # see if we're in a git repo and fetch from there
     try:
-        thisFileLoc = os.path.split(__file__)[0]
-        output = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
-                                         cwd=thisFileLoc, stderr=subprocess.PIPE)
+        __git_sha__ = _getGitSha() or __git_sha__
     except Exception:
-        output = False
-    if output:
-        __git_sha__ = output.strip()  # remove final linefeed
+        pass
 
 # update preferences and the user paths
 if 'installing' not in locals():
     from psychopy.preferences import prefs
     for pathName in prefs.general['paths']:
         sys.path.append(pathName)
-    
-    from psychopy.tools.versionchooser import useVersion, ensureMinimal
+
+    # versionchooser imports logging, web etc., so only import it if used
+    def useVersion(requestedVersion):
+        # see psychopy.tools.versionchooser.useVersion
+        from psychopy.tools.versionchooser import useVersion
+        return useVersion(requestedVersion)
+
+    def ensureMinimal(requiredVersion):
+        # see psychopy.tools.versionchooser.ensureMinimal
+        from psychopy.tools.versionchooser import ensureMinimal
+        return ensureMinimal(requiredVersion)
 
 """
 
@@ -18,7 +18,11 @@ from __future__ import absolute_import, division, print_function
 from builtins import object
 import time
 import sys
-from pkg_resources import parse_version
+import re
+import heapq
+import threading
+from bisect import bisect_left
+from collections import deque
 
 
 try:
@@ -27,7 +31,6 @@ except ImportError:
     pass  # pyglet is not installed
 
 from psychopy.constants import STARTED, NOT_STARTED, FINISHED, PY3
-import psychopy.logging  # Absolute import to work around circularity
 
 
 # set the default timing mechanism
@@ -108,6 +111,10 @@ class MonotonicClock(object):
 
 monotonicClock = MonotonicClock()
 
+# Absolute import to work around circularity; only after monotonicClock is
+# defined, as logging uses it (e.g. when clock is imported before logging)
+import psychopy.logging
+
 
 class Clock(MonotonicClock):
     """A convenient class to keep track of time in your experiments.
@@ -176,6 +183,191 @@ class CountdownTimer(Clock):
             Clock.reset(self, t)
 
 
+class Scheduler(object):
+    """Waits until deadlines on the psychopy time base (see `getTime()`) and
+    calls functions at given times.
+
+    Most of a wait is spent in `time.sleep()`, which can overshoot by an
+    amount that depends on the OS and the machine. The scheduler measures
+    this from every sleep, and stops sleeping that much before a deadline,
+    polling the clock for the rest. Until its first sleep it stops
+    `maxSleepMargin` secs before, unless :meth:`calibrate` has been called.
+    In the final `hogCPUperiod` of a wait, pyglet events are pumped at most
+    once every `pumpInterval` secs, sleeping in between when there's time,
+    rather than on every poll of the clock.
+
+    Calls can be scheduled (and cancelled) from any thread. They are made by
+    the thread that is waiting, or calling :meth:`runDue`, when they are
+    due; a call scheduled during a sleep is made when the sleep ends.
+
+    How late each wait finished is counted in a histogram (see
+    :meth:`overshootHistogram`) to help with tuning for a machine.
+
+    Typical usage (`scheduler` is the instance used by :func:`wait`)::
+
+        from psychopy.clock import getTime, scheduler
+        t0 = getTime()
+        scheduler.callAt(t0 + 0.2, port.setData, 0)  # 200ms after t0
+        scheduler.waitUntil(t0 + 0.5)  # calls port.setData(0) meanwhile
+    """
+    # upper edges (secs) of the bins of the overshoot histogram
+    overshootBins = (0.00001, 0.00002, 0.00005, 0.0001, 0.0002, 0.0005,
+                     0.001, 0.002, 0.005, 0.01, float('inf'))
+
+    def __init__(self, pumpInterval=0.001, maxSleepMargin=0.02):
+        """
+        :param pumpInterval: the minimum time (secs) between pumping pyglet
+            events during the final `hogCPUperiod` of a wait
+        :param maxSleepMargin: the limit to the time (secs) before a
+            deadline that the scheduler stops sleeping
+        """
+        super(Scheduler, self).__init__()
+        self.pumpInterval = pumpInterval
+        self.maxSleepMargin = maxSleepMargin
+        self.sleepMargin = maxSleepMargin  # until measured
+        self._sleepOvershoots = deque(maxlen=50)
+        self._lock = threading.Lock()  # for _calls
+        self._calls = []  # a heap of [t, callN, function, args, kwargs]
+        self._nCalls = 0
+        self.resetOvershoots()
+
+    def calibrate(self, nSleeps=10, sleepTime=0.001):
+        """Measures how much `time.sleep()` overshoots, which sets how long
+        before a deadline the scheduler stops sleeping (`sleepMargin`).
+        Takes about `nSleeps * sleepTime` secs, so call it before the
+        timing matters, e.g. while loading stimuli.
+        """
+        self._sleepOvershoots.clear()
+        for n in range(nSleeps):
+            self._sleep(sleepTime)
+
+    def _sleep(self, secs):
+        t0 = getTime()
+        time.sleep(secs)
+        self._sleepOvershoots.append(getTime() - t0 - secs)
+        # a little more than the largest of the recent overshoots
+        margin = max(self._sleepOvershoots) * 1.5 + 0.0001
+        self.sleepMargin = min(max(margin, 0), self.maxSleepMargin)
+
+    def waitUntil(self, t, hogCPUperiod=0.2):
+        """Waits until time `t` on the psychopy time base, e.g.
+        `getTime() + 0.5`, calling any functions that are due meanwhile
+        (see :meth:`callAt`).
+
+        For the final `hogCPUperiod` secs pyglet events are pumped, e.g. to
+        get key presses during the wait (see :func:`wait`).
+
+        :return: the overshoot, i.e. how long after `t` the wait ended
+        """
+        hogStart = t - hogCPUperiod
+        self.runDue()
+        nextCall = self._nextCallTime()
+        while nextCall is not None and nextCall < t:
+            self._waitUntil(nextCall, hogStart)
+            self.runDue()
+            nextCall = self._nextCallTime()
+        self._waitUntil(t, hogStart)
+        overshoot = getTime() - t
+        self._countOvershoot(overshoot)
+        self.runDue()
+        return overshoot
+
+    def _waitUntil(self, t, hogStart):
+        from . import core
+        pumpEvents = core.havePyglet and core.checkPygletDuringWait
+        lastPump = None
+        while True:
+            now = getTime()
+            remaining = t - now
+            if remaining <= 0:
+                return
+            sleepTime = remaining - self.sleepMargin
+            if now < hogStart:
+                # relaxed period, just sleeping
+                sleepTime = min(sleepTime, hogStart - now)
+            elif pumpEvents:
+                if lastPump is None or now - lastPump >= self.pumpInterval:
+                    _pumpEvents(core)
+                    lastPump = now
+                sleepTime = min(sleepTime, lastPump + self.pumpInterval - now)
+            if sleepTime > 0:
+                self._sleep(sleepTime)
+
+    def callAt(self, t, function, *args, **kwargs):
+        """Calls `function(*args, **kwargs)` at time `t` on the psychopy
+        time base. It's called during a wait (see :meth:`waitUntil`) or by
+        :meth:`runDue`, so not at all if neither happens after `t`.
+
+        :return: the scheduled call, which can be given to :meth:`cancel`
+        """
+        with self._lock:
+            call = [t, self._nCalls, function, args, kwargs]
+            self._nCalls += 1
+            heapq.heappush(self._calls, call)
+        return call
+
+    def cancel(self, call):
+        """Cancels a call from :meth:`callAt` if it hasn't been made yet
+        """
+        with self._lock:
+            if call in self._calls:
+                self._calls.remove(call)
+                heapq.heapify(self._calls)
+
+    def _nextCallTime(self):
+        """The time of the next call from :meth:`callAt` (None if none)"""
+        with self._lock:
+            return self._calls[0][0] if self._calls else None
+
+    def runDue(self):
+        """Makes the calls from :meth:`callAt` that are due, in the order
+        of their times, e.g. from a loop that doesn't wait
+        """
+        while True:
+            # the lock isn't held during a call, which can schedule others
+            with self._lock:
+                if not self._calls or self._calls[0][0] > getTime():
+                    return
+                t, n, function, args, kwargs = heapq.heappop(self._calls)
+            function(*args, **kwargs)
+
+    def _countOvershoot(self, overshoot):
+        self.nWaits += 1
+        self.maxOvershoot = max(self.maxOvershoot, overshoot)
+        self.overshootCounts[bisect_left(self.overshootBins, overshoot)] += 1
+
+    def overshootHistogram(self):
+        """Returns the histogram of how long after their deadlines the waits
+        ended, as a list of (fromSecs, toSecs, count).
+        """
+        edges = (0,) + self.overshootBins
+        return list(zip(edges[:-1], edges[1:], self.overshootCounts))
+
+    def resetOvershoots(self):
+        """Clears the overshoot histogram"""
+        self.nWaits = 0
+        self.maxOvershoot = 0
+        self.overshootCounts = [0] * len(self.overshootBins)
+
+
+scheduler = Scheduler()
+
+
+def waitUntil(t, hogCPUperiod=0.2):
+    """Waits until time `t` on the psychopy time base (e.g.
+    `getTime() + 0.5`), more precisely than a wait() for the time
+    remaining. See :meth:`Scheduler.waitUntil`.
+    """
+    return scheduler.waitUntil(t, hogCPUperiod)
+
+
+def callAt(t, function, *args, **kwargs):
+    """Calls `function(*args, **kwargs)` at time `t` on the psychopy time
+    base during a later wait. See :meth:`Scheduler.callAt`.
+    """
+    return scheduler.callAt(t, function, *args, **kwargs)
+
+
 class StaticPeriod(object):
     """A class to help insert a timing period that includes code to be run.
 
@@ -227,12 +419,14 @@ class StaticPeriod(object):
 
     def complete(self):
         """Completes the period, using up whatever time is remaining with a
-        call to wait()
+        call to waitUntil()
 
         :return: 1 for success, 0 for fail (the period overran)
         """
         self.status = FINISHED
-        timeRemaining = self.countdown.getTime()
+        # the end of the period on the psychopy time base
+        endTime = self.countdown.getLastResetTime()
+        timeRemaining = endTime - getTime()
         if self.win:
             self.win.recordFrameIntervals = self._winWasRecordingIntervals
         if timeRemaining < 0:
@@ -242,7 +436,7 @@ class StaticPeriod(object):
             psychopy.logging.warn(msg % vals)
             return 0
         else:
-            wait(timeRemaining)
+            waitUntil(endTime)
             return 1
 
 
@@ -269,36 +463,39 @@ def wait(secs, hogCPUperiod=0.2):
         core.wait(sec)
 
     This will preserve terminal-window focus during command line usage.
+
+    The hogging period only sleeps for short times between pumping the
+    events, and doesn't pump them more often than every
+    `scheduler.pumpInterval` secs (see :class:`Scheduler`).
+    """
+    scheduler.waitUntil(getTime() + secs, hogCPUperiod)
+
+
+def _versionTuple(v):
+    """(1, 2, 3) from a version string such as '1.2.3rc1', for comparisons
     """
-    from . import core
-
-    # initial relaxed period, using sleep (better for system resources etc)
-    if secs > hogCPUperiod:
-        time.sleep(secs - hogCPUperiod)
-        secs = hogCPUperiod  # only this much is now left
-
-    # hog the cpu, checking time
-    t0 = getTime()
-    while (getTime() - t0) < secs:
-        if not (core.havePyglet and core.checkPygletDuringWait):
-            continue
-        # let's see if pyglet collected any event in meantime
-        try:
-            # this takes focus away from command line terminal window:
-            if parse_version(pyglet.version) < parse_version('1.2'):
-                # events for sounds/video should run independently of wait()
-                pyglet.media.dispatch_events()
-        except AttributeError:
-            # see http://www.pyglet.org/doc/api/pyglet.media-module.html#dispatch_events
-            # Deprecated: Since pyglet 1.1, Player objects schedule themselves
-            # on the default clock automatically. Applications should not call
-            # pyglet.media.dispatch_events().
-            pass
-        for winWeakRef in core.openWindows:
-            win = winWeakRef()
-            if (win.winType == "pyglet" and
-                    hasattr(win.winHandle, "dispatch_events")):
-                win.winHandle.dispatch_events()  # pump events
+    return tuple(int(re.match(r'\d*', part).group() or 0)
+                 for part in v.split('.'))
+
+
+def _pumpEvents(core):
+    """Dispatches pyglet events during a wait"""
+    try:
+        # this takes focus away from command line terminal window:
+        if _versionTuple(pyglet.version) < (1, 2):
+            # events for sounds/video should run independently of wait()
+            pyglet.media.dispatch_events()
+    except AttributeError:
+        # see http://www.pyglet.org/doc/api/pyglet.media-module.html#dispatch_events
+        # Deprecated: Since pyglet 1.1, Player objects schedule themselves
+        # on the default clock automatically. Applications should not call
+        # pyglet.media.dispatch_events().
+        pass
+    for winWeakRef in core.openWindows:
+        win = winWeakRef()
+        if (win.winType == "pyglet" and
+                hasattr(win.winHandle, "dispatch_events")):
+            win.winHandle.dispatch_events()  # pump events
 
 
 def getAbsTime():
@@ -13,6 +13,7 @@ from .staircase import (StairHandler, QuestHandler, PsiHandler,
 
 from .utils import (checkValidFilePath, isValidVariableName, importTrialTypes,
                     sliceFromString, indicesFromString, importConditions,
+                    ConditionsTable,
                     createFactorialTrialList, bootStraps, functionFromStaircase,
                     getDateStr)
 
@@ -20,10 +20,36 @@ from psychopy.constants import PY3
 from psychopy.tools.arraytools import shuffleArray
 from psychopy.tools.filetools import (openOutputFile, genDelimiter,
                                       genFilenameFromDelimiter)
-from .utils import importConditions
+from .utils import importConditions, ConditionsTable
 from .base import _BaseTrialHandler, DataHandler
 
 
+# trials that TrialHandler2.data converts on each access before adding them
+# to its cached DataFrame
+_dataFrameChunk = 100
+
+
+def _concatFrames(frames, rows):
+    """Returns the DataFrame of `rows` (a list of dicts) from `frames`, the
+    DataFrames of consecutive slices of them (None for an empty slice).
+
+    The result is the same as `pd.DataFrame(rows)`, with a single concat.
+    pandas infers the dtypes of each frame from its own rows, so the columns
+    that the frames disagree on (different dtypes, or objects that some of
+    the frames don't have) are converted again from all the rows.
+    """
+    frames = [frame for frame in frames if frame is not None and len(frame)]
+    if len(frames) < 2:
+        return frames[0] if frames else pd.DataFrame(rows)
+    combined = pd.concat(frames, ignore_index=True, sort=False)
+    for name in combined.columns:
+        dtypes = set(frame[name].dtype for frame in frames if name in frame)
+        if len(dtypes) > 1 or (combined[name].dtype == object and
+                               any(name not in frame for frame in frames)):
+            combined[name] = pd.DataFrame(rows, columns=[name])[name]
+    return combined
+
+
 class TrialType(dict):
     """This is just like a dict, except that you can access keys with obj.key
     """
@@ -846,20 +872,27 @@ class TrialHandler2(_BaseTrialHandler):
             # import conditions from that file
             self.trialList, self.columns = importConditions(
                 trialList,
-                returnFieldNames=True)
+                returnFieldNames=True,
+                asColumns=True)
+        elif isinstance(trialList, ConditionsTable):
+            self.trialList = trialList
+            self.columns = list(trialList.fieldNames)
         else:
             self.trialList = trialList
             self.columns = list(trialList[0].keys())
         # convert any entry in the TrialList into a TrialType object (with
         # obj.key or obj[key] access)
-        for n, entry in enumerate(self.trialList):
-            if type(entry) == dict:
-                self.trialList[n] = TrialType(entry)
+        if isinstance(self.trialList, ConditionsTable):
+            # rows are created on demand, so just set their type
+            if self.trialList.rowType == dict:
+                self.trialList.rowType = TrialType
+        else:
+            for n, entry in enumerate(self.trialList):
+                if type(entry) == dict:
+                    self.trialList[n] = TrialType(entry)
         self.nReps = int(nReps)
         self.nTotal = self.nReps * len(self.trialList)
         self.nRemaining = self.nTotal  # subtract 1 each trial
-        self.remainingIndices = []
-        self.prevIndices = []
         self.method = method
         self.thisRepN = 0  # records which repetition or pass we are on
         self.thisTrialN = -1  # records trial number within this repetition
@@ -870,6 +903,11 @@ class TrialHandler2(_BaseTrialHandler):
         self.extraInfo = extraInfo
         self.seed = seed
         self._rng = np.random.RandomState(seed=seed)
+        # the condition index of each trial (made a repeat at a time, as
+        # needed), with thisN as the cursor
+        self._sequence = []
+        # how many times each condition has been run (for fullRandom)
+        self._condCounts = [0] * len(self.trialList)
 
         # store a list of dicts, convert to pandas DataFrame on access
         self._data = []
@@ -942,9 +980,74 @@ class TrialHandler2(_BaseTrialHandler):
         Read only attribute - you can't directly modify TrialHandler.data
 
         Note that data are stored internally as a list of dictionaries,
-        one per trial. These are converted to a DataFrame on access.
+        one per trial. These are converted to a DataFrame on access. The
+        DataFrame of the trials before the current one is cached (and
+        updated every 100 trials), so each access only converts the recent
+        trials and adds them to it.
+        """
+        # the current trial can still change, so isn't cached
+        nDone = max(len(self._data) - 1, 0)
+        done = self.__dict__.get('_dataFrame')
+        if done is not None and len(done) > nDone:
+            done = None
+        nCached = 0 if done is None else len(done)
+        if nDone - nCached >= _dataFrameChunk:
+            done = _concatFrames(
+                [done, pd.DataFrame(self._data[nCached:nDone])],
+                self._data[:nDone])
+            self._dataFrame = done
+            nCached = nDone
+        return _concatFrames([done, pd.DataFrame(self._data[nCached:])],
+                             self._data)
+
+    def __getstate__(self):
+        # the cached DataFrame is made again from the data when needed
+        state = self.__dict__.copy()
+        state.pop('_dataFrame', None)
+        return state
+
+    @property
+    def prevIndices(self):
+        """The condition indices of the trials before the current one
+        """
+        return self._sequence[:max(self.thisN, 0)]
+
+    @property
+    def remainingIndices(self):
+        """The condition indices of the trials still to come in this
+        repetition (or in the whole run, for 'fullRandom')
+        """
+        if self.thisN < 0 or self.finished:
+            return []
+        if self.method == 'fullRandom':
+            end = self.nTotal
+        else:
+            nConds = len(self.trialList)
+            end = (self.thisN // nConds + 1) * nConds
+        self._extendSequence(end)
+        return self._sequence[self.thisN + 1:end]
+
+    def _extendSequence(self, nTrials):
+        """Makes sure that the sequence of condition indices covers the
+        first nTrials trials (or all of them).
+
+        The conditions are shuffled a repetition at a time, in order, so
+        the trials are the same whenever the sequence is extended.
         """
-        return pd.DataFrame(self._data)
+        nConds = len(self.trialList)
+        if self.method == 'fullRandom':
+            if not self._sequence and self.nTotal:
+                # all the trials are shuffled together at the start
+                sequence = np.tile(np.arange(nConds), self.nReps)
+                self._rng.shuffle(sequence)
+                self._sequence = sequence.tolist()
+        elif self.method in ('sequential', 'random'):
+            nTrials = min(nTrials, self.nTotal)
+            while len(self._sequence) < nTrials:
+                sequence = np.arange(nConds)
+                if self.method == 'random':
+                    self._rng.shuffle(sequence)  # shuffle in-place
+                self._sequence.extend(sequence.tolist())
 
     def __next__(self):
         """Advances to next trial and returns it.
@@ -970,44 +1073,27 @@ class TrialHandler2(_BaseTrialHandler):
         self.thisTrialN += 1  # number of trial this pass
         self.thisN += 1  # number of trial in total
         self.nRemaining -= 1
-        if self.thisIndex is not None:
-            self.prevIndices.append(self.thisIndex)
-
-        # thisRepN has exceeded nReps
-        if self.remainingIndices == []:
-            # we've just started, or just starting a new repeat
-            sequence = list(range(len(self.trialList)))
-            if (self.method == 'fullRandom' and
-                        self.thisN < (self.nReps * len(self.trialList))):
-                # we've only just started on a fullRandom sequence
-                sequence *= self.nReps
-                self._rng.shuffle(sequence)
-                self.remainingIndices = sequence
-            elif (self.method in ('sequential', 'random') and
-                          self.thisRepN < self.nReps):
-                # start a new repetition
-                self.thisTrialN = 0
-                self.thisRepN += 1
-                if self.method == 'random':
-                    self._rng.shuffle(sequence)  # shuffle in-place
-                self.remainingIndices = sequence
-            else:
-                # we've finished
-                self.finished = True
-                self._terminate()  # raises Stop (code won't go beyond here)
+
+        self._extendSequence(self.thisN + 1)
+        if self.thisN >= len(self._sequence):
+            # we've finished
+            self.finished = True
+            self._terminate()  # raises Stop (code won't go beyond here)
+        if (self.method in ('sequential', 'random') and
+                self.thisN % len(self.trialList) == 0):
+            # start a new repetition
+            self.thisTrialN = 0
+            self.thisRepN += 1
 
         # fetch the trial info
-        if len(self.trialList) == 0:
-            self.thisIndex = 0
-            self.thisTrial = {}
-        else:
-            self.thisIndex = self.remainingIndices.pop(0)
-            # if None then use empty dict
-            thisTrial = self.trialList[self.thisIndex] or {}
-            self.thisTrial = copy.copy(thisTrial)
-        # for fullRandom check how many times this has come up before
+        self.thisIndex = self._sequence[self.thisN]
+        # if None then use empty dict
+        thisTrial = self.trialList[self.thisIndex] or {}
+        self.thisTrial = copy.copy(thisTrial)
+        # for fullRandom count how many times this has come up before
         if self.method == 'fullRandom':
-            self.thisRepN = self.prevIndices.count(self.thisIndex)
+            self.thisRepN = self._condCounts[self.thisIndex]
+            self._condCounts[self.thisIndex] += 1
 
         # update data structure with new info
         self._data.append(self.thisTrial)  # update the data list of dicts
@@ -1029,8 +1115,10 @@ class TrialHandler2(_BaseTrialHandler):
         # offsets:
         if n > self.nRemaining or self.thisN + n < 0:
             return None
-        seqs = np.array(self.sequenceIndices).transpose().flat
-        condIndex = seqs[self.thisN + n]
+        self._extendSequence(self.thisN + n + 1)
+        if self.thisN + n >= len(self._sequence):
+            return None
+        condIndex = self._sequence[self.thisN + n]
         return self.trialList[condIndex]
 
     def getEarlierTrial(self, n=-1):
@@ -1160,6 +1248,9 @@ class TrialHandler2(_BaseTrialHandler):
         self_copy = copy.deepcopy(self)
         self_copy._rng_state = self_copy._rng.get_state()
         del self_copy._rng
+        # store conditions in the usual form of a list of dicts
+        if isinstance(self_copy.trialList, ConditionsTable):
+            self_copy.trialList = list(self_copy.trialList)
 
         r = (super(TrialHandler2, self_copy)
              .saveAsJson(fileName=fileName,
@@ -10,9 +10,11 @@ from builtins import range
 from past.builtins import basestring
 import os
 import re
+import json
 import pickle
 import time
 import codecs
+from copy import deepcopy
 import numpy as np
 import pandas as pd
 
@@ -168,125 +170,242 @@ def indicesFromString(indsString):
         pass
 
 
-def importConditions(fileName, returnFieldNames=False, selection=""):
-    """Imports a list of conditions from an .xlsx, .csv, or .pkl file
+# parsed conditions files, keyed on absolute path; an entry is only reused
+# while the file's modification time and size are unchanged
+_conditionsCache = {}
 
-    The output is suitable as an input to :class:`TrialHandler`
-    `trialTypes` or to :class:`MultiStairHandler` as a `conditions` list.
 
-    If `fileName` ends with:
+class ConditionsTable(object):
+    """A columnar set of conditions, as returned by
+    `importConditions(fileName, asColumns=True)`
 
-        - .csv:  import as a comma-separated-value file
-            (header + row x col)
-        - .xlsx: import as Excel 2007 (xlsx) files.
-            No support for older (.xls) is planned.
-        - .pkl:  import from a pickle file as list of lists
-            (header + row x col)
+    Each parameter is stored once, as a list of values in `.columns`. The
+    table also behaves as a sequence of conditions (`len()`, iteration and
+    indexing give one dict per condition) but each dict is only built when
+    it is first needed, so :class:`TrialHandler2` and friends can use the
+    table in place of a list of dicts.
 
-    The file should contain one row per type of trial needed and one column
-    for each parameter that defines the trial type. The first row should give
-    parameter names, which should:
-
-        - be unique
-        - begin with a letter (upper or lower case)
-        - contain no spaces or other punctuation (underscores are permitted)
+    The dicts are those of the table: changing a param in one (e.g.
+    `table[0]['x'] = 1`) also changes `.columns`, `select()`, `copy()` and
+    `toList()`. A param removed from a dict becomes None and keys that are
+    not params of the table are not added to it.
+    """
 
+    def __init__(self, fieldNames, columns, rowType=OrderedDict,
+                 _mutable=None):
+        self.fieldNames = list(fieldNames)
+        self._columns = OrderedDict()
+        for name in self.fieldNames:
+            self._columns[name] = list(columns[name])
+        self.rowType = rowType
+        if self.fieldNames:
+            self._nRows = len(self._columns[self.fieldNames[0]])
+        else:
+            self._nRows = 0
+        # names of columns holding lists etc., which need a deep copy
+        if _mutable is None:
+            _mutable = [name for name in self.fieldNames
+                        if any(isinstance(val, (list, dict))
+                               for val in self._columns[name])]
+        self._mutable = _mutable
+        self._rows = {}  # {index: dict} of the conditions handed out
+
+    @property
+    def columns(self):
+        """{param: list of values}, including any changes made to the
+        conditions handed out
+        """
+        self._updateColumns()
+        return self._columns
 
-    `selection` is used to select a subset of condition indices to be used
-    It can be a list/array of indices, a python `slice` object or a string to
-    be parsed as either option.
-    e.g.:
+    def _updateColumns(self):
+        """Write the params of the conditions handed out (which may have
+        been changed since) into the columns
+        """
+        for index, row in self._rows.items():
+            for name in self.fieldNames:
+                val = row.get(name)
+                self._columns[name][index] = val
+                if isinstance(val, (list, dict)) and name not in self._mutable:
+                    self._mutable.append(name)
+
+    @classmethod
+    def fromRows(cls, rows, fieldNames, rowType=dict):
+        """Create a table from a list of dicts with the given keys
+        """
+        columns = OrderedDict()
+        for name in fieldNames:
+            columns[name] = [row[name] for row in rows]
+        return cls(fieldNames, columns, rowType=rowType)
+
+    def __len__(self):
+        return self._nRows
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.select(range(*index.indices(self._nRows)))
+        if index < 0:
+            index += self._nRows
+        if not 0 <= index < self._nRows:
+            raise IndexError('ConditionsTable index out of range')
+        if index not in self._rows:
+            self._rows[index] = self.rowType(
+                (name, self._columns[name][index]) for name in self.fieldNames)
+        return self._rows[index]
+
+    def __setitem__(self, index, value):
+        if index < 0:
+            index += self._nRows
+        if not 0 <= index < self._nRows:
+            raise IndexError('ConditionsTable index out of range')
+        if sorted(value) != sorted(self.fieldNames):
+            msg = 'A condition in this ConditionsTable must have the params %s'
+            raise ValueError(msg % self.fieldNames)
+        # the new condition is written to the columns (along with any later
+        # changes to it) by _updateColumns()
+        self._rows[index] = value
+
+    def __iter__(self):
+        for index in range(self._nRows):
+            yield self[index]
+
+    def __eq__(self, other):
+        if isinstance(other, (list, tuple, ConditionsTable)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        if equal is NotImplemented:
+            return equal
+        return not equal
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '<ConditionsTable: %i conditions, %i params %s>' % (
+            self._nRows, len(self.fieldNames), self.fieldNames)
+
+    def select(self, indices):
+        """Return a new table with only the conditions at `indices`
+        """
+        indices = [int(ii) for ii in indices]
+        columns = OrderedDict()
+        self._updateColumns()
+        for name in self.fieldNames:
+            col = self._columns[name]
+            columns[name] = [col[ii] for ii in indices]
+        return ConditionsTable(self.fieldNames, columns, self.rowType,
+                               _mutable=self._mutable)
+
+    def copy(self):
+        """Return an independent copy of the table (nested lists included)
+        """
+        columns = OrderedDict()
+        self._updateColumns()
+        for name in self.fieldNames:
+            if name in self._mutable:
+                columns[name] = deepcopy(self._columns[name])
+            else:
+                columns[name] = self._columns[name]
+        return ConditionsTable(self.fieldNames, columns, self.rowType,
+                               _mutable=self._mutable)
+
+    def toList(self):
+        """Return the conditions as a list of dicts (one per condition)
+        """
+        rowType, names = self.rowType, self.fieldNames
+        self._updateColumns()
+        cols = [self._columns[name] for name in names]
+        return [rowType(zip(names, vals)) for vals in zip(*cols)]
 
-        - "1,2,4" or [1,2,4] or (1,2,4) are the same
-        - "2:5"       # 2, 3, 4 (doesn't include last whole value)
-        - "-10:2:"    # tenth from last to the last in steps of 2
-        - slice(-10, 2, None)  # the same as above
-        - random(5) * 8  # five random vals 0-8
 
+def _assertValidVarNames(fieldNames, fileName):
+    """screens a list of names as candidate variable names. if all
+    names are OK, return silently; else raise  with msg
     """
+    fileName = pathToString(fileName)
+    if not all(fieldNames):
+        msg = ('Conditions file %s: Missing parameter name(s); '
+               'empty cell(s) in the first row?')
+        raise ValueError(msg % fileName)
+    for name in fieldNames:
+        OK, msg = isValidVariableName(name)
+        if not OK:
+            # tailor message to importConditions
+            msg = msg.replace('Variables', 'Parameters (column headers)')
+            raise ValueError('Conditions file %s: %s%s"%s"' %
+                              (fileName, msg, os.linesep * 2, name))
 
-    def _assertValidVarNames(fieldNames, fileName):
-        """screens a list of names as candidate variable names. if all
-        names are OK, return silently; else raise  with msg
-        """
-        fileName = pathToString(fileName)
-        if not all(fieldNames):
-            msg = ('Conditions file %s: Missing parameter name(s); '
-                   'empty cell(s) in the first row?')
-            raise ValueError(msg % fileName)
-        for name in fieldNames:
-            OK, msg = isValidVariableName(name)
-            if not OK:
-                # tailor message to importConditions
-                msg = msg.replace('Variables', 'Parameters (column headers)')
-                raise ValueError('Conditions file %s: %s%s"%s"' %
-                                  (fileName, msg, os.linesep * 2, name))
 
-    if fileName in ['None', 'none', None]:
-        if returnFieldNames:
-            return [], []
-        return []
-    if not os.path.isfile(fileName):
-        msg = 'Conditions file not found: %s'
-        raise ValueError(msg % os.path.abspath(fileName))
-
-    def pandasToDictList(dataframe):
-        """Convert a pandas dataframe to a list of dicts.
-        This helper function is used by csv or excel imports via pandas
-        """
-        # convert the resulting dataframe to a numpy recarray
-        trialsArr = dataframe.to_records(index=False)
-        # Check for new line characters in strings, and replace escaped characters
-        for record in trialsArr:
-            for idx, element in enumerate(record):
-                if isinstance(element, str):
-                    record[idx] = element.replace('\\n', '\n')
-        if trialsArr.shape == ():
-            # convert 0-D to 1-D with one element:
-            trialsArr = trialsArr[np.newaxis]
-        fieldNames = list(trialsArr.dtype.names)
-        _assertValidVarNames(fieldNames, fileName)
+def _columnFromSeries(series):
+    """Convert a pandas Series (one conditions column) to a list of values.
 
-        # convert the record array into a list of dicts
-        trialList = []
-        for trialN, trialType in enumerate(trialsArr):
-            thisTrial = OrderedDict()
-            for fieldN, fieldName in enumerate(fieldNames):
-                val = trialsArr[trialN][fieldN]
-
-                if isinstance(val, basestring):
-                    if val.startswith('[') and val.endswith(']'):
-                        # val = eval('%s' %unicode(val.decode('utf8')))
-                        val = eval(val)
-                elif type(val) == np.string_:
-                    val = str(val.decode('utf-8'))
-                    # if it looks like a list, convert it:
-                    if val.startswith('[') and val.endswith(']'):
-                        # val = eval('%s' %unicode(val.decode('utf8')))
-                        val = eval(val)
-                elif np.isnan(val):
-                    val = None
-                thisTrial[fieldName] = val
-            trialList.append(thisTrial)
-        return trialList, fieldNames
+    The whole column is processed at once: escaped newlines are replaced
+    with vectorized string operations, missing values become None and only
+    the cells that look like lists are evaluated individually.
 
+    Numbers are returned as Python ints and floats (by `Series.tolist()`),
+    where conditions used to hold numpy.int64 and numpy.float64 values.
+    They compare equal, but e.g. `type()` checks will see the difference.
+    """
+    isNull = series.isna().values
+    if (pd.api.types.is_numeric_dtype(series) or
+            pd.api.types.is_bool_dtype(series)):
+        vals = series.tolist()
+        for ii in np.flatnonzero(isNull):
+            vals[ii] = None
+        return vals
+    try:
+        strs = series.str.replace('\\n', '\n', regex=False)
+    except AttributeError:  # not a column of strings (e.g. dates)
+        vals = series.tolist()
+        for ii in np.flatnonzero(isNull):
+            vals[ii] = None
+        return vals
+    isStr = strs.notna().values
+    isList = (strs.str.startswith('[') & strs.str.endswith(']'))
+    isList = isList.fillna(False).values.astype(bool) & isStr
+    vals = series.tolist()
+    strVals = strs.tolist()
+    for ii in np.flatnonzero(isStr):
+        vals[ii] = strVals[ii]
+    for ii in np.flatnonzero(isNull & ~isStr):
+        vals[ii] = None
+    for ii in np.flatnonzero(isList):
+        vals[ii] = eval(vals[ii])
+    return vals
+
+
+def _tableFromDataFrame(dataframe, fileName):
+    """Convert a pandas dataframe to a ConditionsTable, column by column.
+    This helper function is used by csv or excel imports via pandas
+    """
+    unnamed = dataframe.columns.to_series().str.contains('^Unnamed: ')
+    dataframe = dataframe.loc[:, ~unnamed]  # clear unnamed cols
+    logging.debug(u"Clearing unnamed columns from {}".format(fileName))
+    fieldNames = [str(name) for name in dataframe.columns]
+    _assertValidVarNames(fieldNames, fileName)
+    columns = OrderedDict()
+    for fieldN, fieldName in enumerate(fieldNames):
+        columns[fieldName] = _columnFromSeries(dataframe.iloc[:, fieldN])
+    return ConditionsTable(fieldNames, columns, rowType=OrderedDict)
+
+
+def _parseConditionsFile(fileName):
+    """Read a conditions file (any supported format) into a ConditionsTable
+    """
     if fileName.endswith('.csv'):
         with open(fileName, 'rU') as fileUniv:
             # use pandas reader, which can handle commas in fields, etc
             trialsArr = pd.read_csv(fileUniv, encoding='utf-8')
             logging.debug(u"Read csv file with pandas: {}".format(fileName))
-            unnamed = trialsArr.columns.to_series().str.contains('^Unnamed: ')
-            trialsArr = trialsArr.loc[:, ~unnamed]  # clear unnamed cols
-            logging.debug(u"Clearing unnamed columns from {}".format(fileName))
-            trialList, fieldNames = pandasToDictList(trialsArr)
+            return _tableFromDataFrame(trialsArr, fileName)
 
     elif fileName.endswith(('.xlsx','.xls')) and haveXlrd:
         trialsArr = pd.read_excel(fileName)
         logging.debug(u"Read excel file with pandas: {}".format(fileName))
-        unnamed = trialsArr.columns.to_series().str.contains('^Unnamed: ')
-        trialsArr = trialsArr.loc[:, ~unnamed]  # clear unnamed cols
-        logging.debug(u"Clearing unnamed columns from {}".format(fileName))
-        trialList, fieldNames = pandasToDictList(trialsArr)
+        return _tableFromDataFrame(trialsArr, fileName)
 
     elif fileName.endswith('.xlsx'):
         if not haveOpenpyxl:
@@ -318,9 +437,8 @@ def importConditions(fileName, returnFieldNames=False, selection=""):
         _assertValidVarNames(fieldNames, fileName)
 
         # loop trialTypes
-        trialList = []
+        columns = OrderedDict((fieldName, []) for fieldName in fieldNames)
         for rowN in range(1, nRows):  # skip header first row
-            thisTrial = {}
             for colN in range(nCols):
                 val = ws.cell(_getExcelCellName(col=colN, row=rowN)).value
                 # if it looks like a list or tuple, convert it
@@ -328,9 +446,8 @@ def importConditions(fileName, returnFieldNames=False, selection=""):
                         (val.startswith('[') and val.endswith(']') or
                                  val.startswith('(') and val.endswith(')'))):
                     val = eval(val)
-                fieldName = fieldNames[colN]
-                thisTrial[fieldName] = val
-            trialList.append(thisTrial)
+                columns[fieldNames[colN]].append(val)
+        return ConditionsTable(fieldNames, columns, rowType=dict)
 
     elif fileName.endswith('.pkl'):
         f = open(fileName, 'rb')
@@ -346,7 +463,6 @@ def importConditions(fileName, returnFieldNames=False, selection=""):
         except Exception:
             raise IOError('Could not open %s as conditions' % fileName)
         f.close()
-        trialList = []
         if PY3:
             # In Python3, strings returned by pickle() is unhashable.
             # So, we have to convert them to str.
@@ -354,16 +470,162 @@ def importConditions(fileName, returnFieldNames=False, selection=""):
                           for item in row] for row in trialsArr]
         fieldNames = trialsArr[0]  # header line first
         _assertValidVarNames(fieldNames, fileName)
-        for row in trialsArr[1:]:
-            thisTrial = {}
-            for fieldN, fieldName in enumerate(fieldNames):
-                # type is correct, being .pkl
-                thisTrial[fieldName] = row[fieldN]
-            trialList.append(thisTrial)
+        # type is correct, being .pkl
+        columns = OrderedDict()
+        for fieldN, fieldName in enumerate(fieldNames):
+            columns[fieldName] = [row[fieldN] for row in trialsArr[1:]]
+        return ConditionsTable(fieldNames, columns, rowType=dict)
     else:
         raise IOError('Your conditions file should be an '
                       'xlsx, csv or pkl file')
 
+
+def _conditionsSidecarPath(absPath):
+    """Path of the (hidden) JSON cache stored next to a conditions file
+    """
+    folder, name = os.path.split(absPath)
+    return os.path.join(folder, '.%s.psycache' % name)
+
+
+def _readConditionsSidecar(sidecar, fileKey):
+    """Return the ConditionsTable stored in a sidecar file (as written by
+    _writeConditionsSidecar) or None if it is not for `fileKey`.
+
+    The sidecar is JSON, so reading one that came with an experiment folder
+    cannot run any code; anything but the expected layout raises an error.
+    """
+    with open(sidecar, 'r') as f:
+        stored = json.load(f)
+    if stored['key'] != list(fileKey):
+        return None
+    fieldNames = stored['fieldNames']
+    columns = stored['columns']
+    if not (isinstance(fieldNames, list) and isinstance(columns, dict) and
+            sorted(fieldNames) == sorted(columns)):
+        raise ValueError('invalid conditions cache')
+    for name in fieldNames:
+        if not isinstance(columns[name], list):
+            raise ValueError('invalid conditions cache')
+    if len(set(len(col) for col in columns.values())) > 1:
+        raise ValueError('invalid conditions cache')
+    rowType = {'dict': dict, 'OrderedDict': OrderedDict}[stored['rowType']]
+    return ConditionsTable(fieldNames, columns, rowType=rowType)
+
+
+def _writeConditionsSidecar(sidecar, fileKey, table):
+    """Store `table` in a JSON sidecar file, if its values survive the
+    conversion (e.g. not for tuples or dates)
+    """
+    columns = dict(table.columns)
+    stored = {'key': list(fileKey),
+              'fieldNames': table.fieldNames,
+              'rowType': 'OrderedDict' if table.rowType is OrderedDict
+                         else 'dict',
+              'columns': columns}
+    try:
+        text = json.dumps(stored)
+    except (TypeError, ValueError):
+        return
+    if json.loads(text)['columns'] != columns:
+        return
+    try:
+        with open(sidecar, 'w') as f:
+            f.write(text)
+    except (IOError, OSError):
+        logging.debug(u"Could not write conditions cache {}".format(sidecar))
+
+
+def _loadConditionsTable(fileName, diskCache=False):
+    """Return the parsed ConditionsTable for `fileName`, from the cache if
+    the file has not changed since it was last parsed.
+
+    The returned table is shared with the cache; copy it before handing it
+    to anything that might modify it.
+    """
+    absPath = os.path.abspath(fileName)
+    stat = os.stat(absPath)
+    fileKey = (stat.st_mtime, stat.st_size)
+    if absPath in _conditionsCache:
+        cachedKey, table = _conditionsCache[absPath]
+        if cachedKey == fileKey:
+            logging.debug(u"Using cached conditions for {}".format(fileName))
+            return table
+
+    table = None
+    sidecar = _conditionsSidecarPath(absPath)
+    if diskCache and os.path.isfile(sidecar):
+        try:
+            table = _readConditionsSidecar(sidecar, fileKey)
+        except Exception:
+            table = None
+        if table is not None:
+            logging.debug(u"Read conditions cache {}".format(sidecar))
+    if table is None:
+        table = _parseConditionsFile(fileName)
+        if diskCache:
+            _writeConditionsSidecar(sidecar, fileKey, table)
+    _conditionsCache[absPath] = (fileKey, table)
+    return table
+
+
+def importConditions(fileName, returnFieldNames=False, selection="",
+                     asColumns=False, diskCache=False):
+    """Imports a list of conditions from an .xlsx, .csv, or .pkl file
+
+    The output is suitable as an input to :class:`TrialHandler`
+    `trialTypes` or to :class:`MultiStairHandler` as a `conditions` list.
+
+    If `fileName` ends with:
+
+        - .csv:  import as a comma-separated-value file
+            (header + row x col)
+        - .xlsx: import as Excel 2007 (xlsx) files.
+            No support for older (.xls) is planned.
+        - .pkl:  import from a pickle file as list of lists
+            (header + row x col)
+
+    The file should contain one row per type of trial needed and one column
+    for each parameter that defines the trial type. The first row should give
+    parameter names, which should:
+
+        - be unique
+        - begin with a letter (upper or lower case)
+        - contain no spaces or other punctuation (underscores are permitted)
+
+
+    `selection` is used to select a subset of condition indices to be used
+    It can be a list/array of indices, a python `slice` object or a string to
+    be parsed as either option.
+    e.g.:
+
+        - "1,2,4" or [1,2,4] or (1,2,4) are the same
+        - "2:5"       # 2, 3, 4 (doesn't include last whole value)
+        - "-10:2:"    # tenth from last to the last in steps of 2
+        - slice(-10, 2, None)  # the same as above
+        - random(5) * 8  # five random vals 0-8
+
+    Each file is only parsed once per session (or until it is modified);
+    later calls reuse the parsed values. With `diskCache=True` the parsed
+    values are also stored in a hidden JSON file next to the conditions
+    file (`.<fileName>.psycache`) so that other sessions can skip parsing
+    (unless a value cannot be stored as JSON, e.g. a tuple or a date).
+
+    If `asColumns` is True then a :class:`ConditionsTable` is returned
+    instead of a list of dicts. It stores one list of values per parameter
+    and builds the dict for a condition only when that condition is used.
+
+    """
+    if fileName in ['None', 'none', None]:
+        if returnFieldNames:
+            return [], []
+        return []
+    if not os.path.isfile(fileName):
+        msg = 'Conditions file not found: %s'
+        raise ValueError(msg % os.path.abspath(fileName))
+
+    table = _loadConditionsTable(fileName, diskCache=diskCache).copy()
+    fieldNames = list(table.fieldNames)
+
     # if we have a selection then try to parse it
     if isinstance(selection, basestring) and len(selection) > 0:
         selection = indicesFromString(selection)
@@ -377,12 +639,14 @@ def importConditions(fileName, returnFieldNames=False, selection=""):
 
     # the selection might now be a slice or a series of indices
     if isinstance(selection, slice):
-        trialList = trialList[selection]
+        table = table[selection]
     elif len(selection) > 0:
-        allConds = trialList
-        trialList = []
-        for ii in selection:
-            trialList.append(allConds[int(round(ii))])
+        table = table.select([int(round(ii)) for ii in selection])
+
+    if asColumns:
+        trialList = table
+    else:
+        trialList = table.toList()
 
     logging.exp('Imported %s as conditions, %d conditions, %d params' %
                 (fileName, len(trialList), len(fieldNames)))
@@ -19,8 +19,9 @@ from builtins import object
 import sys
 import string
 import copy
+import threading
 import numpy
-from collections import namedtuple, OrderedDict, MutableMapping
+from collections import namedtuple, OrderedDict, MutableMapping, deque
 from psychopy.preferences import prefs
 
 # try to import pyglet & pygame and hope the user has at least one of them!
@@ -57,6 +58,179 @@ from psychopy.tools.monitorunittools import cm2pix, deg2pix, pix2cm, pix2deg
 from psychopy import logging
 from psychopy.constants import NOT_STARTED
 
+# types of the events in the input event buffer
+KEY_EVENT = 0  # name is the key (modifiers are None for text events)
+MOUSE_PRESS = 1  # name is the button (0, 1, 2), pos is where it happened
+MOUSE_RELEASE = 2
+MOUSE_WHEEL = 3  # name is 'wheel', pos is the (x, y) scroll
+
+
+class _InputEventBuffer(object):
+    """A ring buffer of the keyboard and mouse events, in the order that they
+    happened and all time-stamped with `psychopy.core.getTime()`.
+
+    The events are stored in preallocated arrays, and the numbers of those
+    not yet collected are kept in a queue per (eventType, name) so that
+    removing the events for a keyList only touches the matching events.
+    Events can be added from another thread than the one collecting them
+    (e.g. by a backend's event handlers), so adding and removing events are
+    done holding a lock. If the buffer fills up with keys that haven't been
+    collected it is made bigger (rather than losing any keys). Mouse events
+    are only collected by `Mouse.getEvents()` and `clearEvents()`, so an
+    uncollected one is dropped when the buffer wraps round to it instead:
+    at most the last `size` mouse events are kept.
+
+    For backwards compatibility len(), append() and extend() behave like
+    the list of (key, modifiers, time) tuples that this replaced.
+    """
+
+    def __init__(self, size=1024):
+        self._lock = threading.Lock()
+        self._count = 0  # events ever added (event n is in slot n % size)
+        self._queues = {}  # {(eventType, name): deque of event numbers}
+        self._arrays = self._makeArrays(size)
+
+    @staticmethod
+    def _makeArrays(size):
+        # (types, names, modifiers, times, positions, pending), swapped in
+        # at once
+        return (numpy.zeros(size, dtype=numpy.int8),
+                numpy.empty(size, dtype=object),
+                numpy.empty(size, dtype=object),
+                numpy.zeros(size),
+                numpy.zeros((size, 2)),
+                numpy.zeros(size, dtype=bool))
+
+    def add(self, eventType, name, modifiers=None, time=None, pos=(0, 0)):
+        """Add an event (time-stamped now if no time is given)
+        """
+        if time is None:
+            time = psychopy.core.getTime()
+        with self._lock:
+            n = self._count
+            types, names, mods, times, positions, pending = self._arrays
+            i = n % len(names)
+            if pending[i] and types[i] != KEY_EVENT:
+                # the oldest uncollected mouse event: drop it
+                self._queues[(int(types[i]), names[i])].popleft()
+                pending[i] = False
+            if pending[i]:  # full of keys still to be collected
+                self._grow()
+                types, names, mods, times, positions, pending = self._arrays
+                i = n % len(names)
+            types[i] = eventType
+            names[i] = name
+            mods[i] = modifiers
+            times[i] = time
+            positions[i] = pos
+            pending[i] = True
+            queue = self._queues.get((eventType, name))
+            if queue is None:
+                queue = self._queues[(eventType, name)] = deque()
+            queue.append(n)
+            self._count = n + 1
+
+    def _grow(self):
+        # called by add(), holding the lock
+        oldArrays = self._arrays
+        oldSize = len(oldArrays[0])
+        newArrays = self._makeArrays(oldSize * 2)
+        numbers = numpy.arange(self._count - oldSize, self._count)
+        for old, new in zip(oldArrays, newArrays):
+            new[numbers % len(new)] = old[numbers % oldSize]
+        self._arrays = newArrays
+
+    def pop(self, eventTypes, eventNames=None):
+        """Remove the events of the given types (and names, if given) from
+        the buffer and return their (types, names, modifiers, times,
+        positions) in the order they happened
+        """
+        with self._lock:
+            if eventNames is None:
+                queues = [queue for (eventType, _), queue
+                          in self._queues.items() if eventType in eventTypes]
+            else:
+                queues = [self._queues.get((eventType, name))
+                          for eventType in eventTypes for name in eventNames]
+            numbers = []
+            for queue in queues:
+                while queue:
+                    numbers.append(queue.popleft())
+            numbers.sort()
+            types, names, mods, times, positions, pending = self._arrays
+            slots = numpy.array(numbers, dtype=int) % len(names)
+            pending[slots] = False
+            return (types[slots].tolist(), names[slots].tolist(),
+                    mods[slots].tolist(), times[slots].tolist(),
+                    positions[slots].tolist())
+
+    def clear(self, eventTypes=None):
+        """Remove all events (or all those of the given types)
+        """
+        if eventTypes is None:
+            eventTypes = [KEY_EVENT, MOUSE_PRESS, MOUSE_RELEASE, MOUSE_WHEEL]
+        self.pop(eventTypes)
+
+    def count(self, eventTypes):
+        with self._lock:
+            return sum(len(queue) for (eventType, _), queue
+                       in self._queues.items() if eventType in eventTypes)
+
+    def __len__(self):
+        return self.count([KEY_EVENT])
+
+    def append(self, key):
+        """Add a (key, modifiers, time) or (text, time) tuple
+        """
+        if len(key) == 2:
+            self.add(KEY_EVENT, key[0], None, key[1])
+        else:
+            self.add(KEY_EVENT, key[0], key[1], key[2])
+
+    def extend(self, keys):
+        for key in keys:
+            self.append(key)
+
+
+def _timeStampOffset(timeStamped):
+    """The offset to subtract from event times (from core.getTime()) to
+    time-stamp them as requested by getKeys(timeStamped=...), or None if
+    timeStamped is not a valid value
+    """
+    if hasattr(timeStamped, 'getLastResetTime'):
+        # keys were originally time-stamped with
+        #   core.monotonicClock._lastResetTime
+        # we need to shift that by the difference between it and
+        # our custom clock
+        _last = timeStamped.getLastResetTime()
+        _clockLast = psychopy.core.monotonicClock.getLastResetTime()
+        return _last - _clockLast
+    elif timeStamped is True:
+        return 0
+    elif isinstance(timeStamped, (float, int)):
+        return timeStamped
+
+
+def _dispatchPygletEvents():
+    """For each (pyglet) window, dispatch its events so that the event
+    handlers have added them to the buffer
+    """
+    defDisplay = pyglet.window.get_platform().get_default_display()
+    for win in defDisplay.get_windows():
+        try:
+            win.dispatch_events()  # pump events on pyglet windows
+        except ValueError as e:  # pragma: no cover
+            # Pressing special keys, such as 'volume-up', results in a
+            # ValueError. This appears to be a bug in pyglet, and may be
+            # specific to certain systems and versions of Python.
+            logging.error(u'Failed to handle keypress')
+
+
+# all backends (including pygame's getKeys) collect events here
+_eventBuffer = _InputEventBuffer()
+# the keyboard events (as the list of keys this replaced)
+_keyBuffer = _eventBuffer
+
 if havePyglet or haveGLFW:
     # importing from mouse takes ~250ms, so do it now
     if havePyglet:
@@ -73,7 +247,6 @@ if havePyglet or haveGLFW:
             MOD_SCROLLLOCK
         )
 
-    _keyBuffer = []
     mouseButtons = [0, 0, 0]
     mouseWheelRel = numpy.array([0.0, 0.0])
     # list of 3 clocks that are reset on mouse button presses
@@ -163,7 +336,7 @@ def _onPygletText(text, emulated=False):
         keySource = 'EmulatedKey'
     else:
         keySource = 'KeyPress'
-    _keyBuffer.append((text, keyTime))
+    _eventBuffer.add(KEY_EVENT, text, None, keyTime)
     logging.data("%s: %s" % (keySource, text))
 
 
@@ -171,8 +344,9 @@ def _onPygletKey(symbol, modifiers, emulated=False):
     """handler for on_key_press pyglet events; call directly to emulate a
     key press
 
-    Appends a tuple with (keyname, timepressed) into the global _keyBuffer.
-    The _keyBuffer can then be accessed as normal using event.getKeys(),
+    Adds the key (with its modifiers and the time it was pressed) to the
+    global input event buffer.
+    The keys can then be accessed as normal using event.getKeys(),
     .waitKeys(), clearBuffer(), etc.
 
     J Gray 2012: Emulated means add a key (symbol) to the buffer virtually.
@@ -215,7 +389,7 @@ def _onPygletKey(symbol, modifiers, emulated=False):
         if thisKey == 'enter':
             thisKey = 'return'
         keySource = 'Keypress'
-    _keyBuffer.append((thisKey, modifiers, keyTime))  # tuple
+    _eventBuffer.add(KEY_EVENT, thisKey, modifiers, keyTime)
     logging.data("%s: %s" % (keySource, thisKey))
     _process_global_event_key(thisKey, modifiers)
 
@@ -255,14 +429,17 @@ def _onPygletMousePress(x, y, button, modifiers, emulated=False):
     if button & LEFT:
         mouseButtons[0] = 1
         mouseTimes[0] = now - mouseClick[0].getLastResetTime()
+        _eventBuffer.add(MOUSE_PRESS, 0, modifiers, pos=(x, y))
         label += ' Left'
     if button & MIDDLE:
         mouseButtons[1] = 1
         mouseTimes[1] = now - mouseClick[1].getLastResetTime()
+        _eventBuffer.add(MOUSE_PRESS, 1, modifiers, pos=(x, y))
         label += ' Middle'
     if button & RIGHT:
         mouseButtons[2] = 1
         mouseTimes[2] = now - mouseClick[2].getLastResetTime()
+        _eventBuffer.add(MOUSE_PRESS, 2, modifiers, pos=(x, y))
         label += ' Right'
     logging.data("Mouse: %s button down, pos=(%i,%i)" % (label.strip(), x, y))
 
@@ -275,12 +452,15 @@ def _onPygletMouseRelease(x, y, button, modifiers, emulated=False):
         label = ''
     if button & LEFT:
         mouseButtons[0] = 0
+        _eventBuffer.add(MOUSE_RELEASE, 0, modifiers, pos=(x, y))
         label += ' Left'
     if button & MIDDLE:
         mouseButtons[1] = 0
+        _eventBuffer.add(MOUSE_RELEASE, 1, modifiers, pos=(x, y))
         label += ' Middle'
     if button & RIGHT:
         mouseButtons[2] = 0
+        _eventBuffer.add(MOUSE_RELEASE, 2, modifiers, pos=(x, y))
         label += ' Right'
     logging.data("Mouse: %s button up, pos=(%i,%i)" % (label, x, y))
 
@@ -288,6 +468,7 @@ def _onPygletMouseRelease(x, y, button, modifiers, emulated=False):
 def _onPygletMouseWheel(x, y, scroll_x, scroll_y):
     global mouseWheelRel
     mouseWheelRel = mouseWheelRel + numpy.array([scroll_x, scroll_y])
+    _eventBuffer.add(MOUSE_WHEEL, 'wheel', pos=(scroll_x, scroll_y))
     msg = "Mouse: wheel shift=(%i,%i), pos=(%i,%i)"
     logging.data(msg % (scroll_x, scroll_y, x, y))
 
@@ -382,75 +563,42 @@ def getKeys(keyList=None, modifiers=False, timeStamped=False):
         - 2009 timeStamped code provided by Dave Britton
         - 2016 modifiers code provided by 5AM Solutions
     """
-    keys = []
-
     if havePygame and display.get_init():
         # see if pygame has anything instead (if it exists)
         for evts in evt.get(locals.KEYDOWN):
             # pygame has no keytimes
-            keys.append((pygame.key.name(evts.key), 0))
+            _eventBuffer.add(KEY_EVENT, pygame.key.name(evts.key), 0, 0)
     elif havePyglet:
         # for each (pyglet) window, dispatch its events before checking event
         # buffer
-        defDisplay = pyglet.window.get_platform().get_default_display()
-        for win in defDisplay.get_windows():
-            try:
-                win.dispatch_events()  # pump events on pyglet windows
-            except ValueError as e:  # pragma: no cover
-                # Pressing special keys, such as 'volume-up', results in a
-                # ValueError. This appears to be a bug in pyglet, and may be
-                # specific to certain systems and versions of Python.
-                logging.error(u'Failed to handle keypress')
-
-        global _keyBuffer
-        if len(_keyBuffer) > 0:
-            # then pyglet is running - just use this
-            keys = _keyBuffer
-            # _keyBuffer = []  # DO /NOT/ CLEAR THE KEY BUFFER ENTIRELY
-
-    elif haveGLFW:
-        # 'poll_events' is called when a window is flipped, all the callbacks
-        # populate the buffer
-        if len(_keyBuffer) > 0:
-            keys = _keyBuffer
+        _dispatchPygletEvents()
+    # with GLFW 'poll_events' is called when a window is flipped, all the
+    # callbacks populate the buffer
 
     if keyList is None:
-        _keyBuffer = []  # clear buffer entirely
-        targets = keys  # equivalent behavior to getKeys()
+        # clear buffer entirely (equivalent behavior to getKeys())
+        _, names, mods, times, _ = _eventBuffer.pop([KEY_EVENT])
     else:
-        nontargets = []
-        targets = []
-        # split keys into keepers and pass-thrus
-        for key in keys:
-            if key[0] in keyList:
-                targets.append(key)
-            else:
-                nontargets.append(key)
-        _keyBuffer = nontargets  # save these
+        # only remove the keys in keyList (leaving the others)
+        if isinstance(keyList, basestring):
+            keyList = [keyList]
+        _, names, mods, times, _ = _eventBuffer.pop([KEY_EVENT],
+                                                    set(keyList))
 
-    # now we have a list of tuples called targets
     # did the user want timestamped tuples or keynames?
     if modifiers == False and timeStamped == False:
-        keyNames = [k[0] for k in targets]
-        return keyNames
+        return names
     elif timeStamped == False:
-        keyNames = [(k[0], modifiers_dict(k[1])) for k in targets]
-        return keyNames
-    elif hasattr(timeStamped, 'getLastResetTime'):
-        # keys were originally time-stamped with
-        #   core.monotonicClock._lastResetTime
-        # we need to shift that by the difference between it and
-        # our custom clock
-        _last = timeStamped.getLastResetTime()
-        _clockLast = psychopy.core.monotonicClock.getLastResetTime()
-        timeBaseDiff = _last - _clockLast
-        relTuple = [[_f for _f in (k[0], modifiers and modifiers_dict(k[1]) or None, k[-1] - timeBaseDiff) if _f] for k in targets]
-        return relTuple
-    elif timeStamped is True:
-        return [[_f for _f in (k[0], modifiers and modifiers_dict(k[1]) or None, k[-1]) if _f] for k in targets]
-    elif isinstance(timeStamped, (float, int, int)):
-        relTuple = [[_f for _f in (k[0], modifiers and modifiers_dict(k[1]) or None, k[-1] - timeStamped) if _f] for k in targets]
-        return relTuple
+        return [(name, modifiers_dict(mod or 0))
+                for name, mod in zip(names, mods)]
+    offset = _timeStampOffset(timeStamped)
+    if offset is not None:
+        if not modifiers:
+            mods = [None] * len(names)
+        else:
+            mods = [modifiers_dict(mod or 0) for mod in mods]
+        return [[_f for _f in (name, mod, keyTime - offset) if _f]
+                for name, mod, keyTime in zip(names, mods, times)]
 
 
 def waitKeys(maxWait=float('inf'), keyList=None, modifiers=False,
@@ -501,13 +649,8 @@ def waitKeys(maxWait=float('inf'), keyList=None, modifiers=False,
     got_keypress = False
 
     while not got_keypress and timer.getTime() < maxWait:
-        # Pump events on pyglet windows if they exist.
-        if havePyglet:
-            defDisplay = pyglet.window.get_platform().get_default_display()
-            for win in defDisplay.get_windows():
-                win.dispatch_events()
-
-        # Get keypresses and return if anything is pressed.
+        # Get keypresses (getKeys pumps the events on pyglet windows) and
+        # return if anything is pressed.
         keys = getKeys(keyList=keyList, modifiers=modifiers,
                        timeStamped=timeStamped)
         if keys:
@@ -747,6 +890,41 @@ class Mouse(object):
         mouseWheelRel = numpy.array([0.0, 0.0])
         return rel
 
+    def getEvents(self, timeStamped=False):
+        """Returns the mouse button presses and releases, and the wheel
+        movements, since the last call (or `clearEvents`) in the order they
+        happened.
+
+        Each event is a tuple of (action, button, pos) where action is
+        'press', 'release' or 'wheel', button is 0, 1 or 2 (as for
+        `getPressed`) and pos is the position of the mouse in pixels from
+        the bottom left of the window. For 'wheel' events button is None and
+        pos is the (x, y) travel of the wheel.
+
+        `timeStamped` is as for :func:`~psychopy.event.getKeys` and adds the
+        time of each event to its tuple, using the same time base as the
+        keys so that the two can be merged.
+
+        Mouse events are recorded whether or not they are collected, so
+        only the most recent ones (at least the last 1024 input events) are
+        kept until they are.
+        """
+        if usePygame:
+            return []
+        if havePyglet:
+            _dispatchPygletEvents()
+        actions = {MOUSE_PRESS: 'press', MOUSE_RELEASE: 'release',
+                   MOUSE_WHEEL: 'wheel'}
+        types, names, _, times, positions = _eventBuffer.pop(list(actions))
+        events = [(actions[eventType], None if name == 'wheel' else name,
+                   tuple(pos))
+                  for eventType, name, pos in zip(types, names, positions)]
+        if not timeStamped:
+            return events
+        offset = _timeStampOffset(timeStamped)
+        return [event + (eventTime - offset,)
+                for event, eventTime in zip(events, times)]
+
     def getVisible(self):
         """Gets the visibility of the mouse (1 or 0)
         """
@@ -812,9 +990,7 @@ class Mouse(object):
             # False:  # havePyglet: # like in getKeys - pump the events
             # for each (pyglet) window, dispatch its events before checking
             # event buffer
-            defDisplay = pyglet.window.get_platform().get_default_display()
-            for win in defDisplay.get_windows():
-                win.dispatch_events()  # pump events on pyglet windows
+            _dispatchPygletEvents()
 
             # else:
             if not getTime:
@@ -916,17 +1092,16 @@ def clearEvents(eventType=None):
     if not havePygame or not display.get_init():  # pyglet
         # For each window, dispatch its events before
         # checking event buffer.
-        defDisplay = pyglet.window.get_platform().get_default_display()
-        for win in defDisplay.get_windows():
-            win.dispatch_events()  # pump events on pyglet windows
+        _dispatchPygletEvents()
 
         if eventType == 'mouse':
-            pass
+            _eventBuffer.clear([MOUSE_PRESS, MOUSE_RELEASE, MOUSE_WHEEL])
         elif eventType == 'joystick':
             pass
-        else:  # eventType='keyboard' or eventType=None.
-            global _keyBuffer
-            _keyBuffer = []
+        elif eventType == 'keyboard':
+            _eventBuffer.clear([KEY_EVENT])
+        else:  # eventType=None
+            _eventBuffer.clear()
     else:  # pygame
         if eventType == 'mouse':
             evt.get([locals.MOUSEMOTION, locals.MOUSEBUTTONUP,
@@ -1165,7 +1340,7 @@ def _onGLFWKey(*args, **kwargs):
 
     # TODO - modifier integration
     keySource = 'Keypress'
-    _keyBuffer.append((key_name, modifiers, keyTime))  # tuple
+    _eventBuffer.add(KEY_EVENT, key_name, modifiers, keyTime)
     logging.data("%s: %s" % (keySource, key_name))
 
 
@@ -1186,7 +1361,7 @@ def _onGLFWText(*args, **kwargs):
     if not useText:  # _onPygletKey has handled the input
         return
     keySource = 'KeyPress'
-    _keyBuffer.append((text, keyTime))
+    _eventBuffer.add(KEY_EVENT, text, None, keyTime)
     logging.data("%s: %s" % (keySource, text))
 
 
@@ -1203,25 +1378,24 @@ def _onGLFWMouseButton(*args, **kwargs):
     # get current position of the mouse
     # this might not be at the exact location of the mouse press
     x, y = glfw.get_cursor_pos(win_ptr)
+    # from the top left of the window, so flip y to be from the bottom left
+    # (as for pyglet)
+    y = glfw.get_window_size(win_ptr)[1] - y
 
     # process actions
+    buttons = {glfw.MOUSE_BUTTON_LEFT: 0,
+               glfw.MOUSE_BUTTON_MIDDLE: 1,
+               glfw.MOUSE_BUTTON_RIGHT: 2}
+    if button not in buttons:
+        return
+    button = buttons[button]
     if action == glfw.PRESS:
-        if button == glfw.MOUSE_BUTTON_LEFT:
-            mouseButtons[0] = 1
-            mouseTimes[0] = now - mouseClick[0].getLastResetTime()
-        elif button == glfw.MOUSE_BUTTON_MIDDLE:
-            mouseButtons[1] = 1
-            mouseTimes[1] = now - mouseClick[1].getLastResetTime()
-        elif button == glfw.MOUSE_BUTTON_RIGHT:
-            mouseButtons[2] = 1
-            mouseTimes[2] = now - mouseClick[2].getLastResetTime()
+        mouseButtons[button] = 1
+        mouseTimes[button] = now - mouseClick[button].getLastResetTime()
+        _eventBuffer.add(MOUSE_PRESS, button, modifier, now, (x, y))
     elif action == glfw.RELEASE:
-        if button == glfw.MOUSE_BUTTON_LEFT:
-            mouseButtons[0] = 0
-        elif button == glfw.MOUSE_BUTTON_MIDDLE:
-            mouseButtons[1] = 0
-        elif button == glfw.MOUSE_BUTTON_RIGHT:
-            mouseButtons[2] = 0
+        mouseButtons[button] = 0
+        _eventBuffer.add(MOUSE_RELEASE, button, modifier, now, (x, y))
 
 
 def _onGLFWMouseScroll(*args, **kwargs):
@@ -1232,6 +1406,7 @@ def _onGLFWMouseScroll(*args, **kwargs):
     window_ptr, x_offset, y_offset = args
     global mouseWheelRel
     mouseWheelRel = mouseWheelRel + numpy.array([x_offset, y_offset])
+    _eventBuffer.add(MOUSE_WHEEL, 'wheel', pos=(x_offset, y_offset))
     msg = "Mouse: wheel shift=(%i,%i)"
     logging.data(msg % (x_offset, y_offset))
 
@@ -18,7 +18,6 @@ The code that writes out a *_lastrun.py experiment file is (in order):
 
 from __future__ import absolute_import, print_function
 # from future import standard_library
-from past.builtins import basestring
 from builtins import object
 import os
 import codecs
@@ -31,9 +30,9 @@ from .exports import IndentingBuffer, NameSpace
 from .flow import Flow
 from .loops import TrialHandler, LoopInitiator, \
     LoopTerminator, StairHandler, MultiStairHandler
-from .params import _findParam, Param
+from .params import _findParam, Param, getJSExpression
 from .routine import Routine
-from . import utils, py2js
+from . import utils, py2js, codecache, resources
 from .components import getComponents, getAllComponents
 
 from psychopy.localization import _translate
@@ -167,13 +166,34 @@ class Experiment(object):
         else:
             self.routines[routineName] = routine
 
-    def writeScript(self, expPath=None, target="PsychoPy", modular=True):
+    def writeScript(self, expPath=None, target="PsychoPy", modular=True,
+                    useCache=False):
         """Write a PsychoPy script for the experiment
+
+        With `useCache=True` the code of Routines and Components that have
+        not changed since the last call is reused rather than regenerated
+        (see :mod:`psychopy.experiment.codecache`) and a summary of what was
+        rebuilt is stored in `self.compileReport`.
         """
         # set this so that params write for approp target
         utils.scriptTarget = target
         self.flow._prescreenValues()
         self.expPath = expPath
+        if useCache:
+            self._codeCache = codecache.getCodeCache(self)
+            self._codeCache.resetStats()
+        try:
+            return self._writeScript(target, modular)
+        finally:
+            if useCache:
+                self.compileReport = self._codeCache.report()
+                logging.info(self.compileReport)
+                self._codeCache.save()
+                del self._codeCache
+
+    def _writeScript(self, target, modular):
+        """Write the script itself (see writeScript)
+        """
         script = IndentingBuffer(u'')  # a string buffer object
 
         # get date info, in format preferred by current locale as set by app:
@@ -197,6 +217,7 @@ class Experiment(object):
             script = script.getvalue()
         elif target == "PsychoJS":
             script.oneIndent = "  "  # use 2 spaces rather than python 4
+            self.translateParamsJS()
             self.settings.writeInitCodeJS(script, self.psychopyVersion, localDateTime, modular)
             self.flow.writeFlowSchedulerJS(script)
             self.settings.writeExpSetupCodeJS(script, self.psychopyVersion)
@@ -210,7 +231,7 @@ class Experiment(object):
                 # NB each entry is a routine or LoopInitiator/Terminator
                 self._currentRoutine = entry
                 if hasattr(entry, 'writeInitCodeJS'):
-                    entry.writeInitCodeJS(script)
+                    codecache.writeCode(entry, 'writeInitCodeJS', script)
 
             # create globalClock etc
             code = ("// Create some handy timers\n"
@@ -233,9 +254,11 @@ class Experiment(object):
                     self.flow.writeLoopHandlerJS(script)
                 elif thisItem.name in routinesToWrite:
                     self._currentRoutine = self.routines[thisItem.name]
-                    self._currentRoutine.writeRoutineBeginCodeJS(script)
-                    self._currentRoutine.writeEachFrameCodeJS(script)
-                    self._currentRoutine.writeRoutineEndCodeJS(script)
+                    for methodName in ('writeRoutineBeginCodeJS',
+                                       'writeEachFrameCodeJS',
+                                       'writeRoutineEndCodeJS'):
+                        codecache.writeCode(self._currentRoutine, methodName,
+                                            script)
                     routinesToWrite.remove(thisItem.name)
             self.settings.writeEndCodeJS(script)
             try:
@@ -699,109 +722,47 @@ class Experiment(object):
                 return comp
         return None
 
+    def translateParamsJS(self):
+        """Translate the code in the params of all the Components, Loops and
+        the settings to JS in a single pass (each distinct piece of code is
+        only translated once and the results are cached for writeScript())
+
+        :return: OrderedDict of {python: js}
+        """
+        allParams = list(self.settings.params.values())
+        for thisRoutine in self.routines.values():
+            for thisComp in thisRoutine:
+                allParams.extend(thisComp.params.values())
+        for thisEntry in self.flow:
+            if thisEntry.getType() == 'LoopInitiator':
+                allParams.extend(thisEntry.loop.params.values())
+        exprs = [getJSExpression(param) for param in allParams]
+        return py2js.expressions2js(expr for expr in exprs
+                                    if expr is not None)
+
     def getResourceFiles(self):
         """Returns a list of known files needed for the experiment
         Interrogates each loop looking for conditions files and each
+        component looking for file names in its params
 
+        :return: list of dicts{'rel','abs'} of valid file paths
         """
-        join = os.path.join
-        abspath = os.path.abspath
         srcRoot = os.path.split(self.filename)[0]
+        scanner = resources.ResourceScanner(srcRoot,
+                                            getattr(self, 'expPath', None))
+        return scanner.scan(self)
 
-        def getPaths(filePath):
-            """Helper to return absolute and relative paths (or None)
-
-            :param filePath: str to a potential file path (rel or abs)
-            :return: dict of 'asb' and 'rel' paths or None
-            """
-            thisFile = {}
-            if len(filePath) > 2 and (filePath[0] == "/" or filePath[1] == ":"):
-                thisFile['abs'] = filePath
-                thisFile['rel'] = os.path.relpath(filePath, srcRoot)
-            else:
-                thisFile['rel'] = filePath
-                thisFile['abs'] = os.path.normpath(join(srcRoot, filePath))
-            if os.path.isfile(thisFile['abs']):
-                return thisFile
-            else:
-                return None
-
-        def findPathsInFile(filePath):
-            """Recursively search a conditions file (xlsx or csv)
-             extracting valid file paths in any param/cond
+    def getResourceIndex(self, hashes=True):
+        """As getResourceFiles() but returns an index of the files, with
+        their size, modification time and (optionally) sha1 hash
 
-            :param filePath: str to a potential file path (rel or abs)
-            :return: list of dicts{'rel','abs'} of valid file paths
-            """
-
-            # Clean up filePath that cannot be eval'd
-            if '$' in filePath:
-                try:
-                    filePath = filePath.strip('$')
-                    filePath = eval(filePath)
-                except NameError:
-                    # List files in director and get condition files
-                    if 'xlsx' in filePath or 'xls' in filePath or 'csv' in filePath:
-                        # Get all xlsx and csv files
-                        expPath = self.expPath
-                        if 'html' in self.expPath:  # Get resources from parent directory i.e, original exp path
-                            expPath = self.expPath.split('html')[0]
-                        fileList = (
-                        [getPaths(condFile) for condFile in os.listdir(expPath)
-                         if len(condFile.split('.')) > 1
-                         and condFile.split('.')[1] in ['xlsx', 'xls', 'csv']])
-                        return fileList
-            paths = []
-            # does it look at all like an excel file?
-            if (not isinstance(filePath, basestring)
-                    or not os.path.splitext(filePath)[1] in ['.csv', '.xlsx',
-                                                             '.xls']):
-                return paths
-            thisFile = getPaths(filePath)
-            # does it exist?
-            if not thisFile:
-                return paths
-            # this file itself is valid so add to resources if not already
-            if thisFile not in paths:
-                paths.append(thisFile)
-            conds = data.importConditions(thisFile['abs'])  # load the abs path
-            for thisCond in conds:  # thisCond is a dict
-                for param, val in list(thisCond.items()):
-                    if isinstance(val, basestring) and len(val):
-                        subFile = getPaths(val)
-                    else:
-                        subFile = None
-                    if subFile:
-                        paths.append(subFile)
-                        # if it's a possible conditions file then recursive
-                        if thisFile['abs'][-4:] in ["xlsx", ".xls", ".csv"]:
-                            contained = findPathsInFile(subFile['abs'])
-                            paths.extend(contained)
-            return paths
-
-        resources = []
-        for thisEntry in self.flow:
-            if thisEntry.getType() == 'LoopInitiator':
-                # find all loops and check for conditions filename
-                params = thisEntry.loop.params
-                if 'conditionsFile' in params:
-                    condsPaths = findPathsInFile(params['conditionsFile'].val)
-                    resources.extend(condsPaths)
-            elif thisEntry.getType() == 'Routine':
-                # find all params of all compons and check if valid filename
-                for thisComp in thisEntry:
-                    for paramName in thisComp.params:
-                        thisParam = thisComp.params[paramName]
-                        thisFile = ''
-                        if isinstance(thisParam, basestring):
-                            thisFile = getPaths(thisParam)
-                        elif isinstance(thisParam.val, basestring):
-                            thisFile = getPaths(thisParam.val)
-                        # then check if it's a valid path
-                        if thisFile:
-                            resources.append(thisFile)
-
-        return resources
+        :return: OrderedDict of {rel: {'rel', 'abs', 'size', 'mtime',
+            'hash'}}
+        """
+        srcRoot = os.path.split(self.filename)[0]
+        scanner = resources.ResourceScanner(srcRoot,
+                                            getattr(self, 'expPath', None))
+        return scanner.buildIndex(scanner.scan(self), hashes=hashes)
 
 
 class ExpFile(list):
@@ -0,0 +1,296 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Part of the PsychoPy library
+# Copyright (C) 2018 Jonathan Peirce
+# Distributed under the terms of the GNU General Public License (GPL).
+
+"""Cache of the code generated for Routines and Components, so that
+Experiment.writeScript() only regenerates the parts that have changed.
+
+Each fragment of code (e.g. the frame code of one Component, or the whole
+of a Routine's main code) is stored under a hash of everything that went
+into it: the params of the Routine/Component, the experiment settings, the
+loops it sits in, the target language, the indent level and the source of
+the class that wrote it. When nothing has changed the stored text is written
+straight into the script buffer.
+
+The cache for an experiment is kept in memory for the session and, for
+saved experiments, as JSON in the user's prefs folder (`codeCache/`), so
+that compiling an experiment never reads anything that came with it.
+"""
+
+from __future__ import absolute_import, print_function
+
+import os
+import sys
+import time
+import json
+import hashlib
+from collections import OrderedDict
+
+import psychopy
+from psychopy import logging, prefs
+from psychopy.experiment import utils
+
+# one CodeCache per experiment file (or '' for unsaved experiments)
+_caches = {}
+
+# where the caches of saved experiments are stored (None for the codeCache
+# folder in the user's prefs folder)
+cacheFolder = None
+
+# {class: (sourceFile, mtime)} of the classes that write code
+_classSources = {}
+
+
+def _classSource(cls):
+    """Source file and its modification time for a class, so that editing a
+    Component's code also invalidates its cached output
+    """
+    if cls not in _classSources:
+        sourceFile = getattr(sys.modules.get(cls.__module__), '__file__', '')
+        try:
+            mtime = os.path.getmtime(sourceFile)
+        except (OSError, TypeError):
+            mtime = None
+        _classSources[cls] = (sourceFile, mtime)
+    return _classSources[cls]
+
+
+def _simpleRepr(val):
+    """repr() of plain data, or None for anything else (e.g. objects whose
+    repr contains a memory address)
+    """
+    if isinstance(val, (list, tuple)):
+        items = [_simpleRepr(item) for item in val]
+        if None in items:
+            return None
+        return '[%s]' % ', '.join(items)
+    elif isinstance(val, dict):
+        items = [(_simpleRepr(key), _simpleRepr(val[key]))
+                 for key in sorted(val, key=repr)]
+        if any(None in item for item in items):
+            return None
+        return '{%s}' % ', '.join('%s: %s' % item for item in items)
+    elif val is None or isinstance(val, (bool, int, float, str, bytes)):
+        return repr(val)
+    try:  # unicode in Py2
+        if isinstance(val, unicode):
+            return repr(val)
+    except NameError:
+        pass
+    return None
+
+
+def paramsSignature(params):
+    """Everything about a dict of Params that affects the code they write
+    """
+    sig = []
+    for name in sorted(params):
+        param = params[name]
+        if hasattr(param, 'valType'):
+            sig.append((name, repr(param.val), param.valType,
+                        repr(param.updates)))
+        else:  # e.g. the name of a Routine is a plain string
+            sig.append((name, repr(param)))
+    return sig
+
+
+def objectSignature(obj):
+    """Signature of a Routine or Component: its class (and the source of
+    that class), its params and any other plain-data attributes, plus the
+    position of a Component in its Routine and the signatures (in order) of
+    the Components in a Routine
+    """
+    attribs = []
+    for name in sorted(vars(obj)):
+        if name in ('exp', 'params'):
+            continue
+        attribs.append((name, _simpleRepr(getattr(obj, name))))
+    sig = [type(obj).__name__, _classSource(type(obj)),
+           paramsSignature(obj.params), attribs]
+    if isinstance(obj, list):
+        sig.append([objectSignature(comp) for comp in obj])
+    elif hasattr(obj, 'getPosInRoutine'):
+        try:
+            sig.append(obj.getPosInRoutine())
+        except (KeyError, ValueError):  # not (yet) in a Routine
+            sig.append(None)
+    return sig
+
+
+def isCacheable(obj):
+    """Whether the code written by `obj` can be cached. Routines and
+    Components opt in with `_cacheableCode = True` (Components that inspect
+    the script buffer, or other Components, set it back to False). A Routine
+    is only cacheable if all its Components are.
+    """
+    if not getattr(obj, '_cacheableCode', False):
+        return False
+    if obj.getType() == 'Routine':
+        return all(isCacheable(comp) for comp in obj)
+    return True
+
+
+class CodeCache(object):
+    """Code fragments for one experiment, keyed on a hash of their inputs.
+
+    Use :func:`writeCode` rather than calling this directly.
+    """
+
+    maxFragments = 5000  # least-recently used fragments beyond this are dropped
+
+    def __init__(self, filename=''):
+        super(CodeCache, self).__init__()
+        self.filename = filename  # where to store the cache ('' for none)
+        self.fragments = OrderedDict()  # {key: (text, indentChange)}
+        self._changed = False
+        self.resetStats()
+        if filename and os.path.isfile(filename):
+            try:
+                self._load()
+            except Exception:
+                self.fragments = OrderedDict()
+                logging.debug("Could not read code cache {}".format(filename))
+
+    def _load(self):
+        """Read the fragments from the (JSON) cache file, checking that
+        they are all strings and indent changes
+        """
+        with open(self.filename, 'r') as f:
+            stored = json.load(f)
+        if stored.get('version') != psychopy.__version__:
+            return
+        fragments = OrderedDict()
+        for key, text, indentChange in stored['fragments']:
+            if not (isinstance(key, type(u'')) and
+                    isinstance(text, type(u'')) and
+                    isinstance(indentChange, int)):
+                raise ValueError('invalid code cache fragment')
+            fragments[key] = (text, indentChange)
+        self.fragments = fragments
+
+    def resetStats(self):
+        """Start recording which fragments are rebuilt/reused (again)
+        """
+        self.rebuilt = []  # [(label, seconds)]
+        self.reused = []  # [label]
+        self.t0 = time.time()
+
+    def getKey(self, obj, methodName, buff):
+        """Hash of everything that the code written by `obj.methodName(buff)`
+        depends on
+        """
+        exp = obj.exp
+        flow = exp.flow
+        loops = [(loop.type, loop.params['name'].val)
+                 for loop in flow._loopList]
+        currentRoutine = getattr(flow._currentRoutine, 'name', None)
+        context = [psychopy.__version__, exp.psychopyVersion,
+                   utils.scriptTarget, methodName,
+                   buff.indentLevel, buff.oneIndent,
+                   getattr(exp, 'expPath', None), exp.filename,
+                   paramsSignature(exp.settings.params),
+                   loops, currentRoutine, exp._expHandler.name]
+        sig = repr([context, objectSignature(obj)])
+        return hashlib.sha1(sig.encode('utf-8')).hexdigest()
+
+    def write(self, obj, methodName, buff):
+        """Write the code of `obj.methodName(buff)` into `buff`, from the
+        cache if possible
+        """
+        name = obj.params['name']
+        label = '%s.%s' % (getattr(name, 'val', name), methodName)
+        key = self.getKey(obj, methodName, buff)
+        if key in self.fragments:
+            text, indentChange = self.fragments.pop(key)
+            self.fragments[key] = (text, indentChange)  # most recently used
+            buff.write(text)
+            buff.setIndentLevel(indentChange, relative=True)
+            self.reused.append(label)
+            return
+
+        t0 = time.time()
+        # write into a separate buffer (so we know exactly what was written)
+        fragment = type(buff)(u'')
+        fragment.oneIndent = buff.oneIndent
+        fragment.indentLevel = buff.indentLevel
+        getattr(obj, methodName)(fragment)
+        text = fragment.getvalue()
+        indentChange = fragment.indentLevel - buff.indentLevel
+        buff.write(text)
+        buff.setIndentLevel(indentChange, relative=True)
+
+        self.fragments[key] = (text, indentChange)
+        while len(self.fragments) > self.maxFragments:
+            self.fragments.popitem(last=False)
+        self._changed = True
+        self.rebuilt.append((label, time.time() - t0))
+
+    def save(self):
+        """Store the fragments on disk (if anything changed)
+        """
+        if not (self.filename and self._changed):
+            return
+        stored = {'version': psychopy.__version__,
+                  'fragments': [[key, text, indentChange] for
+                                key, (text, indentChange)
+                                in self.fragments.items()]}
+        try:
+            folder = os.path.dirname(self.filename)
+            if not os.path.isdir(folder):
+                os.makedirs(folder)
+            with open(self.filename, 'w') as f:
+                json.dump(stored, f)
+            self._changed = False
+        except (IOError, OSError):
+            logging.debug("Could not write code cache {}"
+                          .format(self.filename))
+
+    def report(self):
+        """Summary of the fragments rebuilt since `resetStats()`, slowest
+        first
+        """
+        nTotal = len(self.rebuilt) + len(self.reused)
+        lines = ['Compiled script in %.3fs: %i of %i code fragments rebuilt'
+                 % (time.time() - self.t0, len(self.rebuilt), nTotal)]
+        for label, duration in sorted(self.rebuilt, key=lambda x: -x[1]):
+            lines.append('    %-50s %.4fs' % (label, duration))
+        return '\n'.join(lines)
+
+
+def cachePath(psyexpFile):
+    """The file in which to store the code cache for a .psyexp file: in
+    `cacheFolder`, named from the hash of the file's absolute path
+    """
+    folder = cacheFolder
+    if folder is None:
+        folder = os.path.join(prefs.paths['userPrefsDir'], 'codeCache')
+    path = os.path.abspath(psyexpFile)
+    name = hashlib.sha1(path.encode('utf-8')).hexdigest()
+    return os.path.join(folder, '%s.json' % name)
+
+
+def getCodeCache(exp):
+    """The (session-wide) CodeCache for an Experiment
+    """
+    filename = exp.filename or ''
+    if filename not in _caches:
+        if filename:
+            _caches[filename] = CodeCache(cachePath(filename))
+        else:
+            _caches[filename] = CodeCache()
+    return _caches[filename]
+
+
+def writeCode(obj, methodName, buff):
+    """Call `obj.methodName(buff)`, but take the output from the code cache
+    if the experiment is being written with one (see
+    `Experiment.writeScript(useCache=True)`) and nothing relevant has changed
+    """
+    cache = getattr(getattr(obj, 'exp', None), '_codeCache', None)
+    if cache is None or not isCacheable(obj):
+        getattr(obj, methodName)(buff)
+    else:
+        cache.write(obj, methodName, buff)
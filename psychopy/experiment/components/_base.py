@@ -25,6 +25,8 @@ class BaseComponent(object):
     # an attribute of the class, determines the section in the components panel
     categories = ['Custom']
     targets = ['PsychoPy']
+    # the code written by Components can be cached (see codecache.py)
+    _cacheableCode = True
 
     def __init__(self, exp, parentName, name='',
                  startType='time (s)', startVal='',
@@ -36,6 +36,7 @@ class ioLabsButtonBoxComponent(KeyboardComponent):
     components over which active buttons (for responses and lights).
     """
     categories = ['Responses']  # which section(s) in the components panel
+    _cacheableCode = False  # checks the script buffer for existing code
 
     def __init__(self, exp, parentName, name='bbox',
                  active="(0,1,2,3,4,5,6,7)", store='first button',
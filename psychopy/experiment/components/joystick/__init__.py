@@ -32,6 +32,7 @@ class JoystickComponent(BaseComponent):
     """
     categories = ['Responses']
     targets = ['PsychoPy']
+    _cacheableCode = False  # frame code sets self.clockStr for end code
 
     def __init__(self, exp, parentName, name='joystick',
                  startType='time (s)', startVal=0.0,
@@ -31,6 +31,7 @@ class MouseComponent(BaseComponent):
     """
     categories = ['Responses']
     targets = ['PsychoPy', 'PsychoJS']
+    _cacheableCode = False  # frame code sets self.clockStr for end code
 
     def __init__(self, exp, parentName, name='mouse',
                  startType='time (s)', startVal=0.0,
@@ -43,6 +43,7 @@ _localized = {'noiseImage': _translate('Image from which to derive noise spectru
 
 class NoiseStimComponent(BaseVisualComponent):
     """A class for presenting grating stimuli"""
+    _cacheableCode = False  # init code sets flags used by the frame code
 
     def __init__(self, exp, parentName, name='noise', noiseImage='None',
                  mask='None', sf='None', interpolate='nearest',
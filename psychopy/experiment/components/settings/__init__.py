@@ -480,13 +480,19 @@ class SettingsComponent(object):
         resFolder = join(folder, 'resources')
         if not os.path.isdir(resFolder):
             os.mkdir(resFolder)
-        resourceFiles = self.exp.getResourceFiles()
+        resourceFiles = self.exp.getResourceIndex(hashes=False)
 
-        for srcFile in resourceFiles:
+        for srcFile in resourceFiles.values():
             dstAbs = os.path.normpath(join(resFolder, srcFile['rel']))
             dstFolder = os.path.split(dstAbs)[0]
             if not os.path.isdir(dstFolder):
                 os.makedirs(dstFolder)
+            # copy2 keeps the mtime so an unchanged copy can be skipped
+            if os.path.isfile(dstAbs):
+                dstStat = os.stat(dstAbs)
+                if (dstStat.st_size == srcFile['size']
+                        and dstStat.st_mtime == srcFile['mtime']):
+                    continue
             shutil.copy2(srcFile['abs'], dstAbs)
 
     def writeInitCodeJS(self, buff, version, localDateTime, modular=True):
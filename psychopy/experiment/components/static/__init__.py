@@ -31,6 +31,7 @@ class StaticComponent(BaseComponent):
     # override the categories property below
     # an attribute of the class, determines the section in the components panel
     categories = ['Custom']
+    _cacheableCode = False  # its code depends on other Components
 
     def __init__(self, exp, parentName, name='ISI',
                  startType='time (s)', startVal=0.0,
@@ -14,6 +14,7 @@ from past.builtins import basestring
 from psychopy.experiment.utils import unescapedDollarSign_re
 from psychopy.experiment.params import getCodeFromParamStr
 from psychopy.experiment.routine import Routine
+from psychopy.experiment.codecache import writeCode
 from psychopy.experiment.loops import LoopTerminator, LoopInitiator
 
 
@@ -240,7 +241,7 @@ class Flow(list):
         for entry in self:
             # NB each entry is a routine or LoopInitiator/Terminator
             self._currentRoutine = entry
-            entry.writeInitCode(script)
+            writeCode(entry, 'writeInitCode', script)
         # create clocks (after initialising stimuli)
         code = ("\n# Create some handy timers\n"
                 "globalClock = core.Clock()  # to track the "
@@ -251,11 +252,11 @@ class Flow(list):
         # run-time code
         for entry in self:
             self._currentRoutine = entry
-            entry.writeMainCode(script)
+            writeCode(entry, 'writeMainCode', script)
         # tear-down code (very few components need this)
         for entry in self:
             self._currentRoutine = entry
-            entry.writeExperimentEndCode(script)
+            writeCode(entry, 'writeExperimentEndCode', script)
 
 
     def writeFlowSchedulerJS(self, script):
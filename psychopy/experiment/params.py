@@ -43,7 +43,7 @@ def _findParam(name, node):
 
 
 class Param(object):
-    """Defines parameters for Experiment Components
+    r"""Defines parameters for Experiment Components
     A string representation of the parameter will depend on the valType:
 
     >>> print(Param(val=[3,4], valType='num'))
@@ -170,27 +170,19 @@ class Param(object):
                     return s
             return repr(self.val)
         elif self.valType in ['code', 'extendedCode']:
-            isStr = isinstance(self.val, basestring)
-            if isStr and self.val.startswith("$"):
-                # a $ in a code parameter is unnecessary so remove it
-                val = "%s" % self.val[1:]
-            elif isStr and self.val.startswith("\$"):
-                # the user actually wanted just the $
-                val = "%s" % self.val[1:]
-            elif isStr:
-                val = "%s" % self.val
-            else:  # if val was a tuple it needs converting to a string first
-                val = "%s" % repr(self.val)
             if utils.scriptTarget == "PsychoJS":
                 if self.valType == 'code':
+                    # the expression that Experiment translates in a batch
+                    val = getJSExpression(self)
                     valJS = py2js.expression2js(val)
                 elif self.valType == 'extendedCode':
+                    val = _getCodeFromParamVal(self.val)
                     valJS = py2js.snippet2js(val)
                 if val != valJS:
                     logging.info("py2js: {} -> {}".format(val, valJS))
                 return valJS
             else:
-                return val
+                return _getCodeFromParamVal(self.val)
         elif self.valType == 'list':
             return "%s" %(toList(self.val))
         elif self.valType == 'fixedList':
@@ -218,14 +210,55 @@ def getCodeFromParamStr(val):
     """Convert a Param.val string to its intended python code
     (as triggered by special char $)
     """
-    tmp = re.sub(r"^(\$)+", '', val)  # remove leading $, if any
-    # remove all nonescaped $, squash $$$$$
-    tmp2 = re.sub(r"([^\\])(\$)+", r"\1", tmp)
-    out = re.sub(r"[\\]\$", '$', tmp2)  # remove \ from all \$
+    out = _stripDollars(val)
     if utils.scriptTarget=='PsychoJS':
         out = py2js.expression2js(out)
     return out
 
+
+def _stripDollars(val):
+    """The python code in a Param.val string (see getCodeFromParamStr)
+    """
+    tmp = re.sub(r"^(\$)+", '', val)  # remove leading $, if any
+    # remove all nonescaped $, squash $$$$$
+    tmp2 = re.sub(r"([^\\])(\$)+", r"\1", tmp)
+    return re.sub(r"[\\]\$", '$', tmp2)  # remove \ from all \$
+
+
+def _getCodeFromParamVal(val):
+    """The code in the val of a 'code' or 'extendedCode' Param
+    """
+    if not isinstance(val, basestring):
+        # if val was a tuple it needs converting to a string first
+        return repr(val)
+    elif val.startswith("$"):
+        # a $ in a code parameter is unnecessary so remove it
+        return val[1:]
+    elif val.startswith(r"\$"):
+        # the user actually wanted just the $
+        return val[1:]
+    return val
+
+
+def getJSExpression(param):
+    """The python expression that a Param is translated from when it is
+    written to a JS script (Param.__str__ translates this one), or None if
+    it isn't one
+    """
+    val = getattr(param, 'val', None)
+    valType = getattr(param, 'valType', None)
+    if valType == 'str':
+        if (isinstance(val, basestring)
+                and utils.unescapedDollarSign_re.search(val)):
+            return _stripDollars(val)  # as getCodeFromParamStr
+    elif valType == 'code':
+        return _getCodeFromParamVal(val)
+    elif valType == 'list':
+        if isinstance(val, basestring):
+            return val.strip()  # as toList
+    return None
+
+
 def toList(val):
     """
 
@@ -10,8 +10,11 @@ to JS (ES6/PsychoJS)
 """
 
 import ast
+import functools
+from collections import OrderedDict
 import astunparse
 import esprima
+from psychopy import logging
 from psychopy.constants import PY3
 
 if PY3:
@@ -21,12 +24,48 @@ else:
 
 
 class NamesJS(dict):
+    version = 0  # incremented on every change, so cached translations expire
+
     def __getitem__(self, name):
         try:
             return dict.__getitem__(self, name)
         except:
             return "{}".format(name)
 
+    def __setitem__(self, name, value):
+        self.version += 1
+        dict.__setitem__(self, name, value)
+
+    def __delitem__(self, name):
+        self.version += 1
+        dict.__delitem__(self, name)
+
+    # dict's other methods that change it don't call __setitem__/__delitem__
+
+    def update(self, *args, **kwargs):
+        self.version += 1
+        dict.update(self, *args, **kwargs)
+
+    def setdefault(self, name, value=None):
+        self.version += 1
+        return dict.setdefault(self, name, value)
+
+    def pop(self, name, *default):
+        self.version += 1
+        return dict.pop(self, name, *default)
+
+    def popitem(self):
+        self.version += 1
+        return dict.popitem(self)
+
+    def clear(self):
+        self.version += 1
+        dict.clear(self)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
 
 namesJS = NamesJS()
 namesJS['sin'] = 'Math.sin'
@@ -68,6 +107,45 @@ def unparse(tree):
     return v.getvalue()
 
 
+# translations already done, {(function name, expr, namesJS.version): js}
+_cache = OrderedDict()
+cacheSize = 10000  # least recently used translations beyond this are dropped
+cacheStats = {'hits': 0, 'misses': 0}
+
+
+def _cached(func):
+    """Decorator storing the result of func(expr) in the (LRU) cache.
+    Errors (e.g. SyntaxError) are not cached.
+    """
+    @functools.wraps(func)
+    def cachedFunc(expr):
+        key = (func.__name__, expr, namesJS.version)
+        try:
+            jsStr = _cache.pop(key)
+        except (KeyError, TypeError):  # not cached or not hashable
+            cacheStats['misses'] += 1
+            jsStr = func(expr)
+            try:
+                _cache[key] = jsStr
+            except TypeError:
+                return jsStr
+            while len(_cache) > cacheSize:
+                _cache.popitem(last=False)
+        else:
+            cacheStats['hits'] += 1
+            _cache[key] = jsStr  # now the most recently used
+        return jsStr
+    cachedFunc.uncached = func
+    return cachedFunc
+
+
+def clearCache():
+    """Forget all the translations done so far"""
+    _cache.clear()
+    cacheStats['hits'] = cacheStats['misses'] = 0
+
+
+@_cached
 def expression2js(expr):
     """Convert a short expression (e.g. a Component Parameter) Python to JS"""
 
@@ -90,6 +168,7 @@ def expression2js(expr):
     jsStr = unparse(syntaxTree).strip()
     return jsStr
 
+
 def snippet2js(expr):
     """Convert several lines (e.g. a Code Component) Python to JS"""
     # for now this is just adding ';' onto each line ending so will fail on
@@ -98,6 +177,28 @@ def snippet2js(expr):
     return expr
 
 
+def expressions2js(exprs):
+    """Convert many expressions at once, e.g. all those in the params of an
+    experiment (see `Experiment.translateParamsJS()`), so that they are in the
+    cache when the script is written. Each distinct expression is only
+    translated once.
+
+    :param exprs: iterable of Python expressions (str)
+    :return: OrderedDict of {expr: jsStr}, without the expressions that
+        could not be translated
+    """
+    translated = OrderedDict()
+    for expr in exprs:
+        if expr in translated:
+            continue
+        try:
+            translated[expr] = expression2js(expr)
+        except Exception as err:  # it will be reported when writing the script
+            logging.debug("py2js: couldn't translate {!r}: {}".format(expr,
+                                                                       err))
+    return translated
+
+
 def findUndeclaredVariables(ast, allUndeclaredVariables):
     """Detect undeclared variables
     """
@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Part of the PsychoPy library
+# Copyright (C) 2018 Jonathan Peirce
+# Distributed under the terms of the GNU General Public License (GPL).
+
+"""Finds the files (images, sounds, conditions files...) that an experiment
+needs, e.g. so that they can be copied to the resources folder of an online
+(PsychoJS) experiment.
+
+Each conditions file is only parsed once per scan, each candidate path is
+only checked once (the checks are run in a pool of threads) and the result
+can be returned as an index of the files with their size and hash.
+"""
+
+from __future__ import absolute_import, print_function
+from past.builtins import basestring
+
+import os
+import stat
+import hashlib
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+
+from psychopy import data
+
+conditionsExtensions = ['.csv', '.xlsx', '.xls']
+
+# {(absPath, size, mtime): sha1} so unchanged files are only hashed once
+_hashes = {}
+
+
+def fileHash(absPath, size=None, mtime=None, blockSize=2**20):
+    """The sha1 (hex digest) of a file's contents, cached on the path, size
+    and modification time of the file
+    """
+    if size is None or mtime is None:
+        info = os.stat(absPath)
+        size, mtime = info.st_size, info.st_mtime
+    key = (absPath, size, mtime)
+    if key not in _hashes:
+        sha = hashlib.sha1()
+        with open(absPath, 'rb') as f:
+            block = f.read(blockSize)
+            while block:
+                sha.update(block)
+                block = f.read(blockSize)
+        _hashes[key] = sha.hexdigest()
+    return _hashes[key]
+
+
+class ResourceScanner(object):
+    """Finds the files used by an experiment (see
+    `Experiment.getResourceFiles()`).
+
+    The results of `os.stat()` and of parsing conditions files are stored
+    for the lifetime of the scanner, so create a new one for each scan.
+    """
+
+    nThreads = 8  # for checking/hashing files and parsing conditions files
+
+    def __init__(self, srcRoot, expPath=None, nThreads=None):
+        super(ResourceScanner, self).__init__()
+        self.srcRoot = srcRoot  # relative paths are relative to this
+        self.expPath = expPath  # where the script is being written
+        if nThreads is not None:
+            self.nThreads = nThreads
+        self._fileInfo = {}  # {absPath: (size, mtime) or None}
+        self._condsPaths = {}  # {conditions file: paths found in it}
+        self._pool = None
+
+    def _map(self, func, items):
+        """map() using the thread pool (if there are enough items to bother)
+        """
+        items = list(items)
+        if len(items) < 2 or self.nThreads < 2:
+            return [func(item) for item in items]
+        if self._pool is None:
+            self._pool = ThreadPool(self.nThreads)
+        return self._pool.map(func, items)
+
+    def close(self):
+        """Stop the thread pool (if one was started)
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
+    def _absPath(self, filePath):
+        if len(filePath) > 2 and (filePath[0] == "/" or filePath[1] == ":"):
+            return filePath
+        return os.path.normpath(os.path.join(self.srcRoot, filePath))
+
+    def fileInfo(self, absPath):
+        """(size, mtime) of a file or None if it isn't one
+        """
+        if absPath not in self._fileInfo:
+            try:
+                info = os.stat(absPath)
+            except (OSError, ValueError, TypeError):
+                self._fileInfo[absPath] = None
+            else:
+                if stat.S_ISREG(info.st_mode):
+                    self._fileInfo[absPath] = (info.st_size, info.st_mtime)
+                else:
+                    self._fileInfo[absPath] = None
+        return self._fileInfo[absPath]
+
+    def statFiles(self, filePaths):
+        """Check many potential file paths in one go (in parallel) so that
+        later calls to `getPaths()` for them are just lookups
+        """
+        unknown = set()
+        for filePath in filePaths:
+            if isinstance(filePath, basestring) and len(filePath):
+                absPath = self._absPath(filePath)
+                if absPath not in self._fileInfo:
+                    unknown.add(absPath)
+        self._map(self.fileInfo, unknown)
+
+    def getPaths(self, filePath):
+        """Helper to return absolute and relative paths (or None)
+
+        :param filePath: str to a potential file path (rel or abs)
+        :return: dict of 'abs' and 'rel' paths or None
+        """
+        thisFile = {}
+        if len(filePath) > 2 and (filePath[0] == "/" or filePath[1] == ":"):
+            thisFile['abs'] = filePath
+            thisFile['rel'] = os.path.relpath(filePath, self.srcRoot)
+        else:
+            thisFile['rel'] = filePath
+            thisFile['abs'] = os.path.normpath(
+                os.path.join(self.srcRoot, filePath))
+        if self.fileInfo(thisFile['abs']):
+            return thisFile
+        else:
+            return None
+
+    def _listConditionsFiles(self):
+        """All the conditions files in the folder of the experiment (for
+        conditions files given as a variable)
+        """
+        expPath = self.expPath or self.srcRoot
+        if 'html' in expPath:  # use the original exp path, not the html one
+            expPath = expPath.split('html')[0]
+        fileList = [self.getPaths(condFile) for condFile in os.listdir(expPath)
+                    if len(condFile.split('.')) > 1
+                    and condFile.split('.')[1] in ['xlsx', 'xls', 'csv']]
+        return [thisFile for thisFile in fileList if thisFile]
+
+    def findPathsInFile(self, filePath, _visited=None):
+        """Recursively search a conditions file (xlsx or csv)
+        extracting valid file paths in any param/cond
+
+        :param filePath: str to a potential file path (rel or abs)
+        :return: list of dicts{'rel','abs'} of valid file paths
+        """
+        # Clean up filePath that cannot be eval'd
+        if '$' in filePath:
+            try:
+                filePath = filePath.strip('$')
+                filePath = eval(filePath)
+            except NameError:
+                # a variable: use the conditions files in the exp folder
+                if ('xlsx' in filePath or 'xls' in filePath
+                        or 'csv' in filePath):
+                    return self._listConditionsFiles()
+        # does it look at all like an excel file?
+        if (not isinstance(filePath, basestring)
+                or not os.path.splitext(filePath)[1] in conditionsExtensions):
+            return []
+        thisFile = self.getPaths(filePath)
+        # does it exist?
+        if not thisFile:
+            return []
+        if thisFile['abs'] in self._condsPaths:
+            return self._condsPaths[thisFile['abs']]
+        # guard against conditions files that (indirectly) refer to themselves
+        if _visited is None:
+            _visited = set()
+        if thisFile['abs'] in _visited:
+            return []
+        _visited.add(thisFile['abs'])
+
+        paths = [thisFile]
+        conds = data.importConditions(thisFile['abs'])  # load the abs path
+        for thisCond in conds:  # thisCond is a dict
+            for param, val in list(thisCond.items()):
+                if isinstance(val, basestring) and len(val):
+                    subFile = self.getPaths(val)
+                else:
+                    subFile = None
+                if subFile:
+                    paths.append(subFile)
+                    # if it's a possible conditions file then recursive
+                    if thisFile['abs'][-4:] in ["xlsx", ".xls", ".csv"]:
+                        contained = self.findPathsInFile(subFile['abs'],
+                                                         _visited)
+                        paths.extend(contained)
+        self._condsPaths[thisFile['abs']] = paths
+        return paths
+
+    def scan(self, exp):
+        """The files used by the loops and components of an experiment, in
+        the order they are found and with no duplicates
+
+        :return: list of dicts{'rel','abs'} of valid file paths
+        """
+        condsFiles = []
+        candidates = []
+        for thisEntry in exp.flow:
+            if thisEntry.getType() == 'LoopInitiator':
+                # find all loops and check for conditions filename
+                params = thisEntry.loop.params
+                if 'conditionsFile' in params:
+                    condsFiles.append(params['conditionsFile'].val)
+            elif thisEntry.getType() == 'Routine':
+                # find all params of all compons and check if valid filename
+                for thisComp in thisEntry:
+                    for paramName in thisComp.params:
+                        thisParam = thisComp.params[paramName]
+                        if isinstance(thisParam, basestring):
+                            candidates.append(thisParam)
+                        elif isinstance(thisParam.val, basestring):
+                            candidates.append(thisParam.val)
+
+        try:
+            # conditions files are parsed in parallel, then component params
+            # are checked in parallel
+            condsPaths = self._map(self.findPathsInFile, condsFiles)
+            self.statFiles(candidates)
+        finally:
+            self.close()
+
+        compPaths = [self.getPaths(val) for val in candidates if len(val)]
+        resources = []
+        found = set()
+        for thisFile in sum(condsPaths, []) + compPaths:
+            if thisFile and thisFile['abs'] not in found:
+                found.add(thisFile['abs'])
+                resources.append(thisFile)
+        return resources
+
+    def buildIndex(self, resources, hashes=True):
+        """An index of the files in `resources` (as returned by `scan()`)
+
+        :param hashes: whether to include the sha1 of each file (the files
+            are read in parallel, and only re-read if they have changed)
+        :return: OrderedDict of {rel: {'rel', 'abs', 'size', 'mtime',
+            'hash'}}
+        """
+        index = OrderedDict()
+        for thisFile in resources:
+            size, mtime = self.fileInfo(thisFile['abs'])
+            index[thisFile['rel']] = dict(thisFile, size=size, mtime=mtime,
+                                          hash=None)
+        if hashes:
+            entries = list(index.values())
+
+            def hashEntry(entry):
+                return fileHash(entry['abs'], entry['size'], entry['mtime'])
+
+            try:
+                for entry, sha in zip(entries, self._map(hashEntry, entries)):
+                    entry['hash'] = sha
+            finally:
+                self.close()
+        return index
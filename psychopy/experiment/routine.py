@@ -11,6 +11,7 @@
 from __future__ import absolute_import, print_function
 
 from psychopy.constants import FOREVER
+from psychopy.experiment.codecache import writeCode
 
 
 class Routine(list):
@@ -24,12 +25,13 @@ class Routine(list):
     each of which knows when it starts and stops.
     """
 
+    _cacheableCode = True  # see psychopy.experiment.codecache
+
     def __init__(self, name, exp, components=()):
         super(Routine, self).__init__()
         self.params = {'name': name}
         self.name = name
         self.exp = exp
-        self._clockName = None  # for scripts e.g. "t = trialClock.GetTime()"
         self.type = 'Routine'
         list.__init__(self, list(components))
 
@@ -44,6 +46,12 @@ class Routine(list):
     def name(self, name):
         self.params['name'] = name
 
+    @property
+    def _clockName(self):
+        """for scripts e.g. "t = trialClock.GetTime()"
+        """
+        return self.name + "Clock"
+
     def addComponent(self, component):
         """Add a component to the end of the routine"""
         self.append(component)
@@ -93,19 +101,17 @@ class Routine(list):
     def writeInitCode(self, buff):
         code = '\n# Initialize components for Routine "%s"\n'
         buff.writeIndentedLines(code % self.name)
-        self._clockName = self.name + "Clock"
         buff.writeIndented('%s = core.Clock()\n' % self._clockName)
         for thisCompon in self:
-            thisCompon.writeInitCode(buff)
+            writeCode(thisCompon, 'writeInitCode', buff)
 
     def writeInitCodeJS(self, buff):
         code = '// Initialize components for Routine "%s"\n'
         buff.writeIndentedLines(code % self.name)
-        self._clockName = self.name + "Clock"
         buff.writeIndented('%s = new util.Clock();\n' % self._clockName)
         for thisCompon in self:
             if hasattr(thisCompon, 'writeInitCodeJS'):
-                thisCompon.writeInitCodeJS(buff)
+                writeCode(thisCompon, 'writeInitCodeJS', buff)
 
     def writeResourcesCodeJS(self, buff):
         buff.writeIndented("// <<maybe need to load images for {}?>>\n"
@@ -130,7 +136,7 @@ class Routine(list):
         buff.writeIndentedLines(code)
         # This is the beginning of the routine, before the loop starts
         for event in self:
-            event.writeRoutineStartCode(buff)
+            writeCode(event, 'writeRoutineStartCode', buff)
 
         code = '# keep track of which components have finished\n'
         buff.writeIndentedLines(code)
@@ -162,10 +168,10 @@ class Routine(list):
         for event in self:
             if event.type == 'Static':
                 continue  # we'll do those later
-            event.writeFrameCode(buff)
+            writeCode(event, 'writeFrameCode', buff)
         # update static component code last
         for event in self.getStatics():
-            event.writeFrameCode(buff)
+            writeCode(event, 'writeFrameCode', buff)
 
         # are we done yet?
         code = (
@@ -205,7 +211,7 @@ class Routine(list):
                 '        thisComponent.setAutoDraw(False)\n')
         buff.writeIndentedLines(code % (self.name, self.name))
         for event in self:
-            event.writeRoutineEndCode(buff)
+            writeCode(event, 'writeRoutineEndCode', buff)
 
         # reset routineTimer at the *very end* of all non-nonSlip routines
         if not useNonSlip:
@@ -236,7 +242,7 @@ class Routine(list):
         # This is the beginning of the routine, before the loop starts
         for thisCompon in self:
             if "PsychoJS" in thisCompon.targets:
-                thisCompon.writeRoutineStartCodeJS(buff)
+                writeCode(thisCompon, 'writeRoutineStartCodeJS', buff)
 
         code = ("// keep track of which components have finished\n"
                 "%(name)sComponents = [];\n" % self.params)
@@ -275,11 +281,11 @@ class Routine(list):
         # just 'normal' components
         for comp in self:
             if "PsychoJS" in comp.targets and comp.type != 'Static':
-                comp.writeFrameCodeJS(buff)
+                writeCode(comp, 'writeFrameCodeJS', buff)
         # update static component code last
         for comp in self.getStatics():
             if "PsychoJS" in comp.targets:
-                comp.writeFrameCodeJS(buff)
+                writeCode(comp, 'writeFrameCodeJS', buff)
 
         # are we done yet?
         code = ("\n// check if the Routine should terminate\n"
@@ -334,7 +340,7 @@ class Routine(list):
         # add the EndRoutine code for each component
         for compon in self:
             if "PsychoJS" in compon.targets:
-                compon.writeRoutineEndCodeJS(buff)
+                writeCode(compon, 'writeRoutineEndCodeJS', buff)
 
         # reset routineTimer at the *very end* of all non-nonSlip routines
         if not useNonSlip:
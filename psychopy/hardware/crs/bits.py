@@ -224,6 +224,217 @@ class touch(dict):
         for k,v in value.items(): self[k]=v
 
 
+# the values in the Bits# status reports, as a numpy structured array
+# (DWORD is not reported but is the DIN values as one binary word)
+statusDtype = np.dtype([('sample', int), ('time', float), ('trigIn', int),
+                        ('DIN', int, (10,)), ('DWORD', int),
+                        ('IR', int, (6,)), ('ADC', float, (6,))])
+_statusNFields = 25  # after the '#sample' tag
+_statusDWORDWeights = 2 ** np.arange(10)
+
+
+def parseStatusLines(lines):
+    """Parses Bits# status lines (bytes without the CR), e.g. as read
+    from the serial port, into a structured array of statusDtype.
+
+    All the lines are converted at once, rather than value by value.
+    Lines that aren't status reports are skipped.
+    """
+    rows = []
+    nTouch = 0
+    for line in lines:
+        if line.startswith(b'#sample;'):
+            row = line[8:].rstrip(b';')
+            nSeparators = row.count(b';')
+            if nSeparators > _statusNFields - 1:  # ignore any extra fields
+                row = b';'.join(row.split(b';', _statusNFields)[:-1])
+            if nSeparators >= _statusNFields - 1:
+                rows.append(row)
+        elif line.startswith(b'$touch'):
+            nTouch += 1
+    if nTouch:
+        # We've read screen touch events by mistake.
+        logging.warning("_statusLog found touch"
+                        " data on input so skipping that")
+    values = np.zeros(len(rows), dtype=statusDtype)
+    if rows:
+        # parse all the numbers in one go
+        fields = np.fromstring(b';'.join(rows), sep=';')
+        if fields.size != len(rows) * _statusNFields:
+            # something that isn't a number (raises the ValueError)
+            fields = np.array([row.split(b';') for row in rows])
+        fields = fields.astype(float).reshape(-1, _statusNFields)
+        values['sample'] = fields[:, 0]
+        values['time'] = fields[:, 1]
+        values['trigIn'] = fields[:, 2]
+        values['DIN'] = fields[:, 3:13]
+        values['DWORD'] = values['DIN'].dot(_statusDWORDWeights)
+        values['IR'] = fields[:, 13:19]
+        values['ADC'] = fields[:, 19:25]
+    return values
+
+
+class StatusParser(object):
+    """Parses the stream of status reports from a Bits# as it is read.
+
+    Bytes are added with feed(), which parses the complete lines in one go
+    and keeps any incomplete line until the rest of it is read. The status
+    values so far are a structured array (see statusDtype) in `values`.
+    """
+    def __init__(self):
+        self._buffer = bytearray()
+        self._values = []
+        self.nValues = 0
+
+    def feed(self, data):
+        """Adds bytes read from the Bits# and returns the status values of
+        the lines that they complete
+        """
+        self._buffer.extend(data)
+        end = self._buffer.rfind(b'\r')
+        if end < 0:
+            return np.zeros(0, dtype=statusDtype)
+        lines = bytes(self._buffer[:end]).split(b'\r')
+        del self._buffer[:end + 1]
+        values = parseStatusLines(lines)
+        if len(values):
+            self._values.append(values)
+            self.nValues += len(values)
+        return values
+
+    @property
+    def values(self):
+        """All the status values parsed so far"""
+        if len(self._values) != 1:
+            self._values = [np.concatenate(
+                [np.zeros(0, dtype=statusDtype)] + self._values)]
+        return self._values[0]
+
+
+class statusList(object):
+    """List like sequence of status() objects for the rows of a
+    structured array of status values, which are only made when used.
+    """
+    def __init__(self, values):
+        self.values = values
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        row = self.values[index]
+        value = status()
+        value.sample = int(row['sample'])
+        value.time = float(row['time'])
+        value.trigIn = int(row['trigIn'])
+        value.DIN = row['DIN'].tolist()
+        value.DWORD = int(row['DWORD'])
+        value.IR = row['IR'].tolist()
+        value.ADC = row['ADC'].tolist()
+        return value
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+def _binaryEdges(states, base):
+    """Finds where inputs that are 0 or 1 change state.
+
+    `states` is an array of the input values (nSamples x nInputs) and
+    `base` is their values before the first sample. Values that are not 0
+    or 1 leave the state unchanged. Returns the (down, up) boolean arrays of
+    the samples where an input changed to 0 and to 1.
+    """
+    nSamples, nInputs = states.shape
+    valid = (states == 0) | (states == 1)
+    # the last valid sample up to each sample (0 is the base)
+    last = np.where(valid, np.arange(1, nSamples + 1)[:, None], 0)
+    np.maximum.accumulate(last, axis=0, out=last)
+    held = np.vstack([base, states])
+    previous = held[last[:-1], np.arange(nInputs)]
+    previous = np.vstack([base, previous])
+    changed = valid & (states != previous)
+    # a base that's not 0 or 1 never changes
+    changed &= (base == 0) | (base == 1)
+    return changed & (states == 0), changed & (states == 1)
+
+
+def _analogEdges(values, base, threshold):
+    """Finds the samples where an analog input has moved more than
+    threshold from its value at the previous change (or from base).
+
+    Returns an array of the sample numbers and an array that is True for
+    the changes upwards.
+    """
+    samples = []
+    up = []
+    start = 0
+    window = 64
+    while start < len(values):
+        moved = np.abs(values[start:start + window] - base) > threshold
+        if not moved.any():
+            start += window
+            window *= 2  # few changes, so search further ahead
+            continue
+        n = start + int(np.argmax(moved))
+        samples.append(n)
+        up.append(values[n] > base)
+        base = values[n]
+        start = n + 1
+        window = 64
+    return np.array(samples, dtype=int), np.array(up, dtype=bool)
+
+
+def findStatusEvents(values, DINBase=0b1111111111, IRBase=0b111111,
+                     trigInBase=0, ADCBase=0, threshold=9999.99,
+                     mode=('up', 'down')):
+    """Finds the events (changes of the inputs) in an array of status
+    values (see statusDtype) and returns them as a list of event() objects.
+
+    See BitsSharp.setStatusEventParams for the parameters. The changes are
+    found for all the samples at once and the events are in the order of
+    the samples and then of the inputs (DIN, IR, ADC then trigger).
+    """
+    DINBase = np.array([(DINBase >> i) & 1 for i in range(10)])
+    IRBase = np.array([(IRBase >> i) & 1 for i in range(6)])
+    states = np.hstack([values['DIN'], values['IR'],
+                        values['trigIn'][:, None]])
+    down, up = _binaryEdges(states,
+                            np.hstack([DINBase, IRBase, [trigInBase]]))
+    samples, keys = np.nonzero(down | up)
+    isUp = up[samples, keys]
+    for j in range(6):
+        adcSamples, adcUp = _analogEdges(values['ADC'][:, j], ADCBase,
+                                         threshold)
+        samples = np.concatenate([samples, adcSamples])
+        keys = np.concatenate([keys, np.full(len(adcSamples), 17 + j)])
+        isUp = np.concatenate([isUp, adcUp])
+    # order the inputs within a sample as DIN, IR, ADC then trigger
+    keys = np.where(keys == 16, 22, np.where(keys > 16, keys - 1, keys))
+    reportUp = 'up' in mode or 'Up' in mode
+    reportDown = 'down' in mode or 'Down' in mode
+    report = np.where(isUp, reportUp, reportDown)
+    order = np.lexsort((keys, samples))
+    order = order[report[order]]
+    sources = ['DIN'] * 10 + ['IR'] * 6 + ['ADC'] * 6 + ['Trigger']
+    inputs = list(range(10)) + list(range(6)) + list(range(6)) + [0]
+    times = values['time'][samples[order]].tolist()
+    events = []
+    for key, direction, t in zip(keys[order].tolist(),
+                                 isUp[order].tolist(), times):
+        thisEvent = event()
+        thisEvent.source = sources[key]
+        thisEvent.input = inputs[key]
+        thisEvent.dir = 'up' if direction else 'down'
+        thisEvent.time = t
+        events.append(thisEvent)
+    return events
 
 
 class BitsPlusPlus(object):
@@ -1341,6 +1552,8 @@ class BitsSharp(BitsPlusPlus, serialdevice.SerialDevice):
         # members for storing status logs and reports
         self.statusQ=Queue.Queue(70000) # sets up a queue in which to store bits status events
         self.statusValues=[] # full list of values recorded while logging the Bits# status
+        self.statusArray = np.zeros(0, dtype=statusDtype) # the same as a structured array
+        self._statusParser = StatusParser() # parses the status reports as they are read
         self.status_nValues = 0 #number of status values recorded
         self.statusEvents=[] # list of meaningful events extracted from log
         self.status_nEvents = 0 #number of events recorded
@@ -3931,7 +4144,7 @@ class BitsSharp(BitsPlusPlus, serialdevice.SerialDevice):
         The minimum time is 10ms, less than this results in recording stopping after 
         about 1 status report has been read.
         
-        Puts its results into a Queue.
+        Puts its results into self._statusParser.
         
         This function is normally run in its own thread so actions can be asynchronous.
         """
@@ -3943,54 +4156,24 @@ class BitsSharp(BitsPlusPlus, serialdevice.SerialDevice):
         else:
             oneshot = False
         sT=clock() # start time
-        msg=""
+        # Lines are parsed in batches as they are completed, ignoring the
+        # last (incomplete) line when logging stops.
+        parser = self._statusParser = StatusParser()
         # Continue reading data until sample time is up or status.End is set
         # Note when used in thread statusEnd canbe set from outside this function.
         while (clock() - sT < t) and (self.statusEnd == False):
             smsg=self.read(timeout=0.1)
-            # Compile message strings
             if smsg:
-                msg=msg + smsg.decode("utf-8")
+                parser.feed(smsg)
             # Stop if we have 1 whole status string in one shot mode
-            if len(msg) > self._statusSize and oneshot:
+            if parser.nValues and oneshot:
                 self.statusEnd = True
         # Send stop signal to CRS device to shut it up.
         self._statusDisable() # Send stop signal to CRS device to shut it up.
         self.statusEnd = True # Confirm that data logging has ended.
-        if msg: # If we actually have a message
-            lines = msg.split('\r') # Split message into status lines marked by CR
-            N = len(lines) 
-            values = [status() for  i in range(N-1)] # ignore last line as likely to be error
-            for i in range(N-1): # for each status line
-                v=lines[i].split(';') # split line into compoment parts marked by ;
-                if v[0] == '#sample': # Check we have read a status line
-                    # Now strip out statsu values into a structure.
-                    values[i].sample = int(float(v[1]))
-                    values[i].time = float(v[2])
-                    values[i].trigIn = int(float(v[3]))
-                    dword = 0;
-                    for j in range(10): #10 digital inputs
-                        values[i].DIN[j] = int(float(v[4+j]))
-                        dword=dword + (2**j) * values[i].DIN[j]
-                    values[i].DWORD = dword
-                    for j in range(6): # 6 IR buttons
-                        values[i].IR[j] = int(float(v[14+j]))
-                    for j in range(6): # 6 Analog inputs
-                        values[i].ADC[j] = float(v[20+j])
-                    # Put the structure onto the cue.
-                    self.statusQ.put(values[i])
-                elif v[0] == '$touch': # We've read a screen touch event by mistake.
-                    warning = ("_statusLog found touch" 
-                            " data on input so skipping that")
-                    logging.warning(warning)
-                else: # We've read something we can't interpret.
-                    warning = ("_statusLog found unknown data"
-                            " on input so skipping that")
-
-
 
     def _getStatusLog(self):
-        """ Read the log Queue
+        """ Read the values parsed from the log
         
         Should not be needed by user if start/stopStatusLog or pollStatus 
         are used.
@@ -4002,19 +4185,16 @@ class BitsSharp(BitsPlusPlus, serialdevice.SerialDevice):
         They can be accessed as statusValues[i]['sample'] 
         or statusValues[i].sample, statusValues[i].ADC[j]
         
+        statusArray has the same values as a numpy structured array
+        (see statusDtype), e.g. statusArray['ADC'][:, j].
+        
         Also sets status_nValues to the number of values recorded.
         """
 
-        if not(self.statusQ.empty()):
-            # emply statusValues of correct size
-            self.statusValues = [
-                        status() for  i in range(self.statusQ.qsize())]
-            # Take the status values off the queue
-            for index in range(0,self.statusQ.qsize()):
-                self.statusValues[index] = self.statusQ.get()
-            self.status_nValues = len(self.statusValues)
-        else:
-            self.status_nValues = 0
+        self.statusArray = self._statusParser.values
+        # status() objects are made as they are used
+        self.statusValues = statusList(self.statusArray)
+        self.status_nValues = len(self.statusArray)
 
     def _extractStatusEvents(self): 
         """ Interprets values from status log to pullout any events.
@@ -4044,129 +4224,12 @@ class BitsSharp(BitsPlusPlus, serialdevice.SerialDevice):
         
         """
         
-        DIN_baseAll = [0]*10
-        IR_baseAll = [0]*6
-        ADC_baseAll = [self.statusADCBase]*6
-        # Interpret statusDINBase and statusIRBase statusADCBase into lists.
-        for i in range(10):
-            mask = 2**i
-            if mask & self.statusDINBase:
-                DIN_baseAll[i] = 1
-        for i in range(6):
-            mask = 2**i
-            if mask & self.statusIRBase:
-                IR_baseAll[i] = 1
-       
-        Trig_base = self.statusTrigInBase
-        N = len(self.statusValues)
-
-        self.statusEvents = []
-        nEvents = 0
-        for i in range(N):
-            DIN = self.statusValues[i].DIN 
-            IR = self.statusValues[i].IR
-            Trig = self.statusValues[i].trigIn
-            ADC = self.statusValues[i].ADC
-            # For 10 digital inputs
-            for j in range(10):
-                # Has input changed high to low and is that direction being recorded?
-                if (DIN[j] == 0) and (DIN_baseAll[j] == 1): 
-                    if ('down' in self.statusMode
-                        or 'Down' in self.statusMode):
-                        self.statusEvents.append(event())
-                        self.statusEvents[nEvents].source = 'DIN'
-                        self.statusEvents[nEvents].input = j
-                        self.statusEvents[nEvents].dir = 'down'
-                        self.statusEvents[nEvents].time = self.statusValues[i].time
-                        nEvents = nEvents + 1
-                    DIN_baseAll[j] = 0  # Set to the current input state
-                # Has input changed low to high and is that direction being recorded?
-                if (DIN[j] == 1) and (DIN_baseAll[j] == 0):
-                    if ('up' in self.statusMode
-                        or 'Up' in self.statusMode):
-                        self.statusEvents.append(event())
-                        self.statusEvents[nEvents].source = 'DIN'
-                        self.statusEvents[nEvents].input = j
-                        self.statusEvents[nEvents].dir = 'up'
-                        self.statusEvents[nEvents].time = self.statusValues[i].time
-                        nEvents = nEvents + 1
-                    DIN_baseAll[j] = 1 # Set to the current input state
-                    
-            # For 6 IR buttons
-            for j in range(6):
-                # Has button changed high to low and is that direction being recorded?
-                if (IR[j] == 0) and (IR_baseAll[j] == 1):
-                    if ('down' in self.statusMode
-                        or 'Down' in self.statusMode):
-                        self.statusEvents.append(event())
-                        self.statusEvents[nEvents].source = 'IR'
-                        self.statusEvents[nEvents].input = j
-                        self.statusEvents[nEvents].dir = 'down'
-                        self.statusEvents[nEvents].time = self.statusValues[i].time
-                        nEvents = nEvents + 1
-                    IR_baseAll[j] = 0 # Set to the current input state
-                    
-                # Has button changed low to high and is that direction being recorded?
-                if (IR[j] == 1) and (IR_baseAll[j]==0):
-                    if ('up' in self.statusMode
-                        or 'Up' in self.statusMode):
-                        self.statusEvents.append(event())
-                        self.statusEvents[nEvents].source = 'IR'
-                        self.statusEvents[nEvents].input = j
-                        self.statusEvents[nEvents].dir = 'up'
-                        self.statusEvents[nEvents].time = self.statusValues[i].time
-                        nEvents = nEvents + 1
-                    IR_baseAll[j] = 1 # Set to the current input state
-            for j in range(6):
-                # Has analog input changed high to low and is that direction being recorded?
-                if ADC_baseAll[j] - ADC[j] > self.statusThreshold:
-                    if ('down' in self.statusMode
-                        or 'Down' in self.statusMode):
-                        self.statusEvents.append(event())
-                        self.statusEvents[nEvents].source = 'ADC'
-                        self.statusEvents[nEvents].input = j
-                        self.statusEvents[nEvents].dir = 'down'
-                        self.statusEvents[nEvents].time = self.statusValues[i].time
-                        nEvents = nEvents + 1
-                    ADC_baseAll[j] = ADC[j]
-                    
-                # Has analog input changed low to high and is that direction being recorded?
-                if ADC[j] - ADC_baseAll[j]  > self.statusThreshold:
-                    if ('up' in self.statusMode
-                        or 'Up' in self.statusMode):
-                        self.statusEvents.append(event())
-                        self.statusEvents[nEvents].source = 'ADC'
-                        self.statusEvents[nEvents].input = j
-                        self.statusEvents[nEvents].dir = 'up'
-                        self.statusEvents[nEvents].time = self.statusValues[i].time
-                        nEvents = nEvents + 1
-                    ADC_baseAll[j] = ADC[j]
-                    
-            # Has trigger changed high to low and is that direction being recorded?
-            if Trig == 0 and Trig_base == 1:
-                if ('down' in self.statusMode
-                    or 'Down' in self.statusMode):
-                    self.statusEvents.append(event())
-                    self.statusEvents[nEvents].source='Trigger'
-                    self.statusEvents[nEvents].input=0
-                    self.statusEvents[nEvents].dir='down'
-                    self.statusEvents[nEvents].time=self.statusValues[i].time
-                    nEvents=nEvents+1
-                Trig_base = 0 # Set to the current input state
-                
-            # Has trigger changed low to high and is that direction being recorded?
-            if Trig == 1 and Trig_base == 0:
-                if ('up' in self.statusMode
-                    or 'Up' in self.statusMode):
-                    self.statusEvents.append(event())
-                    self.statusEvents[nEvents].source = 'Trigger'
-                    self.statusEvents[nEvents].input = 0
-                    self.statusEvents[nEvents].dir = 'up'
-                    self.statusEvents[nEvents].time = self.statusValues[i].time
-                    nEvents = nEvents + 1
-                Trig_base = 1 # Set to the current input state
-                
-        self.status_nEvents=nEvents
+        self.statusEvents = findStatusEvents(
+            self.statusArray, DINBase=self.statusDINBase,
+            IRBase=self.statusIRBase, trigInBase=self.statusTrigInBase,
+            ADCBase=self.statusADCBase, threshold=self.statusThreshold,
+            mode=self.statusMode)
+        self.status_nEvents = len(self.statusEvents)
 
 
 
@@ -30,7 +30,6 @@ from ..devices import DeviceEvent, import_device
 from ..devices.computer import Computer
 from ..devices.experiment import MessageEvent, LogEvent
 from ..constants import DeviceConstants, EventConstants
-from psychopy import constants
 
 getTime = Computer.getTime
 
@@ -58,8 +57,14 @@ class DeviceRPC(object):
     def __call__(self, *args, **kwargs):
         # Send the device method call request to the ioHub Server and wait
         # for the method return value sent back from the ioHub Server.
-        r = self.sendToHub(('EXP_DEVICE', 'DEV_RPC', self.device_class,
-                            self.method_name, args, kwargs))
+        r = self.sendToHub(self._request(args, kwargs))
+        return self._result(r, kwargs)
+
+    def _request(self, args, kwargs):
+        return ('EXP_DEVICE', 'DEV_RPC', self.device_class,
+                self.method_name, args, kwargs)
+
+    def _result(self, r, kwargs):
         r = r[1:]
         if len(r) == 1:
             r = r[0]
@@ -100,6 +105,46 @@ class DeviceRPC(object):
         return [conversionMethod(el) for el in r]
 
 
+class DeviceRPCBatch(object):
+    '''
+    Collects iohub device method calls so that they are sent to the iohub
+    server in one request, rather than each waiting for the reply to the
+    last. DeviceRPCBatch instances are created by ioHubConnection.batch().
+    '''
+
+    def __init__(self, hubClient):
+        self.hubClient = hubClient
+        self.results = None
+        self._calls = []
+
+    def call(self, rpc, *args, **kwargs):
+        '''
+        Adds a call of an ioHubDeviceView method (a DeviceRPC) to the batch,
+        returning the index of its result in results.
+        '''
+        self._calls.append((rpc, kwargs, rpc._request(args, kwargs)))
+        return len(self._calls) - 1
+
+    def send(self):
+        '''
+        Sends the calls to the iohub server and returns the list of their
+        results, which is also kept as the results attribute.
+        '''
+        calls, self._calls = self._calls, []
+        replies = self.hubClient._sendBatchToHubServer(
+            [request for _, _, request in calls])
+        self.results = [rpc._result(r, kwargs)
+                        for (rpc, kwargs, _), r in zip(calls, replies)]
+        return self.results
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.send()
+
+
 # pylint: disable=protected-access
 
 class ioHubDeviceView(object):
@@ -360,7 +405,10 @@ class ioHubConnection(object):
         """
         r = None
         if device_label is None:
-            events = self._sendToHubServer(('GET_EVENTS',))[1]
+            if self.udp_client.isReceiving():
+                events = self._popReceivedEvents()
+            else:
+                events = self._sendToHubServer(('GET_EVENTS',))[1]
             if events is None:
                 r = self.allEvents
             else:
@@ -414,6 +462,7 @@ class ioHubConnection(object):
         if device_label.lower() == 'all':
             self.allEvents = []
             self._sendToHubServer(('RPC', 'clearEventBuffer', [True, ]))
+            self.udp_client.events.clear()
             try:
                 self.getDevice('keyboard')._clearLocalEvents()
             except:
@@ -421,6 +470,7 @@ class ioHubConnection(object):
         elif device_label in [None, '', False]:
             self.allEvents = []
             self._sendToHubServer(('RPC', 'clearEventBuffer', [False, ]))
+            self.udp_client.events.clear()
             try:
                 self.getDevice('keyboard')._clearLocalEvents()
             except:
@@ -433,7 +483,8 @@ class ioHubConnection(object):
     def sendMessageEvent(self, text, category='', offset=0.0, sec_time=None):
         """
         Create and send an Experiment MessageEvent to the ioHub Server
-        for storage in the ioDataStore hdf5 file.
+        for storage in the ioDataStore hdf5 file. The message is sent without
+        waiting for a reply from the ioHub Server.
 
         .. note::
             MessageEvents can be thought of as DeviceEvents from the
@@ -461,9 +512,52 @@ class ioHubConnection(object):
                                              category=category,
                                              msg_offset=offset,
                                              sec_time=sec_time)
-        self._sendToHubServer(('EXP_DEVICE', 'EVENT_TX', [msg_evt, ]))
+        self._postToHubServer(('EXP_DEVICE', 'EVENT_TX', [msg_evt, ]))
         return True
 
+    def batch(self):
+        """Returns a DeviceRPCBatch, which sends several iohub device method
+        calls to the ioHub Server in one request. For example::
+
+            with io.batch() as batch:
+                batch.call(io.devices.mouse.getPosition)
+                batch.call(io.devices.keyboard.getEvents, asType='dict')
+            mouse_position, kb_events = batch.results
+
+        Returns:
+            DeviceRPCBatch: the (empty) batch of calls.
+        """
+        return DeviceRPCBatch(self)
+
+    def startEventReceiver(self, poll_interval=0.005):
+        """Starts a background thread which receives all replies from the
+        ioHub Server, and requests new events from it every poll_interval
+        sec. Until stopEventReceiver() is called, getEvents() (for all
+        devices) returns the events already received by the thread instead
+        of waiting for the ioHub Server.
+
+        Args:
+            poll_interval (float): sec.msec between requests for new events.
+
+        Returns:
+            None
+        """
+        self.udp_client.startReceiver(poll_interval)
+
+    def stopEventReceiver(self):
+        """Stops the thread started by startEventReceiver(). Events it
+        received are still returned by the next call to getEvents().
+
+        Returns:
+            None
+        """
+        self.udp_client.stopReceiver()
+        self.allEvents.extend(self._popReceivedEvents())
+
+    def _popReceivedEvents(self):
+        events = self.udp_client.events
+        return [events.popleft() for _ in range(len(events))]
+
     def getHubServerConfig(self):
         """Returns a dict containing the current ioHub Server configuration.
 
@@ -901,8 +995,8 @@ class ioHubConnection(object):
         # >>>>> Create open UDP port to ioHub Server
 
         server_udp_port = self._iohub_server_config.get('udp_port', 9000)
-        from ..net import UDPClientConnection
-        self.udp_client = UDPClientConnection(remote_port=server_udp_port)
+        from ..net import ioHubRequestConnection
+        self.udp_client = ioHubRequestConnection(remote_port=server_udp_port)
         # <<<<< Done Creating open UDP port to ioHub Server
 
         # >>>> Check for orphaned ioHub Process and kill if found...
@@ -1101,26 +1195,7 @@ class ioHubConnection(object):
 
         Return (object): response from the ioHub Server process.
         """
-        try:
-            # send request to host, return is # bytes sent.
-            self.udp_client.sendTo(tx_data)
-        except Exception as e: # pylint: disable=broad-except
-            import traceback
-            traceback.print_exc()
-            self.shutdown()
-            raise e
-
-        try:
-            # wait for response from ioHub server, which will be the
-            # result data and iohub server address (ip4,port).
-            result = self.udp_client.receive()
-            if result:
-                result, _ = result
-        except Exception as e: # pylint: disable=broad-except
-            import traceback
-            traceback.print_exc()
-            self.shutdown()
-            raise e
+        result = self._hubRequest(self.udp_client.request, tx_data)
 
         # check if the reply is an error or not. If it is, raise the error.
         # TODO: This is not really working as planned, in part because iohub
@@ -1130,21 +1205,47 @@ class ioHubConnection(object):
             raise ioHubError(result)
 
         # Otherwise return the result
-        if constants.PY3 and not result is None:
-            if isinstance(result, list):
-                for ind, items in enumerate(result):
-                    if isinstance(items, list) and not items is None:
-                        for nextInd, nested in enumerate(items):
-                            if type(nested) not in [dict, list, int, float, bool] and not nested is None :
-                                result[ind][nextInd] = str(nested, 'utf-8')
-                    elif type(items) not in [dict, list, int, float, bool] and not items is None:
-                        result[ind] = str(items, 'utf-8')
-                    elif type(items) is dict:
-                        result[ind] = {str(keys, 'utf-8'): vals for keys, vals in items.items()}
-            else:
-                result = str(result, 'utf-8')
         return result
 
+    def _sendBatchToHubServer(self, requests):
+        """Sends a list of requests to the iohub server in one packet and
+        blocks until the list of their replies is received.
+
+        Args:
+            requests (list): requests, each like the tx_data of
+                             _sendToHubServer.
+
+        Return (list): response from the ioHub Server to each request.
+        """
+        results = self._hubRequest(self.udp_client.batch, requests)
+        if results is None:
+            raise ioHubError('No reply from the ioHub Server to a batch of '
+                             'requests.', requests)
+        for result in results:
+            if self._isErrorReply(result):
+                raise ioHubError(result)
+        return results
+
+    def _postToHubServer(self, *requests):
+        """Sends requests to the iohub server in one packet, without waiting
+        for a reply.
+
+        Args:
+            requests (tuple): data to send to iohub server
+
+        Return: None
+        """
+        self._hubRequest(self.udp_client.post, requests)
+
+    def _hubRequest(self, send, tx_data):
+        try:
+            return send(tx_data)
+        except Exception as e: # pylint: disable=broad-except
+            import traceback
+            traceback.print_exc()
+            self.shutdown()
+            raise e
+
     def _sendExperimentInfo(self, experimentInfoDict):
         """Sends the experiment info from the experiment config file to the
         ioHub Server, which passes it to the ioDataStore, determines if the
@@ -5,7 +5,6 @@
 from __future__ import division, absolute_import, print_function
 
 from builtins import str
-from past.builtins import unicode
 from collections import deque
 import time
 from ..client import ioHubDeviceView, ioEvent, DeviceRPC
@@ -20,6 +19,15 @@ getTime = Computer.getTime
 kb_cls_attr_names = KeyboardInputEvent.CLASS_ATTRIBUTE_NAMES
 kb_mod_codes2labels = KeyboardConstants._modifierCodes2Labels
 
+
+def _asUnicode(value):
+    # strings are sent by the iohub server as text, except those encoded
+    # by the keyboard device (e.g. the char of an event)
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    return value
+
+
 class KeyboardEvent(ioEvent):
     """
     Base class for KeyboardPress and KeyboardRelease events.
@@ -50,7 +58,7 @@ class KeyboardEvent(ioEvent):
 
     @property
     def key(self):
-        return unicode(self._key, 'utf-8')
+        return _asUnicode(self._key)
 
     @property
     def char(self):
@@ -61,7 +69,7 @@ class KeyboardEvent(ioEvent):
         :return: unicode, '' if no char value is available for the event.
 
         """
-        return unicode(self._char, 'utf-8')
+        return _asUnicode(self._char)
 
     @property
     def modifiers(self):
@@ -89,9 +97,7 @@ class KeyboardEvent(ioEvent):
 
     def __str__(self):
         return '%s, key: %s char: %s, modifiers: %s' % (
-            ioEvent.__str__(self), unicode(self.key, 'utf-8'),
-            unicode(self.char, 'utf-8'),
-            unicode(self.modifiers, 'utf-8'))
+            ioEvent.__str__(self), self.key, self.char, self.modifiers)
 
     def __eq__(self, v):
         if isinstance(v, KeyboardEvent):
@@ -214,7 +220,7 @@ class Keyboard(ioHubDeviceView):
         :return: dict
         """
         self._syncDeviceState()
-        self._pressed_keys = {unicode(keys, 'utf-8'): vals for keys, vals in self._pressed_keys.items()}
+        self._pressed_keys = {_asUnicode(keys): vals for keys, vals in self._pressed_keys.items()}
         return self._pressed_keys
 
     @property
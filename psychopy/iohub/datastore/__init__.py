@@ -14,7 +14,7 @@ from builtins import object
 from pkg_resources import parse_version
 from ..server import DeviceEvent
 from ..constants import EventConstants
-from ..errors import ioHubError, printExceptionDetailsToStdErr, print2err
+from ..errors import printExceptionDetailsToStdErr, print2err
 
 
 import tables
@@ -418,11 +418,13 @@ class DataStoreFile(object):
             np_array = np.array(np_events, dtype=eventClass.NUMPY_DTYPE)
             #ioHub.print2err('np_array:',np_array)
             etable.append(np_array)
-            self.bufferedFlush(len(np_events))
-        except ioHubError as e:
-            print2err(e)
         except Exception:
-            printExceptionDetailsToStdErr()
+            # save the events one at a time, so that only the ones that
+            # fail are lost (and reported)
+            for event in events:
+                self._handleEvent(event)
+            return
+        self.bufferedFlush(len(np_events))
 
     def bufferedFlush(self,eventCount=1):
         """
@@ -17,6 +17,12 @@ except ImportError:
     print2err("iohub.datastore.pandas.interestarea requires 'shapely' package.")
 
 from weakref import proxy
+import numpy as np
+
+try:
+    from shapely.vectorized import contains as _shapely_contains
+except ImportError:
+    _shapely_contains = None
 
 
 class Polygon(shapely.geometry.Polygon):
@@ -27,7 +33,7 @@ class Polygon(shapely.geometry.Polygon):
         self.__class__._next_id += 1
         self._name = name
         if name is None:
-            self.name = self.__class__.__name__ + '_' + str(self._ia_id)
+            self._name = self.__class__.__name__ + '_' + str(self._ia_id)
         self._last_target_df = None
         shapely.geometry.Polygon.__init__(self, points)
 
@@ -43,15 +49,42 @@ class Polygon(shapely.geometry.Polygon):
         return shapely.geometry.Polygon.contains(
             self, spy.geometry.Point(v[0], v[1]))
 
+    def contains_points(self, x, y):
+        """Return a bool array that is True where the point (x[i], y[i]) is
+        within the interest area. x and y are arrays (or DataFrame columns)
+        of the same length.
+        """
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        minx, miny, maxx, maxy = self.bounds
+        inside = (x > minx) & (x < maxx) & (y > miny) & (y < maxy)
+        candidates = np.flatnonzero(inside)
+        if len(candidates):
+            inside[candidates] = self._polygon_contains(x[candidates],
+                                                        y[candidates])
+        return inside
+
+    def _polygon_contains(self, x, y):
+        if _shapely_contains is not None:
+            # tests the points against a prepared geometry
+            return _shapely_contains(self, x, y)
+        from matplotlib.path import Path
+        points = np.column_stack((x, y))
+        inside = Path(np.asarray(self.exterior.coords)).contains_points(
+            points)
+        for hole in self.interiors:
+            inside &= ~Path(np.asarray(hole.coords)).contains_points(points)
+        return inside
+
     def filter(self, target_df, x_col='x_position', y_col='y_position'):
         if self._last_target_df is not target_df:
             self._last_target_df = proxy(target_df)
             self._ia_df = None
-            self._ia_df = target_df[
-                target_df[[x_col, y_col]].apply(self.contains, axis=1)]
+            inside = self.contains_points(target_df[x_col].values,
+                                          target_df[y_col].values)
+            self._ia_df = target_df[inside].copy()
             self._ia_df['ia_name'] = self.name
             self._ia_df['ia_id'] = self.ia_id
-            self._ia_df['ia_name'] = self.name
             self._ia_df['ia_id_num'] = range(1, len(self._ia_df) + 1)
         return self._ia_df
 
@@ -65,6 +98,13 @@ class Circle(Polygon):
             radius,
             resolution=16)
         Polygon.__init__(self, name, point.exterior.coords)
+        self._center = tuple(center_point)
+        self._radius = radius
+
+    def contains_points(self, x, y):
+        dx = np.asarray(x, dtype=np.float64) - self._center[0]
+        dy = np.asarray(y, dtype=np.float64) - self._center[1]
+        return dx * dx + dy * dy < self._radius * self._radius
 
 
 class Ellipse(Polygon):
@@ -91,6 +131,18 @@ class Ellipse(Polygon):
         point = spy.affinity.rotate(
             point, angle, origin='center', use_radians=use_radians)
         Polygon.__init__(self, name, point.exterior.coords)
+        self._center = tuple(center_point)
+        self._axes = (min_axis, max_axis)  # x and y axis before rotation
+        self._angle = angle if use_radians else np.deg2rad(angle)
+
+    def contains_points(self, x, y):
+        dx = np.asarray(x, dtype=np.float64) - self._center[0]
+        dy = np.asarray(y, dtype=np.float64) - self._center[1]
+        # rotate the points back by angle, so the ellipse axes are x and y
+        cos, sin = np.cos(self._angle), np.sin(self._angle)
+        u = (dx * cos + dy * sin) / self._axes[0]
+        v = (dy * cos - dx * sin) / self._axes[1]
+        return u * u + v * v < 1.0
 
 
 class Rectangle(Polygon):
@@ -100,3 +152,45 @@ class Rectangle(Polygon):
         if not ccw:
             coords = coords[::-1]
         Polygon.__init__(self, name, coords)
+        self._xrange = min(minx, maxx), max(minx, maxx)
+        self._yrange = min(miny, maxy), max(miny, maxy)
+
+    def contains_points(self, x, y):
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        return ((x > self._xrange[0]) & (x < self._xrange[1]) &
+                (y > self._yrange[0]) & (y < self._yrange[1]))
+
+
+def label_points(areas, x, y):
+    """Return an int array with the index (in areas) of the interest area
+    that contains each point (x[i], y[i]), or -1 for points outside all of
+    them. Where interest areas overlap, the first one in areas is used.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    labels = np.full(len(x), -1, dtype=np.intp)
+    unlabelled = np.arange(len(x))
+    for i, area in enumerate(areas):
+        if len(unlabelled) == 0:
+            break
+        inside = area.contains_points(x[unlabelled], y[unlabelled])
+        labels[unlabelled[inside]] = i
+        unlabelled = unlabelled[~inside]
+    return labels
+
+
+def label(areas, target_df, x_col='x_position', y_col='y_position'):
+    """Return a copy of target_df with ia_name and ia_id columns giving the
+    interest area (of areas) each row's position is within; ia_name is None
+    and ia_id is 0 for rows that are not within any of them.
+    """
+    labels = label_points(areas, target_df[x_col].values,
+                          target_df[y_col].values)
+    # label -1 picks the last item, i.e. None / 0
+    names = np.array([a.name for a in areas] + [None], dtype=object)
+    ids = np.array([a.ia_id for a in areas] + [0])
+    df = target_df.copy()
+    df['ia_name'] = names[labels]
+    df['ia_id'] = ids[labels]
+    return df
@@ -37,58 +37,77 @@ class InterestPeriodDefinition(object):
         return self._ipid
 
     def find(self, target, ip_cols=None):
-        df = target[:]
-        df['ip_id_num'] = np.nan
-        df['ip_id'] = self.ipid
-        df['ip_name'] = self.name
-        df = df.groupby(level=[0, 1], group_keys=False).apply(self.__find)
+        """Return the rows of target with a time within (start_time <= time
+        <= end_time) one of the interest periods, with the ip_id_num, ip_id
+        and ip_name of the interest period added. A row that is within
+        several (overlapping) interest periods is returned once for each.
+        """
+        ips = self.ip_df
+        starts = ips['start_time'].values
+        ends = ips['end_time'].values
+        times = target['time'].values
+        rows, ip_rows = [], []
+        for group, ip_pos in self._group_positions(target):
+            # the target rows of the group in time order
+            group = group[np.argsort(times[group], kind='mergesort')]
+            group_times = times[group]
+            first = np.searchsorted(group_times, starts[ip_pos], 'left')
+            last = np.searchsorted(group_times, ends[ip_pos], 'right')
+            counts = np.maximum(last - first, 0)
+            rows.append(group[_ranges(first, counts)])
+            ip_rows.append(np.repeat(ip_pos, counts))
+        df = self._ip_rows(target, rows, ip_rows)
 
         if ip_cols is not None:
             df = self._merge_ip_cols(df, ip_cols)
 
         return df
 
-    def __find(self, target_group):
-        group_id = target_group.index[0]
-        group_ips = self.ip_df.ix[group_id]
-        if len(group_ips) > 0:
-            overlapping = []
-            for index, ip in group_ips.iterrows():
-                in_ip = ((target_group['time'] >= ip['start_time']) &
-                         (target_group['time'] <= ip['end_time']))
-                target_in_ip = target_group[in_ip]
-                target_in_ip['ip_id_num'] = ip['ip_id_num']
-                overlapping += [target_in_ip]
-            target_filtered = pd.concat(overlapping)
-        else:
-            target_filtered = target_group[[False] * len(target_group)]
-        return target_filtered
-
     def filter(self, target, ip_cols=None):
-        df = target[:]
-        df['ip_id'] = self.ipid
-        df['ip_name'] = self.name
-        df = target.groupby(
-            level=[
-                0, 1], group_keys=False).apply(
-            self.__filter)
+        """Return the rows of target with a time within (start_time < time
+        <= end_time) one of the interest periods, with the ip_id_num, ip_id
+        and ip_name of the interest period added. The interest periods of a
+        session must not overlap.
+
+        HT http://stackoverflow.com/a/21370058/2506078
+        """
+        ips = self.ip_df
+        starts = ips['start_time'].values
+        ends = ips['end_time'].values
+        times = target['time'].values
+        rows, ip_rows = [], []
+        for group, ip_pos in self._group_positions(target):
+            ip_pos = ip_pos[np.argsort(starts[ip_pos], kind='mergesort')]
+            group_times = times[group]
+            start_idx = np.searchsorted(starts[ip_pos], group_times) - 1
+            end_idx = np.searchsorted(ends[ip_pos], group_times)
+            mask = (start_idx == end_idx)
+            rows.append(group[mask])
+            ip_rows.append(ip_pos[start_idx[mask]])
+        df = self._ip_rows(target, rows, ip_rows)
 
         if ip_cols is not None:
             df = self._merge_ip_cols(df, ip_cols)
 
         return df
 
-    def __filter(self, group):
-        """
-        HT http://stackoverflow.com/a/21370058/2506078
-        """
-        ips = self.ip_df.ix[group.index[0]]
-        start_idx = np.searchsorted(ips['start_time'], group['time']) - 1
-        end_idx = np.searchsorted(ips['end_time'], group['time'])
-        mask = (start_idx == end_idx)
-        group['ip_id_num'] = np.nan
-        group['ip_id_num'][mask] = start_idx
-        return group[mask]
+    def _group_positions(self, target):
+        """(target row positions, ip_df row positions) for each experiment_id,
+        session_id group of target that has interest periods."""
+        ip_groups = self.ip_df.groupby(level=[0, 1]).indices
+        target_groups = target.groupby(level=[0, 1]).indices
+        for key in sorted(target_groups):
+            if key in ip_groups:
+                yield target_groups[key], ip_groups[key]
+
+    def _ip_rows(self, target, rows, ip_rows):
+        rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.intp)
+        ip_rows = np.concatenate(ip_rows) if ip_rows else rows
+        df = target.iloc[rows].copy()
+        df['ip_id_num'] = self.ip_df['ip_id_num'].values[ip_rows]
+        df['ip_id'] = self.ipid
+        df['ip_name'] = self.name
+        return df
 
     def _merge_ip_cols(self, target, cols):
         if not isinstance(cols, dict):
@@ -123,14 +142,13 @@ class InterestPeriodDefinition(object):
 
         return matches
 
-    def __enumerate_ips(self, group):
-        group['ip_id_num'] = range(len(group))
-        return group
-
     def _ip_zipper(self, start, end, temp_index='ip_id_num'):
         # TODO: make sure the two dfs "zip" nicely
-        _start = start.groupby(level=[0, 1]).apply(self.__enumerate_ips)
-        _end = end.groupby(level=[0, 1]).apply(self.__enumerate_ips)
+        # number the starts and the ends 0..n-1 within each session
+        _start = start.copy()
+        _start[temp_index] = start.groupby(level=[0, 1]).cumcount().values
+        _end = end.copy()
+        _end[temp_index] = end.groupby(level=[0, 1]).cumcount().values
 
         _start.set_index(temp_index, append=True, inplace=True)
         _end.set_index(temp_index, append=True, inplace=True)
@@ -138,6 +156,12 @@ class InterestPeriodDefinition(object):
         _all = pd.merge(_start, _end, left_index=True, right_index=True)
         return _all.reset_index(temp_index)
 
+
+def _ranges(starts, counts):
+    """Concatenation of the ranges starts[i]..starts[i] + counts[i] - 1"""
+    offsets = np.cumsum(counts) - counts
+    return np.arange(counts.sum()) + np.repeat(starts - offsets, counts)
+
 #############################################
 
 
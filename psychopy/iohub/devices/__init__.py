@@ -12,7 +12,6 @@ import collections
 import copy
 import os
 from collections import deque
-from operator import itemgetter
 
 import numpy as np
 
@@ -288,7 +287,7 @@ class Device(ioObject):
         ioObject.__init__(self, *args, **kwargs)
 
         self._is_reporting_events = kwargs.get('auto_report_events', False)
-        self._iohub_event_buffer = dict()
+        self._iohub_event_buffer = DeviceEventStore(self.event_buffer_length)
         self._event_listeners = dict()
         self._configuration = kwargs
         self._last_poll_time = 0
@@ -358,35 +357,11 @@ class Device(ioObject):
 
         filter_id = kwargs.get('filter_id', None)
 
-        currentEvents = []
-        if eventTypeID:
-            currentEvents = list(self._iohub_event_buffer.get(eventTypeID, []))
-
-            if filter_id:
-                currentEvents = [
-                    e for e in currentEvents if e[
-                        DeviceEvent.EVENT_FILTER_ID_INDEX] == filter_id]
-
-            if clearEvents is True and len(currentEvents) > 0:
-                self.clearEvents(
-                    eventTypeID,
-                    filter_id=filter_id,
-                    call_proc_events=False)
-        else:
-            if filter_id:
-                [currentEvents.extend([fe for fe in l if fe[
-                                      DeviceEvent.EVENT_FILTER_ID_INDEX] == filter_id]) for l in list(self._iohub_event_buffer.values())]
-            else:
-                [currentEvents.extend(l)
-                 for l in list(self._iohub_event_buffer.values())]
-
-            if clearEvents is True and len(currentEvents) > 0:
-                self.clearEvents(filter_id=filter_id, call_proc_events=False)
-
-        if len(currentEvents) > 0:
-            currentEvents = sorted(
-                currentEvents, key=itemgetter(
-                    DeviceEvent.EVENT_HUB_TIME_INDEX))
+        currentEvents = self._iohub_event_buffer.getEvents(eventTypeID,
+                                                           filter_id)
+        if clearEvents is True and len(currentEvents) > 0:
+            self.clearEvents(eventTypeID, filter_id=filter_id,
+                             call_proc_events=False)
         return currentEvents
 
     def clearEvents(
@@ -411,23 +386,7 @@ class Device(ioObject):
         if call_proc_events:
             self._iohub_server.processDeviceEvents()
 
-        if event_type:
-            if filter_id:
-                event_que = self._iohub_event_buffer[event_type]
-                newque = deque([e for e in event_que if e[
-                               DeviceEvent.EVENT_FILTER_ID_INDEX] != filter_id], maxlen=self.event_buffer_length)
-                self._iohub_event_buffer[event_type] = newque
-            else:
-                self._iohub_event_buffer.setdefault(
-                    event_type, deque(maxlen=self.event_buffer_length)).clear()
-        else:
-            if filter_id:
-                for event_type, event_deque in list(self._iohub_event_buffer.items()):
-                    newque = deque([e for e in event_deque if e[
-                                   DeviceEvent.EVENT_FILTER_ID_INDEX] != filter_id], maxlen=self.event_buffer_length)
-                    self._iohub_event_buffer[event_type] = newque
-            else:
-                self._iohub_event_buffer.clear()
+        self._iohub_event_buffer.clear(event_type, filter_id)
 
     def enableEventReporting(self, enabled=True):
         """
@@ -544,22 +503,26 @@ class Device(ioObject):
             f.enable = yes
 
     def _handleEvent(self, e):
-        event_type_id = e[DeviceEvent.EVENT_TYPE_ID_INDEX]
-        self._iohub_event_buffer.setdefault(
-            event_type_id, deque(
-                maxlen=self.event_buffer_length)).append(e)
+        Device._handleEvents(self, [e, ])
+
+    def _handleEvents(self, events):
+        """Add a list of events, all of the same type, to the device event
+        buffer and to any filters bound to the device."""
+        event_type_id = events[0][DeviceEvent.EVENT_TYPE_ID_INDEX]
+        self._iohub_event_buffer.add(event_type_id, events)
 
-        # Add the event to any filters bound to the device which
+        # Add the events to any filters bound to the device which
         # list wanting the event's type and events filter_id
-        input_evt_filter_id = e[DeviceEvent.EVENT_FILTER_ID_INDEX]
         for event_filter in list(self._filters.values()):
             if event_filter.enable is True:
                 current_filter_id = event_filter.filter_id
-                if current_filter_id != input_evt_filter_id:
-                    # stops circular event processing
-                    evt_filter_ids = event_filter.input_event_types.get(
-                        event_type_id, [])
-                    if input_evt_filter_id in evt_filter_ids:
+                evt_filter_ids = event_filter.input_event_types.get(
+                    event_type_id, [])
+                for e in events:
+                    input_evt_filter_id = e[DeviceEvent.EVENT_FILTER_ID_INDEX]
+                    # current_filter_id check stops circular event processing
+                    if (current_filter_id != input_evt_filter_id and
+                            input_evt_filter_id in evt_filter_ids):
                         event_filter._addInputEvent(copy.deepcopy(e))
 
     def _getNativeEventBuffer(self):
@@ -585,7 +548,7 @@ class Device(ioObject):
         result_dict = {}
         self._iohub_server.processDeviceEvents()
         events = {key: tuple(value)
-                  for key, value in list(self._iohub_event_buffer.items())}
+                  for key, value in self._iohub_event_buffer.items()}
         result_dict['events'] = events
         if clear_events:
             self.clearEvents(call_proc_events=False)
@@ -979,6 +942,7 @@ class DeviceEvent(ioObject):
 
 
 import sys
+from .eventstore import DeviceEventStore
 
 
 def import_device(module_path, device_class_name):
@@ -8,6 +8,7 @@ from __future__ import print_function
 from past.builtins import basestring
 from builtins import object
 import numpy as np
+from numpy.lib.stride_tricks import as_strided
 from collections import deque
 
 from ..util import NumPyRingBuffer
@@ -36,6 +37,12 @@ class DeviceEventFilter(object):
     event_id_index = DeviceEvent.EVENT_ID_INDEX
     event_time_index = DeviceEvent.EVENT_HUB_TIME_INDEX
 
+    # If True, process() is called once for each batch of events taken from
+    # the device's native event buffer by the iohub server, rather than once
+    # for every input event, so that a filter can process whole blocks of
+    # events (e.g. with MovingWindowFilter.add_block).
+    process_blocks = False
+
     def __init__(self, **kwargs):
         # _parent_device_type filled in by iohub
         self._parent_device_type = None
@@ -117,7 +124,15 @@ class DeviceEventFilter(object):
     def _addInputEvent(self, evt):
         """Takes event from parent device for processing."""
         self._input_events.append(evt)
-        self.process()
+        if not self.process_blocks:
+            self.process()
+
+    def _processInputBlock(self):
+        """Called by the the iohub Server after each batch of device events
+        has been handled; processes the input events of filters that use
+        process_blocks."""
+        if self.process_blocks and self._input_events:
+            self.process()
 
     def _removeOutputEvents(self):
         """Called by the the iohub Server when processing device events."""
@@ -144,7 +159,7 @@ class MovingWindowFilter(object):
 
     The base class implements a moving window averaging filter, no weights.
     To change the filter used, extend this class and replace the filteredValue
-    method.
+    method (and the filteredValues method, which is used by add_block).
 
     """
 
@@ -193,6 +208,13 @@ class MovingWindowFilter(object):
         """
         return self._filtering_buffer.mean()
 
+    def filteredValues(self, windows):
+        """Returns the filtered value of each row of the 2D array windows (one
+        window of values per row), as filteredValue() would for each of them.
+        Used by add_block.
+        """
+        return windows.mean(axis=1)
+
     def add(self, event):
         """Add the given iohub event ( in list form ) to the moving window. The
         value of the specified event attribute when the filter was created is
@@ -217,6 +239,50 @@ class MovingWindowFilter(object):
             if self.isFull():
                 return None, self.filteredValue()
 
+    def add_block(self, events):
+        """Add a sequence of iohub events (in list form), or a sequence / array
+        of values, to the moving window in one go. Gives the same results as
+        calling add() for each of them, but the filtered values are
+        calculated for all the windows at once.
+
+        Returns a tuple (filtered_events, filtered_values): the events that
+        add() would have returned, in order, and a numpy array of their
+        filtered values. filtered_events is None if values were added.
+        """
+        if len(events) and isinstance(events[0], (list, tuple)):
+            events = list(events)
+            values = [e[self._event_field_index] for e in events]
+        else:
+            values, events = events, None
+        values = np.asarray(values, dtype=self._filtering_buffer._dtype)
+        length = self._filtering_buffer.max_size
+        history = _bufferedValues(self._filtering_buffer)[-(length - 1):]
+        if length == 1:
+            history = history[:0]
+        all_values = np.concatenate((history, values))
+
+        if len(all_values) >= length:
+            filtered_values = self.filteredValues(
+                _windowView(all_values, length))
+        else:
+            filtered_values = all_values[:0]
+
+        filtered_events = None
+        if events is not None:
+            all_events = list(self._events)[len(self._events) -
+                                            len(history):] + events
+            filtered_events = all_events[
+                self._active_index:
+                self._active_index + len(filtered_values)]
+            if self._inplace:
+                for e, v in zip(filtered_events, filtered_values):
+                    e[self._event_field_index] = v
+            self._events.extend(events[-length:])
+
+        for v in values[-length:]:
+            self._filtering_buffer.append(v)
+        return filtered_events, filtered_values
+
     def isFull(self):
         return self._filtering_buffer.isFull()
 
@@ -224,6 +290,21 @@ class MovingWindowFilter(object):
         self._filtering_buffer.clear()
         if self._events:
             self._events.clear()
+
+
+def _bufferedValues(ring_buffer):
+    """The values in a NumPyRingBuffer, oldest first (fewer than max_size if
+    it is not full yet)."""
+    return ring_buffer.getElements()[ring_buffer.max_size - len(ring_buffer):]
+
+
+def _windowView(values, length):
+    """A (len(values) - length + 1, length) view of the contiguous 1D array
+    values, with one moving window position per row."""
+    values = np.ascontiguousarray(values)
+    return as_strided(values, shape=(len(values) - length + 1, length),
+                      strides=(values.strides[0], values.strides[0]))
+
 # ------
 
 
@@ -242,6 +323,9 @@ class PassThroughFilter(MovingWindowFilter):
     def filteredValue(self):
         return self._filtering_buffer[0]
 
+    def filteredValues(self, windows):
+        return windows[:, 0]
+
 # ------
 
 
@@ -258,6 +342,9 @@ class MedianFilter(MovingWindowFilter):
     def filteredValue(self):
         return np.median(self._filtering_buffer.getElements())
 
+    def filteredValues(self, windows):
+        return np.median(windows, axis=1)
+
 # ------
 
 
@@ -283,7 +370,12 @@ class WeightedAverageFilter(MovingWindowFilter):
         return np.convolve(
             self._filtering_buffer.getElements(),
             self._weights,
-            'valid')
+            'valid')[0]
+
+    def filteredValues(self, windows):
+        # the windows overlap, so convolve the values they are made from
+        values = np.concatenate((windows[0], windows[1:, -1]))
+        return np.convolve(values, self._weights, 'valid')
 
 
 # ------
@@ -298,39 +390,92 @@ class StampFilter(MovingWindowFilter):
     level arg indicates how many iterations of the Stampe filter should be
     applied before starting to return filtered data. Default = 1.
 
-    If levels = 2, then the filter would use data returned from a sub filter
-    instance of the Stampe filter., Etc.
+    If levels = 2, then the second iteration filters the values returned by
+    the first, etc. Each level delays the filtered values by one sample.
     """
 
     def __init__(self, **kwargs):
-        level = kwargs.get('level')
+        level = kwargs.get('level') or 1
         self._level = level
         kwargs['knot_pos'] = 'center'
         kwargs['length'] = 3
-        self.sub_filter = None
         MovingWindowFilter.__init__(self, **kwargs)
-        if level > 1:
-            level = level - 1
-            kwargs['inplace'] = False
-            kwargs['level'] = level
-            self.sub_filter = StampFilter(**kwargs)
+        # one window per level, each filled with the output of the last
+        self._level_buffers = [self._filtering_buffer] + [
+            NumPyRingBuffer(3) for _ in range(level - 1)]
+        if self._events is not None:
+            # the event of a filtered value is level samples old
+            self._events = deque(maxlen=level + 1)
+
+    @staticmethod
+    def _stampValues(e1, e2, e3):
+        """v2, or (v1 + v3) / 2 where v2 is a peak or a trough (works for
+        scalars and arrays)"""
+        non_monotonic = ((e2 > e1) & (e2 > e3)) | ((e2 < e1) & (e2 < e3))
+        return np.where(non_monotonic, (e1 + e3) / 2.0, e2)
 
     def filteredValue(self):
-        if self.sub_filter:
-            return self.sub_filter.filteredValue()
+        e1, e2, e3 = self._level_buffers[-1][0:3]
+        return self._stampValues(e1, e2, e3)[()]
 
-        e1, e2, e3 = self._filtering_buffer[0:3]
-        if not(e1 < e2 and e2 < e3) or not (e3 < e2 and e2 < e1):
-            return (e1 + e3) / 2.0
-        return e2
+    def filteredValues(self, windows):
+        return self._stampValues(windows[:, 0], windows[:, 1], windows[:, 2])
 
     def add(self, event):
-        if self.sub_filter:
-            sub_result = self.sub_filter.add(event)
-            if sub_result:
-                self._filtering_buffer.append(sub_result[1])
-                self._events.append(event)
-        return MovingWindowFilter.add(self, event)
+        if isinstance(event, (list, tuple)):
+            value = event[self._event_field_index]
+            self._events.append(event)
+        else:
+            value = event
+        for buff in self._level_buffers:
+            buff.append(value)
+            if not buff.isFull():
+                return None
+            e1, e2, e3 = buff[0:3]
+            value = self._stampValues(e1, e2, e3)[()]
+        if isinstance(event, (list, tuple)):
+            event = self._events[0]
+            if self._inplace:
+                event[self._event_field_index] = value
+            return event, value
+        return None, value
+
+    def add_block(self, events):
+        if len(events) and isinstance(events[0], (list, tuple)):
+            events = list(events)
+            values = [e[self._event_field_index] for e in events]
+        else:
+            values, events = events, None
+        values = np.asarray(values, dtype=self._filtering_buffer._dtype)
+        for buff in self._level_buffers:
+            all_values = np.concatenate((_bufferedValues(buff)[-2:], values))
+            for v in values[-3:]:
+                buff.append(v)
+            if len(all_values) < 3:
+                values = all_values[:0]
+                break
+            values = self.filteredValues(
+                _windowView(all_values, 3)).astype(all_values.dtype)
+
+        filtered_events = None
+        if events is not None:
+            # the last value is for the event level samples before the last
+            all_events = list(self._events) + events
+            end = len(all_events) - self._level
+            filtered_events = all_events[end - len(values):end]
+            if self._inplace:
+                for e, v in zip(filtered_events, values):
+                    e[self._event_field_index] = v
+            self._events.extend(events[-(self._level + 1):])
+        return filtered_events, values
+
+    def isFull(self):
+        return self._level_buffers[-1].isFull()
+
+    def clear(self):
+        MovingWindowFilter.clear(self)
+        for buff in self._level_buffers:
+            buff.clear()
 
 # ------
 
@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+# Part of the psychopy.iohub library.
+# Copyright (C) 2012-2016 iSolver Software Solutions
+# Distributed under the terms of the GNU General Public License (GPL).
+"""Time ordered event buffers used by ioHub Devices for their events.
+
+Each event type has its own EventTypeBuffer: a preallocated numpy structured
+array holding the hub time, filter_id and the event itself (in list form)
+for each buffered event, kept in time order. Selecting events by filter_id
+or time range is then done with numpy masks / binary searches, and the
+events of several types are merged into time order (a k-way merge of the
+already sorted buffers) rather than sorted on every getEvents() call.
+"""
+from __future__ import division, absolute_import
+
+from builtins import object
+from collections import OrderedDict
+import numpy as np
+
+from . import DeviceEvent
+
+EVENT_TIME_INDEX = DeviceEvent.EVENT_HUB_TIME_INDEX
+EVENT_FILTER_ID_INDEX = DeviceEvent.EVENT_FILTER_ID_INDEX
+
+BUFFER_DTYPE = np.dtype([('time', np.float64),
+                         ('filter_id', np.int32),
+                         ('event', object)])
+
+
+class EventTypeBuffer(object):
+    """Buffer of the events of one type, in hub time order.
+
+    Holds up to maxlen events (the oldest ones are dropped when it is full),
+    or any number of events if maxlen is None (like a deque).
+    """
+
+    initial_size = 256  # used if maxlen is None
+
+    def __init__(self, maxlen=None):
+        self.maxlen = maxlen
+        size = maxlen if maxlen else self.initial_size
+        # twice the size, so that the buffer is only compacted every
+        # size events or so
+        self._data = np.zeros(2 * size, dtype=BUFFER_DTYPE)
+        self._start = 0
+        self._end = 0
+
+    def __len__(self):
+        return self._end - self._start
+
+    @property
+    def data(self):
+        """Structured array (view) of the buffered events, in time order."""
+        return self._data[self._start:self._end]
+
+    def _reserve(self, n):
+        """Make room for n more events at the end of the buffer"""
+        count = len(self)
+        if self._end + n <= len(self._data):
+            return
+        size = len(self._data)
+        while count + n > size:
+            size *= 2
+        data = self._data if size == len(self._data) else np.zeros(
+            size, dtype=BUFFER_DTYPE)
+        data[:count] = self._data[self._start:self._end]
+        data['event'][count:] = None  # release the old events
+        self._data = data
+        self._start, self._end = 0, count
+
+    def extend(self, events):
+        """Add a list of events (in list form) to the buffer."""
+        n = len(events)
+        if n == 0 or self.maxlen == 0:
+            return
+        times = np.fromiter((e[EVENT_TIME_INDEX] for e in events),
+                            np.float64, n)
+        filter_ids = np.fromiter((e[EVENT_FILTER_ID_INDEX] for e in events),
+                                 np.int32, n)
+        if self.maxlen and n > self.maxlen:
+            events = events[-self.maxlen:]
+            times = times[-self.maxlen:]
+            filter_ids = filter_ids[-self.maxlen:]
+            n = self.maxlen
+
+        in_order = ((n == 1 or np.all(times[1:] >= times[:-1])) and
+                    (len(self) == 0 or
+                     times[0] >= self._data['time'][self._end - 1]))
+        if in_order:
+            self._reserve(n)
+            new = self._data[self._end:self._end + n]
+            new['time'] = times
+            new['filter_id'] = filter_ids
+            new['event'] = _objectArray(events)
+            self._end += n
+        else:
+            # events that arrived late (e.g. from an event filter) are merged
+            # into place
+            new = np.zeros(n, dtype=BUFFER_DTYPE)
+            new['time'] = times
+            new['filter_id'] = filter_ids
+            new['event'] = _objectArray(events)
+            new = new[np.argsort(times, kind='mergesort')]
+            self._replace(mergeByTime([self.data, new]))
+
+        if self.maxlen and len(self) > self.maxlen:
+            self._start = self._end - self.maxlen
+
+    def append(self, event):
+        self.extend([event])
+
+    def _replace(self, rows):
+        self._start = self._end = 0
+        self._reserve(len(rows))
+        self._data[:len(rows)] = rows
+        self._end = len(rows)
+
+    def select(self, filter_id=None, start_time=None, end_time=None):
+        """Rows (a structured array) of the buffered events with the given
+        filter_id, and with start_time <= time < end_time."""
+        rows = self.data
+        if start_time is not None or end_time is not None:
+            times = rows['time']
+            start = 0 if start_time is None else np.searchsorted(
+                times, start_time, 'left')
+            end = len(rows) if end_time is None else np.searchsorted(
+                times, end_time, 'left')
+            rows = rows[start:end]
+        if filter_id:
+            rows = rows[rows['filter_id'] == filter_id]
+        return rows
+
+    def remove(self, filter_id=None):
+        """Remove the events with the given filter_id (all events if None)."""
+        if filter_id:
+            rows = self.data
+            self._replace(rows[rows['filter_id'] != filter_id])
+        else:
+            self.clear()
+
+    def clear(self):
+        self._data['event'][self._start:self._end] = None
+        self._start = self._end = 0
+
+    def getEvents(self):
+        """The buffered events (in list form), in time order."""
+        return self.data['event'].tolist()
+
+
+def _objectArray(items):
+    """1D object array of items (which are lists themselves)"""
+    array = np.empty(len(items), dtype=object)
+    for i, item in enumerate(items):
+        array[i] = item
+    return array
+
+
+def mergeOrder(time_arrays):
+    """Indices that put the concatenation of time_arrays, which are each
+    sorted, into time order. The sorted arrays are merged (two at a time)
+    rather than sorted, and equal times stay in the order of the arrays given
+    (like a stable sort of their concatenation).
+    """
+    runs = []
+    offset = 0
+    for times in time_arrays:
+        if len(times):
+            runs.append((times, np.arange(offset, offset + len(times))))
+        offset += len(times)
+    if not runs:
+        return np.zeros(0, dtype=np.intp)
+    while len(runs) > 1:
+        merged = [_mergeTwo(runs[i], runs[i + 1])
+                  for i in range(0, len(runs) - 1, 2)]
+        if len(runs) % 2:
+            merged.append(runs[-1])
+        runs = merged
+    return runs[0][1]
+
+
+def _mergeTwo(a, b):
+    (a_times, a_ix), (b_times, b_ix) = a, b
+    # where each of b goes in the merged arrays
+    b_pos = np.searchsorted(a_times, b_times, 'right') + np.arange(len(b_ix))
+    from_a = np.ones(len(a_ix) + len(b_ix), dtype=bool)
+    from_a[b_pos] = False
+    times = np.empty(len(from_a))
+    times[b_pos] = b_times
+    times[from_a] = a_times
+    ix = np.empty(len(from_a), dtype=np.intp)
+    ix[b_pos] = b_ix
+    ix[from_a] = a_ix
+    return times, ix
+
+
+def mergeByTime(arrays):
+    """Merge structured arrays (with a 'time' field) that are each sorted by
+    time into one array in time order (see mergeOrder)."""
+    arrays = [a for a in arrays if len(a)]
+    if not arrays:
+        return np.zeros(0, dtype=BUFFER_DTYPE)
+    if len(arrays) == 1:
+        return arrays[0]
+    return np.concatenate(arrays)[mergeOrder([a['time'] for a in arrays])]
+
+
+class DeviceEventStore(object):
+    """The events of a Device, with one EventTypeBuffer per event type."""
+
+    def __init__(self, maxlen=None):
+        self.maxlen = maxlen  # per event type
+        self._buffers = OrderedDict()
+
+    def getBuffer(self, event_type):
+        if event_type not in self._buffers:
+            self._buffers[event_type] = EventTypeBuffer(self.maxlen)
+        return self._buffers[event_type]
+
+    def add(self, event_type, events):
+        """Add a list of events (in list form) of one event type."""
+        self.getBuffer(event_type).extend(events)
+
+    def _selectRows(self, event_type, filter_id, start_time, end_time):
+        if event_type:
+            buffers = [self._buffers[event_type]] if \
+                event_type in self._buffers else []
+        else:
+            buffers = list(self._buffers.values())
+        rows = [b.select(filter_id, start_time, end_time) for b in buffers]
+        return [r for r in rows if len(r)]
+
+    def select(self, event_type=None, filter_id=None, start_time=None,
+               end_time=None):
+        """Rows (structured array with 'time', 'filter_id' and 'event'
+        fields) of the matching events of event_type (all types if None), in
+        time order."""
+        return mergeByTime(self._selectRows(event_type, filter_id,
+                                            start_time, end_time))
+
+    def getEvents(self, event_type=None, filter_id=None, start_time=None,
+                  end_time=None):
+        """List of the matching events (in list form), in time order."""
+        rows = self._selectRows(event_type, filter_id, start_time, end_time)
+        if not rows:
+            return []
+        if len(rows) == 1:
+            return rows[0]['event'].tolist()
+        # only the times and the events are needed, so merge just those
+        events = np.concatenate([r['event'] for r in rows])
+        return events[mergeOrder([r['time'] for r in rows])].tolist()
+
+    def clear(self, event_type=None, filter_id=None):
+        """Remove the events of event_type (all types if None) with filter_id
+        (any filter_id if None)."""
+        if event_type:
+            if event_type in self._buffers:
+                self._buffers[event_type].remove(filter_id)
+        elif filter_id:
+            for buff in self._buffers.values():
+                buff.remove(filter_id)
+        else:
+            self._buffers.clear()
+
+    def items(self):
+        """(event_type, list of events) for each event type"""
+        return [(event_type, buff.getEvents())
+                for event_type, buff in self._buffers.items()]
+
+    def __len__(self):
+        return sum(len(b) for b in self._buffers.values())
@@ -0,0 +1,548 @@
+# -*- coding: utf-8 -*-
+# Part of the psychopy.iohub library.
+# Copyright (C) 2012-2016 iSolver Software Solutions
+# Distributed under the terms of the GNU General Public License (GPL).
+"""
+ioHub Eye Tracker Offline (Batch) Sample Event Parser
+
+Parses the eye samples saved in an ioHub DataStore (HDF5) file into fixation,
+saccade and blink events, using the same heuristics as the online
+EyeTrackerEventParser (see parser.py), but working on whole sample arrays at
+once so that a recorded session can quickly be re-parsed with different
+settings:
+
+* Binocular samples are converted to monocular ones (the positions of the two
+  eyes are averaged if both are valid).
+* Sample positions are converted to visual angles, and positions (and pupil
+  size) are linearly interpolated over runs of missing samples.
+* Velocities are calculated from the angle positions.
+* The velocity threshold for saccades is the adaptive (mean + 3 * SD of the
+  velocities below the threshold) threshold of the online parser, calculated
+  over a moving window of the recent (non zero) velocities. To keep this fast
+  for long recordings, the threshold is only recalculated every
+  `threshold_update_interval` samples (1 gives the same threshold as the
+  online parser).
+* Invalid samples are categorised as blinks, samples with an x or y
+  velocity at or above the threshold as saccades and all others as
+  fixations. Each run of samples with the same category becomes one start
+  and one end event.
+
+The events are returned, and can be written to the DataStore file, as numpy
+structured arrays with the NUMPY_DTYPE of the ioHub event classes.
+
+Example::
+
+    from psychopy.iohub.devices.eyetracker.filters import batchparser
+
+    display = dict(mm_size=dict(width=500, height=280),
+                   pixel_res=(1920, 1080), eye_distance=550)
+    events = batchparser.parseDataStoreFile('events.hdf5', display,
+                                            sampling_rate=1000)
+    fixations = events[EventConstants.FIXATION_END]
+"""
+from __future__ import division, absolute_import, print_function
+
+from collections import OrderedDict
+from math import sqrt
+import numpy as np
+
+from ....constants import EventConstants
+from ....util.visualangle import VisualAngleCalc
+from ..eye_events import (MonocularEyeSampleEvent,
+                          FixationStartEvent, FixationEndEvent,
+                          SaccadeStartEvent, SaccadeEndEvent,
+                          BlinkStartEvent, BlinkEndEvent)
+from .parser import iterateThresholds
+
+MONOCULAR_EYE_SAMPLE = EventConstants.MONOCULAR_EYE_SAMPLE
+BINOCULAR_EYE_SAMPLE = EventConstants.BINOCULAR_EYE_SAMPLE
+
+# the filter_id given to parsed events (the same as the online parser)
+PARSER_FILTER_ID = 23
+
+LEFT_EYE = 1
+
+# sample categories
+MIS = 0  # missing data (blink)
+FIX = 1
+SAC = 2
+
+EVENT_CLASSES = OrderedDict([
+    (EventConstants.FIXATION_START, FixationStartEvent),
+    (EventConstants.FIXATION_END, FixationEndEvent),
+    (EventConstants.SACCADE_START, SaccadeStartEvent),
+    (EventConstants.SACCADE_END, SaccadeEndEvent),
+    (EventConstants.BLINK_START, BlinkStartEvent),
+    (EventConstants.BLINK_END, BlinkEndEvent)])
+
+# {category: (start event type, end event type)}
+CATEGORY_EVENT_TYPES = {
+    FIX: (EventConstants.FIXATION_START, EventConstants.FIXATION_END),
+    SAC: (EventConstants.SACCADE_START, EventConstants.SACCADE_END),
+    MIS: (EventConstants.BLINK_START, EventConstants.BLINK_END)}
+
+# the sample fields copied to the start_ / end_ fields of events
+_EVENT_SAMPLE_FIELDS = ('gaze_x', 'gaze_y', 'angle_x', 'angle_y', 'raw_x',
+                        'raw_y', 'pupil_measure1', 'pupil_measure1_type',
+                        'velocity_x', 'velocity_y', 'velocity_xy')
+
+
+def _slidingMin(values, window, ends):
+    """The minimum of values[k - window + 1:k + 1] for each k in `ends`, from
+    running minimums within blocks of `window` values (van Herk / Gil-Werman)
+    """
+    blocks = -(-len(values) // window)
+    padded = np.full(blocks * window, np.inf)
+    padded[:len(values)] = values
+    padded = padded.reshape(blocks, window)
+    fromStart = np.minimum.accumulate(padded, axis=1).ravel()
+    toEnd = np.minimum.accumulate(padded[:, ::-1], axis=1)[:, ::-1].ravel()
+    return np.minimum(toEnd[ends - window + 1], fromStart[ends])
+
+
+def adaptiveVelocityThreshold(velocity, window, step=1):
+    """The adaptive velocity threshold of the online parser, for a whole
+    array of velocities.
+
+    As for the online parser, only velocities > 0 are added to the window of
+    `window` recent velocities, the threshold is NaN for samples with zero
+    velocity and until the window is full.
+
+    The thresholds of all the windows are iterated at once (see
+    parser.iterateThresholds). Consecutive windows are handled in chunks:
+    the first window of a chunk is sorted, so the count and sums of its
+    velocities below a threshold come from cumulative sums, and for the
+    other windows of the chunk the velocities that have left and entered
+    the window since are subtracted and added.
+
+    :param velocity: 1D array of velocities (one axis)
+    :param window: number of velocities used for the threshold
+    :param step: the threshold is recalculated every `step` velocities and
+        kept in between (1 = for every sample, as the online parser does)
+    :return: array of thresholds, same length as `velocity`
+    """
+    velocity = np.asarray(velocity, dtype=np.float64)
+    window = int(window)
+    step = max(int(step), 1)
+    thresholds = np.full(len(velocity), np.nan)
+    positive = np.flatnonzero(velocity > 0)
+    values = velocity[positive]
+    nValues = len(values)
+    if window < 1 or nValues <= window:
+        return thresholds
+
+    # the window is full from the (window + 1)th positive velocity on; the
+    # window for positive velocity k is values[k - window + 1:k + 1]
+    evalIx = np.arange(window, nValues, step)
+    evalThresh = np.empty(len(evalIx))
+    minimums = _slidingMin(values, window, evalIx)
+    # velocities are compared by rank, so that a chunk's sorted windows can
+    # be searched as one array: v < t for the ranks < ordered.searchsorted(t)
+    order = np.argsort(values, kind='mergesort')
+    ordered = values[order]
+    ranks = np.empty(nValues, dtype=np.int64)
+    ranks[order] = np.arange(nValues)
+
+    # windows per chunk, balancing sorting the first windows against the
+    # velocities moved in and out of the others
+    rows = max(1, min(int(sqrt(window / step)), window // step + 1))
+    moves = (rows - 1) * step
+    # [moves velocities out of the first window, moves velocities into it]
+    moved = np.concatenate((np.arange(moves), window + np.arange(moves)))
+    sign = np.repeat([-1.0, 1.0], moves)
+    # isMoved[row, i]: moved[i] has moved for that window of the chunk
+    isMoved = np.tile(np.arange(moves), 2) < (np.arange(rows) * step)[:, None]
+    # each block of chunks uses arrays of up to ~4M values
+    blockSize = rows * max(2 ** 22 // (window + rows * 2 * moves), 1)
+    for first in range(0, len(evalIx), blockSize):
+        ends = evalIx[first:first + blockSize]
+        chunks = -(-len(ends) // rows)
+        starts = ends[::rows] - window + 1
+        sortedRanks = np.sort(ranks[starts[:, None] + np.arange(window)],
+                              axis=1)
+        sortedValues = ordered[sortedRanks]
+        zeros = np.zeros((chunks, 1))
+        sums = np.hstack((zeros, sortedValues.cumsum(axis=1)))
+        squares = np.hstack((zeros, (sortedValues ** 2).cumsum(axis=1)))
+        searched = (sortedRanks + (np.arange(chunks) * nValues)[:, None]
+                    ).ravel()
+        # past the last window for the last chunk, but never counted
+        movedAt = np.minimum(starts[:, None] + moved, nValues - 1)
+        movedRanks = ranks[movedAt]
+        # (chunk, moved velocity, [count, sum, sum of squares])
+        movedStats = sign[:, None] * values[movedAt][..., None] ** [0, 1, 2]
+
+        def statsBelow(ix, thresh):
+            limit = ordered.searchsorted(thresh)
+            chunk = ix // rows
+            below = searched.searchsorted(limit + chunk * nValues)
+            below -= chunk * window
+            stats = np.column_stack((below, sums[chunk, below],
+                                     squares[chunk, below]))
+            if moves:
+                # the moved velocities of whole chunks, with limit -1 (none
+                # below) for the windows not in ix
+                inChunks, chunkIx = np.unique(chunk, return_inverse=True)
+                limits = np.full((len(inChunks), rows), -1)
+                limits[chunkIx, ix % rows] = limit
+                movedBelow = ((movedRanks[inChunks, None, :] <
+                               limits[..., None]) & isMoved)
+                stats += np.matmul(movedBelow.astype(np.float64),
+                                   movedStats[inChunks])[chunkIx, ix % rows]
+            return stats.T
+
+        # starting from min + 3 * SD of each window
+        n, total, sumSquares = statsBelow(np.arange(len(ends)),
+                                          np.full(len(ends), np.inf))
+        mean = total / n
+        sd = np.sqrt(np.maximum(sumSquares / n - mean * mean, 0.0))
+        evalThresh[first:first + len(ends)] = iterateThresholds(
+            minimums[first:first + blockSize] + 3.0 * sd, statsBelow)
+    # positive velocities in between evaluations keep the last threshold
+    rowThresh = np.repeat(evalThresh, step)[:nValues - window]
+    thresholds[positive[window:]] = rowThresh
+    return thresholds
+
+
+def runStarts(values):
+    """Indices at which each run of equal values starts
+    """
+    values = np.asarray(values)
+    if not len(values):
+        return np.zeros(0, dtype=int)
+    return np.concatenate(([0], np.flatnonzero(values[1:] != values[:-1]) + 1))
+
+
+class EyeSampleBatchParser(object):
+    """Parses arrays of eye samples into fixation, saccade and blink events.
+
+    Args:
+        display_device (dict): with 'mm_size' ({'width', 'height'}),
+            'pixel_res' ((width, height)) and 'eye_distance' (mm) of the
+            display, for converting gaze positions to visual angles.
+        sampling_rate (float): of the eye tracker (Hz).
+        adaptive_vel_thresh_history (float): duration (sec) of the velocity
+            window used for the adaptive velocity threshold.
+        threshold_update_interval (int): recalculate the velocity threshold
+            every this many samples (1 = every sample, like the online
+            parser). By default every sampling_rate / 100 samples (10 msec).
+        position_filter, velocity_filter: optional functions that filter
+            (and return) a 1D array of angle positions / velocities.
+    """
+
+    def __init__(self, display_device, sampling_rate,
+                 adaptive_vel_thresh_history=3.0,
+                 threshold_update_interval=None,
+                 position_filter=None, velocity_filter=None):
+        mm_size = display_device.get('mm_size')
+        if isinstance(mm_size, dict):
+            mm_size = mm_size['width'], mm_size['height']
+        self.visual_angle_calc = VisualAngleCalc(
+            mm_size, display_device.get('pixel_res'),
+            display_device.get('eye_distance'))
+        self.pix2deg = self.visual_angle_calc.pix2deg
+        self.sampling_rate = sampling_rate
+        self.vel_thresh_window = int(
+            adaptive_vel_thresh_history * sampling_rate)
+        if threshold_update_interval is None:
+            threshold_update_interval = max(int(sampling_rate // 100), 1)
+        self.threshold_update_interval = threshold_update_interval
+        self.position_filter = position_filter
+        self.velocity_filter = velocity_filter
+
+    def toMonocular(self, samples):
+        """Convert a structured array of binocular or monocular samples to
+        monocular samples (the online parser's conversion, for all samples
+        at once).
+
+        :return: (monocular samples, valid sample mask)
+        """
+        samples = np.asarray(samples)
+        mono = np.zeros(len(samples), dtype=MonocularEyeSampleEvent.NUMPY_DTYPE)
+        names = samples.dtype.names
+        if 'left_gaze_x' not in names:
+            for field in mono.dtype.names:
+                if field in names:
+                    mono[field] = samples[field]
+            mono['type'] = MONOCULAR_EYE_SAMPLE
+            return mono, samples['status'] == 0
+
+        status = samples['status']
+        rightOnly = status == 20
+        bothValid = status == 0
+        for field in mono.dtype.names:
+            if field in names:
+                mono[field] = samples[field]
+            elif field == 'eye':
+                mono[field] = LEFT_EYE
+            elif field.endswith('_type'):
+                mono[field] = samples['left_%s' % field]
+            else:
+                left = samples['left_%s' % field].astype(np.float64)
+                right = samples['right_%s' % field].astype(np.float64)
+                mono[field] = np.where(bothValid, (left + right) / 2.0,
+                                       np.where(rightOnly, right, left))
+        mono['type'] = MONOCULAR_EYE_SAMPLE
+        return mono, status != 22
+
+    def interpolateMissingData(self, mono, valid):
+        """Linearly interpolate the angle positions and pupil size over runs
+        of invalid samples that have a valid sample before and after them.
+
+        :return: mask of the samples that were interpolated
+        """
+        validIx = np.flatnonzero(valid)
+        interpolated = np.zeros(len(mono), dtype=bool)
+        if len(validIx) < 2:
+            return interpolated
+        interpolated[validIx[0]:validIx[-1] + 1] = True
+        interpolated[validIx] = False
+        missingIx = np.flatnonzero(interpolated)
+        for field in ('angle_x', 'angle_y', 'pupil_measure1'):
+            mono[field][missingIx] = np.interp(missingIx, validIx,
+                                               mono[field][validIx])
+        return interpolated
+
+    def addVelocity(self, mono, hasData):
+        """Velocities (deg / sec) from the angle positions of each sample and
+        the previous one (0 if either of them has no position data)
+        """
+        time = mono['time']
+        dt = np.diff(time)
+        dt[dt <= 0] = np.nan
+        usable = hasData[1:] & hasData[:-1]
+        with np.errstate(invalid='ignore'):
+            vx = np.abs(np.diff(mono['angle_x'].astype(np.float64))) / dt
+            vy = np.abs(np.diff(mono['angle_y'].astype(np.float64))) / dt
+        vx = np.where(usable & np.isfinite(vx), vx, 0.0)
+        vy = np.where(usable & np.isfinite(vy), vy, 0.0)
+        mono['velocity_x'][1:] = vx
+        mono['velocity_y'][1:] = vy
+        mono['velocity_xy'][1:] = np.hypot(vx, vy)
+        mono['velocity_x'][0] = 0.0
+        mono['velocity_y'][0] = 0.0
+        mono['velocity_xy'][0] = 0.0
+
+    def processSamples(self, samples):
+        """Convert, interpolate, filter and add velocities and velocity
+        thresholds to a time ordered array of samples.
+
+        :return: (monocular samples, sample categories)
+        """
+        mono, valid = self.toMonocular(samples)
+        if valid.any():
+            mono['angle_x'][valid], mono['angle_y'][valid] = self.pix2deg(
+                mono['gaze_x'][valid].astype(np.float64),
+                mono['gaze_y'][valid].astype(np.float64))
+        interpolated = self.interpolateMissingData(mono, valid)
+        hasData = valid | interpolated
+        self.addVelocity(mono, hasData)
+
+        if self.position_filter:
+            for field in ('angle_x', 'angle_y'):
+                mono[field][hasData] = self.position_filter(
+                    mono[field][hasData])
+        if self.velocity_filter:
+            for field in ('velocity_x', 'velocity_y', 'velocity_xy'):
+                mono[field][hasData] = self.velocity_filter(
+                    mono[field][hasData])
+
+        # the online parser stores the thresholds in the raw_x / raw_y fields
+        for axis in ('x', 'y'):
+            velocity = np.where(valid, mono['velocity_%s' % axis], 0.0)
+            mono['raw_%s' % axis] = adaptiveVelocityThreshold(
+                velocity, self.vel_thresh_window,
+                self.threshold_update_interval)
+
+        categories = np.full(len(mono), FIX, dtype=np.int8)
+        with np.errstate(invalid='ignore'):
+            saccade = ((mono['velocity_x'] >= mono['raw_x']) |
+                       (mono['velocity_y'] >= mono['raw_y']))
+        categories[saccade] = SAC
+        categories[~valid] = MIS
+        return mono, categories
+
+    def parse(self, samples):
+        """Parse a time ordered structured array of samples (binocular or
+        monocular) into events.
+
+        :return: OrderedDict of {event type: structured array of events}, with
+            the NUMPY_DTYPE of each event class
+        """
+        mono, categories = self.processSamples(samples)
+        starts = runStarts(categories)
+        # the last run has no end (yet)
+        ends = np.append(starts[1:] - 1, -1)
+        closed = np.arange(len(starts)) < len(starts) - 1
+        runCategories = categories[starts]
+
+        events = OrderedDict()
+        for category, (startType, endType) in CATEGORY_EVENT_TYPES.items():
+            isCategory = runCategories == category
+            events[startType] = self._startEvents(
+                startType, mono, starts[isCategory])
+            isClosed = isCategory & closed
+            events[endType] = self._endEvents(
+                endType, mono, starts[isClosed], ends[isClosed])
+        return events
+
+    def _baseEvents(self, eventType, mono, ix):
+        events = np.zeros(len(ix), dtype=EVENT_CLASSES[eventType].NUMPY_DTYPE)
+        for field in ('experiment_id', 'session_id', 'device_id', 'event_id',
+                      'device_time', 'logged_time', 'time', 'eye', 'status'):
+            events[field] = mono[field][ix]
+        events['type'] = eventType
+        events['filter_id'] = PARSER_FILTER_ID
+        return events
+
+    def _startEvents(self, eventType, mono, startIx):
+        events = self._baseEvents(eventType, mono, startIx)
+        if eventType != EventConstants.BLINK_START:
+            for field in _EVENT_SAMPLE_FIELDS:
+                events[field] = mono[field][startIx]
+        return events
+
+    def _endEvents(self, eventType, mono, startIx, endIx):
+        events = self._baseEvents(eventType, mono, endIx)
+        events['duration'] = mono['time'][endIx] - mono['time'][startIx]
+        if eventType == EventConstants.BLINK_END or not len(endIx):
+            return events
+
+        for field in _EVENT_SAMPLE_FIELDS:
+            events['start_%s' % field] = mono[field][startIx]
+            events['end_%s' % field] = mono[field][endIx]
+
+        # means and peaks over the samples of each event (the runs of
+        # samples are [startIx, endIx] and none of them ends the array)
+        counts = endIx - startIx + 1
+        bounds = np.column_stack((startIx, endIx + 1)).ravel()
+        fields = ['velocity_x', 'velocity_y', 'velocity_xy']
+        if eventType == EventConstants.FIXATION_END:
+            fields += ['gaze_x', 'gaze_y', 'angle_x', 'angle_y',
+                       'pupil_measure1']
+            events['average_pupil_measure1_type'] = mono[
+                'pupil_measure1_type'][endIx]
+        for field in fields:
+            values = mono[field].astype(np.float64)
+            events['average_%s' % field] = np.add.reduceat(
+                values, bounds)[::2] / counts
+        for field in ('velocity_x', 'velocity_y', 'velocity_xy'):
+            events['peak_%s' % field] = np.maximum.reduceat(
+                mono[field], bounds)[::2]
+
+        if eventType == EventConstants.SACCADE_END:
+            xDiff = events['end_gaze_x'] - events['start_gaze_x']
+            yDiff = events['end_gaze_y'] - events['start_gaze_y']
+            events['amplitude_x'] = xDiff
+            events['amplitude_y'] = yDiff
+            events['angle'] = np.rad2deg(np.arctan2(yDiff, xDiff))
+        return events
+
+
+def _eventTablePaths(hubFile):
+    """{event type id: table path} from the class_table_mapping table
+    """
+    mapping = hubFile.root.class_table_mapping.read()
+    return dict((int(row['class_id']), row['table_path'].decode('utf-8')
+                 if isinstance(row['table_path'], bytes) else row['table_path'])
+                for row in mapping if row['class_type_id'] == 1)
+
+
+def readSamples(hubFile, session_id=None):
+    """Read the eye samples (binocular if there are any, else monocular)
+    from an open ioHub DataStore file, in time order.
+
+    :return: structured array of samples (or None if there are none)
+    """
+    paths = _eventTablePaths(hubFile)
+    for sampleType in (BINOCULAR_EYE_SAMPLE, MONOCULAR_EYE_SAMPLE):
+        if sampleType not in paths:
+            continue
+        table = hubFile.get_node(paths[sampleType])
+        if session_id is None:
+            samples = table.read()
+        else:
+            samples = table.read_where('session_id == %d' % session_id)
+        if len(samples):
+            return samples[np.argsort(samples['time'], kind='mergesort')]
+    return None
+
+
+def writeEventTables(hubFile, events, replace=True, session_ids=None):
+    """Store parsed events in an open (writable) ioHub DataStore file, in the
+    tables used for each event type (which are created if needed).
+
+    :param events: {event type: structured array}, as returned by
+        EyeSampleBatchParser.parse()
+    :param replace: remove the events of the parsed sessions previously
+        stored by a parser (i.e. with filter_id == PARSER_FILTER_ID) first
+    :param session_ids: the sessions that were parsed (default those that
+        `events` are from); the events of other sessions are kept
+    """
+    if session_ids is None:
+        session_ids = np.unique(np.concatenate(
+            [evts['session_id'] for evts in events.values()]))
+    paths = _eventTablePaths(hubFile)
+    mappingTable = hubFile.root.class_table_mapping
+    eventsGroup = hubFile.root.data_collection.events
+    for eventType, evts in events.items():
+        eventClass = EVENT_CLASSES[eventType]
+        if eventType in paths:
+            table = hubFile.get_node(paths[eventType])
+        else:
+            groupName = eventClass.PARENT_DEVICE.DEVICE_TYPE_STRING.lower()
+            if groupName not in eventsGroup:
+                hubFile.create_group(eventsGroup, groupName)
+            table = hubFile.create_table(eventsGroup._f_get_child(groupName),
+                                         eventClass.__name__,
+                                         eventClass.NUMPY_DTYPE)
+            row = mappingTable.row
+            row['class_id'] = eventType
+            row['class_type_id'] = 1
+            row['class_name'] = eventClass.__name__
+            row['table_path'] = table._v_pathname
+            row.append()
+            mappingTable.flush()
+        if replace and table.nrows:
+            stored = table.read()
+            parsed = ((stored['filter_id'] == PARSER_FILTER_ID) &
+                      np.in1d(stored['session_id'], session_ids))
+            if parsed.any():
+                table.truncate(0)
+                if not parsed.all():
+                    table.append(stored[~parsed])
+        if len(evts):
+            table.append(evts.astype(table.dtype))
+        table.flush()
+
+
+def parseDataStoreFile(filePath, display_device, sampling_rate,
+                       session_ids=None, write=True, replace=True, **kwargs):
+    """Parse the eye samples of each session in an ioHub DataStore file and
+    (optionally) write the resulting events back to the file.
+
+    :param session_ids: the sessions to parse (default all of them)
+    :param kwargs: passed on to EyeSampleBatchParser
+    :return: OrderedDict of {event type: structured array of events} for
+        all the parsed sessions
+    """
+    import tables
+    parser = EyeSampleBatchParser(display_device, sampling_rate, **kwargs)
+    hubFile = tables.open_file(filePath, mode='a' if write else 'r')
+    try:
+        if session_ids is None:
+            sessions = hubFile.root.data_collection.session_meta_data.read()
+            session_ids = sorted(set(sessions['session_id']))
+        parsed = [parser.parse(samples) for samples in
+                  (readSamples(hubFile, session_id)
+                   for session_id in session_ids) if samples is not None]
+        events = OrderedDict(
+            (eventType, np.concatenate([p[eventType] for p in parsed]) if parsed
+             else np.zeros(0, dtype=eventClass.NUMPY_DTYPE))
+            for eventType, eventClass in EVENT_CLASSES.items())
+        if write:
+            writeEventTables(hubFile, events, replace=replace,
+                             session_ids=session_ids)
+    finally:
+        hubFile.close()
+    return events
@@ -25,6 +25,10 @@ for a sample, the positions are averaged together. If only one of the two eyes
 has valid data, then that eye data is used for the sample. So the only case
 where a sample will be tagged as missing data is when both eyes do not have
 valid eye position / pupil size data.
+* The saccade velocity threshold adapts to the last adaptive_vel_thresh_history
+seconds of velocities (see AdaptiveVelocityThreshold). By default it is
+updated incrementally (adaptive_vel_thresh_incremental=True);
+adaptive_vel_thresh_max_iterations can cap the iterations per sample.
 
 POSITION_FILTER and VELOCITY_FILTER can be set to one of the following event
 field filter types. Example values for any input arguments are given. The filter
@@ -131,6 +135,8 @@ Data is filtered once, similar to what a 'normal' filter level would be in the
   eyelink<tm> system. Level = 2 would be similar to the 'extra' filter level
   setting of eyelink<tm>.
 """
+import numpy as np
+from numpy import abs as np_abs, rad2deg, arctan2
 from ....constants import EventConstants
 from ....errors import print2err
 from ... import DeviceEvent, eventfilters
@@ -152,6 +158,134 @@ RIGHT_EYE = 2
 BOTH_EYE = 3
 
 
+def thresholdFromSums(n, total, squares):
+    """The mean + 3 * SD of velocities from their count, sum and sum of
+    squares (NaN for a count of 0); also works on arrays of them."""
+    n = np.where(n > 0, n, np.nan)
+    mean = total / n
+    return mean + 3.0 * np.sqrt(np.maximum(squares / n - mean * mean, 0.0))
+
+
+def iterateThresholds(thresholds, statsBelow, max_iterations=None):
+    """The adaptive velocity threshold iteration, for any number of windows
+    of velocities at once.
+
+    Each of the initial `thresholds` (min + 3 * SD of its window) is
+    repeatedly replaced by the mean + 3 * SD of the window velocities below
+    it, until it changes by less than 1 (or max_iterations times).
+    statsBelow(rows, thresholds) returns the count, sum and sum of squares of
+    the velocities below `thresholds` in the windows at indices `rows`.
+
+    Used by AdaptiveVelocityThreshold and the batch parser (batchparser.py).
+    Returns `thresholds`, updated in place.
+    """
+    rows = np.arange(len(thresholds))
+    iterations = 0
+    while len(rows) and iterations != max_iterations:
+        PT = thresholdFromSums(*statsBelow(rows, thresholds[rows]))
+        PTd = np_abs(PT - thresholds[rows])
+        thresholds[rows] = PT
+        rows = rows[PTd >= 1.0]  # False for NaN too
+        iterations += 1
+    return thresholds
+
+
+class AdaptiveVelocityThreshold(object):
+    """Adaptive saccade velocity threshold for one velocity axis.
+
+    The threshold is calculated from a moving window of the most recent
+    (non zero) velocities: starting from min + 3 * SD of the window, the
+    threshold is repeatedly set to the mean + 3 * SD of the velocities below
+    the current threshold, until it changes by less than 1.
+
+    With incremental=True (the default), the count, sum and sum of squares
+    of the window velocities below the last threshold are updated as
+    velocities enter and leave the window, and each new threshold starts
+    from the previous one. Usually the first step has already converged, so
+    a new velocity costs O(1) instead of several passes over the window. The
+    running sums are recounted from the window when the threshold moves by 1
+    or more, and once per window length to stop rounding errors building up.
+
+    max_iterations limits the number of iterations per velocity (None = until
+    converged), trading accuracy for a fixed worst case cost.
+    """
+
+    def __init__(self, length, incremental=True, max_iterations=None):
+        self.length = max(int(length), 1)
+        self.incremental = incremental
+        self.max_iterations = max_iterations
+        self._buffer = np.zeros(self.length)
+        self.reset()
+
+    def reset(self):
+        self._index = 0
+        self._base = np.nan  # threshold that the running sums are for
+        self._below = [0, 0.0, 0.0]  # count, sum, sum of squares below _base
+        self._updates = 0  # since the running sums were last recounted
+
+    def _statsBelow(self, threshold):
+        below = self._buffer[self._buffer < threshold]
+        return [len(below), below.sum(), np.dot(below, below)]
+
+    def _recount(self, threshold):
+        self._base = threshold
+        self._below = self._statsBelow(threshold)
+        self._updates = 0
+
+    def _nextThreshold(self):
+        """mean + 3 * SD of the window velocities below self._base"""
+        return thresholdFromSums(*self._below)
+
+    def _iterate(self):
+        """The threshold calculated from scratch (a pass over the window for
+        each iteration)"""
+        buff = self._buffer
+        PT = np.array([buff.min() + buff.std() * 3.0])
+        return iterateThresholds(
+            PT, lambda rows, PT: self._statsBelow(PT[0]),
+            self.max_iterations)[0]
+
+    def add(self, velocity):
+        """Add a velocity to the window and return the threshold for it (NaN
+        for velocities <= 0 and until the window is full)."""
+        if not velocity > 0.0:
+            return np.nan
+        i = self._index % self.length
+        old = self._buffer[i]
+        self._buffer[i] = velocity
+        full = self._index >= self.length
+        self._index += 1
+        if not full:
+            return np.nan
+        if not self.incremental or np.isnan(self._base):
+            PT = self._iterate()
+            if self.incremental and not np.isnan(PT):
+                self._recount(PT)
+            return PT
+
+        self._updates += 1
+        if self._updates >= self.length:
+            self._recount(self._base)
+        else:
+            below = self._below
+            if old < self._base:
+                below[0] -= 1
+                below[1] -= old
+                below[2] -= old * old
+            if velocity < self._base:
+                below[0] += 1
+                below[1] += velocity
+                below[2] += velocity * velocity
+        PT = self._nextThreshold()
+        iterations = 1
+        while (np_abs(PT - self._base) >= 1.0
+               and iterations != self.max_iterations):
+            self._recount(PT)
+            PT = self._nextThreshold()
+            iterations += 1
+        return PT
+
+
 class EyeTrackerEventParser(eventfilters.DeviceEventFilter):
 
     def __init__(self, **kwargs):
@@ -191,12 +325,13 @@ class EyeTrackerEventParser(eventfilters.DeviceEventFilter):
         else:
             vel_filter_class, vel_filter_kwargs = eventfilters.PassThroughFilter, {}
 
-        self.adaptive_x_vthresh_buffer = np.zeros(
-            self.vel_thresh_history_dur * sampling_rate)
-        self.x_vthresh_buffer_index = 0
-        self.adaptive_y_vthresh_buffer = np.zeros(
-            self.vel_thresh_history_dur * sampling_rate)
-        self.y_vthresh_buffer_index = 0
+        vthresh_length = int(self.vel_thresh_history_dur * sampling_rate)
+        incremental = kwargs.get('adaptive_vel_thresh_incremental', True)
+        max_iterations = kwargs.get('adaptive_vel_thresh_max_iterations')
+        self.x_vthresh = AdaptiveVelocityThreshold(
+            vthresh_length, incremental, max_iterations)
+        self.y_vthresh = AdaptiveVelocityThreshold(
+            vthresh_length, incremental, max_iterations)
 
         pos_filter_kwargs['event_type'] = MONOCULAR_EYE_SAMPLE
         pos_filter_kwargs['inplace'] = True
@@ -404,44 +539,8 @@ class EyeTrackerEventParser(eventfilters.DeviceEventFilter):
         return end_event, start_event
 
     def addVelocityToAdaptiveThreshold(self, sample):
-        velocity_x = sample[self.io_event_ix('velocity_x')]
-        velocity_y = sample[self.io_event_ix('velocity_y')]
-        velocity_buffers = [
-            self.adaptive_x_vthresh_buffer,
-            self.adaptive_y_vthresh_buffer]
-        velocity_buffer_indexs = [
-            self.x_vthresh_buffer_index,
-            self.y_vthresh_buffer_index]
-        vthresh_values = []
-        for v, velocity in enumerate([velocity_x, velocity_y]):
-            current_velocity_buffer = velocity_buffers[v]
-            current_vbuffer_index = velocity_buffer_indexs[v]
-            blen = len(current_velocity_buffer)
-            if velocity > 0.0:
-                i = current_vbuffer_index % blen
-                current_velocity_buffer[i] = velocity
-                full = current_vbuffer_index >= blen
-                if v == 0:
-                    self.x_vthresh_buffer_index += 1
-                else:
-                    self.y_vthresh_buffer_index += 1
-                if full:
-                    PT = current_velocity_buffer.min() + current_velocity_buffer.std() * 3.0
-                    velocity_below_thresh = current_velocity_buffer[
-                        current_velocity_buffer < PT]
-                    PTd = 2.0
-                    pt_list = [PT, ]
-                    while PTd >= 1.0:
-                        if len(pt_list) > 0:
-                            PT = velocity_below_thresh.mean() + 3.0 * velocity_below_thresh.std()
-                            velocity_below_thresh = current_velocity_buffer[
-                                current_velocity_buffer < PT]
-                            PTd = np.abs(PT - pt_list[-1])
-                        pt_list.append(PT)
-                    vthresh_values.append(PT)
-            if len(vthresh_values) != v + 1:
-                vthresh_values.append(np.NaN)
-        return vthresh_values
+        return [self.x_vthresh.add(sample[self.io_event_ix('velocity_x')]),
+                self.y_vthresh.add(sample[self.io_event_ix('velocity_y')])]
 
     def reset(self):
         eventfilters.DeviceEventFilter.reset(self)
@@ -455,8 +554,8 @@ class EyeTrackerEventParser(eventfilters.DeviceEventFilter):
         self.x_velocity_filter.clear()
         self.y_velocity_filter.clear()
         self.xy_velocity_filter.clear()
-        self.x_vthresh_buffer_index = 0
-        self.y_vthresh_buffer_index = 0
+        self.x_vthresh.reset()
+        self.y_vthresh.reset()
 
     def initializeForSampleType(self, in_evt):
         # in_evt[DeviceEvent.EVENT_TYPE_ID_INDEX]
@@ -825,7 +924,7 @@ class EyeTrackerEventParser(eventfilters.DeviceEventFilter):
                     'time')] - existing_start_event[self.io_event_ix('time')],
                 xDiff,
                 yDiff,
-                rad2deg(arctan(yDiff, xDiff)),
+                rad2deg(arctan2(yDiff, xDiff)),
                 existing_start_event[gx],
                 existing_start_event[gy],
                 0.0,
@@ -100,6 +100,10 @@ class EventPublisher(Device):
             self._pub_socket.send_multipart(
                 [EventConstants.getClass(e_id).__name__, self.pack(event_array)], 0)
 
+    def _handleEvents(self, events):
+        for e in events:
+            self._handleEvent(e)
+
     def _close(self):
         if self._pub_socket is not None:
             self._pub_socket.send_multipart(['EXIT', ''])
@@ -211,6 +215,10 @@ class RemoteEventSubscriber(Device):
             #print2err('SUB RX callback: ',e[0:8])
             Device._handleEvent(self, e)
 
+    def _handleEvents(self, events):
+        for e in events:
+            self._handleEvent(e)
+
     def _addEventListener(self, l, eventTypeIDs):
         from ...server import ioServer
         if not isinstance(l, ioServer):
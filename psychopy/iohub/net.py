@@ -4,9 +4,16 @@
 # Distributed under the terms of the GNU General Public License (GPL).
 from __future__ import division, absolute_import
 
+import socket
 import struct
+import threading
+import zlib
+from collections import deque, OrderedDict
+from itertools import count
 from weakref import proxy
 
+import numpy as np
+
 from gevent import sleep, Greenlet
 import msgpack
 try:
@@ -19,12 +26,137 @@ except ImportError:
 
 from .devices import Computer
 from .errors import print2err, printExceptionDetailsToStdErr
-from .util import NumPyRingBuffer as RingBuffer
 
 MAX_PACKET_SIZE = 64 * 1024
 
+# Replies larger than MAX_DATAGRAM_SIZE are sent as chunks, each starting with
+# a CHUNK_HEADER of: CHUNK_MARKER (a byte never used by msgpack), flags, the
+# reply id, the chunk index, the number of chunks and the size of the reply.
+MAX_DATAGRAM_SIZE = MAX_PACKET_SIZE // 2 - 20
+CHUNK_HEADER = struct.Struct('<BBIIII')
+CHUNK_MARKER = 0xC1
+CHUNK_DATA_SIZE = MAX_DATAGRAM_SIZE - CHUNK_HEADER.size
+CHUNK_COMPRESSED = 1
+
 defTimeout = 0.1
 
+
+class ChunkSender(object):
+    """Sends replies too large for one datagram as numbered chunks, each a
+    memoryview slice of the reply. The last few replies are kept, so that
+    chunks the receiver did not get can be sent again. Replies of at least
+    compress_threshold bytes (unless 0) are compressed with zlib first."""
+
+    def __init__(self, compress_threshold=0, history=4):
+        self.compress_threshold = compress_threshold
+        self.history = history
+        self._ids = count(1)
+        self._sent = OrderedDict()
+        self._buffer = bytearray(MAX_DATAGRAM_SIZE)
+
+    def send(self, sock, data, address):
+        flags = 0
+        if self.compress_threshold and len(data) >= self.compress_threshold:
+            data = zlib.compress(data, 1)
+            flags |= CHUNK_COMPRESSED
+        reply_id = next(self._ids)
+        self._sent[reply_id] = flags, data
+        while len(self._sent) > self.history:
+            self._sent.popitem(last=False)
+        self._sendChunks(sock, reply_id, flags, data,
+                         range(chunkCount(len(data))), address)
+        return reply_id
+
+    def resend(self, sock, reply_id, indexes, address):
+        """Sends the chunks of a recent reply again, returning False if the
+        reply is no longer kept."""
+        if reply_id not in self._sent:
+            return False
+        flags, data = self._sent[reply_id]
+        self._sendChunks(sock, reply_id, flags, data, indexes, address)
+        return True
+
+    def _sendChunks(self, sock, reply_id, flags, data, indexes, address):
+        view = memoryview(data)
+        size = len(data)
+        chunk_count = chunkCount(size)
+        sendmsg = getattr(sock, 'sendmsg', None)
+        for index in indexes:
+            start = index * CHUNK_DATA_SIZE
+            chunk = view[start:start + CHUNK_DATA_SIZE]
+            header = (CHUNK_MARKER, flags, reply_id, index, chunk_count, size)
+            if sendmsg is not None:
+                sendmsg([CHUNK_HEADER.pack(*header), chunk], [], 0, address)
+            else:
+                # e.g. on Windows, so the chunk is copied after the header
+                buf = self._buffer
+                CHUNK_HEADER.pack_into(buf, 0, *header)
+                end = CHUNK_HEADER.size + len(chunk)
+                buf[CHUNK_HEADER.size:end] = chunk
+                sock.sendto(memoryview(buf)[:end], address)
+
+
+class ChunkReceiver(object):
+    """Reassembles the chunks of a reply sent by a ChunkSender into a
+    preallocated bytearray, keeping track of the chunks still missing."""
+
+    def __init__(self):
+        self.reply_id = None
+        self._buffer = bytearray()
+        self._received = bytearray()
+        self._remaining = 0
+        self._flags = 0
+        self._size = 0
+
+    @property
+    def complete(self):
+        return self.reply_id is not None and self._remaining == 0
+
+    def add(self, datagram):
+        """Adds a chunk (a buffer with its CHUNK_HEADER), returning False
+        if it had already been added."""
+        _, flags, reply_id, index, chunk_count, size = \
+            CHUNK_HEADER.unpack_from(datagram)
+        if reply_id != self.reply_id:
+            # the first chunk received of a reply
+            self.reply_id = reply_id
+            if len(self._buffer) < size:
+                self._buffer = bytearray(size)
+            self._received = bytearray(chunk_count)
+            self._remaining = chunk_count
+            self._flags = flags
+            self._size = size
+        if not self._received[index]:
+            start = index * CHUNK_DATA_SIZE
+            chunk = memoryview(datagram)[CHUNK_HEADER.size:]
+            self._buffer[start:start + len(chunk)] = chunk
+            self._received[index] = 1
+            self._remaining -= 1
+            return True
+        return False
+
+    def isReceived(self, datagram):
+        """True if the chunk has already been added."""
+        _, _, reply_id, index, _, _ = CHUNK_HEADER.unpack_from(datagram)
+        return reply_id == self.reply_id and self._received[index] == 1
+
+    def missing(self):
+        """The indexes of the chunks not received yet."""
+        return [i for i, received in enumerate(self._received)
+                if not received]
+
+    def data(self):
+        """The reassembled reply (a memoryview of the buffer)."""
+        data = memoryview(self._buffer)[:self._size]
+        if self._flags & CHUNK_COMPRESSED:
+            return zlib.decompress(data)
+        return data
+
+
+def chunkCount(size):
+    return max(1, -(-size // CHUNK_DATA_SIZE))
+
+
 class SocketConnection(object): # pylint: disable=too-many-instance-attributes
     def __init__(
             self,
@@ -44,10 +176,15 @@ class SocketConnection(object): # pylint: disable=too-many-instance-attributes
         self.lastAddress = None
         self.sock = None
         self.initSocket(broadcast, blocking, timeout)
+        self.max_resends = 3
+        self.resend_window = 8
+        self._rx_buffer = bytearray(rcvBufferLength)
+        self._rx_backlog = deque()
+        self._chunks = ChunkReceiver()
 
         self.coder = msgpack
-        self.packer = msgpack.Packer()
-        self.unpacker = msgpack.Unpacker(use_list=True)
+        self.packer = msgpack.Packer(use_bin_type=True)
+        self.unpacker = msgpack.Unpacker(use_list=True, raw=False)
         self.pack = self.packer.pack
         self.feed = self.unpacker.feed
         self.unpack = self.unpacker.unpack
@@ -80,21 +217,64 @@ class SocketConnection(object): # pylint: disable=too-many-instance-attributes
 
     def receive(self):
         try:
-            data, address = self.sock.recvfrom(self._rcvBufferLength)
+            if self._rx_backlog:
+                data, address = self._rx_backlog.popleft()
+            else:
+                nbytes, address = self.sock.recvfrom_into(self._rx_buffer)
+                data = memoryview(self._rx_buffer)[:nbytes]
+                while self._rx_buffer[0] == CHUNK_MARKER:
+                    if not self._chunks.isReceived(data):
+                        data = self._receiveChunks(data, address)
+                        if data is None:
+                            return None
+                        break
+                    # a chunk sent again, of a reply already received
+                    nbytes, address = self.sock.recvfrom_into(
+                        self._rx_buffer)
+                    data = memoryview(self._rx_buffer)[:nbytes]
             self.lastAddress = address
-            self.feed(data)
-            result = self.unpack()
-            if result[0] == 'IOHUB_MULTIPACKET_RESPONSE':
-                num_packets = result[1]
-                while num_packets > 0:
-                    data, address = self.sock.recvfrom(self._rcvBufferLength)
-                    self.feed(data)
-                    num_packets = num_packets - 1
-                result = self.unpack()
-            return result, address
+            return self.coder.unpackb(data, use_list=True, raw=False), address
         except Exception: # pylint: disable=broad-except
             pass # printExceptionDetailsToStdErr()
 
+    def _receiveChunks(self, chunk, address):
+        # Reassembles a reply sent as chunks, asking for any chunks lost
+        # (i.e. not received within the socket timeout) to be sent again, up
+        # to resend_window chunks at a time so they fit in the receive
+        # buffer. Other replies received meanwhile are kept for the next
+        # receive().
+        chunks = self._chunks
+        chunks.add(chunk)
+        resends = 0
+        awaited = 0
+        while not chunks.complete:
+            try:
+                nbytes, _ = self.sock.recvfrom_into(self._rx_buffer)
+            except Exception: # pylint: disable=broad-except
+                if resends == self.max_resends:
+                    print2err('Error: chunks {} of reply {} were lost'.format(
+                        chunks.missing(), chunks.reply_id))
+                    return None
+                resends += 1
+                awaited = self._requestChunks(chunks, address)
+                continue
+            if self._rx_buffer[0] == CHUNK_MARKER:
+                if chunks.add(memoryview(self._rx_buffer)[:nbytes]):
+                    resends = 0
+                    awaited -= 1
+                    if awaited == 0 and not chunks.complete:
+                        # the chunks sent again are in, so ask for the next
+                        awaited = self._requestChunks(chunks, address)
+            else:
+                self._rx_backlog.append((bytes(self._rx_buffer[:nbytes]),
+                                         address))
+        return chunks.data()
+
+    def _requestChunks(self, chunks, address):
+        indexes = chunks.missing()[:self.resend_window]
+        self.sendTo(('IOHUB_RESEND', chunks.reply_id, indexes), address)
+        return len(indexes)
+
     def close(self):
         self.sock.close()
 
@@ -122,6 +302,182 @@ class UDPClientConnection(SocketConnection):
         self.sock.settimeout(timeout)
         self.sock.setblocking(blocking)
 
+
+class ioHubRequestConnection(UDPClientConnection):
+    """The UDPClientConnection used by an ioHubConnection to send requests to
+    the ioHub Server. Each request is tagged with an id that the ioHub Server
+    returns with the reply, so a reply that arrives late is never taken as
+    the reply to a later request.
+
+    Requests can also be sent without waiting for a reply (post), or several
+    at once in one packet (batch). startReceiver() starts a thread that
+    receives all replies and polls the ioHub Server for new events every
+    poll_interval sec., adding them to the events deque.
+    """
+    poll_lost_after = 1.0
+    # room for the chunks of large replies (the OS may allow less)
+    socket_rcv_buffer_size = 1024 * 1024
+
+    def __init__(self, remote_host='127.0.0.1', remote_port=9000,
+                 timeout=defTimeout):
+        UDPClientConnection.__init__(self, remote_host=remote_host,
+                                     remote_port=remote_port,
+                                     timeout=timeout)
+        from socket import SOL_SOCKET, SO_RCVBUF
+        self.sock.setsockopt(SOL_SOCKET, SO_RCVBUF,
+                             self.socket_rcv_buffer_size)
+        self.events = deque()
+        self._ids = count(1)
+        self._send_lock = threading.Lock()
+        self._reply_ready = threading.Condition()
+        self._pending = set()
+        self._replies = dict()
+        self._receiver = None
+        self._receiving = False
+        self.reply_timeout = timeout
+
+    @property
+    def reply_timeout(self):
+        """sec. to wait for the reply to a request before giving up."""
+        return self._reply_timeout
+
+    @reply_timeout.setter
+    def reply_timeout(self, timeout):
+        self._reply_timeout = timeout
+        if self._receiver is None:
+            self.sock.settimeout(timeout)
+
+    def sendTo(self, data, address=None):
+        with self._send_lock:
+            return UDPClientConnection.sendTo(self, data, address)
+
+    def request(self, data):
+        """Sends a request to the ioHub Server and returns its reply, or None
+        if no reply is received within reply_timeout sec."""
+        return self._sendAndWait('REQ', data)
+
+    def batch(self, requests):
+        """Sends a list of requests to the ioHub Server in one packet and
+        returns the list of their replies, or None if no reply is received
+        within reply_timeout sec."""
+        return self._sendAndWait('BATCH', list(requests))
+
+    def post(self, requests):
+        """Sends a list of requests to the ioHub Server in one packet, without
+        waiting for their replies (which the ioHub Server does not send)."""
+        self.sendTo(('NO_REPLY', list(requests)))
+
+    def _sendAndWait(self, request_type, data):
+        req_id = next(self._ids)
+        if self._receiver is None:
+            self.sendTo((request_type, req_id, data))
+            return self._receiveReply(req_id)
+
+        deadline = Computer.getTime() + self.reply_timeout
+        with self._reply_ready:
+            self._pending.add(req_id)
+        try:
+            self.sendTo((request_type, req_id, data))
+            with self._reply_ready:
+                while req_id not in self._replies and \
+                        None not in self._replies:
+                    remaining = deadline - Computer.getTime()
+                    if remaining <= 0:
+                        return None
+                    self._reply_ready.wait(remaining)
+                if req_id in self._replies:
+                    return self._replies.pop(req_id)
+                return self._replies.pop(None)
+        finally:
+            with self._reply_ready:
+                self._pending.discard(req_id)
+
+    def _receiveReply(self, req_id):
+        while True:
+            result = self.receive()
+            if result is None:
+                return None
+            reply = result[0]
+            reply_id = self._replyId(reply)
+            if reply_id is None:
+                # not tagged, e.g. IOHUB_SERVER_RESPONSE_ERROR
+                return reply
+            if reply_id == req_id:
+                return reply[2]
+            # else the late reply to an earlier request, which is dropped
+
+    @staticmethod
+    def _replyId(reply):
+        if isinstance(reply, list) and len(reply) == 3 and \
+                reply[0] in ('REPLY', 'BATCH_REPLY'):
+            return reply[1]
+        return None
+
+    def startReceiver(self, poll_interval=0.005):
+        """Starts the thread that receives the replies from the ioHub Server
+        and polls it for new events every poll_interval sec."""
+        if self._receiver is not None:
+            return
+        self.sock.settimeout(poll_interval)
+        self._receiving = True
+        self._receiver = threading.Thread(target=self._receiveLoop,
+                                          args=(poll_interval,))
+        self._receiver.daemon = True
+        self._receiver.start()
+
+    def stopReceiver(self):
+        if self._receiver is None:
+            return
+        self._receiving = False
+        self._receiver.join()
+        self._receiver = None
+        self.sock.settimeout(self.reply_timeout)
+
+    def isReceiving(self):
+        return self._receiver is not None
+
+    def _receiveLoop(self, poll_interval):
+        polls = dict()
+        next_poll = 0.0
+        while self._receiving:
+            ctime = Computer.getTime()
+            if ctime >= next_poll:
+                # only one GET_EVENTS poll is outstanding at a time, unless
+                # it was lost
+                for poll_id, poll_time in list(polls.items()):
+                    if ctime - poll_time > self.poll_lost_after:
+                        del polls[poll_id]
+                if not polls:
+                    poll_id = next(self._ids)
+                    polls[poll_id] = ctime
+                    self.sendTo(('REQ', poll_id, ('GET_EVENTS',)))
+                next_poll = ctime + poll_interval
+
+            result = self.receive()
+            if result is None:
+                continue
+            reply = result[0]
+            reply_id = self._replyId(reply)
+            if reply_id in polls:
+                del polls[reply_id]
+                events = reply[2]
+                if isinstance(events, list) and events[1]:
+                    self.events.extend(events[1])
+                continue
+            with self._reply_ready:
+                if reply_id is None and self._pending:
+                    self._replies[None] = reply
+                elif reply_id in self._pending:
+                    self._replies[reply_id] = reply[2]
+                else:
+                    continue
+                self._reply_ready.notify_all()
+
+    def close(self):
+        self.stopReceiver()
+        UDPClientConnection.close(self)
+
+
 ##### TIME SYNC CLASS ######
 
 
@@ -144,7 +500,10 @@ class ioHubTimeSyncConnection(UDPClientConnection):
 
         self.sync_batch_size = 5
 
-    def sync(self):
+    def syncSamples(self):
+        """Sends a batch of sync requests to the remote ioHub Server and
+        returns a list of (local_time, remote_time, rtt) for the replies,
+        where local_time is the local time at the middle of the request."""
         sync_count = self.sync_batch_size
         sync_data = ['SYNC_REQ', ]
 
@@ -158,10 +517,7 @@ class ioHubTimeSyncConnection(UDPClientConnection):
         remote_address = self.remote_iohub_address
         sendto = self.sock.sendto
 
-        min_delay = 1000.0
-        min_local_time = 0.0
-        min_remote_time = 0.0
-
+        samples = []
         while sync_count > 0:
             # send sync request
             sync_start = Computer.getTime()
@@ -174,15 +530,17 @@ class ioHubTimeSyncConnection(UDPClientConnection):
             sync_end = Computer.getTime()
             rtt = sync_end - (sync_start + sync_start2) / 2.0
 
-            old_delay = min_delay
-            min_delay = min(min_delay, rtt)
-
-            if old_delay != min_delay:
-                min_local_time = (sync_end + sync_start) / 2.0
-                min_remote_time = remote_time
+            samples.append(((sync_end + sync_start) / 2.0, remote_time, rtt))
             sync_count = sync_count - 1
 
-        return min_delay, min_local_time, min_remote_time
+        return samples
+
+    def sync(self):
+        """Returns the (rtt, local_time, remote_time) of the sync request
+        in a batch with the smallest round trip time."""
+        local_time, remote_time, rtt = min(self.syncSamples(),
+                                           key=lambda sample: sample[2])
+        return rtt, local_time, remote_time
 
 
 class ioHubTimeGreenSyncManager(Greenlet):
@@ -228,27 +586,19 @@ class ioHubTimeGreenSyncManager(Greenlet):
         self._close()
 
     def _sync(self, calc_drift_and_offset=True):
+        if not self._sync_socket:
+            return True
         try:
-            if self._sync_socket:
-                r = self._sync_socket.sync()
-                min_delay, min_local_time, min_remote_time = r
-                sync_state_target = self.sync_state_target
-                sync_state_target.RTTs.append(min_delay)
-                sync_state_target.L_times.append(min_local_time)
-                sync_state_target.R_times.append(min_remote_time)
-
-                if calc_drift_and_offset is True:
-                    l1 = sync_state_target.L_times[-2]
-                    l2 = sync_state_target.L_times[-1]
-                    r1 = sync_state_target.R_times[-2]
-                    r2 = sync_state_target.R_times[-1]
-                    self.sync_state_target.drifts.append((r2 - r1) / (l2 - l1))
-
-                    l = sync_state_target.L_times[-1]
-                    r = sync_state_target.R_times[-1]
-                    self.sync_state_target.offsets = (r - l)
-        except Exception: # pylint: disable=broad-except
+            self.sync_state_target.addSamples(
+                self._sync_socket.syncSamples(),
+                update=calc_drift_and_offset)
+        except socket.error:  # e.g. no reply from the remote ioHub Server
             return False
+        except Exception:
+            print2err('** Exception during ioHubTimeGreenSyncManager._sync: ',
+                      self._remote_address)
+            printExceptionDetailsToStdErr()
+            raise
         return True
 
     def _close(self):
@@ -271,23 +621,9 @@ class ioHubTimeSyncManager(object):
 
     def sync(self, calc_drift_and_offset=True):
         if self._sync_socket:
-            r = self._sync_socket.sync()
-            min_delay, min_local_time, min_remote_time = r
-            sync_state_target = self.sync_state_target
-            sync_state_target.RTTs.append(min_delay)
-            sync_state_target.L_times.append(min_local_time)
-            sync_state_target.R_times.append(min_remote_time)
-
-            if calc_drift_and_offset is True:
-                l1 = sync_state_target.L_times[-2]
-                l2 = sync_state_target.L_times[-1]
-                r1 = sync_state_target.R_times[-2]
-                r2 = sync_state_target.R_times[-1]
-                self.sync_state_target.drifts.append((r2 - r1) / (l2 - l1))
-
-                l = sync_state_target.L_times[-1]
-                r = sync_state_target.R_times[-1]
-                self.sync_state_target.offsets = (r - l)
+            self.sync_state_target.addSamples(
+                self._sync_socket.syncSamples(),
+                update=calc_drift_and_offset)
 
     def close(self):
         if self._sync_socket:
@@ -301,39 +637,128 @@ class ioHubTimeSyncManager(object):
 class TimeSyncState(object):
     """Container class used by an ioHubSyncManager to hold the data necessary
     to calculate the current time base offset and drift between an ioHub Server
-    and a ioHubRemoteEventSubscriber client."""
-    RTTs = RingBuffer(10)
-    L_times = RingBuffer(10)
-    R_times = RingBuffer(10)
-    drifts = RingBuffer(20)
-    offsets = RingBuffer(20)
+    and a ioHubRemoteEventSubscriber client.
+
+    The last window_size (local time, remote time, RTT) sync samples are
+    kept. remote_time = drift * local_time + offset is fitted to them by
+    linear regression, weighting each sample by 1 / RTT**2 since the remote
+    time was taken somewhere within the RTT of the request. Samples with an
+    RTT far above the typical one (e.g. when the network or either computer
+    was busy), and then those that don't fit the line, are left out.
+    The drift is only fitted once the samples span min_drift_span sec.;
+    until then it is 1.0.
+    """
+    outlier_threshold = 3.0  # in robust standard deviations
+
+    def __init__(self, window_size=100, min_drift_span=2.0):
+        self.samples = deque(maxlen=window_size)
+        self.min_drift_span = min_drift_span
+        # drift, offset, accuracy, replaced together after each fit
+        self._estimate = 1.0, 0.0, float('nan')
+
+    @property
+    def L_times(self):
+        return np.array([sample[0] for sample in self.samples])
+
+    @property
+    def R_times(self):
+        return np.array([sample[1] for sample in self.samples])
+
+    @property
+    def RTTs(self):
+        return np.array([sample[2] for sample in self.samples])
+
+    def addSamples(self, samples, update=True):
+        """Adds (local_time, remote_time, rtt) sync samples, dropping the
+        oldest ones beyond window_size, and (by default) updates the offset
+        and drift estimates."""
+        self.samples.extend(samples)
+        if update:
+            self.update()
+
+    def update(self):
+        """Fits the offset and drift to the current samples."""
+        if not self.samples:
+            return
+        local_times, remote_times, rtts = np.array(self.samples, dtype=float).T
+        use = rtts <= np.median(rtts) + self.outlier_threshold * _mad(rtts)
+        for _ in range(3):
+            drift, offset, se = self._fit(local_times[use], remote_times[use],
+                                          rtts[use])
+            residuals = remote_times - (drift * local_times + offset)
+            limit = rtts / 2.0 + self.outlier_threshold * _mad(residuals[use])
+            inliers = use & (np.abs(residuals) <= limit)
+            if not inliers.any() or (inliers == use).all():
+                break
+            use = inliers
+        else:
+            drift, offset, se = self._fit(local_times[use], remote_times[use],
+                                          rtts[use])
+        # each sample is within half its RTT, plus the error of the fit
+        accuracy = np.hypot(np.median(rtts[use]) / 2.0, se)
+        self._estimate = float(drift), float(offset), float(accuracy)
+
+    def _fit(self, local_times, remote_times, rtts):
+        """Weighted least squares fit of remote = drift * local + offset.
+        Returns drift, offset and the standard error of the remote time
+        that they give for the latest local time."""
+        weights = 1.0 / np.maximum(rtts, 1e-6) ** 2
+        weights /= weights.sum()
+        # centred, for the precision of large times
+        local_mean = np.dot(weights, local_times)
+        remote_mean = np.dot(weights, remote_times)
+        x = local_times - local_mean
+        y = remote_times - remote_mean
+        sxx = np.dot(weights, x * x)
+        if np.ptp(local_times) >= self.min_drift_span and sxx > 0:
+            drift = np.dot(weights, x * y) / sxx
+        else:
+            drift = 1.0
+        offset = remote_mean - drift * local_mean
+        n = len(local_times)
+        if n < 3:
+            return drift, offset, 0.0
+        variance = np.dot(weights, (y - drift * x) ** 2) * n / (n - 2)
+        x_latest = local_times.max() - local_mean
+        se2 = variance / n
+        if sxx > 0:
+            se2 += variance * x_latest ** 2 / (sxx * n)
+        return drift, offset, np.sqrt(se2)
 
     def getDrift(self):
         """Current drift between two time bases."""
-        return self.drifts.mean()
+        return self._estimate[0]
 
     def getOffset(self):
         """Current offset between two time bases."""
-        return self.offsets.mean()
+        return self._estimate[1]
 
     def getAccuracy(self):
-        """Current accuracy of the time synchronization, as calculated as the.
-
-        average of the last 10 round trip time sync request - response delays
-        divided by two.
-
-        """
-        return self.RTTs.mean() / 2.0
+        """Current accuracy of the time synchronization, i.e. an estimate of
+        the uncertainty (sec.msec) of the times converted between the two
+        time bases: half the typical round trip time of the sync requests
+        combined with the standard error of the fit."""
+        return self._estimate[2]
 
     def local2RemoteTime(self, local_time=None):
         """Converts a local time (sec.msec format) to the corresponding remote
         computer time, using the current offset and drift measures."""
         if local_time is None:
             local_time = Computer.getTime()
-        return self.getDrift() * local_time + self.getOffset()
+        drift, offset, _ = self._estimate
+        return drift * local_time + offset
 
     def remote2LocalTime(self, remote_time):
         """Converts a remote computer time (sec.msec format) to the
         corresponding local time, using the current offset and drift
         measures."""
-        return (remote_time - self.getOffset()) / self.getDrift()
+        drift, offset, _ = self._estimate
+        return (remote_time - offset) / drift
+
+
+def _mad(values):
+    """Median absolute deviation, scaled to estimate the standard deviation
+    of normally distributed values."""
+    if len(values) == 0:
+        return 0.0
+    return 1.4826 * np.median(np.abs(values - np.median(values)))
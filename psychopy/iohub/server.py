@@ -20,11 +20,11 @@ try:
 except ImportError:
     pass
 
-from past.builtins import basestring, unicode
+from past.builtins import basestring
 from . import _pkgroot
 from . import IOHUB_DIRECTORY, EXP_SCRIPT_DIRECTORY, _DATA_STORE_AVAILABLE
 from .errors import print2err, printExceptionDetailsToStdErr, ioHubError
-from .net import MAX_PACKET_SIZE
+from .net import MAX_DATAGRAM_SIZE, ChunkSender
 from .util import convertCamelToSnake, win32MessagePump
 from .util import yload, yLoader
 from .constants import DeviceConstants, EventConstants
@@ -33,24 +33,24 @@ from .devices import Computer
 from .devices.deviceConfigValidation import validateDeviceConfiguration
 getTime = Computer.getTime
 
-MAX_PACKET_SIZE = 64 * 1024
-
 # pylint: disable=protected-access
 # pylint: disable=broad-except
 
 class udpServer(DatagramServer):
     client_proc_init_req = None
-    def __init__(self, ioHubServer, address):
+    def __init__(self, ioHubServer, address, compress_threshold=0):
         self.iohub = ioHubServer
         self.feed = None
+        self._replies = None
         self._running = True
         self.iohub.log('ioHub Server configuring msgpack...')
         self.coder = msgpack
-        self.packer = msgpack.Packer()
+        self.packer = msgpack.Packer(use_bin_type=True)
         self.pack = self.packer.pack
-        self.unpacker = msgpack.Unpacker(use_list=True)
+        self.unpacker = msgpack.Unpacker(use_list=True, raw=False)
         self.unpack = self.unpacker.unpack
         self.feed = self.unpacker.feed
+        self.chunks = ChunkSender(compress_threshold)
         DatagramServer.__init__(self, address)
 
     def handle(self, request, replyTo):
@@ -59,7 +59,46 @@ class udpServer(DatagramServer):
         self.feed(request)
         request = self.unpack()
         # print2err(">> Rx Packet: {}, {}".format(request, replyTo))
-        request_type = unicode(request.pop(0), 'utf-8') # convert bytes to string for compatibility
+        request_type = request[0]
+        if request_type in ('REQ', 'BATCH'):
+            # request(s) tagged with an id, which is returned with the reply
+            _, req_id, data = request
+            if request_type == 'REQ':
+                reply = ('REPLY', req_id, self.handleRequests([data],
+                                                              replyTo)[0])
+            else:
+                reply = ('BATCH_REPLY', req_id,
+                         self.handleRequests(data, replyTo))
+            self.sendResponse(reply, replyTo)
+            return True
+        elif request_type == 'NO_REPLY':
+            self.handleRequests(request[1], replyTo)
+            return True
+        return self.handleRequest(request, replyTo)
+
+    def handleRequests(self, requests, replyTo):
+        """Handles each of a list of requests, returning the list of their
+        replies (None for a request with no reply) rather than sending them.
+        """
+        replies = self._replies = []
+        try:
+            for request in requests:
+                reply_count = len(replies)
+                try:
+                    self.handleRequest(list(request), replyTo)
+                except Exception:
+                    print2err('IOHUB_REQUEST_ERROR: ', request)
+                    printExceptionDetailsToStdErr()
+                    replies.append('IOHUB_REQUEST_ERROR')
+                if len(replies) == reply_count:
+                    replies.append(None)
+                del replies[reply_count:-1]
+        finally:
+            self._replies = None
+        return replies
+
+    def handleRequest(self, request, replyTo):
+        request_type = request.pop(0)
         if request_type == 'SYNC_REQ':
             self.sendResponse(['SYNC_REPLY', getTime()], replyTo)
             return True
@@ -73,6 +112,13 @@ class udpServer(DatagramServer):
             return True
         elif request_type == 'GET_EVENTS':
             return self.handleGetEvents(replyTo)
+        elif request_type == 'IOHUB_RESEND':
+            reply_id, indexes = request
+            if not self.chunks.resend(self.socket, reply_id, indexes,
+                                      replyTo):
+                print2err('IOHUB_RESEND_ERROR: reply {} is no longer '
+                          'available'.format(reply_id))
+            return True
         elif request_type == 'EXP_DEVICE':
             return self.handleExperimentDeviceRequest(request, replyTo)
         elif request_type == 'CUSTOM_TASK':
@@ -88,7 +134,7 @@ class udpServer(DatagramServer):
 
             result = None
             try:
-                result = getattr(self, unicode(callable_name, 'utf-8'))
+                result = getattr(self, callable_name)
             except Exception:
                 print2err('RPC_ATTRIBUTE_ERROR')
                 printExceptionDetailsToStdErr()
@@ -195,7 +241,7 @@ class udpServer(DatagramServer):
             return False
 
     def handleExperimentDeviceRequest(self, request, replyTo):
-        request_type = unicode(request.pop(0), 'utf-8') # convert bytes to string for compatibility
+        request_type = request.pop(0)
         io_dev_dict = ioServer.deviceDict
         if request_type == 'EVENT_TX':
             exp_events = request.pop(0)
@@ -205,8 +251,8 @@ class udpServer(DatagramServer):
             self.sendResponse(('EVENT_TX_RESULT', len(exp_events)), replyTo)
             return True
         elif request_type == 'DEV_RPC':
-            dclass = unicode(request.pop(0), 'utf-8')
-            dmethod = unicode(request.pop(0), 'utf-8')
+            dclass = request.pop(0)
+            dmethod = request.pop(0)
             args = None
             kwargs = None
             if len(request) == 1:
@@ -273,7 +319,7 @@ class udpServer(DatagramServer):
                 return False
 
         elif request_type == 'GET_DEV_INTERFACE':
-            dclass = unicode(request.pop(0), 'utf-8')
+            dclass = request.pop(0)
             data = None
             if dclass in ['EyeTracker', 'DAQ']:
                 for dname, hdevice in ioServer.deviceDict.items():
@@ -314,31 +360,22 @@ class udpServer(DatagramServer):
             return False
 
     def sendResponse(self, data, address):
+        if self._replies is not None:
+            # collected by handleRequests
+            self._replies.append(data)
+            return
         reply_data_sz = -1
-        max_pkt_sz = int(MAX_PACKET_SIZE / 2 - 20)
-        pkt_cnt = -1
-        p = si = -1
         try:
             reply_data = self.pack(data)
             reply_data_sz = len(reply_data)
-            if reply_data_sz >= max_pkt_sz:
-                pkt_cnt = int(reply_data_sz // max_pkt_sz) + 1
-                mpr_payload = ('IOHUB_MULTIPACKET_RESPONSE', pkt_cnt)
-                self.sendResponse(mpr_payload, address)
-                for p in xrange(pkt_cnt - 1):
-                    si = p*max_pkt_sz
-                    self.socket.sendto(reply_data[si:si+max_pkt_sz], address)
-                si = (p+1)*max_pkt_sz
-                self.socket.sendto(reply_data[si:reply_data_sz], address)
+            if reply_data_sz > MAX_DATAGRAM_SIZE:
+                self.chunks.send(self.socket, reply_data, address)
             else:
                 self.socket.sendto(reply_data, address)
         except Exception:
             print2err('=============================')
             print2err('Error trying to send data to experiment process:')
-            print2err('max_pkt_sz: ', max_pkt_sz)
             print2err('reply_data_sz: ', reply_data_sz)
-            print2err('pkt_cnt: ', pkt_cnt)
-            print2err('packet index, byte index: ', p, si)
             printExceptionDetailsToStdErr()
             print2err('=============================')
             pktdata = self.pack('IOHUB_SERVER_RESPONSE_ERROR')
@@ -520,7 +557,9 @@ class ioServer(object):
 
         self._running = True
         # start UDP service
-        self.udpService = udpServer(self, ':%d' % config.get('udp_port', 9000))
+        self.udpService = udpServer(
+            self, ':%d' % config.get('udp_port', 9000),
+            config.get('udp_compress_threshold', 0))
         self._initDataStore(config, rootScriptPathDir)
 
         self._addDevices(config)
@@ -867,20 +906,22 @@ class ioServer(object):
             evt = []
             try:
                 events = device._getNativeEventBuffer()
-                while events:
-                    evt = device._getIOHubEventObject(events.popleft())
-                    if evt:
-                        etype = evt[DeviceEvent.EVENT_TYPE_ID_INDEX]
-                        for l in device._getEventListeners(etype):
-                            l._handleEvent(evt)
+                iohub_events = []
+                try:
+                    while events:
+                        evt = device._getIOHubEventObject(events.popleft())
+                        if evt:
+                            iohub_events.append(evt)
+                finally:
+                    # the events converted before an error are dispatched
+                    # all the same (they have left the native buffer)
+                    self._dispatchEvents(device, iohub_events)
 
                 filtered_events = []
                 for efilter in device._filters.values():
+                    efilter._processInputBlock()
                     filtered_events.extend(efilter._removeOutputEvents())
-                for evt in filtered_events:
-                    etype = evt[DeviceEvent.EVENT_TYPE_ID_INDEX]
-                    for l in device._getEventListeners(etype):
-                        l._handleEvent(evt)
+                self._dispatchEvents(device, filtered_events)
 
             except Exception:
                 print2err('Error in processDeviceEvents: ', device,
@@ -892,9 +933,33 @@ class ioServer(object):
                 printExceptionDetailsToStdErr()
                 print2err('--------------------------------------')
 
+    @staticmethod
+    def _dispatchEvents(device, events):
+        """Pass events to the device's listeners for their type. Each run of
+        consecutive events of the same type is passed as one list to
+        listeners that have a _handleEvents method."""
+        start = 0
+        while start < len(events):
+            etype = events[start][DeviceEvent.EVENT_TYPE_ID_INDEX]
+            end = start + 1
+            while (end < len(events) and
+                   events[end][DeviceEvent.EVENT_TYPE_ID_INDEX] == etype):
+                end += 1
+            run = events[start:end]
+            for l in device._getEventListeners(etype):
+                if hasattr(l, '_handleEvents'):
+                    l._handleEvents(run)
+                else:
+                    for evt in run:
+                        l._handleEvent(evt)
+            start = end
+
     def _handleEvent(self, event):
         self.eventBuffer.append(event)
 
+    def _handleEvents(self, events):
+        self.eventBuffer.extend(events)
+
     def clearEventBuffer(self, call_proc_events=True):
         if call_proc_events is True:
             self.processDeviceEvents()
@@ -10,7 +10,7 @@ MonotonicClock = None
 monotonicClock = None
 
 if _ispkg is False:
-    import psychopy
+    import psychopy.clock
     MonotonicClock = psychopy.clock.MonotonicClock
     monotonicClock = psychopy.clock.monotonicClock
     _getTime = monotonicClock.getTime
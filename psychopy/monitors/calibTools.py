@@ -33,9 +33,8 @@ import sys
 from copy import deepcopy, copy
 
 import numpy as np
-import scipy.optimize as optim
-from scipy import interpolate
-import json_tricks  # allows json to dump/load np.arrays and dates
+# scipy and json_tricks (which imports pandas) are slow to import, so they
+# are imported by the functions that need them
 
 DEBUG = False
 
@@ -67,6 +66,34 @@ if not os.path.isdir(monitorFolder):
     os.makedirs(monitorFolder)
 
 
+# the calibrations loaded from each monitor file, as
+# {fileName: ((mtime, size), calibs)}, so that a file is only parsed again
+# when it has changed
+_calibFileCache = {}
+
+
+def _loadCalibFile(fileName):
+    """Returns (a copy of) the calibrations stored in a monitor file (json or
+    pickled .calib), using the cached values if the file is unchanged
+    """
+    info = os.stat(fileName)
+    stamp = (info.st_mtime, info.st_size)
+    cached = _calibFileCache.get(fileName)
+    if cached is None or cached[0] != stamp:
+        if fileName.endswith(".json"):
+            import json_tricks  # allows json to load np.arrays and dates
+            with open(fileName, 'r') as thisFile:
+                calibs = json_tricks.load(thisFile, ignore_comments=False,
+                                          encoding='utf-8',
+                                          preserve_order=False)
+        else:
+            with open(fileName, 'rb') as thisFile:
+                calibs = pickle.load(thisFile)
+        cached = _calibFileCache[fileName] = (stamp, calibs)
+    # each Monitor can change its own calibrations
+    return deepcopy(cached[1])
+
+
 class Monitor(object):
     """Creates a monitor object for storing calibration details.
     This will be loaded automatically from disk if the
@@ -97,6 +124,11 @@ class Monitor(object):
     or not (in which case the changes will be lost)
     """
 
+    # number of entries per gun in the tables used by linearizeLums
+    linearizeLUTSize = 4096
+    # lums in this many of the lowest entries are calculated directly
+    linearizeLUTSteep = 16
+
     def __init__(self, name,
                  width=None,
                  distance=None,
@@ -120,6 +152,7 @@ class Monitor(object):
         self.calibNames = []
         self._gammaInterpolator = None
         self._gammaInterpolator2 = None
+        self._linearizeLUT = None  # (calibration key, tables)
         self._loadAll()
         if len(self.calibNames) > 0:
             self.setCurrent(-1)  # will fetch previous vals if monitor exists
@@ -432,13 +465,7 @@ class Monitor(object):
         if not os.path.exists(thisFileName):
             self.calibNames = []
         else:
-            if ext==".json":
-                with open(thisFileName, 'r') as thisFile:
-                    self.calibs = json_tricks.load(thisFile, ignore_comments=False,
-                                                   encoding='utf-8', preserve_order=False)
-            else:
-                with open(thisFileName, 'rb') as thisFile:
-                    self.calibs = pickle.load(thisFile)
+            self.calibs = _loadCalibFile(thisFileName)
             self.calibNames = sorted(self.calibs)
             
             if not constants.PY3:  # saving for future (not needed if we are IN future!)
@@ -535,6 +562,7 @@ class Monitor(object):
             thisFileName = os.path.join(monitorFolder, self.name + ".calib")
             with open(thisFileName, 'wb') as thisFile:
                 pickle.dump(self.calibs, thisFile)
+            _calibFileCache.pop(thisFileName, None)
 
         # also save as JSON (at the moment)
         # (When we're sure this works we should ONLY save as JSON)
@@ -552,9 +580,11 @@ class Monitor(object):
             calib = self.calibs[calibName]
             if isinstance(calib['calibDate'], time.struct_time):
                 calib['calibDate'] = time.mktime(calib['calibDate'])
+        import json_tricks  # allows json to dump np.arrays and dates
         with open(thisFileName, 'w') as outfile:
             json_tricks.dump(self.calibs, outfile, indent=2,
                              allow_nan=True)
+        _calibFileCache.pop(thisFileName, None)
 
 
     def copyCalib(self, calibName=None):
@@ -572,6 +602,82 @@ class Monitor(object):
                       overrideGamma=None):
         """lums should be uncalibrated luminance values (e.g. a linear ramp)
         ranging 0:1
+
+        Arrays of lums (either 1D luminance or Nx3 rgb) are linearized by
+        looking them up in tables of :attr:`linearizeLUTSize` values per gun
+        (interpolating linearly between entries). These are computed once
+        for the current calibration and are recomputed when it changes, so
+        linearizing large arrays (e.g. textures) is fast.
+        """
+        desiredLums = np.asarray(desiredLums)
+        if overrideGamma is None and self._canUseLinearizeLUT(desiredLums):
+            lut = self._getLinearizeLUT(desiredLums.ndim, newInterpolators)
+            pos = desiredLums * (lut.shape[-1] - 1)
+            index = np.minimum(pos.astype(np.intp), lut.shape[-1] - 2)
+            frac = pos - index
+            if desiredLums.ndim > 1:
+                rows = np.arange(3)
+            else:
+                rows = 0
+            lower = lut[rows, index]
+            output = lower + frac * (lut[rows, index + 1] - lower)
+            # inverse gamma functions are too steep near zero to interpolate
+            # accurately so the lowest lums are calculated directly
+            steep = index < self.linearizeLUTSteep
+            if desiredLums.ndim > 1:
+                steep = steep.any(axis=1)
+            if steep.any():
+                output[steep] = self._linearizeLums(desiredLums[steep])
+            return output
+        return self._linearizeLums(desiredLums, newInterpolators,
+                                   overrideGamma)
+
+    def _canUseLinearizeLUT(self, desiredLums):
+        """Whether desiredLums can be linearized with the look-up tables
+        (values outside 0:1, or shapes other than 1D or Nx3, use the full
+        calculation)
+        """
+        if desiredLums.size < 2 or desiredLums.dtype.kind not in 'fiu':
+            return False
+        if desiredLums.ndim > 2 or (desiredLums.ndim == 2 and
+                                    desiredLums.shape[1] != 3):
+            return False
+        linMethod = self.getLinearizeMethod()
+        if linMethod == 3:
+            if self.getLumsPre() is None:
+                return False
+        elif linMethod not in [1, 2, 4]:
+            return False
+        return bool(desiredLums.min() >= 0 and desiredLums.max() <= 1)
+
+    def _getLinearizeLUT(self, ndim, newInterpolators=False):
+        """Returns the look-up table of linearized values for evenly spaced
+        lums 0:1, either for luminance (ndim=1) or for each gun (ndim=2),
+        recomputing it if the calibration has changed since it was made
+        """
+        calib = self.currentCalib
+        key = [self.getLinearizeMethod()]
+        for name in ['gamma', 'gammaGrid', 'lumsPre', 'levelsPre']:
+            val = calib.get(name)
+            if val is not None:
+                val = np.asarray(val, dtype=float).tobytes()
+            key.append(val)
+        if (newInterpolators or self._linearizeLUT is None or
+                self._linearizeLUT[0] != key):
+            self._linearizeLUT = (key, {})
+        tables = self._linearizeLUT[1]
+        if ndim not in tables:
+            levels = np.linspace(0, 1, self.linearizeLUTSize)
+            if ndim > 1:
+                levels = np.repeat(levels[:, None], 3, axis=1)
+            lut = self._linearizeLums(levels, newInterpolators)
+            tables[ndim] = np.ascontiguousarray(np.atleast_2d(lut.T))
+        return tables[ndim]
+
+    def _linearizeLums(self, desiredLums, newInterpolators=False,
+                       overrideGamma=None):
+        """Calculates linearizeLums for each value (rather than from the
+        look-up tables)
         """
         linMethod = self.getLinearizeMethod()
         desiredLums = np.asarray(desiredLums)
@@ -586,6 +692,7 @@ class Monitor(object):
                 if self.autoLog:
                     logging.info('Creating linear interpolation for gamma')
                 # we can make an interpolator
+                from scipy import interpolate
                 self._gammaInterpolator = []
                 self._gammaInterpolator2 = []
                 # each of these interpolators is a function!
@@ -755,6 +862,7 @@ class GammaCalculator(object):
         # gamma = optim.fminbound(self.fitGammaErrFun,
         #    minGamma, maxGamma,
         #    args=(x,y, minLum, maxLum))
+        import scipy.optimize as optim
         params = optim.fmin_tnc(self.fitGammaErrFun, np.array(guess),
                                 approx_grad=True,
                                 args=(x, y, minLum, maxLum),
@@ -780,6 +888,7 @@ class GammaCalculator(object):
 def makeDKL2RGB(nm, powerRGB):
     """Creates a 3x3 DKL->RGB conversion matrix from the spectral input powers
     """
+    from scipy import interpolate
     interpolateCones = interpolate.interp1d(wavelength_5nm,
                                             cones_SmithPokorny)
     interpolateJudd = interpolate.interp1d(wavelength_5nm,
@@ -821,7 +930,7 @@ def makeDKL2RGB(nm, powerRGB):
 def makeLMS2RGB(nm, powerRGB):
     """Creates a 3x3 LMS->RGB conversion matrix from the spectral input powers
     """
-
+    from scipy import interpolate
     interpolateCones = interpolate.interp1d(wavelength_5nm,
                                             cones_SmithPokorny)
     coneSens = interpolateCones(nm)
@@ -7,6 +7,7 @@ from builtins import object
 import os
 import sys
 import platform
+import hashlib
 import configobj
 from configobj import ConfigObj
 
@@ -15,6 +16,11 @@ try:
 except ImportError:
     from configobj import validate
 
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
 join = os.path.join
 
 
@@ -129,6 +135,10 @@ class Preferences(object):
 
     def loadAll(self):
         """Load the user prefs and the application data
+
+        The validated prefs are cached (in prefsCache.pickle, in the user
+        prefs folder) so that they are only parsed and validated again when
+        one of the spec or cfg files has changed.
         """
         self._validator = validate.Validator()
 
@@ -137,6 +147,10 @@ class Preferences(object):
             self.paths['userPrefsDir'], 'appData.cfg')
         self.paths['userPrefsFile'] = join(
             self.paths['userPrefsDir'], 'userPrefs.cfg')
+        self.paths['appDataSpecFile'] = join(
+            self.paths['appDir'], 'appData.spec')
+        self.paths['prefsCacheFile'] = join(
+            self.paths['userPrefsDir'], 'prefsCache.pickle')
 
         # If PsychoPy is tucked away by Py2exe in library.zip, the preferences
         # file cannot be found. This hack is an attempt to fix this.
@@ -145,9 +159,12 @@ class Preferences(object):
             self.paths["prefsSpecFile"] = self.paths["prefsSpecFile"].replace(
                 libzip, "\\resources\\")
 
-        self.userPrefsCfg = self.loadUserPrefs()
-        self.appDataCfg = self.loadAppData()
-        self.validate()
+        cacheKey = self._getCacheKey()
+        if not self._loadCache(cacheKey):
+            self.userPrefsCfg = self.loadUserPrefs()
+            self.appDataCfg = self.loadAppData()
+            self.validate()
+            self._saveCache(cacheKey)
 
         # simplify namespace
         self.general = self.userPrefsCfg['general']
@@ -197,7 +214,7 @@ class Preferences(object):
 
     def loadAppData(self):
         # fetch appData too against a config spec
-        appDataSpec = ConfigObj(join(self.paths['appDir'], 'appData.spec'),
+        appDataSpec = ConfigObj(self.paths['appDataSpecFile'],
                                 encoding='UTF8', list_values=False)
         cfg = ConfigObj(self.paths['appDataFile'],
                         encoding='UTF8', configspec=appDataSpec)
@@ -222,6 +239,61 @@ class Preferences(object):
             os.makedirs(self.paths['userPrefsDir'])
         self.appDataCfg.write()
 
+    def _getCacheKey(self):
+        """Identifies the contents of the spec and cfg files that the prefs
+        are loaded from (and the python and configobj versions)
+        """
+        key = [sys.version_info[:2], configobj.__version__]
+        for name in ['prefsSpecFile', 'userPrefsFile', 'appDataSpecFile',
+                     'appDataFile']:
+            path = self.paths[name]
+            try:
+                mtime = os.path.getmtime(path)
+                with open(path, 'rb') as f:
+                    contents = f.read()
+            except (OSError, IOError):  # e.g. no user prefs yet
+                key.append((path, None))
+            else:
+                key.append((path, mtime, hashlib.sha1(contents).hexdigest()))
+        return key
+
+    def _loadCache(self, cacheKey):
+        """Load the validated prefs from the cache file if it is up to date
+        (has the same cacheKey); returns True if it was.
+        """
+        try:
+            with open(self.paths['prefsCacheFile'], 'rb') as f:
+                cached = pickle.load(f)
+        except Exception:  # missing, or written by another python etc
+            return False
+        if cached[0] != cacheKey:
+            return False
+        # pickled together, so userPrefsCfg still uses this prefsSpec
+        _, self.prefsSpec, self.userPrefsCfg, self.appDataCfg = cached
+        return True
+
+    def _saveCache(self, cacheKey):
+        """Save the validated prefs to the cache file, if possible
+        """
+        cacheFile = self.paths['prefsCacheFile']
+        tmpFile = '%s.%i.tmp' % (cacheFile, os.getpid())
+        cached = (cacheKey, self.prefsSpec, self.userPrefsCfg,
+                  self.appDataCfg)
+        try:
+            with open(tmpFile, 'wb') as f:
+                pickle.dump(cached, f, 2)  # a protocol both py2 and py3 read
+            # replace the cache in one step, in case other processes (e.g.
+            # an ioHub server) are reading it
+            if hasattr(os, 'replace'):
+                os.replace(tmpFile, cacheFile)
+            else:
+                if os.path.exists(cacheFile):
+                    os.remove(cacheFile)
+                os.rename(tmpFile, cacheFile)
+        except Exception:  # e.g. read-only prefs folder, so don't cache
+            if os.path.exists(tmpFile):
+                os.remove(tmpFile)
+
     def validate(self):
         """Validate (user) preferences and reset invalid settings to defaults
         """
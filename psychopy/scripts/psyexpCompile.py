@@ -15,8 +15,11 @@ parser = argparse.ArgumentParser(description='Compile your python file from here
 parser.add_argument('infile', help='The input (psyexp) file to be compiled')
 parser.add_argument('--version', '-v', help='The PsychoPy version to use for compiling the script. e.g. 1.84.1')
 parser.add_argument('--outfile', '-o', help='The output (py) file to be generated (defaults to the ')
+parser.add_argument('--cache', '-c', action='store_true', help='Reuse the code of Routines and Components that have not changed since the last compile')
+parser.add_argument('--timing', '-t', action='store_true', help='Use the code cache and report which parts of the script were rebuilt and how long they took')
 
-def compileScript(infile=None, version=None, outfile=None):
+def compileScript(infile=None, version=None, outfile=None, timing=False,
+                  useCache=False):
     """
     This function will compile either Python or JS PsychoPy script from .psyexp file.
         :param infile: The input (psyexp) file to be compiled
@@ -24,6 +27,11 @@ def compileScript(infile=None, version=None, outfile=None):
                         Warning: Cannot set version if module imported. Set version from
                         command line interface only.
         :param outfile: The output (py) file to be generated (defaults to Python script.
+        :param timing: If True, use the code cache and print which Routines/Components
+                       had their code rebuilt (rather than taken from the cache) and how
+                       long that took.
+        :param useCache: If True, reuse the code of Routines/Components that have not
+                         changed since the last compile (see psychopy.experiment.codecache).
     """
     if __name__ != '__main__' and version not in [None, 'None', 'none', '']:
         version = None
@@ -39,6 +47,8 @@ def compileScript(infile=None, version=None, outfile=None):
         # Write version to experiment init text
         thisExp.psychopyVersion = version
 
+    useCache = useCache or timing
+
     # Set output type, either JS or Python
     if outfile.endswith(".js"):
         targetOutput = "PsychoJS"
@@ -48,16 +58,21 @@ def compileScript(infile=None, version=None, outfile=None):
     # Write script
     if targetOutput == "PsychoJS":
         # Write module JS code
-        script = thisExp.writeScript(outfile, target=targetOutput, modular=True)
+        script = thisExp.writeScript(outfile, target=targetOutput, modular=True,
+                                     useCache=useCache)
         # Write no module JS code
         outfileNoModule = outfile.replace('.js', 'NoModule.js')  # For no JS module script
-        scriptNoModule = thisExp.writeScript(outfileNoModule, target=targetOutput, modular=False)
+        scriptNoModule = thisExp.writeScript(outfileNoModule, target=targetOutput, modular=False,
+                                             useCache=useCache)
         # Store scripts in list
         scriptDict = {'outfile': script, 'outfileNoModule': scriptNoModule}
     else:
-        script = thisExp.writeScript(outfile, target=targetOutput)
+        script = thisExp.writeScript(outfile, target=targetOutput, useCache=useCache)
         scriptDict = {'outfile': script}
 
+    if timing:
+        print(thisExp.compileReport)
+
     # Output script to file
     for scripts in scriptDict:
         with codecs.open(eval(scripts), 'w', 'utf-8') as f:
@@ -77,4 +92,4 @@ if __name__ == "__main__":
         useVersion(args.version)
 
     # run PsychoPy with useVersion active
-    compileScript(args.infile, args.version, args.outfile)
+    compileScript(args.infile, args.version, args.outfile, args.timing, args.cache)
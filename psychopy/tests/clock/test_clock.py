@@ -1,10 +1,12 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import threading
 import numpy as np
 import pytest
 
-from psychopy.clock import wait, StaticPeriod, CountdownTimer
+from psychopy.clock import (wait, StaticPeriod, CountdownTimer, getTime,
+                            Scheduler)
 from psychopy.visual import Window
 
 
@@ -45,5 +47,64 @@ def test_StaticPeriod():
     win.close()
 
 
+def test_Scheduler():
+    scheduler = Scheduler()
+    calls = []
+    t0 = getTime()
+    for t in [0.03, 0.01, 0.02, 0.01]:
+        scheduler.callAt(t0 + t, calls.append, t)
+    cancelled = scheduler.callAt(t0 + 0.015, calls.append, 'cancelled')
+    scheduler.cancel(cancelled)
+    overshoot = scheduler.waitUntil(t0 + 0.05, hogCPUperiod=0.02)
+    assert 0 <= overshoot < 0.005
+    assert getTime() - t0 >= 0.05
+    assert calls == [0.01, 0.01, 0.02, 0.03]
+    assert scheduler.sleepMargin <= scheduler.maxSleepMargin
+
+    # calls that are due are made without waiting
+    scheduler.callAt(getTime(), calls.append, 'now')
+    scheduler.runDue()
+    assert calls[-1] == 'now'
+
+    for n in range(5):
+        scheduler.waitUntil(getTime() + 0.01)
+    histogram = scheduler.overshootHistogram()
+    assert sum(count for _, _, count in histogram) == scheduler.nWaits == 6
+    assert histogram[0][0] == 0 and histogram[-1][1] == float('inf')
+    scheduler.resetOvershoots()
+    assert scheduler.nWaits == 0
+
+
+def test_Scheduler_first_wait():
+    # a new scheduler doesn't overshoot (e.g. by calibrating) on first use
+    scheduler = Scheduler()
+    t0 = getTime()
+    assert scheduler.waitUntil(t0 + 0.002) < 0.002
+    assert scheduler.sleepMargin == scheduler.maxSleepMargin
+    scheduler.waitUntil(getTime() + 0.05)
+    assert scheduler.sleepMargin < scheduler.maxSleepMargin
+
+
+def test_Scheduler_threads():
+    # calls are scheduled from other threads while waiting
+    scheduler = Scheduler()
+    calls = []
+    t0 = getTime()
+
+    def schedule(n):
+        for i in range(200):
+            scheduler.callAt(t0 + 0.01 + i * 0.0001, calls.append, (n, i))
+
+    threads = [threading.Thread(target=schedule, args=(n,))
+               for n in range(4)]
+    for thread in threads:
+        thread.start()
+    scheduler.waitUntil(t0 + 0.05)
+    for thread in threads:
+        thread.join()
+    scheduler.runDue()
+    assert sorted(calls) == [(n, i) for n in range(4) for i in range(200)]
+
+
 if __name__ == '__main__':
     test_StaticPeriod()
@@ -390,6 +390,40 @@ class _baseVisualTest(object):
             utils.compareScreenshot('blend_add_%s.png' %self.contextName,
                                     win, crit=20)
 
+    def test_text_layoutCache(self):
+        win = self.win
+        words = [u'gr\u00fcn', 'rouge', 'blue']
+        stim = visual.TextStim(win, text='', autoLog=False)
+        if win.winType == 'pygame':
+            stim.preloadText(words)  # no pyglet layouts to cache
+            return
+        cache = visual.text.textLayoutCache
+        misses = cache.misses
+        stim.preloadText(words)
+        assert cache.misses == misses + 3
+        hits = cache.hits
+        for word in words:
+            stim.text = word
+            stim.draw()
+        assert cache.hits == hits + 3
+        assert cache.misses == misses + 3
+        # stimuli with the same font and height share the layouts
+        other = visual.TextStim(win, text=words[-1], autoLog=False)
+        assert other._pygletTextObj is stim._pygletTextObj
+        # whatever their color and opacity, which are set when drawn
+        other.color = 'red'
+        other.opacity = 0.5
+        other.draw()
+        assert other._pygletTextObj is stim._pygletTextObj
+        assert cache.misses == misses + 3
+        assert other._pygletTextObj._psychopyColor[3] == 127
+        stim.draw()
+        assert stim._pygletTextObj._psychopyColor[3] == 255
+        # but not with another wrap width
+        other.wrapWidth = other.wrapWidth / 2.0
+        other.draw()
+        assert other._pygletTextObj is not stim._pygletTextObj
+
     def test_mov(self):
         win = self.win
         if self.win.winType == 'pygame':
@@ -88,6 +88,7 @@ def contains_overlaps(testType):
                     x = points[j][0] * param['scaleFactor']
                     y = points[j][1] * param['scaleFactor']
                     assert shape.contains(x, y) == res
+                    assert shape.containsPoints([(x, y)])[0] == res
                 elif testType == 'overlaps':
                     res = shape.overlaps(testPoints[j])
                 assert res == correctResults[i][j], \
@@ -133,6 +134,37 @@ def test_point():
     matplotlib.__version__ = mpl_version
 
 
+@pytest.mark.polygon
+def test_points():
+    poly1 = [(1,1), (1,-1), (-1,-1), (-1,1)]
+    poly2 = [(0,0), (2,0), (2,2), (1,0.5), (0,2)]  # concave
+    pts = [(0,0), (12,12), (0.5,-0.5), (-2,0), (1,1.5), (0.2,1), (1.5,1)]
+    for version in (mpl_version, '0.0'):  # matplotlib.path.Path, python
+        matplotlib.__version__ = version
+        for poly in (poly1, poly2):
+            expected = [helpers.pointInPolygon(x, y, poly) for x, y in pts]
+            assert helpers.pointsInPolygon(pts, poly).tolist() == expected
+    matplotlib.__version__ = mpl_version
+    assert not helpers.pointsInPolygon(pts, [(0,0), (1,1)]).any()
+
+
+@pytest.mark.polygon
+def test_hitTest():
+    win.units = 'height'
+    stims = [visual.Circle(win, radius=0.25, pos=(0, 0)),
+             visual.Rect(win, width=0.2, height=0.4, pos=(0, -0.5), ori=30),
+             visual.Line(win, start=(-1, -1), end=(1, 1))]
+    pts = [(0, 0), (0, -0.5), (0, -0.3), (0.05, -0.68), (1, 1), (0.2, 0.1)]
+    for i in range(2):
+        hits = win.hitTest(pts, stims)
+        assert hits.shape == (len(stims), len(pts))
+        assert hits.tolist() == [[s.contains(p) for p in pts] for s in stims]
+        stims[0].pos = (0, -0.5)  # and again after the stimuli change
+        stims[1].ori = 0
+    pix = [(x * 512, y * 512) for x, y in pts]
+    assert (win.hitTest(pix, stims, units='pix') == hits).all()
+
+
 @pytest.mark.polygon
 def test_contains():
     contains_overlaps('contains')  # matplotlib.path.Path
@@ -217,6 +249,8 @@ def test_line_contains():
 
     assert line.contains(point_1) is False
     assert line.contains(point_2) is False
+    assert line.containsPoints([point_1, point_2]).tolist() == [False, False]
+    assert line.containsPoints(point_1).tolist() == [False]
 
 
 if __name__ == '__main__':
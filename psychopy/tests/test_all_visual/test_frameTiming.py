@@ -0,0 +1,57 @@
+from __future__ import division
+
+import pytest
+from psychopy import visual
+from psychopy.tools.frametimingtools import FrameTimer, StimProfiler
+
+
+@pytest.mark.parametrize('useFBO', [False, True])
+def test_flipProbes(useFBO):
+    win = visual.Window(size=(128, 128), useFBO=useFBO, autoLog=False)
+    try:
+        visual.Rect(win, name='square', autoDraw=True, autoLog=False)
+        win.flip()
+        win.frameTimer = FrameTimer()
+        win.callOnFlip(lambda: None)
+        for _ in range(10):
+            win.flip()
+        win.frameTimer, timer = None, win.frameTimer
+        win.flip()
+    finally:
+        win.close()
+
+    assert timer.frameN == 10
+    expected = ['draw: square', 'startOfFlip', 'swapBuffers', 'endOfFlip',
+                'callOnFlip', 'logOnFlip', 'betweenFlips']
+    if useFBO:
+        expected.insert(2, 'blitFBO')
+    if win.waitBlanking:
+        expected.insert(-3, 'waitBlanking')
+    assert timer.phases == expected
+    assert timer.nProbes == 10 * len(expected)
+    durations = timer.durations()
+    assert len(durations['draw: square']) == 10
+    assert len(durations['betweenFlips']) == 9
+    assert all((durations[phase] >= 0).all() for phase in durations)
+
+
+def test_stimProfiler():
+    win = visual.Window(size=(128, 128), autoLog=False)
+    try:
+        win.stimProfiler = StimProfiler(win)
+        grating = visual.GratingStim(win, name='grating', autoLog=False)
+        visual.Rect(win, name='square', autoDraw=True, autoLog=False)
+        for frameN in range(5):
+            grating.ori = frameN * 10
+            grating.draw()
+            win.flip()
+        profiler = win.stimProfiler
+    finally:
+        win.close()
+
+    assert profiler.frameN == 5
+    assert profiler.calls[('grating', 'draw')][0] == 5
+    assert profiler.calls[('square', 'draw')][0] == 5
+    assert profiler.calls[('grating', 'set ori')][0] == 6  # and in __init__
+    assert ('grating', 'createTexture') in profiler.calls
+    assert len(profiler.summary(n=3).splitlines()) == 5
@@ -5,8 +5,9 @@ from builtins import object
 import psychopy.experiment
 from psychopy.experiment._experiment import RequiredImport
 from os import path
-import os, shutil, glob, sys
+import os, shutil, glob, sys, json
 import py_compile
+import hashlib
 import difflib
 from tempfile import mkdtemp
 import codecs
@@ -274,6 +275,79 @@ class TestExpt(object):
         #check that files compiles too
         self._checkCompile(py_file)
 
+    def test_codeCache(self):
+        """Scripts written from the code cache should be identical to those
+        written from scratch, and only changed code should be rebuilt
+        """
+        from psychopy.experiment import codecache
+        expfile = path.join(self.tmp_dir, 'stroop.psyexp')
+        shutil.copy(path.join(self.exp.prefsPaths['demos'], 'builder',
+                              'stroop', 'stroop.psyexp'), expfile)
+        codecache.cacheFolder = path.join(self.tmp_dir, 'codeCache')
+        try:
+            self.exp.loadFromXML(expfile)
+            # the header has the date and time so leave that out
+            noCache = self.exp.writeScript(expPath=expfile)
+            assert not path.isdir(codecache.cacheFolder)  # off by default
+            fromScratch = self.exp.writeScript(expPath=expfile, useCache=True)
+            assert fromScratch.split('\n', 6)[6] == noCache.split('\n', 6)[6]
+            # the cache is JSON, stored in cacheFolder (not with the psyexp)
+            with open(codecache.cachePath(expfile)) as f:
+                assert json.load(f)['fragments']
+            assert os.listdir(self.tmp_dir).count('stroop.psyexp') == 1
+            assert not glob.glob(path.join(self.tmp_dir, '.*'))
+
+            cached = self.exp.writeScript(expPath=expfile, useCache=True)
+            assert cached.split('\n', 6)[6] == noCache.split('\n', 6)[6]
+            assert ': 0 of ' in self.exp.compileReport
+
+            trial = self.exp.routines['trial']
+            resp = trial.getComponentFromName('resp')
+            resp.params['forceEndRoutine'].val = False
+            edited = self.exp.writeScript(expPath=expfile, useCache=True)
+            assert 'resp.writeFrameCode' in self.exp.compileReport
+            assert 'ready.' not in self.exp.compileReport
+            assert edited.split('\n', 6)[6] == self.exp.writeScript(
+                expPath=expfile).split('\n', 6)[6]
+
+            # the position of a Component in its Routine is in its key (e.g.
+            # stimuli write it as their depth)
+            key = codecache.objectSignature(resp)
+            trial.reverse()
+            assert codecache.objectSignature(resp) != key
+            reordered = self.exp.writeScript(expPath=expfile, useCache=True)
+            assert reordered.split('\n', 6)[6] == self.exp.writeScript(
+                expPath=expfile).split('\n', 6)[6]
+
+            # a new session reads the stored cache
+            codecache._caches.clear()
+            self.exp.writeScript(expPath=expfile, useCache=True)
+            assert ': 0 of ' in self.exp.compileReport
+        finally:
+            codecache.cacheFolder = None
+            codecache._caches.clear()
+
+    def test_getResourceIndex(self):
+        """Conditions files (and the files they refer to) should be found,
+        once each, with their size and hash
+        """
+        demoDir = path.join(self.exp.prefsPaths['demos'], 'builder',
+                            'stroopExtended')
+        expfile = path.join(demoDir, 'stroop.psyexp')
+        condsFile = path.join(demoDir, 'trialTypes.xlsx')
+        self.exp.loadFromXML(expfile)
+        self.exp.expPath = expfile
+
+        resources = self.exp.getResourceFiles()
+        assert [thisFile['rel'] for thisFile in resources] == ['trialTypes.xlsx']
+
+        index = self.exp.getResourceIndex()
+        entry = index['trialTypes.xlsx']
+        assert entry['abs'] == path.normpath(condsFile)
+        assert entry['size'] == os.path.getsize(condsFile)
+        with open(condsFile, 'rb') as f:
+            assert entry['hash'] == hashlib.sha1(f.read()).hexdigest()
+
     def test_loopBlocks(self):
         """An experiment file with made-up params and routines to see whether
         future versions of experiments will get loaded.
@@ -0,0 +1,98 @@
+"""Tests for psychopy.experiment.resources (finding the files used by an
+experiment)"""
+from __future__ import print_function
+from builtins import object
+
+import os
+import hashlib
+
+from psychopy.experiment import resources
+from psychopy.experiment.params import Param
+
+
+class _LoopInitiator(object):
+    def __init__(self, conditionsFile):
+        self.loop = type('Loop', (object,), {})()
+        self.loop.params = {'conditionsFile': Param(conditionsFile, 'str')}
+
+    def getType(self):
+        return 'LoopInitiator'
+
+
+class _Routine(list):
+    def getType(self):
+        return 'Routine'
+
+
+class _Component(object):
+    def __init__(self, **params):
+        self.params = dict((name, Param(val, 'str'))
+                           for name, val in params.items())
+
+
+def makeExperiment(folder, nImages=20):
+    """Images, a conditions file that names some of them and another
+    conditions file (which refers back to the first), and an experiment-like
+    flow that uses them
+    """
+    for n in range(nImages):
+        with open(os.path.join(folder, 'im%i.png' % n), 'wb') as f:
+            f.write(('image %i' % n).encode())
+    with open(os.path.join(folder, 'trials.csv'), 'w') as f:
+        f.write('image,block\nim0.png,inner.csv\nim1.png,inner.csv\n'
+                'missing.png,\n')
+    with open(os.path.join(folder, 'inner.csv'), 'w') as f:
+        f.write('image,block\nim2.png,trials.csv\n')
+    routine = _Routine(_Component(name='stim%i' % n, image='im%i.png' % n)
+                       for n in range(5, nImages))
+    routine.append(_Component(name='gone', image='missing.png'))
+    flow = [_LoopInitiator('trials.csv'), routine]
+    return type('Experiment', (object,), {'flow': flow})()
+
+
+def test_scan(tmpdir):
+    folder = str(tmpdir)
+    exp = makeExperiment(folder)
+    expected = (['trials.csv', 'im0.png', 'inner.csv', 'im2.png', 'im1.png'] +
+                ['im%i.png' % n for n in range(5, 20)])
+    for nThreads in (1, 8):
+        scanner = resources.ResourceScanner(folder, nThreads=nThreads)
+        found = scanner.scan(exp)
+        # in the order they are used, once each and only if they exist
+        assert [thisFile['rel'] for thisFile in found] == expected
+        for thisFile in found:
+            assert thisFile['abs'] == os.path.join(folder, thisFile['rel'])
+        assert scanner._pool is None  # the threads are stopped
+
+    # conditions files are parsed once per scan
+    scanner = resources.ResourceScanner(folder)
+    paths = scanner.findPathsInFile('trials.csv')
+    assert scanner.findPathsInFile('trials.csv') is paths
+    assert scanner.findPathsInFile('$"trials.csv"') is paths
+    assert scanner.findPathsInFile('im0.png') == []
+    assert scanner.findPathsInFile('missing.csv') == []
+
+
+def test_buildIndex(tmpdir):
+    folder = str(tmpdir)
+    exp = makeExperiment(folder)
+    scanner = resources.ResourceScanner(folder, nThreads=4)
+    index = scanner.buildIndex(scanner.scan(exp))
+    assert list(index)[:3] == ['trials.csv', 'im0.png', 'inner.csv']
+    for rel, entry in index.items():
+        absPath = os.path.join(folder, rel)
+        assert entry['size'] == os.path.getsize(absPath)
+        with open(absPath, 'rb') as f:
+            assert entry['hash'] == hashlib.sha1(f.read()).hexdigest()
+    assert scanner._pool is None
+
+    # a changed file is hashed again (by a new scanner, as each stats once)
+    newContents = b'a changed image'
+    with open(os.path.join(folder, 'im0.png'), 'wb') as f:
+        f.write(newContents)
+    scanner = resources.ResourceScanner(folder, nThreads=4)
+    changed = scanner.buildIndex(scanner.scan(exp))
+    assert changed['im0.png']['hash'] == hashlib.sha1(newContents).hexdigest()
+    assert changed['im1.png']['hash'] == index['im1.png']['hash']
+    unhashed = scanner.buildIndex(scanner.scan(exp), hashes=False)
+    assert unhashed['im1.png']['hash'] is None
@@ -3,7 +3,7 @@ from __future__ import print_function
 from builtins import str
 from builtins import range
 from builtins import object
-import os, glob
+import os, glob, sys
 from os.path import join as pjoin
 import shutil
 from tempfile import mkdtemp, mkstemp
@@ -255,6 +255,73 @@ class TestTrialHandler2(object):
         t_loaded = fromFile(path)
         assert t == t_loaded
 
+    @pytest.mark.parametrize('method', ['sequential', 'random', 'fullRandom'])
+    def test_future_and_earlier_trials(self, method):
+        conditions = [dict(n=n) for n in range(7)]
+        t = data.TrialHandler2(conditions, nReps=5, method=method,
+                               seed=self.random_seed, autoLog=False)
+        future = [t.getFutureTrial(n)['n'] for n in range(1, t.nTotal + 1)]
+        assert t.getFutureTrial(t.nTotal + 1) is None
+        run = []
+        repCounts = [0] * len(conditions)
+        for trial in t:
+            run.append(trial['n'])
+            if t.thisN >= 3:
+                assert t.getEarlierTrial(-3)['n'] == run[-4]
+            assert t.getEarlierTrial(-t.thisN - 1) is None
+            if method == 'fullRandom':
+                # repeats are counted per condition
+                assert t.thisRepN == repCounts[t.thisIndex]
+                repCounts[t.thisIndex] += 1
+            else:
+                assert sorted(t.prevIndices[t.thisN - t.thisTrialN:] +
+                              [t.thisIndex] +
+                              t.remainingIndices) == list(range(7))
+        assert run == future
+        assert sorted(run) == sorted(list(range(7)) * 5)
+
+    def test_data_frame_cache(self, monkeypatch):
+        pd = pytest.importorskip('pandas')
+        # add the trials to the cached DataFrame every few trials
+        monkeypatch.setattr('psychopy.data.trial._dataFrameChunk', 3)
+        conditions = [dict(ori=ori) for ori in (0, 90)]
+        t = data.TrialHandler2(conditions, nReps=6, method='sequential',
+                               autoLog=False)
+        for trial in t:
+            # columns that are missing, None or change type on some trials
+            t.addData('resp', ['left', None, True][t.thisN % 3])
+            t.addData('corr', t.thisN % 2)
+            if t.thisN >= 4:
+                t.addData('rt', None if t.thisN % 4 else 0.5)
+            if t.thisN == 7:
+                t.addData('corr', 0.5)
+            expected = pd.DataFrame(t._data)
+            assert t.data.equals(expected)
+            assert list(t.data.columns) == list(expected.columns)
+            assert (t.data.dtypes == expected.dtypes).all()
+            # changes to the current trial are included
+            t.addData('late', t.thisN)
+            assert t.data['late'].iloc[-1] == t.thisN
+        assert len(t.data) == 12
+
+
+def benchmarkSequencing(nTrials=(1000, 10000, 100000, 1000000)):
+    """Prints the time per trial taken to run TrialHandler2 sequences of
+    different lengths (it should not grow with the number of trials)
+
+    usage: python test_TrialHandler2.py benchmark
+    """
+    import timeit
+    for method in ['sequential', 'random', 'fullRandom']:
+        for n in nTrials:
+            t = data.TrialHandler2([dict(n=i) for i in range(10)],
+                                   nReps=n // 10, method=method,
+                                   autoLog=False)
+            secs = timeit.timeit(lambda: [t.getFutureTrial(1) for _ in t],
+                                 number=1)
+            print('{:>10} {:>8} trials: {:.2f} us/trial'.format(
+                method, n, secs / n * 1e6))
+
 
 class TestTrialHandler2Output(object):
     def setup_class(self):
@@ -450,4 +517,7 @@ class TestTrialHandler2Output(object):
 
 
 if __name__ == '__main__':
-    pytest.main()
+    if sys.argv[1:] == ['benchmark']:
+        benchmarkSequencing()
+    else:
+        pytest.main()
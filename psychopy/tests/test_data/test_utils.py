@@ -55,6 +55,80 @@ class Test_utilsClass:
             utils.importConditions(fileName_docx)
         assert ('Your conditions file should be an ''xlsx, csv or pkl file') == str(errMsg.value)
 
+    def test_importConditions_cached(self):
+        fileName_xlsx = os.path.join(fixturesPath, 'trialTypes.xlsx')
+        conds = utils.importConditions(fileName_xlsx)
+        conds[0]['text'] = 'changed'
+        # the second import comes from the cache but must not be affected
+        conds2 = utils.importConditions(fileName_xlsx)
+        assert conds2[0]['text'] == 'red'
+        assert conds2 is not conds
+
+        table, fieldNames = utils.importConditions(
+            fileName_xlsx, returnFieldNames=True, asColumns=True)
+        assert isinstance(table, utils.ConditionsTable)
+        assert table.fieldNames == fieldNames
+        assert len(table) == len(conds2)
+        assert table.columns['text'][0] == 'red'
+        assert list(table) == conds2
+        assert table == conds2
+
+        table = utils.importConditions(fileName_xlsx, selection="1,3",
+                                       asColumns=True)
+        assert list(table) == [conds2[1], conds2[3]]
+        assert table[-1] == conds2[3]
+
+        # assigned conditions are seen by the columns and the copies
+        newCond = dict(conds2[0], text='assigned')
+        table[-1] = newCond
+        assert table[0] == conds2[1]
+        assert table[-1] == newCond
+        assert table.columns['text'] == [conds2[1]['text'], 'assigned']
+        assert table.toList()[1] == newCond
+        assert table.copy()[1] == newCond
+        assert list(table.select([1])) == [newCond]
+        with pytest.raises(ValueError):
+            table[0] = {'text': 'no other params'}
+        with pytest.raises(IndexError):
+            table[2] = newCond
+
+        # and so are changes to the conditions handed out
+        table[0]['text'] = 'changed'
+        newCond['text'] = 'changed too'
+        assert table.columns['text'] == ['changed', 'changed too']
+        assert [cond['text'] for cond in table.toList()] == \
+            ['changed', 'changed too']
+        assert table.copy()[0]['text'] == 'changed'
+        assert table.select([1])[0]['text'] == 'changed too'
+        del table[0]['text']
+        assert table.columns['text'][0] is None
+
+    def test_importConditions_diskCache(self, tmpdir, monkeypatch):
+        import json
+        import shutil
+        fileName = os.path.join(str(tmpdir), 'trialTypes.xlsx')
+        shutil.copy(os.path.join(fixturesPath, 'trialTypes.xlsx'), fileName)
+        conds = utils.importConditions(fileName, diskCache=True)
+        sidecar = os.path.join(str(tmpdir), '.trialTypes.xlsx.psycache')
+        with open(sidecar) as f:
+            assert json.load(f)['fieldNames'] == list(conds[0].keys())
+
+        # other sessions read the sidecar rather than the file
+        def noParsing(fileName):
+            raise AssertionError('parsed %s again' % fileName)
+        utils._conditionsCache.clear()
+        with monkeypatch.context() as m:
+            m.setattr(utils, '_parseConditionsFile', noParsing)
+            assert utils.importConditions(fileName, diskCache=True) == conds
+
+        # anything but a JSON sidecar is ignored (and replaced)
+        with open(sidecar, 'wb') as f:
+            f.write(b'cos\nsystem\n(S"echo unsafe"\ntR.')  # a pickle
+        utils._conditionsCache.clear()
+        assert utils.importConditions(fileName, diskCache=True) == conds
+        with open(sidecar) as f:
+            assert json.load(f)['columns']
+
     def test_isValidVariableName(self):
         assert utils.isValidVariableName('Name') == (True, '')
         assert utils.isValidVariableName('a_b_c') == (True, '')
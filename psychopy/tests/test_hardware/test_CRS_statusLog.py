@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""Tests for parsing the status log of a CRS Bits# without the device,
+using a fake serial port that replays status text.
+"""
+from __future__ import print_function, division
+
+import numpy as np
+import pytest
+
+from psychopy.hardware.crs import bits as crsBits
+
+
+def makeStatusText(n=2000, seed=0):
+    """Returns status text like that sent by a Bits# while logging, with
+    random changes of the inputs (and a touch report by mistake)
+    """
+    rng = np.random.RandomState(seed)
+    din = np.ones(10, int)
+    ir = np.ones(6, int)
+    trigIn = 0
+    adc = np.zeros(6)
+    lines = []
+    for n in range(n):
+        din[rng.rand(10) < 0.02] ^= 1
+        ir[rng.rand(6) < 0.02] ^= 1
+        trigIn ^= rng.rand() < 0.02
+        adc = np.clip(adc + rng.randn(6), -5, 5)
+        fields = (['#sample', str(n + 1), '%.6f' % (1.2 + n / 2000.0),
+                   str(trigIn)] + [str(v) for v in din] +
+                  [str(v) for v in ir] + ['%.4f' % v for v in adc])
+        lines.append(';'.join(fields))
+        if n == 100:
+            lines.append('$touch;1;200;300')
+    # the last line is incomplete when logging stops
+    return ('\r'.join(lines) + '\r#sample;12').encode('utf-8')
+
+
+def parseLine(line):
+    """The values of a status line, one at a time"""
+    v = line.split(';')
+    DIN = [int(float(x)) for x in v[4:14]]
+    return dict(sample=int(float(v[1])), time=float(v[2]),
+                trigIn=int(float(v[3])), DIN=DIN,
+                DWORD=sum(d * 2 ** j for j, d in enumerate(DIN)),
+                IR=[int(float(x)) for x in v[14:20]],
+                ADC=[float(x) for x in v[20:26]])
+
+
+class FakeSerial(object):
+    """Replays bytes in chunks of random size, like a serial port"""
+    def __init__(self, data, seed=1):
+        rng = np.random.RandomState(seed)
+        self.chunks = []
+        while data:
+            n = rng.randint(1, 300)
+            self.chunks.append(data[:n])
+            data = data[n:]
+        self.timeout = 0.1
+        self.written = []
+
+    def inWaiting(self):
+        return len(self.chunks[0]) if self.chunks else 0
+
+    def read(self, size=1):
+        return self.chunks.pop(0) if self.chunks else b''
+
+    def write(self, msg):
+        self.written.append(msg)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_parseStatus():
+    text = makeStatusText()
+    lines = text.decode('utf-8').split('\r')[:-1]
+    expected = [parseLine(line) for line in lines
+                if line.startswith('#sample')]
+    parser = crsBits.StatusParser()
+    chunks = FakeSerial(text).chunks
+    nValues = sum(len(parser.feed(chunk)) for chunk in chunks)
+    assert nValues == parser.nValues == len(expected) == 2000
+    values = crsBits.statusList(parser.values)
+    assert len(values) == len(expected)
+    assert [dict(value) for value in values] == expected
+    assert values[-1].DIN == expected[-1]['DIN']
+    # extra fields (and a trailing separator) are ignored
+    extra = crsBits.parseStatusLines([text.split(b'\r')[0] + b';7;8;'])
+    assert dict(crsBits.statusList(extra)[0]) == expected[0]
+
+
+def findEvents(values, DINBase, IRBase, trigInBase, ADCBase, threshold,
+               mode):
+    """The events in a list of status values, one sample at a time"""
+    state = ([(DINBase >> j) & 1 for j in range(10)] +
+             [(IRBase >> j) & 1 for j in range(6)] + [trigInBase])
+    sources = ['DIN'] * 10 + ['IR'] * 6 + ['Trigger']
+    inputs = list(range(10)) + list(range(6)) + [0]
+    ADCState = [ADCBase] * 6
+    events = []
+    for value in values:
+        binary = value['DIN'] + value['IR'] + [value['trigIn']]
+        changes = []
+        for j in range(17):
+            if binary[j] != state[j] and state[j] in (0, 1) and \
+                    binary[j] in (0, 1):
+                changes.append((j, sources[j], inputs[j], binary[j] == 1))
+                state[j] = binary[j]
+        for j in range(6):
+            if abs(value['ADC'][j] - ADCState[j]) > threshold:
+                changes.append((15.1 + j / 10.0, 'ADC', j,
+                                value['ADC'][j] > ADCState[j]))
+                ADCState[j] = value['ADC'][j]
+        for _, source, input, up in sorted(changes):
+            if ('up' if up else 'down') in mode:
+                events.append(dict(source=source, input=input,
+                                   dir='up' if up else 'down',
+                                   time=value['time']))
+    return events
+
+
+@pytest.mark.parametrize('params', [
+    dict(),
+    dict(threshold=1.5, mode=['down']),
+    dict(DINBase=0b0101010101, IRBase=0, trigInBase=1, ADCBase=1,
+         threshold=0.5, mode=['up']),
+    ])
+def test_findStatusEvents(params):
+    values = crsBits.parseStatusLines(makeStatusText().split(b'\r')[:-1])
+    events = crsBits.findStatusEvents(values, **params)
+    kwargs = dict(DINBase=0b1111111111, IRBase=0b111111, trigInBase=0,
+                  ADCBase=0, threshold=9999.99, mode=['up', 'down'])
+    kwargs.update(params)
+    expected = findEvents(list(crsBits.statusList(values)), **kwargs)
+    assert len(events) > 10
+    assert [dict(thisEvent) for thisEvent in events] == expected
+
+
+def test_statusLog():
+    # a BitsSharp that reads from the fake serial port
+    bits = crsBits.BitsSharp.__new__(crsBits.BitsSharp)
+    text = makeStatusText()
+    bits.com = FakeSerial(text)
+    bits.noComms = False
+    bits.name = b'CRS Bits#'
+    bits.eol = b'\r'
+    bits._statusSize = 111
+    bits.statusDINBase = 0b1111111111
+    bits.statusIRBase = 0b111111
+    bits.statusTrigInBase = 0
+    bits.statusADCBase = 0
+    bits.statusThreshold = 9999.99
+    bits.statusMode = ['up', 'down']
+    bits.statusEnd = False
+    bits._statusLog(0.5)
+    bits._getStatusLog()
+    bits._extractStatusEvents()
+    assert bits.com.written == [b'$Stop\r']
+    assert bits.status_nValues == 2000
+    assert bits.getStatus(10).sample == 11
+    assert bits.getAnalog(10)['ADC'] == parseLine(
+        text.decode('utf-8').split('\r')[10])['ADC']
+    assert bits.statusArray['time'][-1] == pytest.approx(1.2 + 1999 / 2000.)
+    assert bits.status_nEvents == len(bits.getAllStatusEvents()) > 0
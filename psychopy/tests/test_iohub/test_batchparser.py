@@ -0,0 +1,153 @@
+"""Tests for the offline (batch) eye sample parser"""
+from __future__ import division
+
+import numpy as np
+import pytest
+
+from psychopy.iohub.constants import EventConstants
+from psychopy.iohub.devices.eyetracker.eye_events import \
+    BinocularEyeSampleEvent
+from psychopy.iohub.devices.eyetracker.filters import batchparser
+
+DISPLAY = dict(mm_size=dict(width=500, height=280), pixel_res=(1920, 1080),
+               eye_distance=550)
+
+
+def onlineThreshold(buffer):
+    """The threshold loop of EyeTrackerEventParser.addVelocityToAdaptiveThreshold
+    """
+    PT = buffer.min() + buffer.std() * 3.0
+    below = buffer[buffer < PT]
+    PTd = 2.0
+    pt_list = [PT, ]
+    while PTd >= 1.0:
+        PT = below.mean() + 3.0 * below.std()
+        below = buffer[buffer < PT]
+        PTd = np.abs(PT - pt_list[-1])
+        pt_list.append(PT)
+    return PT
+
+
+def makeSamples(rate=500.0):
+    """Binocular samples: fixation, saccade, fixation, blink, fixation"""
+    n = 2000
+    samples = np.zeros(n, dtype=BinocularEyeSampleEvent.NUMPY_DTYPE)
+    samples['time'] = np.arange(n) / rate
+    samples['event_id'] = np.arange(n)
+    samples['session_id'] = 1
+    rng = np.random.RandomState(0)
+    x = rng.normal(0, 1.0, n)
+    x[1000:1010] += np.linspace(0, 400, 10)
+    x[1010:] += 400
+    for eye in ('left', 'right'):
+        samples[eye + '_gaze_x'] = x
+        samples[eye + '_gaze_y'] = rng.normal(0, 1.0, n)
+        samples[eye + '_pupil_measure1'] = 5.0
+    samples['status'][1500:1550] = 22
+    return samples
+
+
+def test_adaptiveVelocityThreshold():
+    rng = np.random.RandomState(1)
+    velocity = np.abs(rng.normal(20, 10, 600))
+    velocity[::7] = 0.0  # zero velocities are not added to the window
+    window = 100
+    thresholds = batchparser.adaptiveVelocityThreshold(velocity, window)
+
+    positive = velocity[velocity > 0]
+    expected = np.full(len(velocity), np.nan)
+    expected[np.flatnonzero(velocity > 0)[window:]] = [
+        onlineThreshold(positive[k - window + 1:k + 1])
+        for k in range(window, len(positive))]
+    assert np.allclose(thresholds, expected, equal_nan=True)
+
+    # with a step the threshold is only updated every few samples
+    stepped = batchparser.adaptiveVelocityThreshold(velocity, window, step=5)
+    valid = ~np.isnan(expected)
+    assert np.allclose(stepped[valid][::5], expected[valid][::5])
+    assert np.all(np.isnan(stepped[~valid]))
+
+
+def test_parse():
+    parser = batchparser.EyeSampleBatchParser(DISPLAY, 500,
+                                              adaptive_vel_thresh_history=1.0)
+    events = parser.parse(makeSamples())
+    for eventType, eventClass in batchparser.EVENT_CLASSES.items():
+        assert events[eventType].dtype == np.dtype(eventClass.NUMPY_DTYPE)
+
+    blinks = events[EventConstants.BLINK_END]
+    assert len(blinks) == 1
+    assert blinks['duration'][0] == pytest.approx(49 / 500.0)
+    saccades = events[EventConstants.SACCADE_END]
+    big = saccades[saccades['amplitude_x'] > 100]
+    assert len(big) == 1
+    assert 1000 / 500.0 <= big['time'][0] <= 1011 / 500.0
+    assert np.all(events[EventConstants.FIXATION_END]['filter_id'] ==
+                  batchparser.PARSER_FILTER_ID)
+
+
+def makeDataStoreFile(tables, filePath, sessionIds=(1,)):
+    """An ioHub DataStore file with the samples of makeSamples() for each
+    session
+    """
+    from psychopy.iohub.datastore import ClassTableMappings, SessionMetaData
+    with tables.open_file(filePath, 'w') as hubFile:
+        mapping = hubFile.create_table('/', 'class_table_mapping',
+                                       ClassTableMappings)
+        collection = hubFile.create_group('/', 'data_collection')
+        sessions = hubFile.create_table(collection, 'session_meta_data',
+                                        SessionMetaData)
+        eyetracker = hubFile.create_group(
+            hubFile.create_group(collection, 'events'), 'eyetracker')
+        sampleTable = hubFile.create_table(
+            eyetracker, 'BinocularEyeSampleEvent',
+            BinocularEyeSampleEvent.NUMPY_DTYPE)
+        for sessionId in sessionIds:
+            sessions.append([(sessionId, 1, b'a', b'', b'', b'')])
+            samples = makeSamples()
+            samples['session_id'] = sessionId
+            sampleTable.append(samples)
+        mapping.append([(EventConstants.BINOCULAR_EYE_SAMPLE, 1,
+                         b'BinocularEyeSampleEvent',
+                         sampleTable._v_pathname.encode())])
+
+
+def test_parseDataStoreFile(tmpdir):
+    tables = pytest.importorskip('tables')
+    filePath = str(tmpdir.join('events.hdf5'))
+    makeDataStoreFile(tables, filePath)
+
+    for i in range(2):  # parsing again replaces the events
+        events = batchparser.parseDataStoreFile(
+            filePath, DISPLAY, 500, adaptive_vel_thresh_history=1.0)
+    with tables.open_file(filePath, 'r') as hubFile:
+        stored = hubFile.root.data_collection.events.eyetracker.BlinkEndEvent
+        assert np.array_equal(stored.read(),
+                              events[EventConstants.BLINK_END])
+        stored = hubFile.root.data_collection.events.eyetracker.SaccadeEndEvent
+        assert stored.nrows == len(events[EventConstants.SACCADE_END])
+
+
+def test_parseDataStoreFile_session(tmpdir):
+    tables = pytest.importorskip('tables')
+    filePath = str(tmpdir.join('events.hdf5'))
+    makeDataStoreFile(tables, filePath, sessionIds=(1, 2))
+    events = batchparser.parseDataStoreFile(
+        filePath, DISPLAY, 500, adaptive_vel_thresh_history=1.0)
+    blinks = events[EventConstants.BLINK_END]
+    assert sorted(blinks['session_id']) == [1, 2]
+
+    # parsing (and replacing) one session keeps the events of the other
+    events = batchparser.parseDataStoreFile(
+        filePath, DISPLAY, 500, session_ids=[2],
+        adaptive_vel_thresh_history=1.0)
+    assert list(events[EventConstants.BLINK_END]['session_id']) == [2]
+    with tables.open_file(filePath, 'r') as hubFile:
+        stored = hubFile.root.data_collection.events.eyetracker.BlinkEndEvent
+        assert sorted(stored.read()['session_id']) == [1, 2]
+        stored = hubFile.root.data_collection.events.eyetracker.SaccadeEndEvent
+        saccades = stored.read()
+        for sessionId in (1, 2):
+            assert np.array_equal(
+                saccades[saccades['session_id'] == sessionId]['time'],
+                events[EventConstants.SACCADE_END]['time'])
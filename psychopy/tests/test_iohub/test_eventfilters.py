@@ -0,0 +1,112 @@
+"""Tests for the iohub device event field filters"""
+from __future__ import division
+
+import copy
+import numpy as np
+import pytest
+
+from psychopy.iohub.constants import EventConstants
+from psychopy.iohub.devices import DeviceEvent, eventfilters
+from psychopy.iohub.devices.eyetracker import eye_events
+
+FIELD = 'angle_x'
+
+
+def setup_module():
+    # normally done by the ioHub server when the device is created
+    eventClasses = dict((name, cls) for name, cls in vars(eye_events).items()
+                        if getattr(cls, 'EVENT_TYPE_ID', None))
+    EventConstants.addClassMappings(
+        [cls.EVENT_TYPE_ID for cls in eventClasses.values()], eventClasses)
+
+
+def makeEvents(n=200):
+    samples = np.zeros(n, dtype=eye_events.MonocularEyeSampleEvent.NUMPY_DTYPE)
+    samples['event_id'] = np.arange(n)
+    rng = np.random.RandomState(0)
+    samples[FIELD] = np.cumsum(rng.normal(0, 1.0, n))
+    samples[FIELD][rng.rand(n) < 0.1] += 20  # spikes
+    return [list(e) for e in samples.tolist()]
+
+
+def makeFilter(filterClass, **kwargs):
+    kwargs.update(event_type=EventConstants.MONOCULAR_EYE_SAMPLE,
+                  event_field_name=FIELD, inplace=True)
+    return filterClass(**kwargs)
+
+
+filters = [
+    (eventfilters.MovingWindowFilter, dict(length=4, knot_pos='oldest')),
+    (eventfilters.PassThroughFilter, {}),
+    (eventfilters.MedianFilter, dict(length=5, knot_pos='center')),
+    (eventfilters.MedianFilter, dict(length=3, knot_pos=0)),
+    (eventfilters.WeightedAverageFilter,
+     dict(weights=(17.0, 33.0, 50.0, 33.0, 17.0), knot_pos='center')),
+    (eventfilters.StampFilter, dict(level=1)),
+    (eventfilters.StampFilter, dict(level=3)),
+]
+
+
+@pytest.mark.parametrize('filterClass, kwargs', filters)
+def test_addBlock(filterClass, kwargs):
+    field = eye_events.MonocularEyeSampleEvent.CLASS_ATTRIBUTE_NAMES.index(
+        FIELD)
+    events = makeEvents()
+
+    oneByOne = makeFilter(filterClass, **kwargs)
+    expectedEvents = copy.deepcopy(events)
+    results = [oneByOne.add(e) for e in expectedEvents]
+    expected = [r for r in results if r]
+
+    blockEvents = copy.deepcopy(events)
+    block = makeFilter(filterClass, **kwargs)
+    filteredEvents, values = [], []
+    for start, stop in [(0, 1), (1, 3), (3, 50), (50, 51), (51, 200)]:
+        blockResult = block.add_block(blockEvents[start:stop])
+        filteredEvents.extend(blockResult[0])
+        values.extend(blockResult[1])
+
+    assert ([e[DeviceEvent.EVENT_ID_INDEX] for e in filteredEvents] ==
+            [e[DeviceEvent.EVENT_ID_INDEX] for e, v in expected])
+    assert np.allclose(values, [v for e, v in expected])
+    # filtered in place
+    assert np.allclose([e[field] for e in blockEvents],
+                       [e[field] for e in expectedEvents])
+
+    # and values rather than events
+    values = makeFilter(filterClass, **kwargs).add_block(
+        [e[field] for e in events])
+    assert values[0] is None
+    assert np.allclose(values[1], [v for e, v in expected])
+
+
+def test_stampFilter():
+    stamp = eventfilters.StampFilter(level=1)
+    results = [stamp.add(v) for v in [0.0, 1.0, 5.0, 2.0, 3.0, 4.0]]
+    # peaks and troughs are replaced, monotonic values are not
+    assert [r[1] for r in results[2:]] == [1.0, 1.5, 4.0, 3.0]
+
+
+class BlockCounter(eventfilters.DeviceEventFilter):
+    """Counts the events it gets per call to process()"""
+    process_blocks = True
+    filter_id = 99
+    input_event_types = {}
+
+    def __init__(self, **kwargs):
+        eventfilters.DeviceEventFilter.__init__(self, **kwargs)
+        self.blocks = []
+
+    def process(self):
+        self.blocks.append(len(self.getInputEvents()))
+        self.clearInputEvents()
+
+
+def test_processBlocks():
+    counter = BlockCounter()
+    for e in makeEvents(5):
+        counter._addInputEvent(e)
+    assert counter.blocks == []
+    counter._processInputBlock()
+    counter._processInputBlock()  # nothing new
+    assert counter.blocks == [5]
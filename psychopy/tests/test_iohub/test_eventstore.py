@@ -0,0 +1,157 @@
+"""Tests for the time ordered device event buffers"""
+from collections import deque
+from operator import itemgetter
+
+import numpy as np
+
+from psychopy.iohub.devices import DeviceEvent
+from psychopy.iohub.devices.eventstore import (DeviceEventStore,
+                                               EventTypeBuffer, mergeByTime)
+
+TIME = DeviceEvent.EVENT_HUB_TIME_INDEX
+FILTER_ID = DeviceEvent.EVENT_FILTER_ID_INDEX
+TYPE = DeviceEvent.EVENT_TYPE_ID_INDEX
+
+
+def makeEvent(eventType, time, filterId=0, eventId=0):
+    event = [0] * 12
+    event[DeviceEvent.EVENT_ID_INDEX] = eventId
+    event[TYPE] = eventType
+    event[TIME] = time
+    event[FILTER_ID] = filterId
+    return event
+
+
+def makeEvents(n=1000, types=(1, 2, 3)):
+    rng = np.random.RandomState(0)
+    times = np.cumsum(rng.randint(0, 3, n) / 1000.0)  # some equal times
+    return [makeEvent(types[i % len(types)], t, filterId=(i % 5 == 0) * 23,
+                      eventId=i)
+            for i, t in enumerate(times)]
+
+
+def expectedEvents(events, eventType=None, filterId=None):
+    """What the old deque based Device.getEvents() returned"""
+    byType = {}
+    for e in events:
+        byType.setdefault(e[TYPE], []).append(e)
+    if eventType:
+        selected = list(byType.get(eventType, []))
+    else:
+        selected = sum([byType[t] for t in sorted(byType)], [])
+    if filterId:
+        selected = [e for e in selected if e[FILTER_ID] == filterId]
+    return sorted(selected, key=itemgetter(TIME))
+
+
+def test_getEvents():
+    events = makeEvents()
+    store = DeviceEventStore()
+    for i in range(0, len(events), 7):  # events arrive in batches of a type
+        for eventType in (1, 2, 3):
+            batch = [e for e in events[i:i + 7] if e[TYPE] == eventType]
+            if batch:
+                store.add(eventType, batch)
+    assert len(store) == len(events)
+    for eventType in (None, 1, 3, 4):
+        for filterId in (None, 23):
+            assert (store.getEvents(eventType, filterId) ==
+                    expectedEvents(events, eventType, filterId))
+
+    store.clear(2, 23)
+    assert all(e[FILTER_ID] == 0 for e in store.getEvents(2))
+    store.clear(filter_id=23)
+    assert len(store.getEvents(filter_id=23)) == 0
+    store.clear()
+    assert store.getEvents() == []
+
+
+def test_timeRange():
+    events = makeEvents()
+    store = DeviceEventStore()
+    store.add(1, [e for e in events if e[TYPE] == 1])
+    store.add(2, [e for e in events if e[TYPE] == 2])
+    selected = store.getEvents(start_time=0.1, end_time=0.2)
+    assert selected == [e for e in expectedEvents(events)
+                        if 0.1 <= e[TIME] < 0.2 and e[TYPE] in (1, 2)]
+
+
+def test_lateEvents():
+    # e.g. events from an event filter, with older times
+    buff = EventTypeBuffer()
+    buff.extend([makeEvent(1, t, eventId=t) for t in (1, 2, 5, 6)])
+    buff.extend([makeEvent(1, t, eventId=t, filterId=23) for t in (4, 3)])
+    buff.append(makeEvent(1, 7, eventId=7))
+    assert [e[TIME] for e in buff.getEvents()] == [1, 2, 3, 4, 5, 6, 7]
+
+
+def test_maxlen():
+    buff = EventTypeBuffer(maxlen=10)
+    for i in range(25):
+        buff.append(makeEvent(1, i))
+    assert [e[TIME] for e in buff.getEvents()] == list(range(15, 25))
+    buff.extend([makeEvent(1, i) for i in range(25, 50)])
+    assert [e[TIME] for e in buff.getEvents()] == list(range(40, 50))
+
+    # without maxlen the buffer grows
+    buff = EventTypeBuffer()
+    buff.extend([makeEvent(1, i) for i in range(2000)])
+    assert len(buff) == 2000
+
+    buff = EventTypeBuffer(maxlen=0)
+    buff.append(makeEvent(1, 0))
+    assert len(buff) == 0
+
+
+def test_mergeByTime():
+    a = EventTypeBuffer()
+    a.extend([makeEvent(1, t, eventId=1) for t in (1, 2, 2, 4)])
+    b = EventTypeBuffer()
+    b.extend([makeEvent(2, t, eventId=2) for t in (0, 2, 5)])
+    merged = mergeByTime([a.data, b.data])
+    assert merged['time'].tolist() == [0, 1, 2, 2, 2, 4, 5]
+    # equal times keep the order of the arrays (a before b)
+    assert [e[DeviceEvent.EVENT_ID_INDEX] for e in merged['event']] == [
+        2, 1, 1, 1, 2, 1, 2]
+
+
+class FakeDevice(object):
+    """The parts of a Device used by ioServer.processDeviceEvents"""
+
+    def __init__(self, nativeEvents):
+        self.nativeEvents = deque(nativeEvents)
+        self.received = []
+        self._filters = {}
+
+    def _getNativeEventBuffer(self):
+        return self.nativeEvents
+
+    def _getIOHubEventObject(self, nativeEvent):
+        if nativeEvent is None:
+            raise ValueError('a native event that cannot be converted')
+        return nativeEvent
+
+    def _getEventListeners(self, eventType):
+        return [self]
+
+    def _handleEvents(self, events):
+        self.received.extend(events)
+
+
+def test_processDeviceEvents(monkeypatch):
+    from psychopy.iohub import server
+    monkeypatch.setattr(server, 'print2err', lambda *args: None)
+    monkeypatch.setattr(server, 'printExceptionDetailsToStdErr',
+                        lambda: None)
+    # (the plain function, which Python 2 lets us call on another object)
+    processDeviceEvents = server.ioServer.__dict__['processDeviceEvents']
+    hub = type('Hub', (object,), {})()
+    hub._dispatchEvents = server.ioServer._dispatchEvents
+    events = makeEvents(10)
+    device = FakeDevice(events[:4] + [None] + events[4:])
+    hub.devices = [device]
+    # the events converted before an error are still dispatched
+    processDeviceEvents(hub)
+    assert device.received == events[:4]
+    processDeviceEvents(hub)
+    assert device.received == events
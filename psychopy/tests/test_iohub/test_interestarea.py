@@ -0,0 +1,110 @@
+"""Tests for the iohub pandas interest area and interest period analysis"""
+from __future__ import division
+
+import numpy as np
+import pytest
+
+pd = pytest.importorskip('pandas')
+geometry = pytest.importorskip('shapely.geometry')
+
+from psychopy.iohub.datastore.pandas import interestarea
+from psychopy.iohub.datastore.pandas.interestarea import (
+    Circle, Ellipse, Polygon, Rectangle)
+from psychopy.iohub.datastore.pandas.interestperiod import \
+    InterestPeriodDefinition
+
+
+def makeSamples(n=2000):
+    rng = np.random.RandomState(0)
+    index = pd.MultiIndex.from_arrays(
+        [np.ones(n, dtype=int), np.repeat([1, 2], n // 2)],
+        names=['experiment_id', 'session_id'])
+    return pd.DataFrame(dict(time=np.tile(np.arange(n // 2) / 100.0, 2),
+                             x_position=rng.uniform(-500, 500, n),
+                             y_position=rng.uniform(-500, 500, n)),
+                        index=index)
+
+
+areas = [Circle('circle', [100, 50], 200),
+         Ellipse('ellipse', [-200, -200], 100, 250, 30),
+         Rectangle('rect', 200, -100, 450, -400),
+         Polygon('triangle', [(-400, 400), (0, 450), (-300, 100)])]
+
+
+@pytest.mark.parametrize('area', areas)
+def test_containsPoints(area):
+    df = makeSamples()
+    points = df[['x_position', 'y_position']].values
+    inside = area.contains_points(points[:, 0], points[:, 1])
+    expected = np.array([area.contains(p) for p in points])
+    # the polygon approximations of circles / ellipses differ from the
+    # analytic test near their edge only
+    near_edge = np.array([area.exterior.distance(geometry.Point(p)) < 5
+                          for p in points])
+    assert inside.any()
+    assert np.all((inside == expected) | near_edge)
+    filtered = area.filter(df)
+    assert len(filtered) == inside.sum()
+    assert filtered['ia_id_num'].tolist() == list(range(1, len(filtered) + 1))
+
+
+def test_label():
+    df = makeSamples()
+    labels = interestarea.label_points(areas, df['x_position'],
+                                       df['y_position'])
+    labelled = interestarea.label(areas, df)
+    for i, area in enumerate(areas):
+        inside = area.contains_points(df['x_position'], df['y_position'])
+        # overlaps go to the first area
+        assert np.all(inside[labels == i])
+        earlier = labels[inside]
+        assert np.all((earlier <= i) & (earlier >= 0))
+        assert (labelled['ia_name'] == area.name).sum() == (labels == i).sum()
+    assert np.all(labelled['ia_id'][labels == -1] == 0)
+    assert labelled['ia_name'][labels == -1].isnull().all()
+
+
+class FixedIP(InterestPeriodDefinition):
+
+    def __init__(self, ip_df):
+        InterestPeriodDefinition.__init__(self, 'fixed')
+        self._ip_df = ip_df
+
+    @property
+    def ip_df(self):
+        return self._ip_df
+
+
+def makeIPs():
+    index = pd.MultiIndex.from_tuples([(1, 1)] * 3 + [(1, 2)] * 2 + [(1, 3)],
+                                      names=['experiment_id', 'session_id'])
+    return pd.DataFrame(dict(start_time=[1.0, 3.0, 5.5, 0.0, 2.0, 0.0],
+                             end_time=[2.0, 4.5, 7.0, 1.5, 9.0, 1.0],
+                             ip_id_num=[0, 1, 2, 0, 1, 0]), index=index)
+
+
+def test_findAndFilter():
+    df = makeSamples()
+    ips = makeIPs()
+    period = FixedIP(ips)
+    found = period.find(df)
+    filtered = period.filter(df)
+    assert (found['ip_name'] == 'fixed').all()
+    assert (filtered['ip_id'] == period.ipid).all()
+
+    for (experiment, session), samples in df.groupby(level=[0, 1]):
+        group_found = found.loc[(experiment, session)]
+        group_filtered = filtered.loc[(experiment, session)]
+        for _, ip in ips.loc[(experiment, session)].iterrows():
+            times = samples['time']
+            num = ip['ip_id_num']
+            expected = times[(times >= ip['start_time']) &
+                             (times <= ip['end_time'])]
+            assert (group_found['time'][group_found['ip_id_num'] == num]
+                    .tolist() == expected.tolist())
+            expected = times[(times > ip['start_time']) &
+                             (times <= ip['end_time'])]
+            assert (group_filtered['time'][group_filtered['ip_id_num'] == num]
+                    .tolist() == expected.tolist())
+    # samples are only returned once by filter, in the order of the target
+    assert len(filtered) == len(filtered.drop_duplicates())
@@ -0,0 +1,87 @@
+"""Tests for the online eye sample event parser
+
+Run this file directly to benchmark the parser, replaying samples through
+process() with the exact and the incremental adaptive velocity threshold.
+"""
+from __future__ import division, print_function
+
+import time
+import numpy as np
+
+from psychopy.iohub.constants import EventConstants
+from psychopy.iohub.devices import DeviceEvent
+from psychopy.iohub.devices.eyetracker import eye_events
+from psychopy.iohub.devices.eyetracker.filters.parser import \
+    AdaptiveVelocityThreshold, EyeTrackerEventParser
+from psychopy.tests.test_iohub.test_batchparser import DISPLAY, makeSamples
+
+
+def setup_module():
+    # normally done by the ioHub server when the eye tracker is created
+    eventClasses = dict((name, cls) for name, cls in vars(eye_events).items()
+                        if getattr(cls, 'EVENT_TYPE_ID', None))
+    EventConstants.addClassMappings(
+        [cls.EVENT_TYPE_ID for cls in eventClasses.values()], eventClasses)
+
+
+def velocities(n=5000):
+    rng = np.random.RandomState(0)
+    velocity = np.abs(rng.normal(20, 10, n))
+    velocity[rng.rand(n) < 0.02] *= 20  # saccades
+    velocity[::50] = 0.0  # not added to the window
+    return velocity
+
+
+def replay(samples, **kwargs):
+    """Feed samples one at a time through a parser, as the ioHub server does
+    """
+    parser = EyeTrackerEventParser(display_device=DISPLAY, **kwargs)
+    samples = samples.copy()
+    samples['type'] = EventConstants.BINOCULAR_EYE_SAMPLE
+    events = []
+    for sample in samples.tolist():
+        parser._addInputEvent(list(sample))
+        events.extend(parser._removeOutputEvents())
+    return events
+
+
+def test_adaptiveVelocityThreshold():
+    velocity = velocities()
+    exact = AdaptiveVelocityThreshold(500, incremental=False)
+    expected = np.array([exact.add(v) for v in velocity])
+    incremental = AdaptiveVelocityThreshold(500)
+    thresholds = np.array([incremental.add(v) for v in velocity])
+    # both iterate until the threshold changes by < 1
+    assert np.array_equal(np.isnan(thresholds), np.isnan(expected))
+    assert np.nanmax(np.abs(thresholds - expected)) < 1.0
+
+    # with a single iteration per velocity it catches up after a while
+    fixed = AdaptiveVelocityThreshold(500, max_iterations=1)
+    thresholds = np.array([fixed.add(v) for v in velocity])
+    assert np.nanmax(np.abs(thresholds - expected)[1000:]) < 2.0
+
+    incremental.reset()
+    assert np.isnan(incremental.add(velocity[1]))
+
+
+def test_process():
+    events = replay(makeSamples(), sampling_rate=500,
+                    adaptive_vel_thresh_history=1.0)
+    eventTypes = [e[DeviceEvent.EVENT_TYPE_ID_INDEX] for e in events]
+    assert eventTypes.count(EventConstants.BLINK_END) == 1
+    assert eventTypes.count(EventConstants.SACCADE_END) >= 1
+    assert eventTypes.count(EventConstants.MONOCULAR_EYE_SAMPLE) > 0
+    assert set(e[DeviceEvent.EVENT_FILTER_ID_INDEX] for e in events) == {23}
+
+
+if __name__ == '__main__':
+    setup_module()
+    samples = makeSamples(1000.0)
+    samples = np.concatenate([samples] * 10)
+    samples['time'] = np.arange(len(samples)) / 1000.0
+    for incremental in (False, True):
+        t0 = time.time()
+        replay(samples, sampling_rate=1000,
+               adaptive_vel_thresh_incremental=incremental)
+        print('incremental=%s: %.0f samples/sec'
+              % (incremental, len(samples) / (time.time() - t0)))
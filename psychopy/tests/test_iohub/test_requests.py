@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""Tests for the tagged, batched and posted requests of an ioHubConnection,
+and for replies sent in chunks, using an ioHub Server udpServer (without
+devices) in a local thread"""
+from __future__ import division
+
+import threading
+import time
+from collections import deque
+
+import gevent
+import pytest
+
+from psychopy.iohub import net, server
+from psychopy.iohub.devices import DeviceEvent
+from psychopy.iohub.client import ioHubConnection, DeviceRPC
+from psychopy.iohub.net import ioHubRequestConnection
+
+
+class FakeHub(object):
+    """The parts of an ioServer used by the udpServer requests tested"""
+
+    def __init__(self):
+        self.eventBuffer = deque()
+        self.devices = []
+
+    def log(self, *args):
+        pass
+
+    def processDeviceEvents(self):
+        pass
+
+    def clearEventBuffer(self):
+        self.eventBuffer.clear()
+
+
+class FakeMouse(object):
+    def getPosition(self):
+        return [1.5, -2.0]
+
+    def getName(self):
+        return u'müs'
+
+    def getSamples(self, count):
+        return [[n, n * 0.5, u'sample_%d' % n] for n in range(count)]
+
+    def waitFor(self, secs):
+        time.sleep(secs)
+        return secs
+
+
+class FakeExperiment(object):
+    def __init__(self):
+        self.messages = []
+
+    def _nativeEventCallback(self, event):
+        self.messages.append(event)
+
+
+@pytest.fixture
+def hubServer(monkeypatch):
+    """A udpServer handling requests in its own thread (and gevent hub)"""
+    hub = FakeHub()
+    experiment = FakeExperiment()
+    monkeypatch.setattr(server.ioServer, 'deviceDict',
+                        dict(Mouse=FakeMouse(), Experiment=experiment))
+    started = threading.Event()
+    servers = []
+
+    def serve():
+        udp_server = server.udpServer(hub, ('127.0.0.1', 0))
+        udp_server.start()
+        servers.append(udp_server)
+        started.set()
+        while udp_server._running:
+            gevent.sleep(0.001)
+        udp_server.stop()
+
+    thread = threading.Thread(target=serve)
+    thread.daemon = True
+    thread.start()
+    started.wait()
+    udp_server = servers[0]
+    udp_server.hub = hub
+    udp_server.experiment = experiment
+    yield udp_server
+    udp_server._running = False
+    thread.join()
+
+
+@pytest.fixture
+def connection(hubServer):
+    connection = ioHubRequestConnection(
+        remote_port=hubServer.socket.getsockname()[1], timeout=1.0)
+    yield connection
+    connection.close()
+
+
+def devRequest(method, *args):
+    return ('EXP_DEVICE', 'DEV_RPC', 'Mouse', method, args, {})
+
+
+def test_taggedRequests(connection):
+    assert connection.request(devRequest('getPosition')) == \
+        ['DEV_RPC_RESULT', [1.5, -2.0]]
+    # strings are decoded by msgpack
+    assert connection.request(devRequest('getName')) == \
+        ['DEV_RPC_RESULT', u'müs']
+
+    # the late reply to a request is not taken as the reply to the next one
+    connection.reply_timeout = 0.02
+    assert connection.request(devRequest('waitFor', 0.1)) is None
+    connection.reply_timeout = 1.0
+    assert connection.request(devRequest('getName')) == \
+        ['DEV_RPC_RESULT', u'müs']
+
+
+def test_batchAndPost(connection, hubServer):
+    replies = connection.batch([devRequest('getPosition'), ('NOT_A_REQ',),
+                                ('GET_EVENTS',)])
+    assert replies == [['DEV_RPC_RESULT', [1.5, -2.0]],
+                       'RPC_NOT_CALLABLE_ERROR', ['GET_EVENTS_RESULT', None]]
+
+    messages = [['msg', n] for n in range(3)]
+    assert connection.post([('EXP_DEVICE', 'EVENT_TX', messages[:2]),
+                            ('EXP_DEVICE', 'EVENT_TX', messages[2:])]) is None
+    # requests are handled in order, so the messages are in by the reply
+    assert connection.request(('GET_EVENTS',)) == ['GET_EVENTS_RESULT', None]
+    assert hubServer.experiment.messages == messages
+
+
+def test_deviceRPCBatch(connection):
+    io = ioHubConnection.__new__(ioHubConnection)
+    io.udp_client = connection
+    getPosition = DeviceRPC(io._sendToHubServer, 'Mouse', 'getPosition')
+    getName = DeviceRPC(io._sendToHubServer, 'Mouse', 'getName')
+    assert getPosition() == [1.5, -2.0]
+    with io.batch() as batch:
+        assert batch.call(getName) == 0
+        assert batch.call(getPosition) == 1
+    assert batch.results == [u'müs', [1.5, -2.0]]
+
+
+def test_eventReceiver(connection, hubServer):
+    time_index = DeviceEvent.EVENT_HUB_TIME_INDEX
+    events = [[0] * time_index + [n * 0.001, u'key_%d' % n]
+              for n in range(100)]
+    connection.startReceiver(poll_interval=0.002)
+    assert connection.isReceiving()
+    for event in events:
+        hubServer.hub.eventBuffer.append(event)
+        time.sleep(0.0002)
+    # replies to requests are received by the thread
+    assert connection.request(devRequest('getName')) == \
+        ['DEV_RPC_RESULT', u'müs']
+    assert connection.batch([devRequest('getPosition')]) == \
+        [['DEV_RPC_RESULT', [1.5, -2.0]]]
+    deadline = time.time() + 2.0
+    while len(connection.events) < len(events) and time.time() < deadline:
+        time.sleep(0.01)
+    connection.stopReceiver()
+    assert not connection.isReceiving()
+    assert list(connection.events) == events
+    assert connection.request(('GET_EVENTS',)) == ['GET_EVENTS_RESULT', None]
+
+
+@pytest.mark.parametrize('compress_threshold', [0, 100000])
+def test_chunkedReplies(connection, hubServer, compress_threshold):
+    hubServer.chunks.compress_threshold = compress_threshold
+    samples = FakeMouse().getSamples(30000)
+    for count in (1000, 30000, 10):
+        assert connection.request(devRequest('getSamples', count)) == \
+            ['DEV_RPC_RESULT', samples[:count]]
+    replies = connection.batch([devRequest('getSamples', 20000),
+                                devRequest('getName')])
+    assert replies == [['DEV_RPC_RESULT', samples[:20000]],
+                       ['DEV_RPC_RESULT', u'müs']]
+
+
+def test_lostChunks(connection, monkeypatch):
+    sendChunks = net.ChunkSender._sendChunks
+    dropped = []
+
+    def lossySendChunks(self, sock, reply_id, flags, data, indexes, address):
+        # the 2nd and last chunks of each reply are lost the first time
+        indexes = list(indexes)
+        lost = [index for index in (1, indexes[-1])
+                if (reply_id, index) not in dropped]
+        dropped.extend((reply_id, index) for index in lost)
+        sendChunks(self, sock, reply_id, flags, data,
+                   [index for index in indexes if index not in lost], address)
+
+    monkeypatch.setattr(net.ChunkSender, '_sendChunks', lossySendChunks)
+    connection.reply_timeout = 0.2
+    samples = FakeMouse().getSamples(20000)
+    assert connection.request(devRequest('getSamples', 20000)) == \
+        ['DEV_RPC_RESULT', samples]
+    assert connection.request(devRequest('getName')) == \
+        ['DEV_RPC_RESULT', u'müs']
+    assert len(dropped) == 2
+
+    # chunks that are never received
+    connection.max_resends = 0
+    assert connection.request(devRequest('getSamples', 20000)) is None
@@ -0,0 +1,116 @@
+"""Tests for the iohub time sync offset and drift estimation, using a local
+UDP stand-in for a remote ioHub Server"""
+from __future__ import division
+
+import socket
+import threading
+import time
+
+import msgpack
+import numpy as np
+import pytest
+
+from psychopy.iohub.devices import Computer
+from psychopy.iohub.net import TimeSyncState, ioHubTimeSyncConnection
+
+
+class LoopbackTimeServer(threading.Thread):
+    """Replies to SYNC_REQ requests like an ioHub Server whose clock is
+    drift * local time + offset, delaying every slow_every'th reply (e.g. as
+    if the network was busy)."""
+
+    def __init__(self, drift=1.0, offset=0.0, slow_every=0, delay=0.005):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.drift = drift
+        self.offset = offset
+        self.slow_every = slow_every
+        self.delay = delay
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.settimeout(0.1)
+        self.address = self.sock.getsockname()
+        self._running = True
+        self._n = 0
+
+    def run(self):
+        unpacker = msgpack.Unpacker(use_list=True)
+        while self._running:
+            try:
+                data, reply_to = self.sock.recvfrom(1024)
+            except socket.timeout:
+                continue
+            unpacker.feed(data)
+            unpacker.unpack()
+            self._n += 1
+            if self.slow_every and self._n % self.slow_every == 0:
+                # the remote time is taken after the delay, so the RTT and
+                # the error of the sample are large
+                time.sleep(self.delay)
+            remote_time = self.drift * Computer.getTime() + self.offset
+            self.sock.sendto(msgpack.packb(['SYNC_REPLY', remote_time]),
+                             reply_to)
+
+    def stop(self):
+        self._running = False
+        self.join()
+        self.sock.close()
+
+
+def makeSamples(n=300, drift=1.00002, offset=12.5, seed=0):
+    """(local, remote, rtt) samples every 20ms, with a few slow ones"""
+    rng = np.random.RandomState(seed)
+    local = 1000.0 + np.arange(n) * 0.02
+    rtt = rng.uniform(0.0001, 0.0003, n)
+    error = rng.uniform(-0.5, 0.5, n) * rtt
+    slow = rng.rand(n) < 0.1
+    rtt[slow] += 0.01
+    error[slow] = rtt[slow] * rng.uniform(0.3, 0.5, slow.sum())
+    remote = drift * local + offset + error
+    return list(zip(local, remote, rtt))
+
+
+def test_fitOffsetAndDrift():
+    drift, offset = 1.00002, 12.5
+    samples = makeSamples(drift=drift, offset=offset)
+    state = TimeSyncState(window_size=200)
+    for n in range(0, len(samples), 5):
+        state.addSamples(samples[n:n + 5])
+    assert len(state.samples) == len(state.RTTs) == 200
+    assert state.getDrift() == pytest.approx(drift, abs=5e-6)
+    # the estimates are within the RTT of the good samples
+    local = samples[-1][0] + 1.0
+    assert abs(state.local2RemoteTime(local) -
+               (drift * local + offset)) < 0.0002
+    remote = drift * local + offset
+    assert state.remote2LocalTime(remote) == pytest.approx(local, abs=0.0002)
+    assert 0 < state.getAccuracy() < 0.0005
+
+    # the drift of the first, short, batches is taken as 1
+    state = TimeSyncState()
+    state.addSamples(samples[:5])
+    assert state.getDrift() == 1.0
+    assert state.getOffset() == pytest.approx(offset + 0.00002 * 1000,
+                                              abs=0.0002)
+
+
+def test_loopbackSync():
+    server = LoopbackTimeServer(drift=1.0, offset=-3.25, slow_every=7)
+    server.start()
+    connection = ioHubTimeSyncConnection(server.address)
+    try:
+        state = TimeSyncState(window_size=50, min_drift_span=60.0)
+        for _ in range(12):
+            state.addSamples(connection.syncSamples())
+        rtt, local_time, remote_time = connection.sync()
+    finally:
+        connection.close()
+        server.stop()
+    assert len(state.samples) == 50
+    assert rtt > 0
+    assert state.getDrift() == 1.0
+    # the delayed replies are left out of the fit
+    assert state.getOffset() == pytest.approx(-3.25, abs=0.002)
+    assert state.getAccuracy() < 0.002
+    assert state.local2RemoteTime(local_time) == pytest.approx(remote_time,
+                                                               abs=0.005)
@@ -222,6 +222,83 @@ class _baseTest(object):
         assert 'z' not in key_events
         assert 'z' in event.getKeys()
 
+    def test_keyList_buffer(self):
+        if self.win.winType == 'pygame':
+            pytest.skip()
+        event.clearEvents()
+        keys = ['k%i' % (i % 10) for i in range(3000)]  # fills the buffer
+        [event._onPygletKey(symbol=key, modifiers=0, emulated=True)
+         for key in keys]
+        assert len(event._keyBuffer) == len(keys)
+        # only the keys in keyList are removed, in the order pressed
+        assert event.getKeys(keyList=['k3', 'k1']) == [
+            key for key in keys if key in ('k1', 'k3')]
+        assert event.getKeys(keyList='k0') == keys[::10]
+        assert event.getKeys() == [key for key in keys
+                                   if key not in ('k0', 'k1', 'k3')]
+
+    def test_buffer_threads(self):
+        # events added by another thread while they are being collected
+        buff = event._InputEventBuffer(size=8)
+        keys = ['k%i' % (i % 3) for i in range(5000)]
+
+        def addKeys():
+            for key in keys:
+                buff.add(event.KEY_EVENT, key)
+
+        adding = threading.Thread(target=addKeys)
+        adding.start()
+        collected = []
+        while adding.is_alive():
+            collected.extend(buff.pop([event.KEY_EVENT])[1])
+        adding.join()
+        collected.extend(buff.pop([event.KEY_EVENT])[1])
+        assert collected == keys
+
+    def test_buffer_mouse_events(self):
+        # uncollected mouse events are dropped rather than growing the buffer
+        buff = event._InputEventBuffer(size=8)
+        for i in range(100):
+            buff.add(event.MOUSE_PRESS, i % 3, pos=(i, 0))
+            buff.add(event.KEY_EVENT, 'k')
+            assert buff.pop([event.KEY_EVENT])[1] == ['k']
+        assert len(buff._arrays[0]) == 8
+        positions = buff.pop([event.MOUSE_PRESS])[4]
+        assert [pos[0] for pos in positions] == list(range(96, 100))
+        # but keys never are
+        for i in range(20):
+            buff.add(event.MOUSE_WHEEL, 'wheel', pos=(0, i))
+            buff.add(event.KEY_EVENT, 'k%i' % i)
+        assert buff.pop([event.KEY_EVENT])[1] == ['k%i' % i for i in range(20)]
+        wheel = [pos[1] for pos in buff.pop([event.MOUSE_WHEEL])[4]]
+        assert 0 < len(wheel) < 20
+        assert wheel == list(range(20))[-len(wheel):]
+
+    def test_mouse_events(self):
+        if self.win.winType == 'pygame':
+            pytest.skip()
+        m = event.Mouse()
+        event.clearEvents()
+        c = core.Clock()
+        event._onPygletMousePress(1, 2, LEFT | RIGHT, 0, emulated=True)
+        event._onPygletKey(symbol='x', modifiers=0, emulated=True)
+        event._onPygletMouseWheel(1, 2, 0, 3)
+        event._onPygletMouseRelease(1, 2, LEFT, 0, emulated=True)
+        keyTime = event.getKeys(timeStamped=c)[0][1]
+        events = m.getEvents(timeStamped=c)
+        assert [e[:3] for e in events] == [('press', 0, (1, 2)),
+                                           ('press', 2, (1, 2)),
+                                           ('wheel', None, (0, 3)),
+                                           ('release', 0, (1, 2))]
+        # keys and mouse events have the same time base
+        times = [e[3] for e in events]
+        assert times == sorted(times)
+        assert times[1] <= keyTime <= times[2]
+        assert m.getEvents() == []
+        event._onPygletMouseRelease(1, 2, RIGHT, 0, emulated=True)
+        event.clearEvents('mouse')
+        assert m.getEvents() == []
+
     def test_xydist(self):
         assert event.xydist([0,0], [1,1]) == np.sqrt(2)
 
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""Regression benchmark for the time taken to import psychopy.
+
+Each import is timed in a fresh interpreter with `python -X importtime`
+(python 3.7+). The tests check that the libraries that are slow to import
+are only imported by the functions that need them, not by importing
+psychopy or its core modules.
+
+command-line usage (prints the slowest imports):
+    python psychopy/tests/test_misc/test_importtime.py ["import psychopy"]
+"""
+from __future__ import print_function
+
+import os
+import subprocess
+import sys
+import pytest
+
+import psychopy
+
+# imported when first needed rather than when psychopy is imported
+slowModules = ['scipy', 'matplotlib', 'moviepy', 'pandas', 'pkg_resources',
+               'json_tricks']
+
+statements = ['import psychopy',
+              'import psychopy.core',
+              'from psychopy import logging, clock, monitors',
+              'import psychopy.visual']
+
+needsImportTime = pytest.mark.skipif(sys.version_info < (3, 7),
+                                     reason="needs python -X importtime")
+
+
+def importTimes(statement):
+    """Run `statement` in a new python process and return a dict of
+    {moduleName: (self, cumulative)} import times (in secs) for the modules
+    it imported.
+    """
+    env = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(
+        psychopy.__file__)))
+    env['PYTHONPATH'] = os.pathsep.join(
+        [root] + [p for p in [env.get('PYTHONPATH')] if p])
+    proc = subprocess.Popen([sys.executable, '-X', 'importtime', '-c',
+                             statement], env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            universal_newlines=True)
+    _, stderr = proc.communicate()
+    if proc.returncode:
+        raise RuntimeError('{} failed:\n{}'.format(statement, stderr))
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        selfTime, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(selfTime) / 1e6, int(cumulative) / 1e6)
+    return times
+
+
+@needsImportTime
+@pytest.mark.parametrize('statement', statements)
+def test_lazyImports(statement):
+    try:
+        times = importTimes(statement)
+    except RuntimeError as err:
+        if 'psychopy.visual' in statement:  # e.g. no display
+            pytest.skip(str(err))
+        raise
+    assert 'psychopy' in times
+    assert 'psychopy.tools.versionchooser' not in times
+    imported = [name for name in slowModules if name in times]
+    assert not imported, '{} imported {}'.format(statement, imported)
+
+
+if __name__ == '__main__':
+    statement = sys.argv[1] if len(sys.argv) > 1 else 'import psychopy.visual'
+    times = importTimes(statement)
+    slowest = sorted(times.items(), key=lambda item: -item[1][0])
+    print('{}: {:.3f} s'.format(statement, max(
+        cumulative for _, cumulative in times.values())))
+    for name, (selfTime, cumulative) in slowest[:25]:
+        print('{:8.1f} ms {:8.1f} ms  {}'.format(
+            selfTime * 1000, cumulative * 1000, name))
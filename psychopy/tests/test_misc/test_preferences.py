@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""Tests for the cache of validated preferences"""
+from __future__ import print_function
+
+import os
+import pytest
+
+from psychopy.preferences import preferences
+
+
+@pytest.fixture
+def prefsDir(tmpdir, monkeypatch):
+    # user prefs in a new folder, rather than the real ones
+    monkeypatch.setenv('HOME', str(tmpdir))
+    monkeypatch.setenv('APPDATA', str(tmpdir))
+    prefs = preferences.Preferences()
+    return prefs.paths['userPrefsDir']
+
+
+def test_prefsCache(prefsDir, monkeypatch):
+    cacheFile = os.path.join(prefsDir, 'prefsCache.pickle')
+    assert os.path.isfile(cacheFile)
+
+    def noValidation(*args, **kwargs):
+        raise AssertionError('prefs were validated again')
+
+    # unchanged files, so the cached prefs are used
+    with monkeypatch.context() as m:
+        m.setattr(preferences.Preferences, 'loadUserPrefs', noValidation)
+        prefs = preferences.Preferences()
+    assert prefs.general['units'] == 'norm'
+    assert prefs.userPrefsCfg.configspec is prefs.prefsSpec
+    assert prefs.prefsSpec['general']['units'].startswith('option(')
+
+    # a changed user prefs file is validated again
+    with open(os.path.join(prefsDir, 'userPrefs.cfg'), 'w') as f:
+        f.write("[general]\nunits = pix\nwinType = notAWinType\n")
+    prefs = preferences.Preferences()
+    assert prefs.general['units'] == 'pix'
+    assert prefs.general['winType'] == 'pyglet'  # invalid, so the default
+    with monkeypatch.context() as m:
+        m.setattr(preferences.Preferences, 'loadUserPrefs', noValidation)
+        assert preferences.Preferences().general['units'] == 'pix'
+
+    # a cache that can't be read is ignored
+    with open(cacheFile, 'wb') as f:
+        f.write(b'not a pickle')
+    assert preferences.Preferences().general['units'] == 'pix'
@@ -0,0 +1,100 @@
+"""Tests for the data storage helpers of psychopy.voicekey (vk_tools)"""
+from __future__ import division
+
+import os
+import wave
+
+import numpy as np
+import pytest
+
+pytest.importorskip('pyo')  # imported by psychopy.voicekey.vk_tools
+from psychopy.voicekey.vk_tools import (FeatureBuffer, ChunkBuffer,
+                                        WavStreamWriter)
+
+
+def test_FeatureBuffer():
+    buf = FeatureBuffer(size=4, dtype=np.float64)
+    assert len(buf) == 0
+    assert len(buf.array) == 0
+    values = np.arange(10) * 0.5
+    for value in values:  # grows past the preallocated size, twice
+        buf.append(value)
+    assert len(buf) == 10
+    assert buf._buf.shape == (16,)
+    assert buf.array.dtype == np.float64
+    assert np.array_equal(buf.array, values)
+    assert np.array_equal(list(buf), values)
+    assert buf[3] == values[3]
+    assert buf[-1] == values[-1]
+    assert np.array_equal(buf[2:5], values[2:5])
+    # .array is a view of the values so far, not a copy
+    assert np.shares_memory(buf.array, buf._buf)
+
+    small = FeatureBuffer(size=0, dtype=np.int8)  # at least 1 slot
+    small.append(3)
+    small.append(4)
+    assert np.array_equal(small.array, [3, 4])
+    assert small.array.dtype == np.int8
+
+
+def test_ChunkBuffer():
+    buf = ChunkBuffer(size=2)
+    assert len(buf) == 0
+    assert buf.array.shape == (0, 0)
+    assert len(buf.samples) == 0
+
+    chunks = [np.arange(4, dtype=np.int16) + 10 * n for n in range(5)]
+    for chunk in chunks:
+        buf.append(chunk)
+    buf.append(np.array([1, 2], dtype=np.int16))  # zero-padded
+    buf.append(np.arange(6, dtype=np.int16))  # truncated
+    assert len(buf) == 7
+    assert buf.chunk_size == 4
+    assert buf.array.shape == (7, 4)
+    assert buf.array.dtype == np.int16
+    assert np.array_equal(buf[1], chunks[1])
+    assert np.array_equal(buf[-2], [1, 2, 0, 0])
+    assert np.array_equal(buf[-1], [0, 1, 2, 3])
+    assert np.array_equal(buf[1:3], chunks[1:3])
+    assert buf[::2].shape == (4, 4)
+    assert np.array_equal([chunk for chunk in buf][:5], chunks)
+    # all the samples in order, as one view
+    expected = np.concatenate(chunks + [[1, 2, 0, 0], [0, 1, 2, 3]])
+    assert np.array_equal(buf.samples, expected)
+    assert np.shares_memory(buf.samples, buf._buf)
+
+
+def readWav(fileName):
+    wav = wave.open(fileName, 'rb')
+    try:
+        params = (wav.getnchannels(), wav.getsampwidth(), wav.getframerate())
+        data = np.frombuffer(wav.readframes(wav.getnframes()), dtype='<i2')
+    finally:
+        wav.close()
+    return params, data
+
+
+def test_WavStreamWriter(tmpdir):
+    fileName = os.path.join(str(tmpdir), 'stream.wav')
+    chunks = [(np.arange(100) * (n + 1)).astype(np.int16) for n in range(20)]
+    writer = WavStreamWriter(fileName, rate=16000)
+    writer.start()
+    for chunk in chunks:
+        writer.write(chunk)
+    writer.close()
+    assert not writer.is_alive()
+    assert writer.frames == 2000
+    params, data = readWav(fileName)
+    assert params == (1, 2, 16000)
+    assert np.array_equal(data, np.concatenate(chunks))
+
+    # closing a writer that was never started still writes the file
+    writer = WavStreamWriter(fileName, rate=8000)
+    writer.write(chunks[0])
+    writer.close()
+    params, data = readWav(fileName)
+    assert params == (1, 2, 8000)
+    assert np.array_equal(data, chunks[0])
+
+    with pytest.raises(IOError):
+        WavStreamWriter(os.path.join(str(tmpdir), 'no', 'such', 'dir.wav'))
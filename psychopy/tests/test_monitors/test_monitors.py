@@ -94,5 +94,57 @@ def test_lineariseLums_method_1():
     assert np.allclose(r, desired_lums)
 
 
+@pytest.mark.monitors
+@pytest.mark.parametrize('method', [1, 2, 3, 4])
+def test_linearizeLums_lut(method):
+    m = Monitor(name='foo')
+    m.setLineariseMethod(method)
+    grid = np.array([[0, 80, 2.2, 0, 0, 0],
+                     [5, 30, 2.1, 0, 0.3, 1],
+                     [5, 50, 2.4, 0, 0.2, 1],
+                     [5, 10, 1.9, 0, 0.4, 1]], 'd')
+    m.setGammaGrid(grid)
+    levels = np.linspace(0, 255, 8)
+    m.setLevelsPre(levels)
+    m.setLumsPre(np.array([2 + 80 * (levels / 255.0) ** g
+                           for g in [2.2, 2.1, 2.4, 1.9]]))
+    rgb = np.random.RandomState(0).uniform(0, 1, (1000, 3))
+
+    # the tables give the same result as calculating each value
+    lumsList = [rgb, np.array([[0.0] * 3, [1e-5] * 3, [1.0] * 3])]
+    if method != 4:  # needs rgb
+        lumsList.append(rgb[:, 0])
+    for lums in lumsList:
+        exact = m._linearizeLums(lums)
+        assert np.allclose(m.linearizeLums(lums), exact, atol=1e-4)
+
+    # and are recalculated when the calibration changes
+    grid[1:, 2] = 1.0
+    m.setGammaGrid(grid)
+    m.setLumsPre(np.array([2 + 80 * levels / 255.0] * 4))
+    exact = m._linearizeLums(rgb, newInterpolators=True)
+    assert np.allclose(m.linearizeLums(rgb), exact, atol=1e-4)
+
+
+@pytest.mark.monitors
+def test_calibFileCache():
+    from psychopy.monitors import calibTools
+    name = str(uuid.uuid4().hex)
+    mon = Monitor(name, width=40, distance=57)
+    try:
+        mon.save()
+        mon2 = Monitor(name)
+        assert calibTools._calibFileCache
+        # a copy of the cached calibrations, so changes aren't shared
+        mon2.setWidth(20)
+        assert Monitor(name).getWidth() == 40
+        mon2.save()
+        assert Monitor(name).getWidth() == 20
+    finally:
+        for f in glob.glob(os.path.join(calibTools.monitorFolder,
+                                        name + '.*')):
+            os.remove(f)
+
+
 if __name__ == '__main__':
     pytest.main()
@@ -48,4 +48,40 @@ class Test_PY2JS_Compile(object):
         for idx, expr in enumerate(input):
             # check whether direct match or at least a match when spaces removed
             assert (py2js.expression2js(expr) == output[idx] or
-            py2js.expression2js(expr).replace(" ", "") == output[idx].replace(" ", ""))
\ No newline at end of file
+            py2js.expression2js(expr).replace(" ", "") == output[idx].replace(" ", ""))
+
+    def test_Py2js_Cache(self):
+        """Repeated translations come from the cache, unless namesJS changes"""
+        py2js.clearCache()
+        assert py2js.expression2js('sin(t)') == 'Math.sin(t)'
+        assert py2js.expression2js('sin(t)') == 'Math.sin(t)'
+        assert py2js.cacheStats == {'hits': 1, 'misses': 1}
+
+        py2js.namesJS['sin'] = 'mySin'
+        try:
+            assert py2js.expression2js('sin(t)') == 'mySin(t)'
+        finally:
+            py2js.namesJS['sin'] = 'Math.sin'
+        assert py2js.expression2js('sin(t)') == 'Math.sin(t)'
+
+        # whichever method changes namesJS
+        saved = dict(py2js.namesJS)
+        try:
+            py2js.namesJS.update(sin='mySin')
+            assert py2js.expression2js('sin(t)') == 'mySin(t)'
+            py2js.namesJS.pop('sin')
+            assert py2js.expression2js('sin(t)') == 'sin(t)'
+            py2js.namesJS.setdefault('sin', 'otherSin')
+            assert py2js.expression2js('sin(t)') == 'otherSin(t)'
+            py2js.namesJS.clear()
+            assert py2js.expression2js('sin(t)') == 'sin(t)'
+        finally:
+            py2js.namesJS.update(saved)
+        assert py2js.expression2js('sin(t)') == 'Math.sin(t)'
+
+    def test_Py2js_Expressions2js(self):
+        """Translate a batch of expressions, skipping the invalid ones"""
+        translated = py2js.expressions2js(['(3, 4)', 'pi', '(3, 4)', 'a b'])
+        assert list(translated.keys()) == ['(3, 4)', 'pi']
+        assert translated['pi'] == 'Math.PI'
+        assert translated['(3, 4)'].replace(" ", "") == '[3,4]'
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""Tests for psychopy.tools.frametimingtools"""
+from __future__ import division
+
+import json
+import os
+import time
+
+import numpy as np
+import pytest
+
+from psychopy import logging
+from psychopy.tools.attributetools import attributeSetter
+from psychopy.tools.frametimingtools import FrameTimer, StimProfiler
+
+
+class FakeClock(object):
+    """A clock that returns the times it is given"""
+    def __init__(self):
+        self.t = 0.0
+
+    def getTime(self):
+        return self.t
+
+
+class Stim(object):
+    def __init__(self, name):
+        self.name = name
+
+
+def recordFrames(timer, clock, nFrames, drawTime=0.002):
+    """Probes as Window.flip does, with a frame every 1/60 s"""
+    stims = [Stim('grating'), Stim('text')]
+    for frameN in range(nFrames):
+        clock.t = frameN / 60.0
+        for stim in stims:
+            timer.probeDraw(stim)
+            clock.t += drawTime
+        timer.probe('startOfFlip')
+        clock.t += 0.0001
+        timer.probe('swapBuffers')
+        # every 10th swap takes longer
+        clock.t += 0.008 if frameN % 10 == 9 else 0.004
+        timer.probe('betweenFlips')
+        timer.endFrame()
+
+
+def test_durations():
+    clock = FakeClock()
+    timer = FrameTimer(bufferSize=1000, clock=clock)
+    recordFrames(timer, clock, 100)
+    assert timer.nProbes == 500
+    assert timer.frameN == 100
+    assert timer.phases == ['draw: grating', 'draw: text', 'startOfFlip',
+                            'swapBuffers', 'betweenFlips']
+
+    durations = timer.durations()
+    assert list(durations) == timer.phases
+    assert durations['draw: text'] == pytest.approx([0.002] * 100)
+    swaps = timer.durations('swapBuffers')
+    assert swaps[::10] == pytest.approx([0.004] * 10)
+    assert swaps[9::10] == pytest.approx([0.008] * 10)
+    # the last frame has no next one
+    assert len(durations['betweenFlips']) == 99
+    assert durations['betweenFlips'] + 0.0041 + swaps[:-1] == \
+        pytest.approx([1 / 60.0] * 99)
+    assert len(timer.durations('notAPhase')) == 0
+
+    percentiles = timer.percentiles(q=(50, 100))
+    assert percentiles['swapBuffers'] == pytest.approx([0.004, 0.008])
+    counts, edges = timer.histogram('swapBuffers', bins=2,
+                                    range=(0.003, 0.009))
+    assert list(counts) == [90, 10]
+    summary = timer.summary().splitlines()
+    assert len(summary) == 6
+    assert summary[4].split() == ['swapBuffers', '100', '4.000', '8.000',
+                                  '8.000']
+
+
+def test_ringBuffer():
+    clock = FakeClock()
+    timer = FrameTimer(bufferSize=52, clock=clock)
+    recordFrames(timer, clock, 100)
+    # only the last 52 probes are kept
+    times, codes, frameNs = timer._recorded()
+    assert len(times) == 52
+    assert (np.diff(times) > 0).all()
+    assert frameNs[-1] == 99
+    assert timer.phases[codes[-1]] == 'betweenFlips'
+    assert len(timer.durations('swapBuffers')) == 11
+
+    timer.reset()
+    assert len(timer.durations()) == 0
+    recordFrames(timer, clock, 1)
+    assert list(timer.durations()) == timer.phases[:-1]
+
+
+def test_chromeTrace(tmpdir):
+    clock = FakeClock()
+    timer = FrameTimer(clock=clock)
+    recordFrames(timer, clock, 3)
+    fileName = os.path.join(str(tmpdir), 'trace.json')
+    timer.saveChromeTrace(fileName)
+    with open(fileName) as f:
+        trace = json.load(f)
+    events = trace['traceEvents']
+    assert len(events) == 14
+    assert events[0]['name'] == 'draw: grating'
+    assert events[0]['cat'] == 'draw'
+    assert events[2]['cat'] == 'flip'
+    assert events[3]['ts'] == pytest.approx(4100)
+    assert events[3]['dur'] == pytest.approx(4000)
+    assert [event['args']['frame'] for event in events[4::5]] == [0, 1]
+
+
+class FakeWin(object):
+    monitorFramePeriod = 0.02
+
+
+class ProfiledStim(object):
+    """A stimulus whose draws and textures take the times it is given"""
+    def __init__(self, name, drawTime=0.0, inner=None):
+        self.name = name
+        self.autoLog = False
+        self.drawTime = drawTime
+        self.inner = inner
+
+    @attributeSetter
+    def tex(self, value):
+        self.__dict__['tex'] = value
+        self._createTexture(value)
+
+    def _createTexture(self, tex):
+        time.sleep(0.002)
+
+    def draw(self):
+        if self.inner is not None:
+            self.inner.draw()
+        time.sleep(self.drawTime)
+
+
+def test_stimProfiler(monkeypatch):
+    warnings = []
+    monkeypatch.setattr(logging, 'warning', warnings.append)
+    profiler = StimProfiler(FakeWin(), budget=0.5)
+    label = ProfiledStim('label', drawTime=0.001)
+    grating = ProfiledStim('grating', drawTime=0.003)
+    frame = ProfiledStim('frame', inner=label)
+    for stim in (label, grating, frame):
+        profiler.addStim(stim)
+    profiler.addStim(label)  # only once
+    grating.tex = 'sin'
+    assert grating.tex == 'sin'
+    for frameN in range(3):
+        grating.draw()
+        frame.draw()
+        if frameN == 0:
+            # the draw of label by frame is not counted twice
+            assert profiler._drawTime == pytest.approx(
+                profiler.calls[('grating', 'draw')][1] +
+                profiler.calls[('frame', 'draw')][1])
+        profiler.endFrame()
+    grating.drawTime = 0.012
+    grating.draw()
+    profiler.endFrame()
+
+    calls = profiler.calls
+    assert calls[('grating', 'draw')][0] == 4
+    assert calls[('label', 'draw')][0] == 3
+    assert calls[('grating', 'set tex')][0] == 1
+    assert calls[('grating', 'createTexture')][0] == 1
+    # times are inclusive
+    assert calls[('grating', 'set tex')][1] >= \
+        calls[('grating', 'createTexture')][1] >= 0.002
+    assert calls[('frame', 'draw')][1] >= calls[('label', 'draw')][1]
+    assert profiler.maxDrawTime >= 0.012
+    assert profiler.frameN == 4
+    assert profiler.nOverBudget == 1
+    assert len(warnings) == 1 and 'frame 4' in warnings[0]
+
+    summary = profiler.summary(n=2).splitlines()
+    assert len(summary) == 4
+    assert summary[2].split()[:3] == ['grating', 'draw', '4']
+
+    profiler.removeStim(grating)
+    grating.draw()
+    grating.tex = 'sqr'
+    assert ('grating', 'draw') in calls
+    profiler.reset()
+    grating.draw()
+    label.draw()
+    assert list(profiler.calls) == [('label', 'draw')]
@@ -27,8 +27,14 @@ class attributeSetter(object):
             self.__doc__ = doc
         else:
             self.__doc__ = func.__doc__
+        self._operation = 'set ' + func.__name__  # for a StimProfiler
 
     def __set__(self, obj, value):
+        # obj._profiler is set by tools.frametimingtools.StimProfiler
+        profiler = obj.__dict__.get('_profiler')
+        if profiler is not None:
+            return profiler.call(obj, self._operation, self._profiledSet,
+                                 obj, value)
         newValue = self.func(obj, value)
         # log=None defaults to obj.autoLog:
         logAttrib(obj, log=None, attrib=self.func.__name__,
@@ -48,6 +54,11 @@ class attributeSetter(object):
         '''
         return newValue
 
+    def _profiledSet(self, obj, value):
+        newValue = self.func(obj, value)
+        logAttrib(obj, log=None, attrib=self.func.__name__, value=value)
+        return newValue
+
     def __repr__(self):
         return repr(self.__getattribute__)
 
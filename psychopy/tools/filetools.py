@@ -18,7 +18,6 @@ import atexit
 import codecs
 import numpy as np
 import json
-import json_tricks
 
 try:
     import cPickle as pickle
@@ -51,6 +50,7 @@ def fromFile(filename):
             if hasattr(contents, 'abort'):
                 contents.abort()
     elif filename.endswith('.json'):
+        import json_tricks  # slow to import (it imports pandas)
         with open(filename, 'r') as f:
             contents = json_tricks.load(f)
 
@@ -0,0 +1,317 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Part of the PsychoPy library
+# Copyright (C) 2018 Jonathan Peirce
+# Distributed under the terms of the GNU General Public License (GPL).
+
+"""Tools for timing the phases of the frames drawn by a Window, e.g.::
+
+    from psychopy.tools.frametimingtools import FrameTimer
+    win.frameTimer = FrameTimer()
+    ...  # draw and flip frames as usual
+    print(win.frameTimer.summary())
+    win.frameTimer.saveChromeTrace('frameTiming.json')
+
+and the time spent drawing and updating each stimulus::
+
+    from psychopy.tools.frametimingtools import StimProfiler
+    win.stimProfiler = StimProfiler(win)
+    ...  # create stimuli, draw and flip frames as usual
+    win.stimProfiler.report()
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import json
+from collections import OrderedDict
+
+import numpy as np
+
+from psychopy import logging
+from psychopy.clock import getTime
+
+
+class FrameTimer(object):
+    """Records the time at probes (named points) in each frame, in a
+    preallocated ring buffer holding the last `bufferSize` probes.
+
+    The time from a probe to the next one is the duration of the phase that
+    the probe starts. When a Window has a frameTimer, `Window.flip()` starts
+    the phases:
+
+        - 'draw: <name>' for each autoDraw stimulus
+        - 'startOfFlip', 'blitFBO', 'swapBuffers', 'endOfFlip',
+          'waitBlanking' while the frame is flipped
+        - 'callOnFlip' and 'logOnFlip' for the functions and log messages
+          queued for the flip
+        - 'betweenFlips' for the time until the next flip (i.e. the
+          experiment's code and the draws it makes)
+
+    Other phases can be added with `probe()`. While `Window.frameTimer` is
+    None (the default) no probes are recorded.
+
+    :Parameters:
+
+        bufferSize : int
+            The number of probes kept (the oldest are overwritten).
+
+        clock : a Clock, or None
+            The clock for the probe times (`logging.defaultClock` if None,
+            so the times match those of log messages).
+    """
+
+    def __init__(self, bufferSize=36000, clock=None):
+        self.bufferSize = bufferSize
+        if clock is None:
+            clock = logging.defaultClock
+        self.clock = clock
+        self._getTime = clock.getTime
+        # (time, phase code, frameN) of each probe; a list, as setting its
+        # items is faster than setting those of arrays
+        self._buffer = [(0.0, 0, 0)] * bufferSize
+        self.phases = []  # names of the phases, by code
+        self._codes = {}
+        self._drawPhases = {}
+        self.nProbes = 0
+        self.frameN = 0
+
+    def probe(self, phase):
+        """Records the time now as the start of `phase` (a str)."""
+        code = self._codes.get(phase)
+        if code is None:
+            code = self._codes[phase] = len(self.phases)
+            self.phases.append(phase)
+        self._buffer[self.nProbes % self.bufferSize] = (
+            self._getTime(), code, self.frameN)
+        self.nProbes += 1
+
+    def probeDraw(self, stim):
+        """Records the time now as the start of drawing `stim`."""
+        name = getattr(stim, 'name', None)
+        phase = self._drawPhases.get(name)
+        if phase is None:
+            phase = self._drawPhases[name] = 'draw: {}'.format(name)
+        self.probe(phase)
+
+    def endFrame(self):
+        """Marks the end of a frame (called by `Window.flip()`)."""
+        self.frameN += 1
+
+    def reset(self):
+        """Discards the probes recorded so far."""
+        self.nProbes = 0
+        self.frameN = 0
+
+    def _recorded(self):
+        # the times, phase codes and frame numbers of the probes in the
+        # buffer, oldest first
+        n = min(self.nProbes, self.bufferSize)
+        start = (self.nProbes - n) % self.bufferSize
+        probes = self._buffer[start:n] + self._buffer[:start]
+        if not probes:
+            return np.zeros(0), np.zeros(0, int), np.zeros(0, int)
+        times, codes, frameNs = zip(*probes)
+        return np.array(times), np.array(codes), np.array(frameNs)
+
+    def durations(self, phase=None):
+        """Returns an array of the durations (secs) of each recorded
+        occurrence of `phase`, or if `phase` is None, an OrderedDict of
+        {phase: durations} for all the phases recorded.
+        """
+        times, codes, _ = self._recorded()
+        durations = np.diff(times)
+        codes = codes[:-1]
+        if phase is not None:
+            if phase not in self._codes:
+                return np.array([])
+            return durations[codes == self._codes[phase]]
+        allDurations = OrderedDict()
+        for code, name in enumerate(self.phases):
+            thisPhase = codes == code
+            if thisPhase.any():
+                allDurations[name] = durations[thisPhase]
+        return allDurations
+
+    def percentiles(self, q=(50, 95, 99)):
+        """Returns an OrderedDict of {phase: percentiles} of the durations
+        (secs) of each phase recorded.
+        """
+        return OrderedDict((phase, np.percentile(durations, q))
+                           for phase, durations in self.durations().items())
+
+    def histogram(self, phase, bins=20, range=None):
+        """Returns the histogram (counts, binEdges) of the durations (secs)
+        of `phase`, as from `numpy.histogram`.
+        """
+        return np.histogram(self.durations(phase), bins=bins, range=range)
+
+    def summary(self, q=(50, 95, 99)):
+        """Returns a table (str) of the number of occurrences and the
+        percentiles of the durations (ms) of each phase.
+        """
+        allDurations = self.durations()
+        width = max([len(phase) for phase in allDurations] + [5])
+        lines = ['{:<{}} {:>7} '.format('phase', width, 'n') +
+                 ' '.join('{:>8}'.format('p%g(ms)' % p) for p in q)]
+        for phase, durations in allDurations.items():
+            lines.append('{:<{}} {:>7} '.format(phase, width, len(durations)) +
+                         ' '.join('{:8.3f}'.format(value * 1000) for value
+                                  in np.percentile(durations, q)))
+        return '\n'.join(lines)
+
+    def saveChromeTrace(self, fileName):
+        """Saves the recorded phases as a JSON timeline in the Chrome trace
+        event format, for viewing in chrome://tracing or
+        https://ui.perfetto.dev
+        """
+        times, codes, frameNs = self._recorded()
+        events = []
+        for start, end, code, frameN in zip(times[:-1], times[1:],
+                                             codes[:-1], frameNs[:-1]):
+            phase = self.phases[code]
+            events.append({
+                'name': phase,
+                'cat': 'draw' if phase.startswith('draw: ') else 'flip',
+                'ph': 'X', 'pid': 0, 'tid': 0,
+                'ts': start * 1e6, 'dur': (end - start) * 1e6,
+                'args': {'frame': int(frameN)}})
+        with open(fileName, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+class StimProfiler(object):
+    """Accumulates the number of calls and the time spent in the draws,
+    texture uploads and attribute setters of each stimulus (by name), and
+    warns when the stimuli drawn in a frame take more than `budget` of the
+    frame period, e.g.::
+
+        win.stimProfiler = StimProfiler(win, budget=0.5)
+        grating = visual.GratingStim(win, name='grating')
+        ...  # draw and flip frames as usual
+        win.stimProfiler.report()  # e.g. at the end of a routine
+
+    The stimuli created on `win` while it has a stimProfiler are profiled;
+    others can be added with `addStim()`. Times are inclusive, i.e. the
+    time of a draw includes that of the setters and textures it updates.
+
+    :Parameters:
+
+        win : a Window
+            The window whose flips end the frames.
+
+        budget : float
+            The fraction of the frame period (`win.monitorFramePeriod`, or
+            1/60 s if unknown) the draws of a frame may take before a
+            warning is logged.
+    """
+    methods = ('draw', '_createTexture')  # the methods profiled
+    reportNOverBudget = 5  # stop warning after this many frames over budget
+
+    def __init__(self, win, budget=0.5):
+        self.win = win
+        self.budget = budget
+        self.reset()
+
+    def reset(self):
+        """Discards the calls profiled so far."""
+        self.calls = {}  # {(name, operation): [nCalls, secs]}
+        self.frameN = 0
+        self.nOverBudget = 0
+        self.maxDrawTime = 0.0
+        self._drawTime = 0.0  # of the current frame
+        self._drawDepth = 0
+
+    def addStim(self, stim):
+        """Profiles the methods and attribute setters of `stim`."""
+        if stim.__dict__.get('_profiler') is not None:
+            return
+        stim.__dict__['_profiler'] = self
+        for method in self.methods:
+            func = getattr(stim, method, None)
+            if func is not None:
+                stim.__dict__[method] = self._wrap(stim, method, func)
+
+    def removeStim(self, stim):
+        """Stops profiling `stim`."""
+        if stim.__dict__.get('_profiler') is self:
+            del stim.__dict__['_profiler']
+            for method in self.methods:
+                stim.__dict__.pop(method, None)
+
+    def _wrap(self, stim, method, func):
+        operation = method.lstrip('_')
+
+        def profiled(*args, **kwargs):
+            return self.call(stim, operation, func, *args, **kwargs)
+        profiled.__doc__ = func.__doc__
+        return profiled
+
+    def call(self, stim, operation, func, *args, **kwargs):
+        """Calls `func(*args, **kwargs)`, adding its time to that of
+        `operation` (a str) for `stim`.
+        """
+        isDraw = operation == 'draw'
+        if isDraw:
+            self._drawDepth += 1
+        t0 = getTime()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            secs = getTime() - t0
+            key = (stim.name, operation)
+            totals = self.calls.get(key)
+            if totals is None:
+                self.calls[key] = [1, secs]
+            else:
+                totals[0] += 1
+                totals[1] += secs
+            if isDraw:
+                self._drawDepth -= 1
+                if not self._drawDepth:  # not drawn by another stimulus
+                    self._drawTime += secs
+
+    def endFrame(self):
+        """Checks the draw time of the frame against the budget (called by
+        `Window.flip()`).
+        """
+        self.frameN += 1
+        drawTime, self._drawTime = self._drawTime, 0.0
+        self.maxDrawTime = max(self.maxDrawTime, drawTime)
+        budget = self.budget * (self.win.monitorFramePeriod or 1 / 60.0)
+        if drawTime > budget:
+            self.nOverBudget += 1
+            if self.nOverBudget < self.reportNOverBudget:
+                msg = ('Drawing stimuli took %.2fms of frame %i (budget '
+                       '%.2fms)')
+                logging.warning(msg % (drawTime * 1000, self.frameN,
+                                       budget * 1000))
+            elif self.nOverBudget == self.reportNOverBudget:
+                logging.warning("Multiple frames have been over the draw "
+                                "budget - I'll stop bothering you about "
+                                "them!")
+
+    def summary(self, n=10):
+        """Returns a table (str) of the `n` stimulus operations that took
+        the most time in total, with their number of calls and times (ms).
+        """
+        top = sorted(self.calls.items(), key=lambda item: -item[1][1])[:n]
+        width = max([len(str(name)) for (name, _), _ in top] + [8])
+        lines = ['%i frames, %i over the draw budget, max draw time %.3fms'
+                 % (self.frameN, self.nOverBudget, self.maxDrawTime * 1000),
+                 '{:<{}} {:<16} {:>7} {:>10} {:>9}'.format(
+                     'stimulus', width, 'operation', 'calls', 'total(ms)',
+                     'mean(ms)')]
+        for (name, operation), (nCalls, secs) in top:
+            lines.append('{:<{}} {:<16} {:>7} {:10.3f} {:9.3f}'.format(
+                name, width, operation, nCalls, secs * 1000,
+                secs * 1000 / nCalls))
+        return '\n'.join(lines)
+
+    def report(self, n=10, reset=True):
+        """Logs the `summary()` (at the INFO level), then by default
+        resets the profiler, e.g. for the next routine.
+        """
+        logging.info('Stimulus profile:\n' + self.summary(n))
+        if reset:
+            self.reset()
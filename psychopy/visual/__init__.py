@@ -21,7 +21,7 @@ from psychopy.visual.backends import gamma
 # absolute essentials (nearly all experiments will need these)
 from .basevisual import BaseVisualStim
 # non-private helpers
-from .helpers import pointInPolygon, polygonsOverlap
+from .helpers import pointInPolygon, pointsInPolygon, polygonsOverlap
 from .image import ImageStim
 from .text import TextStim
 # window, should always be loaded first
@@ -41,8 +41,8 @@ from psychopy.tools.attributetools import (attributeSetter, logAttrib,
 from psychopy.tools.colorspacetools import dkl2rgb, lms2rgb
 from psychopy.tools.monitorunittools import (cm2pix, deg2pix, pix2cm,
                                              pix2deg, convertToPix)
-from psychopy.visual.helpers import (pointInPolygon, polygonsOverlap,
-                                     setColor, findImageFile)
+from psychopy.visual.helpers import (pointInPolygon, pointsInPolygon,
+                                     polygonsOverlap, setColor, findImageFile)
 from psychopy.tools.typetools import float_uint8
 from psychopy.tools.arraytools import makeRadialMatrix
 from . import globalVars
@@ -575,6 +575,38 @@ class ContainerMixin(object):
         if units != 'pix':
             xy = convertToPix(xy, pos=(0, 0), units=units, win=self.win)
         # ourself in pixels
+        poly, bounds = self._getHitPolygon()
+
+        return pointInPolygon(xy[0], xy[1], poly=poly)
+
+    def containsPoints(self, points, units=None):
+        """Returns an array of bools, True for each of the points that is
+        inside the stimulus' border.
+
+        `points` is an array (or list) of (x,y) pairs, in the units of the
+        stimulus unless `units` is given. This is the same as calling
+        `contains` for each point, but much faster when there are many of
+        them (e.g. all the gaze samples or mouse positions since the last
+        frame): points outside the bounding box of the stimulus are rejected
+        without testing them against its vertices.
+
+        See also :meth:`~psychopy.visual.Window.hitTest`.
+        """
+        points = numpy.asarray(points, dtype=float).reshape((-1, 2))
+        if units is None:
+            units = self.units
+        if units != 'pix':
+            points = convertToPix(points, pos=(0, 0), units=units,
+                                  win=self.win)
+        poly, bounds = self._getHitPolygon()
+        return pointsInPolygon(points, poly, bounds)
+
+    def _getHitPolygon(self):
+        """The polygon (in pix) used by `contains` and `containsPoints`,
+        and its bounding box (xmin, ymin, xmax, ymax). The bounding box is
+        only recalculated when the polygon changes, i.e. after a change to
+        pos, size, ori or vertices.
+        """
         if hasattr(self, 'border'):
             poly = self._borderPix  # e.g., outline vertices
         elif hasattr(self, 'boundingBox'):
@@ -585,10 +617,19 @@ class ContainerMixin(object):
             x, y = self.posPix
             poly = numpy.array([[x+w/2, y-h/2], [x-w/2, y-h/2],
                                 [x-w/2, y+h/2], [x+w/2, y+h/2]])
+            return poly, (x-w/2, y-h/2, x+w/2, y+h/2)
         else:
             poly = self.verticesPix  # e.g., tessellated vertices
 
-        return pointInPolygon(xy[0], xy[1], poly=poly)
+        # the vertices arrays are replaced (not changed in place) when the
+        # stimulus is updated, so the bounds of the same array still hold
+        cached = self.__dict__.get('_hitPolygon')
+        if cached is None or cached[0] is not poly:
+            bounds = numpy.concatenate((numpy.min(poly, axis=0),
+                                        numpy.max(poly, axis=0)))
+            cached = (poly, bounds)
+            self.__dict__['_hitPolygon'] = cached
+        return cached
 
     def overlaps(self, polygon):
         """Returns `True` if this stimulus intersects another one.
@@ -1202,6 +1243,8 @@ class BaseVisualStim(MinimalStim, WindowMixin, LegacyVisualMixin):
         self.win = win
         self.units = units
         self._rotationMatrix = [[1., 0.], [0., 1.]]  # no rotation by default
+        if getattr(win, 'stimProfiler', None) is not None:
+            win.stimProfiler.addStim(self)
         # self.autoLog is set at end of MinimalStim.__init__
         super(BaseVisualStim, self).__init__(name=name, autoLog=autoLog)
         if self.autoLog:
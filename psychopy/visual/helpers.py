@@ -13,8 +13,8 @@ from __future__ import absolute_import, division, print_function
 from past.builtins import basestring
 from builtins import range
 import os
+import re
 import copy
-from pkg_resources import parse_version
 
 from psychopy import logging, colors
 
@@ -31,15 +31,33 @@ reportNImageResizes = 5  # stop raising warning after this
 # global _nImageResizes
 _nImageResizes = 0
 
-try:
-    import matplotlib
-    if parse_version(matplotlib.__version__) > parse_version('1.2'):
-        from matplotlib.path import Path as mplPath
-    else:
-        from matplotlib import nxutils
-    haveMatplotlib = True
-except Exception:
-    haveMatplotlib = False
+# matplotlib is slow to import, so it is only imported when a polygon
+# function first needs it (see _importMatplotlib)
+haveMatplotlib = None  # not known yet
+
+
+def _versionTuple(v):
+    """(1, 2, 3) from a version string such as '1.2.3rc1', for comparisons
+    """
+    return tuple(int(re.match(r'\d*', part).group() or 0)
+                 for part in v.split('.'))
+
+
+def _importMatplotlib():
+    """Import matplotlib if it is available; returns haveMatplotlib.
+    """
+    global haveMatplotlib, matplotlib, mplPath, nxutils
+    if haveMatplotlib is None:
+        try:
+            import matplotlib
+            if _versionTuple(matplotlib.__version__) > (1, 2):
+                from matplotlib.path import Path as mplPath
+            else:
+                from matplotlib import nxutils
+            haveMatplotlib = True
+        except Exception:
+            haveMatplotlib = False
+    return haveMatplotlib
 
 
 def pointInPolygon(x, y, poly):
@@ -62,8 +80,8 @@ def pointInPolygon(x, y, poly):
         return False
 
     # faster if have matplotlib tools:
-    if haveMatplotlib:
-        if parse_version(matplotlib.__version__) > parse_version('1.2'):
+    if _importMatplotlib():
+        if _versionTuple(matplotlib.__version__) > (1, 2):
             return mplPath(poly).contains_point([x, y])
         else:
             try:
@@ -88,6 +106,57 @@ def pointInPolygon(x, y, poly):
     return inside
 
 
+def pointsInPolygon(points, poly, bounds=None):
+    """Determine which of many points are inside a polygon; returns an array
+    of bools (True if inside).
+
+    `points` is an array of (x,y) pairs and `poly` is a list of 3 or more
+    vertices as (x,y) pairs, in the same units. `bounds` can give the
+    bounding box of the polygon (xmin, ymin, xmax, ymax) if it is known
+    already. Only the points within the bounding box are tested against the
+    polygon itself.
+
+    Same as `pointInPolygon` for each point, and as the `.containsPoints()`
+    method elsewhere.
+    """
+    points = np.asarray(points, dtype=float).reshape((-1, 2))
+    poly = np.asarray(poly, dtype=float)
+    inside = np.zeros(len(points), dtype=bool)
+    if len(poly) < 3:
+        msg = 'pointsInPolygon expects a polygon with 3 or more vertices'
+        logging.warning(msg)
+        return inside
+
+    if bounds is None:
+        bounds = np.concatenate((poly.min(axis=0), poly.max(axis=0)))
+    x, y = points[:, 0], points[:, 1]
+    candidates = np.flatnonzero((x >= bounds[0]) & (x <= bounds[2]) &
+                                (y >= bounds[1]) & (y <= bounds[3]))
+    if not len(candidates):
+        return inside
+    points = points[candidates]
+
+    if _importMatplotlib() and \
+            _versionTuple(matplotlib.__version__) > (1, 2):
+        inside[candidates] = mplPath(poly).contains_points(points)
+        return inside
+
+    # same ray casting as pointInPolygon, for all the points at once
+    x, y = points[:, 0], points[:, 1]
+    crossings = np.zeros(len(points), dtype=bool)
+    p1x, p1y = poly[-1]
+    for p2x, p2y in poly:
+        crosses = ((y > min(p1y, p2y)) & (y <= max(p1y, p2y)) &
+                   (x <= max(p1x, p2x)))
+        if p1x != p2x and p1y != p2y:
+            xints = (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
+            crosses &= (x <= xints)
+        crossings ^= crosses
+        p1x, p1y = p2x, p2y
+    inside[candidates] = crossings
+    return inside
+
+
 def polygonsOverlap(poly1, poly2):
     """Determine if two polygons intersect; can fail for very pointy polygons.
 
@@ -134,8 +203,8 @@ def polygonsOverlap(poly1, poly2):
         poly2_vert_pix = poly2
 
     # faster if have matplotlib tools:
-    if haveMatplotlib:
-        if parse_version(matplotlib.__version__) > parse_version('1.2'):
+    if _importMatplotlib():
+        if _versionTuple(matplotlib.__version__) > (1, 2):
             if any(mplPath(poly1_vert_pix).contains_points(poly2_vert_pix)):
                 return True
             return any(mplPath(poly2_vert_pix).contains_points(poly1_vert_pix))
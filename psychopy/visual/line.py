@@ -84,3 +84,7 @@ class Line(ShapeStim):
 
     def contains(self, *args, **kwargs):
         return False
+
+    def containsPoints(self, points, units=None):
+        points = numpy.asarray(points, dtype=float).reshape((-1, 2))
+        return numpy.zeros(len(points), dtype=bool)
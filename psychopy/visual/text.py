@@ -14,6 +14,7 @@ from builtins import str
 import os
 import glob
 import warnings
+from collections import OrderedDict
 
 # Ensure setting pyglet.options['debug_gl'] to False is done prior to any
 # other calls to pyglet or pyglet submodules, otherwise it may not get picked
@@ -73,6 +74,66 @@ defaultWrapWidth = {'cm': 15.0,
                     'pixels': 500}
 
 
+class TextLayoutCache(object):
+    """A least-recently-used cache of the pyglet text layouts of TextStims,
+    so that texts that recur (e.g. the words of a Stroop, lexical decision or
+    RSVP task) are laid out only once.
+
+    Layouts are keyed on the text, the font (which includes its size, bold
+    and italic), the alignment and the wrap width. They are laid out white
+    and given their color and opacity when drawn (see `_setLayoutColor`), so
+    stimuli that differ only in those share them. Set `maxSize` to 0 to
+    disable the cache.
+    """
+
+    def __init__(self, maxSize=1000):
+        self.maxSize = maxSize
+        self._layouts = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._layouts)
+
+    def get(self, font, text, alignHoriz, alignVert, wrapWidthPix):
+        """Returns the pyglet.font.Text of `text`, from the cache if it has
+        been laid out already.
+        """
+        key = (font, text, alignHoriz, alignVert, wrapWidthPix)
+        layout = self._layouts.pop(key, None)  # to reinsert it as the newest
+        if layout is None:
+            self.misses += 1
+            layout = pyglet.font.Text(font, text,
+                                      halign=alignHoriz, valign=alignVert,
+                                      width=wrapWidthPix)  # width of the frame
+        else:
+            self.hits += 1
+        self._layouts[key] = layout
+        while len(self._layouts) > self.maxSize:
+            self._layouts.popitem(last=False)  # the least recently used
+        return layout
+
+    def clear(self):
+        """Removes all the layouts from the cache."""
+        self._layouts.clear()
+
+# the layouts shared by all TextStims
+textLayoutCache = TextLayoutCache()
+
+
+def _setLayoutColor(layout, color):
+    """Sets the (r, g, b, a) `color` (0 to 1) of a pyglet.font.Text by
+    rewriting the colors of its vertices. Setting `layout.color` instead
+    would lay the whole text out again.
+    """
+    rgba = tuple(int(c * 255) for c in color)  # as pyglet.font.Text does
+    if getattr(layout, '_psychopyColor', None) == rgba:
+        return  # as for the last stim that drew this (shared) layout
+    for vertexList in layout._layout._vertex_lists:
+        vertexList.colors[:] = rgba * (len(vertexList.colors) // 4)
+    layout._psychopyColor = rgba
+
+
 class TextStim(BaseVisualStim, ColorMixin, ContainerMixin):
     """Class of text stimuli to be displayed in a
     :class:`~psychopy.visual.Window`
@@ -324,22 +385,7 @@ class TextStim(BaseVisualStim, ColorMixin, ContainerMixin):
         if text == self.text: # only update for a change
             return
         if text is not None:
-            text = str(text)  # make sure we have unicode object to render
-
-            # deal with some international text issues. Only relevant for Python:
-            # online experiments use web technologies and handle this seamlessly.
-            style = self.languageStyle.lower()  # be flexible with case
-            if style == 'arabic' and haveArabic:
-                # reshape Arabic characters from their isolated form so that
-                # they flow and join correctly to their neighbours:
-                text = arabic_reshaper.reshape(text)
-            if style == 'rtl' or style == 'arabic' and haveArabic:
-                # deal with right-to-left text presentation by applying the
-                # bidirectional algorithm:
-                text = bidi_algorithm.get_display(text)
-            # no action needed for default 'ltr' (left-to-right) option
-
-            self.__dict__['text'] = text
+            self.__dict__['text'] = self._processText(text)
 
         if self.useShaders:
             self._setTextShaders(text)
@@ -353,15 +399,64 @@ class TextStim(BaseVisualStim, ColorMixin, ContainerMixin):
         """
         setAttribute(self, 'text', text, log)
 
+    def _processText(self, text):
+        """Returns `text` as the unicode to render, in its language style
+        """
+        text = str(text)  # make sure we have unicode object to render
+
+        # deal with some international text issues. Only relevant for Python:
+        # online experiments use web technologies and handle this seamlessly.
+        style = self.languageStyle.lower()  # be flexible with case
+        if style == 'arabic' and haveArabic:
+            # reshape Arabic characters from their isolated form so that
+            # they flow and join correctly to their neighbours:
+            text = arabic_reshaper.reshape(text)
+        if style == 'rtl' or style == 'arabic' and haveArabic:
+            # deal with right-to-left text presentation by applying the
+            # bidirectional algorithm:
+            text = bidi_algorithm.get_display(text)
+        # no action needed for default 'ltr' (left-to-right) option
+        return text
+
+    def preloadText(self, texts):
+        """Lays out each of `texts` (e.g. the words of an RSVP stream)
+        with the current font, height, wrapWidth and alignment, so that
+        setting the text to any of them later needs no layout.
+
+        The layouts are kept in `visual.text.textLayoutCache`, which holds
+        the `maxSize` most recently used. Only applies to pyglet and glfw
+        windows.
+        """
+        if self.win.winType not in ["pyglet", "glfw"]:
+            return
+        texts = [self._processText(text) for text in texts]
+        if len(texts) > textLayoutCache.maxSize:
+            msg = ("Preloading %i texts but textLayoutCache.maxSize is %i, "
+                   "so only the last %i will be kept")
+            logging.warning(msg % (len(texts), textLayoutCache.maxSize,
+                                   textLayoutCache.maxSize))
+        for text in texts:
+            textLayoutCache.get(self._font, text,
+                                self.alignHoriz, self.alignVert,
+                                self._wrapWidthPix)
+
+    def _layoutColor(self):
+        """The color to draw the pyglet text layout with (white but for the
+        opacity when the color is applied by the shader)
+        """
+        if self.useShaders:
+            return (1.0, 1.0, 1.0, self.opacity)
+        desiredRGB = self._getDesiredRGB(self.rgb, self.colorSpace,
+                                         self.contrast)
+        return (desiredRGB[0], desiredRGB[1], desiredRGB[2], self.opacity)
+
     def _setTextShaders(self, value=None):
         """Set the text to be rendered using the current font
         """
         if self.win.winType in ["pyglet", "glfw"]:
-            self._pygletTextObj = pyglet.font.Text(
-                self._font, self.text,
-                halign=self.alignHoriz, valign=self.alignVert,
-                color=(1.0, 1.0, 1.0, self.opacity),
-                width=self._wrapWidthPix)  # width of the frame
+            self._pygletTextObj = textLayoutCache.get(
+                self._font, self.text, self.alignHoriz, self.alignVert,
+                self._wrapWidthPix)
             # self._pygletTextObj = pyglet.text.Label(
             #       self.text,self.font, int(self._heightPix),
             #      anchor_x=self.alignHoriz,
@@ -460,6 +555,7 @@ class TextStim(BaseVisualStim, ColorMixin, ContainerMixin):
         if self.win.winType in ["pyglet", "glfw"]:
             GL.glActiveTexture(GL.GL_TEXTURE0)
             GL.glEnable(GL.GL_TEXTURE_2D)
+            _setLayoutColor(self._pygletTextObj, self._layoutColor())
             self._pygletTextObj.draw()
         else:
             # draw a 4 sided polygon
@@ -491,12 +587,9 @@ class TextStim(BaseVisualStim, ColorMixin, ContainerMixin):
         desiredRGB = self._getDesiredRGB(self.rgb, self.colorSpace,
                                          self.contrast)
         if self.win.winType in ["pyglet", "glfw"]:
-            self._pygletTextObj = pyglet.font.Text(
-                self._font, self.text,
-                halign=self.alignHoriz, valign=self.alignVert,
-                color=(desiredRGB[0], desiredRGB[1], desiredRGB[2],
-                       self.opacity),
-                width=self._wrapWidthPix)  # width of the frame
+            self._pygletTextObj = textLayoutCache.get(
+                self._font, self.text, self.alignHoriz, self.alignVert,
+                self._wrapWidthPix)
 
             self.width = self._pygletTextObj.width
             self._fontHeightPix = self._pygletTextObj.height
@@ -579,6 +672,7 @@ class TextStim(BaseVisualStim, ColorMixin, ContainerMixin):
             GL.glBindTexture(GL.GL_TEXTURE_2D, 0)
 
         if self.win.winType in ["pyglet", "glfw"]:
+            _setLayoutColor(self._pygletTextObj, self._layoutColor())
             self._pygletTextObj.draw()
         else:
             # draw a 4 sided polygon
@@ -805,6 +899,7 @@ class TextStim(BaseVisualStim, ColorMixin, ContainerMixin):
             GL.glEnable(GL.GL_TEXTURE_2D)
             # then allow pyglet to bind and use texture during drawing
 
+            _setLayoutColor(self._pygletTextObj, self._layoutColor())
             self._pygletTextObj.draw()
             GL.glDisable(GL.GL_TEXTURE_2D)
         else:
@@ -452,6 +452,10 @@ class Window(object):
         self.recordFrameIntervalsJustTurnedOn = False
         self.nDroppedFrames = 0
         self.frameIntervals = []
+        # a tools.frametimingtools.FrameTimer to time the phases of each flip
+        self.frameTimer = None
+        # a tools.frametimingtools.StimProfiler for the stimuli created on it
+        self.stimProfiler = None
 
         self._toDraw = []
         self._toDrawDepths = []
@@ -695,13 +699,22 @@ class Window(object):
         win.flip(clearBuffer=False)  # the screen is not cleared (so represent
                                      # the previous screen)
         """
-        for thisStim in self._toDraw:
-            thisStim.draw()
+        timer = self.frameTimer
+        if timer is None:
+            for thisStim in self._toDraw:
+                thisStim.draw()
+        else:
+            for thisStim in self._toDraw:
+                timer.probeDraw(thisStim)
+                thisStim.draw()
+            timer.probe('startOfFlip')
 
         flipThisFrame = self._startOfFlip()
         self.resetEyeTransform(False)  # reset transformations
         if self.useFBO:
             if flipThisFrame:
+                if timer is not None:
+                    timer.probe('blitFBO')
                 self._prepareFBOrender()
                 # need blit the framebuffer object to the actual back buffer
 
@@ -730,6 +743,8 @@ class Window(object):
         # call this before flip() whether FBO was used or not
         self._afterFBOrender()
 
+        if timer is not None:
+            timer.probe('swapBuffers')
         self.backend.swapBuffers(flipThisFrame)
 
         if self.useFBO:
@@ -774,10 +789,14 @@ class Window(object):
             GL.glRotatef(flip * self.viewOri, 0.0, 0.0, -1.0)
 
         # reset returned buffer for next frame
+        if timer is not None:
+            timer.probe('endOfFlip')
         self._endOfFlip(clearBuffer)
 
         # waitBlanking
         if self.waitBlanking and flipThisFrame:
+            if timer is not None:
+                timer.probe('waitBlanking')
             GL.glBegin(GL.GL_POINTS)
             GL.glColor4f(0, 0, 0, 0)
             if sys.platform == 'win32' and self.glVendor.startswith('ati'):
@@ -792,11 +811,15 @@ class Window(object):
         now = logging.defaultClock.getTime()
 
         # run other functions immediately after flip completes
+        if timer is not None:
+            timer.probe('callOnFlip')
         for callEntry in self._toCall:
             callEntry['function'](*callEntry['args'], **callEntry['kwargs'])
         del self._toCall[:]
 
         # do bookkeeping
+        if timer is not None:
+            timer.probe('logOnFlip')
         if self.recordFrameIntervals:
             self.frames += 1
             deltaT = now - self.lastFrameT
@@ -828,6 +851,12 @@ class Window(object):
         # keep the system awake (prevent screen-saver or sleep)
         platform_specific.sendStayAwake()
 
+        if timer is not None:
+            timer.probe('betweenFlips')
+            timer.endFrame()
+        if self.stimProfiler is not None:
+            self.stimProfiler.endFrame()
+
         #    If self.waitBlanking is True, then return the time that
         # GL.glFinish() returned, set as the 'now' variable. Otherwise
         # return None as before
@@ -1695,6 +1724,30 @@ class Window(object):
         but use this method if you need to suppress the log message."""
         setAttribute(self, 'mouseVisible', visibility, log)
 
+    def hitTest(self, points, stims, units=None):
+        """Test which of several stimuli contain each of many points.
+
+        Returns an array of bools with a row for each stimulus in `stims`
+        and a column for each of the `points`, which is True where the point
+        is inside the stimulus (as for the stimulus' `containsPoints()`
+        method). `points` is an array (or list) of (x,y) pairs in the units
+        of the window, unless `units` is given.
+
+        Usage::
+
+            # which stimuli were looked at during the last frame
+            looked = win.hitTest(gazeSamples, [stim1, stim2]).any(axis=1)
+        """
+        points = numpy.asarray(points, dtype=float).reshape((-1, 2))
+        if units is None:
+            units = self.units
+        if units != 'pix':
+            points = convertToPix(points, pos=(0, 0), units=units, win=self)
+        hits = numpy.zeros((len(stims), len(points)), dtype=bool)
+        for i, stim in enumerate(stims):
+            hits[i] = stim.containsPoints(points, units='pix')
+        return hits
+
     def setMouseType(self, name='arrow'):
         """Change the appearance of the cursor for this window. Cursor types
         provide contextual hints about how to interact with on-screen objects.
@@ -13,7 +13,6 @@ method. See SimpleThresholdVoiceKey or OnsetVoiceKey for examples.
 
 from __future__ import absolute_import, division, print_function
 
-from builtins import range
 from builtins import object
 __version__ = 0.5
 
@@ -105,6 +104,11 @@ class _BaseVoiceKey(object):
                     bandpass; try False if 32-bit python can't keep up
 
                 'zero_crossings': True
+
+                'stream_to': ''; name of a .wav file to which the chunks
+                    of microphone input are written, by a background thread,
+                    while recording (so that data reach the disk during
+                    capture); '' = no streaming
         """
         if not (pyo_server and pyo_server.getIsBooted() and
                 pyo_server.getIsStarted()):
@@ -139,7 +143,8 @@ class _BaseVoiceKey(object):
                        'threshold': 10,
                        'baseline': 0,
                        'more_processing': True,
-                       'zero_crossings': True}
+                       'zero_crossings': True,
+                       'stream_to': ''}
         self.config.update(config)
         self.baseline = self.config['baseline']
         self.bad_baseline = False
@@ -196,19 +201,24 @@ class _BaseVoiceKey(object):
 
         self.filename = self.file_out or 'rec.wav'
         self.filesize = None
+        self._stream = None
+
+        # preallocate for the ideal number of chunks; slippage means fewer
+        # are actually used, and the buffers grow if needed:
+        size = self.chunks + 1
 
         # timing data for diagnostics
         self.elapsed = 0
-        self.t_enter = []  # time at chunk entry
-        self.t_exit = []  # time at chunk exit
+        self.t_enter = FeatureBuffer(size, np.float64)  # time at chunk entry
+        self.t_exit = FeatureBuffer(size, np.float64)  # time at chunk exit
         self.t_proc = []  # proportion of chunk-time spent doing _do_chunk
 
         # data cache:
-        self.data = []  # raw unprocessed data, in chunks
-        self.power = []
-        self.power_bp = []
-        self.power_above = []
-        self.zcross = []
+        self.data = ChunkBuffer(size)  # raw unprocessed int16 data, by chunk
+        self.power = FeatureBuffer(size)
+        self.power_bp = FeatureBuffer(size)
+        self.power_above = FeatureBuffer(size, np.int8)
+        self.zcross = FeatureBuffer(size)
         self.max_bp = 0
         self.max_bp_chunk = None
         bandpass_pre_cache(rate=self.rate)  # for faster bandpass filtering
@@ -345,6 +355,8 @@ class _BaseVoiceKey(object):
         chunk = np.asarray(self._chunktable.getTable())
         chunk = np.int16(chunk * 2 ** 15)
         self.data.append(chunk)
+        if self._stream:
+            self._stream.write(chunk)
 
         # Calc basic stats, then use to detect features
         self._process(chunk)
@@ -391,6 +403,11 @@ class _BaseVoiceKey(object):
         if self.file_in and not silent:
             self._source.out()
 
+        if self.config['stream_to'] and not self.file_in:
+            self._stream = WavStreamWriter(self.config['stream_to'],
+                                           rate=self.rate)
+            self._stream.start()
+
         # start calling self._do_chunk by flipping its trigger;
         # _do_chunk then triggers itself via _chunktrigger until done:
         self._chunktrig.play()
@@ -408,7 +425,7 @@ class _BaseVoiceKey(object):
         samples contributing to chunk stats.
         """
         if len(self.t_enter) > 1:
-            diffs = np.array(self.t_enter[1:]) - np.array(self.t_enter[:-1])
+            diffs = np.diff(self.t_enter.array)
             ratio = np.mean(diffs) * 1000. / self.msPerChunk
         else:
             ratio = 0
@@ -436,13 +453,16 @@ class _BaseVoiceKey(object):
         self._chunktrig.stop()
         self._wholetrig.stop()
 
+        if self._stream:
+            self._stream.close()
+
         if self.config['autosave']:
             self.save()
 
         # Calc the proportion of the available time spent doing _do_chunk:
-        for ch in range(len(self.t_exit)):
-            t_diff = self.t_exit[ch] - self.t_enter[ch]
-            self.t_proc.append(t_diff * 1000 / self.msPerChunk)
+        t_exit = self.t_exit.array
+        t_diff = t_exit - self.t_enter.array[:len(t_exit)]
+        self.t_proc = t_diff * 1000 / self.msPerChunk
 
     def join(self, sec=None):
         """Sleep for `sec` or until end-of-input, and then call stop().
@@ -532,7 +552,7 @@ class OnsetVoiceKey(_BaseVoiceKey):
             return
         window = 5  # recent hold duration window, in chunks
         threshold = 10 * self.baseline
-        conditions = all([x > threshold for x in self.power_bp[-window:]])
+        conditions = np.all(self.power_bp[-window:] > threshold)
         if conditions:
             self.event_lag = window * self.msPerChunk / 1000.
             self.event_onset = self.elapsed - self.event_lag
@@ -573,7 +593,7 @@ class OffsetVoiceKey(_BaseVoiceKey):
         if not self.event_onset:
             window = 5  # chunks
             threshold = 10 * self.baseline
-            conditions = all([x > threshold for x in self.power_bp[-window:]])
+            conditions = np.all(self.power_bp[-window:] > threshold)
             if conditions:
                 self.event_lag = window * self.msPerChunk / 1000.
                 self.event_onset = self.elapsed - self.event_lag
@@ -581,9 +601,7 @@ class OffsetVoiceKey(_BaseVoiceKey):
         elif not self.event_offset:
             window = 25
             threshold = 10 * self.baseline
-            # segment = np.array(self.power_bp[-window:])
-            conditions = all([x < threshold for x in self.power_bp[-window:]])
-            # conditions = np.all(segment < threshold)
+            conditions = np.all(self.power_bp[-window:] < threshold)
             if conditions:
                 self.event_lag = window * self.msPerChunk / 1000.
                 self.event_offset = self.elapsed - self.event_lag
@@ -9,12 +9,18 @@ from __future__ import absolute_import, division, print_function
 import os
 import sys
 import time
+import wave
+import threading
 import numpy as np
 from scipy.signal import butter, lfilter
 try:
     import pyo64 as pyo
 except Exception:
     import pyo
+try:
+    import Queue
+except Exception:
+    import queue as Queue
 
 
 class PyoFormatException(Exception):
@@ -156,6 +162,162 @@ def apodize(data, ms=5, rate=44100):
     return data
 
 
+# --- data storage helpers ------------------------------------------------
+
+class FeatureBuffer(object):
+    """Growable, preallocated 1D array with a list-like interface.
+
+    Supports `append()`, `len()`, iteration, and indexing / slicing (which
+    return numpy values or views). Storage doubles when full, so appending is
+    amortized O(1) and the data are always contiguous: `.array` gives a view
+    of the values stored so far, without copying.
+    """
+
+    def __init__(self, size=64, dtype=np.float32):
+        self._buf = np.zeros(max(int(size), 1), dtype=dtype)
+        self._len = 0
+
+    def _grow(self):
+        buf = np.zeros(2 * len(self._buf), dtype=self._buf.dtype)
+        buf[:self._len] = self._buf[:self._len]
+        self._buf = buf
+
+    def append(self, value):
+        if self._len == len(self._buf):
+            self._grow()
+        self._buf[self._len] = value
+        self._len += 1
+
+    @property
+    def array(self):
+        """View (not a copy) of the values appended so far.
+        """
+        return self._buf[:self._len]
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        return iter(self.array)
+
+    def __getitem__(self, index):
+        return self.array[index]
+
+    def __repr__(self):
+        return '<{0} len={1} dtype={2}>'.format(
+            self.__class__.__name__, self._len, self._buf.dtype)
+
+
+class ChunkBuffer(FeatureBuffer):
+    """Growable, preallocated 2D buffer of fixed-length chunks of samples.
+
+    Indexing and iteration work per chunk (as for a list of chunks), while
+    `.samples` gives the whole recording as a single contiguous 1D view.
+    The chunk length is taken from the first chunk appended; shorter chunks
+    are zero-padded and longer ones truncated.
+    """
+
+    def __init__(self, size=64, dtype=np.int16):
+        self._size = max(int(size), 1)
+        self._dtype = dtype
+        self._buf = None
+        self._len = 0
+        self.chunk_size = 0
+
+    def _grow(self):
+        shape = (2 * len(self._buf), self.chunk_size)
+        buf = np.zeros(shape, dtype=self._buf.dtype)
+        buf[:self._len] = self._buf[:self._len]
+        self._buf = buf
+
+    def append(self, chunk):
+        if self._buf is None:
+            self.chunk_size = max(len(chunk), 1)
+            shape = (self._size, self.chunk_size)
+            self._buf = np.zeros(shape, dtype=self._dtype)
+        elif self._len == len(self._buf):
+            self._grow()
+        n = min(len(chunk), self.chunk_size)
+        row = self._buf[self._len]
+        row[:n] = chunk[:n]
+        row[n:] = 0
+        self._len += 1
+
+    @property
+    def array(self):
+        if self._buf is None:
+            return np.zeros((0, 0), dtype=self._dtype)
+        return self._buf[:self._len]
+
+    @property
+    def samples(self):
+        """All chunks as one 1D view, in order of acquisition.
+        """
+        return self.array.reshape(-1)
+
+    def __repr__(self):
+        return '<{0} len={1} chunk_size={2}>'.format(
+            self.__class__.__name__, self._len, self.chunk_size)
+
+
+class WavStreamWriter(threading.Thread):
+    """Append int16 chunks to a mono wav file from a background thread.
+
+    `write()` only queues the chunk, so it is safe to call from real-time
+    code; the thread drains the queue and writes to disk. Call `close()` to
+    flush the remaining chunks and finalize the file header.
+    """
+
+    def __init__(self, file_out, rate=44100):
+        super(WavStreamWriter, self).__init__(name='WavStreamWriter')
+        self.daemon = True
+        self.file_out = file_out
+        self.frames = 0
+        self._queue = Queue.Queue()
+        try:
+            self._wav = wave.open(file_out, 'wb')
+        except Exception:
+            msg = 'could not open `{0}`; permissions or other issue?'
+            raise IOError(msg.format(file_out))
+        self._wav.setnchannels(1)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(int(rate))
+
+    def write(self, chunk):
+        """Queue a chunk (np.array of int16 samples) for writing.
+        """
+        self._queue.put(chunk)
+
+    def run(self):
+        done = False
+        while not done:
+            # drain whatever is waiting, to write in as few calls as possible;
+            # None marks the end of the stream:
+            chunks = []
+            chunk = self._queue.get()
+            while chunk is not None:
+                chunks.append(chunk)
+                try:
+                    chunk = self._queue.get_nowait()
+                except Queue.Empty:
+                    break
+            done = chunk is None
+            if chunks:
+                data = np.concatenate(chunks).astype('<i2')
+                self._wav.writeframes(data.tobytes())
+                self.frames += len(data)
+        self._wav.close()
+
+    def close(self):
+        """Write any queued chunks, then close the file.
+        """
+        self._queue.put(None)
+        if self.ident is None:  # never started
+            self.run()
+        else:
+            self.join()
+
+
 # --- pyo helper functions ------------------------------------------------
 
 # format codes for _get_pyo_codes():